@@ -2,6 +2,7 @@
 
 import json
 import time
+import hashlib
 import uuid
 import subprocess
 import base64
@@ -10,6 +11,7 @@ import asyncio
 import os
 import logging
 import tempfile
+import sqlite3
 import re
 import yaml
 from pathlib import Path
@@ -17,9 +19,35 @@ from urllib.parse import unquote
 
 from .config import (
     QUEUE_DIR, HISTORY_DIR, SCREENSHOTS_DIR, PROJECTS_DIR, AXION_OUTBOX,
-    API_CACHE_HEADERS, RELAY_DIR, INPUT_PANEL_NAME
+    API_CACHE_HEADERS, RELAY_DIR, INPUT_PANEL_NAME,
+    VIDEO_KEYFRAME_COUNT, VIDEO_KEYFRAME_MODE, VIDEO_FRAME_FORMAT, AUDIO_STREAM_TO_MODEL,
+    STT_STREAM_MODEL, OCR_TARGET_DPI, OCR_MAX_IMAGES,
+    SQLITE_PAGE_ROWS, SQLITE_MAX_PAGE_ROWS, SQLITE_MAX_STREAM_ROWS, SQLITE_QUERY_TIMEOUT_SECONDS,
+    SQLITE_STREAM_TIMEOUT_SECONDS, HEDGE_ATTEMPT_READ_TIMEOUT_SECONDS
+)
+from .utils import atomic_write_json, etag_matches, safe_json_load
+from .providers import get_session, get_openai_client, request_timeout, provider_snapshot
+from .hedge import HedgedStream, resolve_hedge_model, hedge_snapshot
+from .whisper_models import whisper_registry
+from .transcription import resolve_backend, transcribe_file, backend_snapshot
+from .stt_stream import stt_sessions
+from .tts_cache import tts_cache
+from .tts_stream import split_sentences, synthesize_pipelined, wav_stream
+from .voice_catalog import voice_catalog, voice_catalog_snapshot
+from .piper_pool import piper_pool, piper_voice_models, PiperUnavailable
+from .pdf_render import pdf_etag, pdf_key, render_pdf, pdf_snapshot
+from .sqlite_pool import sqlite_pool, query_page, iter_rows, encode_cursor, decode_cursor
+from .ocr import ocr_images, parse_pages, render_pdf_pages, ocr_snapshot
+from .media_jobs import media_jobs, report_progress, run_subprocess, bind_job, wait_result, MediaJobCancelled
+from .chunked_transcribe import budget_workers, should_chunk
+from .transcript_cache import transcript_cache
+from .audio_extract import audio_cache, extract_wav, decode_pcm, source_pcm
+from .media_probe import probe, probe_duration, media_probe_cache
+from .youtube_cache import youtube_cache, youtube_video_id
+from .video_frames import evenly_spaced_timestamps, extract_frames_at, extract_keyframes
+from .circuit_breaker import (
+    get_breaker, breaker_snapshot, is_provider_failure, CircuitOpenError, ProviderHTTPError, ProviderAuthError
 )
-from .utils import atomic_write_json, safe_json_load
 
 logger = logging.getLogger(__name__)
 
@@ -163,16 +191,22 @@ Stay helpful and complete the task like a helpful pirate. Don't overdo it - keep
         return f"[PERSONALITY INSTRUCTION: {self.PERSONALITY_PROMPTS[personality]}]\n\nNow respond to the following with this personality:"
 
     def _extract_video_frames(self, videos: list, job_id: str) -> list:
-        """Extract frames from video files using FFmpeg.
+        """Extract the most informative frames from video files using FFmpeg.
+
+        Frames are chosen across the whole video by scene-change score with
+        near-duplicates removed (VIDEO_KEYFRAME_MODE), downscaled and encoded
+        as JPEG or WebP to keep the job payload small.
 
         Args:
             videos: List of video info dicts with 'path', 'name', 'type'
-            job_id: Job ID for naming frames
+            job_id: Job ID for logging
 
         Returns:
             List of image dicts with base64 data for Claude
         """
         extracted_images = []
+        mime = "image/webp" if VIDEO_FRAME_FORMAT == "webp" else "image/jpeg"
+        ext = "webp" if VIDEO_FRAME_FORMAT == "webp" else "jpg"
 
         for video in videos:
             video_path = video.get('path')
@@ -183,52 +217,18 @@ Stay helpful and complete the task like a helpful pirate. Don't overdo it - keep
                 continue
 
             try:
-                # Create temp directory for frames
-                frames_dir = RELAY_DIR / ".temp" / f"frames_{job_id}"
-                frames_dir.mkdir(parents=True, exist_ok=True)
-
-                # Extract frames at 1 fps (1 frame per second)
-                # This gives good coverage without overwhelming Claude
-                output_pattern = str(frames_dir / f"frame_%04d.png")
-
-                cmd = [
-                    "ffmpeg", "-y",
-                    "-i", video_path,
-                    "-vf", "fps=1",  # 1 frame per second
-                    "-q:v", "2",      # High quality
-                    output_pattern
-                ]
-
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=120
-                )
-
-                if result.returncode != 0:
-                    logger.error(f"FFmpeg error: {result.stderr}")
-                    continue
-
-                # Load extracted frames as base64 images
-                frame_files = sorted(frames_dir.glob("frame_*.png"))
-
-                # Limit to first 30 frames (30 seconds of video) to avoid overloading
-                for i, frame_file in enumerate(frame_files[:30]):
-                    with open(frame_file, "rb") as f:
-                        frame_data = base64.b64encode(f.read()).decode('utf-8')
+                keyframes = extract_keyframes(video_path, VIDEO_KEYFRAME_COUNT, VIDEO_KEYFRAME_MODE)
 
+                for i, (timestamp, image) in enumerate(keyframes):
+                    frame_data = base64.b64encode(image).decode('utf-8')
                     extracted_images.append({
-                        "data": f"data:image/png;base64,{frame_data}",
-                        "type": "image/png",
-                        "name": f"{video_name}_frame_{i+1:02d}.png"
+                        "data": f"data:{mime};base64,{frame_data}",
+                        "type": mime,
+                        "name": f"{video_name}_frame_{i+1:02d}_{timestamp:.1f}s.{ext}"
                     })
 
-                logger.info(f"Extracted {len(frame_files)} frames from {video_name}")
-
-                # Cleanup frames directory
-                import shutil
-                shutil.rmtree(frames_dir, ignore_errors=True)
+                logger.info(f"Job {job_id}: extracted {len(keyframes)} keyframes from {video_name} "
+                            f"({VIDEO_KEYFRAME_MODE})")
 
             except subprocess.TimeoutExpired:
                 logger.error(f"FFmpeg timeout processing {video_path}")
@@ -279,10 +279,31 @@ Stay helpful and complete the task like a helpful pirate. Don't overdo it - keep
                 result["current_job"] = hb_data.get("current_job")
                 result["activity"] = hb_data.get("activity")
                 result["active_sessions"] = hb_data.get("active_sessions", {})
+                result["watcher_provider_pools"] = hb_data.get("provider_pools", {})
+                result["watcher_hedging"] = hb_data.get("hedging", {})
+                result["watcher_circuit_breakers"] = hb_data.get("circuit_breakers", {})
+                result["watcher_external_runner"] = hb_data.get("external_runner")
                 result["healthy"] = result["heartbeat_ok"]
             except Exception as e:
                 result["error"] = str(e)
 
+        result["provider_pools"] = provider_snapshot()
+        result["hedging"] = hedge_snapshot()
+        result["circuit_breakers"] = breaker_snapshot()
+        result["whisper_models"] = whisper_registry().snapshot()
+        result["transcription"] = backend_snapshot()
+        result["media_jobs"] = media_jobs().snapshot()
+        result["transcript_cache"] = transcript_cache().snapshot()
+        result["media_probe_cache"] = media_probe_cache().snapshot()
+        result["audio_cache"] = audio_cache().snapshot()
+        result["youtube_cache"] = youtube_cache().snapshot()
+        result["stt_stream"] = stt_sessions().snapshot()
+        result["tts_cache"] = tts_cache().snapshot()
+        result["piper_workers"] = piper_pool().snapshot()
+        result["voice_catalogs"] = voice_catalog_snapshot()
+        result["ocr"] = ocr_snapshot()
+        result["pdf_cache"] = pdf_snapshot()
+        result["sqlite_pool"] = sqlite_pool().snapshot()
         self.send_json(result)
 
     def handle_queue_status(self, project: str = ""):
@@ -554,6 +575,12 @@ Stay helpful and complete the task like a helpful pirate. Don't overdo it - keep
             self.send_json({"error": "No job_id"}, 400)
             return
 
+        # Media jobs ({"async": true} media requests) share this status endpoint
+        media_job = media_jobs().get(job_id)
+        if media_job:
+            self.send_json(media_job.to_dict())
+            return
+
         # Clean up old cache entries periodically
         _cleanup_completed_cache()
 
@@ -3274,7 +3301,7 @@ MERGED RESULT:"""
 
     # ========== EDGE TTS ENDPOINTS ==========
 
-    def handle_tts(self, data: dict, send_binary):
+    def handle_tts(self, data: dict, send_binary, if_none_match: str = ""):
         """POST /api/tts - Convert text to speech using Edge TTS.
 
         Request: {"text": "Hello world", "voice": "en-US-GuyNeural"}
@@ -3294,20 +3321,138 @@ MERGED RESULT:"""
         try:
             import edge_tts
 
-            # Run async Edge TTS in a sync context
-            audio_data = self._run_edge_tts(text, voice)
-
-            if audio_data:
-                send_binary(audio_data, "audio/mpeg")
-            else:
+            # Run async Edge TTS in a sync context (only on a cache miss)
+            if not self._send_cached_tts("edge", voice, text, "audio/mpeg",
+                                         lambda: self._run_edge_tts(text, voice), send_binary,
+                                         if_none_match=if_none_match):
                 self.send_json({"error": "TTS generation failed"}, 500)
 
         except ImportError:
             self.send_json({"error": "edge-tts not installed. Run: pip3 install edge-tts"}, 500)
+        except CircuitOpenError as e:
+            self.send_json({"error": str(e), "retry_after": round(e.retry_after, 1)}, 503)
         except Exception as e:
             logger.error(f"TTS error: {e}")
             self.send_json({"error": str(e)}, 500)
 
+    def _cached_tts_audio(self, engine: str, voice: str, text: str, synthesize,
+                          model: str = "", **settings):
+        """(audio, etag) from the shared TTS cache, calling synthesize() only on a miss.
+
+        audio is None if synthesize() produced nothing.
+        """
+        cache = tts_cache()
+        key = cache.key(engine, voice, text, model, **settings)
+        audio = cache.get(key, engine, text)
+        if audio is None:
+            audio = synthesize()
+            if audio:
+                cache.put(key, audio)
+        return audio, cache.etag(key)
+
+    def _send_cached_tts(self, engine: str, voice: str, text: str, content_type: str, synthesize,
+                         send_binary, model: str = "", if_none_match: str = "", **settings) -> bool:
+        """Send TTS audio from the shared cache, calling synthesize() only on a miss.
+
+        The response carries an ETag. A client replaying a clip it already has
+        (if_none_match lists the ETag) gets a 304 before the cache is read, so an
+        evicted entry is not synthesized again just to be thrown away.
+        Returns False if synthesize() produced no audio.
+        """
+        cache = tts_cache()
+        etag = cache.etag(cache.key(engine, voice, text, model, **settings))
+        if etag_matches(etag, if_none_match):
+            send_binary(b"", content_type, etag=etag)  # Answered with 304
+            return True
+        audio, etag = self._cached_tts_audio(engine, voice, text, synthesize, model, **settings)
+        if not audio:
+            return False
+        send_binary(audio, content_type, etag=etag)
+        return True
+
+    def handle_tts_stream(self, data: dict, send_stream):
+        """POST /api/tts/stream - Speak text sentence by sentence while it is being synthesized.
+
+        Request: {"text": "Long response...", "engine": "edge" | "piper", "voice": "en-US-GuyNeural" | "amy"}
+        Response: audio/mpeg (edge) or audio/wav (piper), streamed as each sentence is ready
+
+        Sentences are synthesized TTS_STREAM_WORKERS ahead in parallel and each one
+        goes through the TTS cache, so playback starts after the first sentence.
+        """
+        text = data.get("text", "").strip()
+        engine = data.get("engine", "edge")
+
+        if not text:
+            self.send_json({"error": "No text provided"}, 400)
+            return
+        if len(text) > 10000:
+            text = text[:10000]
+
+        if engine == "edge":
+            try:
+                import edge_tts  # noqa: F401
+            except ImportError:
+                self.send_json({"error": "edge-tts not installed. Run: pip3 install edge-tts"}, 500)
+                return
+            voice = data.get("voice") or os.environ.get("EDGE_TTS_DEFAULT_VOICE", "en-US-GuyNeural")
+            content_type = "audio/mpeg"
+
+            def synthesize(sentence):
+                return self._run_edge_tts(sentence, voice)
+        elif engine == "piper":
+            voice = data.get("voice", "amy")
+            voice_models = piper_voice_models()
+            model_path = voice_models.get(voice)
+            if not model_path or not model_path.exists():
+                available = [k for k, v in voice_models.items() if v.exists()]
+                self.send_json({"error": f"Voice '{voice}' not available. Available: {available}"}, 400)
+                return
+            content_type = "audio/wav"
+
+            def synthesize(sentence):
+                return self._run_piper(voice, model_path, sentence)
+        else:
+            self.send_json({"error": "engine must be 'edge' or 'piper'"}, 400)
+            return
+
+        def sentence_audio(sentence):
+            audio, _ = self._cached_tts_audio(engine, voice, sentence, lambda: synthesize(sentence))
+            if not audio:
+                raise RuntimeError("TTS generation failed")
+            return audio
+
+        chunks = synthesize_pipelined(split_sentences(text), sentence_audio)
+        if engine == "piper":
+            chunks = wav_stream(chunks)
+
+        # Synthesize the first sentence before answering, so early failures are still a JSON error
+        try:
+            first = next(chunks)
+        except CircuitOpenError as e:
+            chunks.close()
+            self.send_json({"error": str(e), "retry_after": round(e.retry_after, 1)}, 503)
+            return
+        except FileNotFoundError:
+            chunks.close()
+            self.send_json({"error": "Piper not installed. Run: pip3 install piper-tts"}, 500)
+            return
+        except Exception as e:
+            chunks.close()
+            logger.error(f"Streaming TTS error: {e}")
+            self.send_json({"error": str(e)}, 500)
+            return
+
+        def stream():
+            try:
+                yield first
+                yield from chunks
+            except Exception as e:
+                logger.error(f"Streaming TTS stopped early: {e}")
+            finally:
+                chunks.close()
+
+        send_stream(stream(), content_type)
+
     def _run_edge_tts(self, text: str, voice: str) -> bytes:
         """Run Edge TTS synthesis and return audio bytes."""
         import edge_tts
@@ -3324,7 +3469,8 @@ MERGED RESULT:"""
         # Use a new event loop to avoid conflicts
         loop = asyncio.new_event_loop()
         try:
-            loop.run_until_complete(_synthesize())
+            with get_breaker("Edge TTS").guard():
+                loop.run_until_complete(_synthesize())
         finally:
             loop.close()
 
@@ -3332,40 +3478,55 @@ MERGED RESULT:"""
             return b"".join(audio_chunks)
         return None
 
-    def handle_tts_voices(self):
-        """GET /api/tts/voices - List available Edge TTS voices."""
-        try:
-            import edge_tts
+    @staticmethod
+    def _fetch_edge_voices() -> dict:
+        """English Edge TTS voices, straight from the service."""
+        import edge_tts
 
-            async def _get_voices():
-                voices = await edge_tts.list_voices()
-                return voices
+        async def _get_voices():
+            voices = await edge_tts.list_voices()
+            return voices
 
-            loop = asyncio.new_event_loop()
-            try:
+        loop = asyncio.new_event_loop()
+        try:
+            with get_breaker("Edge TTS").guard():
                 voices = loop.run_until_complete(_get_voices())
-            finally:
-                loop.close()
-
-            # Filter to English voices and simplify the data
-            english_voices = [
-                {
-                    "id": v["ShortName"],
-                    "name": v["FriendlyName"],
-                    "gender": v["Gender"],
-                    "locale": v["Locale"]
-                }
-                for v in voices
-                if v["Locale"].startswith("en-")
-            ]
+        finally:
+            loop.close()
 
-            # Sort by locale then name
-            english_voices.sort(key=lambda v: (v["locale"], v["name"]))
+        # Filter to English voices and simplify the data
+        english_voices = [
+            {
+                "id": v["ShortName"],
+                "name": v["FriendlyName"],
+                "gender": v["Gender"],
+                "locale": v["Locale"]
+            }
+            for v in voices
+            if v["Locale"].startswith("en-")
+        ]
 
-            self.send_json({"voices": english_voices})
+        # Sort by locale then name
+        english_voices.sort(key=lambda v: (v["locale"], v["name"]))
+        return {"voices": english_voices}
+
+    def _send_catalog(self, send_binary, payload: dict, etag: str):
+        """Send a cached voice catalog as JSON with its ETag (304 when the client has it)."""
+        send_binary(json.dumps(payload).encode(), "application/json", etag=etag)
+
+    def handle_tts_voices(self, send_binary):
+        """GET /api/tts/voices - List available Edge TTS voices.
+
+        Served from the voice catalog cache; a stale list is refreshed in the background.
+        """
+        try:
+            payload, etag = voice_catalog("edge").get(self._fetch_edge_voices)
+            self._send_catalog(send_binary, payload, etag)
 
         except ImportError:
             self.send_json({"error": "edge-tts not installed"}, 500)
+        except CircuitOpenError as e:
+            self.send_json({"error": str(e), "retry_after": round(e.retry_after, 1)}, 503)
         except Exception as e:
             logger.error(f"TTS voices error: {e}")
             self.send_json({"error": str(e)}, 500)
@@ -3376,55 +3537,149 @@ MERGED RESULT:"""
         """POST /api/quick-chat - Fast AI chat via NVIDIA NIM API.
 
         Bypasses the Claude CLI queue for instant conversational responses.
-        Request: {"message": "Hello", "model": "nvidia/nemotron-3-nano-30b-a3b", "personality": "neutral"}
+        Request: {"message": "Hello", "model": "nvidia/nemotron-3-nano-30b-a3b", "personality": "neutral",
+                  "hedge": false, "hedge_model": ""}
         Response: {"response": "Hi there!", "model": "nvidia/nemotron-3-nano-30b-a3b"}
+
+        With "hedge" (or RELAY_HEDGE_ENABLED), a duplicate request is raced against
+        hedge_model if no token arrives within the hedge delay; "served_by" names the winner.
         """
+        params = self._quick_chat_params(data)
+        if not params:
+            return
+
+        try:
+            tokens = self._quick_chat_tokens(data, *params)
+            result_text = "".join(tokens)
+
+            response = {
+                "response": result_text,
+                "model": params[1]
+            }
+            if tokens.hedge_fired:
+                response["served_by"] = tokens.winner
+            self.send_json(response)
+
+        except ImportError:
+            self.send_json({"error": "openai package not installed. Run: pip3 install openai"}, 500)
+        except CircuitOpenError as e:
+            self.send_json({"error": str(e), "retry_after": round(e.retry_after, 1)}, 503)
+        except Exception as e:
+            logger.error(f"Quick chat error: {e}")
+            self.send_json({"error": str(e)}, 500)
+
+    def handle_quick_chat_stream(self, data: dict, send_stream):
+        """POST /api/quick-chat/stream - Quick chat with tokens relayed as they arrive.
+
+        Request: same as /api/quick-chat, plus "format": "sse" (default) or "ndjson"
+        Response: text/event-stream (or application/x-ndjson) events:
+            {"token": "Hi"} ... one per chunk from the provider
+            {"done": true, "response": "Hi there!", "model": "...", "first_token_ms": 412.5, "total_ms": 1830.2}
+        Errors after streaming has started arrive as a final {"done": true, "error": "..."} event.
+        """
+        params = self._quick_chat_params(data)
+        if not params:
+            return
+
+        fmt = data.get("format", "sse")
+        if fmt not in ("sse", "ndjson"):
+            self.send_json({"error": "format must be 'sse' or 'ndjson'"}, 400)
+            return
+
+        try:
+            tokens = self._quick_chat_tokens(data, *params)
+        except ImportError:
+            self.send_json({"error": "openai package not installed. Run: pip3 install openai"}, 500)
+            return
+
+        def encode(event: dict) -> bytes:
+            if fmt == "sse":
+                return f"data: {json.dumps(event)}\n\n".encode()
+            return (json.dumps(event) + "\n").encode()
+
+        def events():
+            started = time.monotonic()
+            parts = []
+            try:
+                for token in tokens:
+                    parts.append(token)
+                    yield encode({"token": token})
+            except CircuitOpenError as e:
+                yield encode({"done": True, "error": str(e), "retry_after": round(e.retry_after, 1)})
+                return
+            except Exception as e:
+                logger.error(f"Quick chat stream error: {e}")
+                yield encode({"done": True, "error": str(e)})
+                return
+
+            final = {
+                "done": True,
+                "response": "".join(parts),
+                "model": params[1],
+                "first_token_ms": round(tokens.first_token_seconds * 1000, 1)
+                if tokens.first_token_seconds is not None else None,
+                "total_ms": round((time.monotonic() - started) * 1000, 1)
+            }
+            if tokens.hedge_fired:
+                final["served_by"] = tokens.winner
+            yield encode(final)
+
+        content_type = "text/event-stream" if fmt == "sse" else "application/x-ndjson"
+        send_stream(events(), content_type)
+
+    def _quick_chat_params(self, data: dict):
+        """Validate a quick chat request. Returns (message, model, personality, api_key, base_url) or None."""
         message = data.get("message", "").strip()
         model = data.get("model", os.environ.get("NVIDIA_MODEL", "nvidia/nemotron-3-nano-30b-a3b"))
         personality = data.get("personality", "neutral")
 
         if not message:
             self.send_json({"error": "No message provided"}, 400)
-            return
+            return None
 
         api_key = os.environ.get("NVIDIA_API_KEY", "")
         base_url = os.environ.get("NVIDIA_BASE_URL", "https://integrate.api.nvidia.com/v1")
 
         if not api_key:
             self.send_json({"error": "NVIDIA_API_KEY not configured in .env file"}, 500)
-            return
-
-        try:
-            import openai
-
-            client = openai.OpenAI(api_key=api_key, base_url=base_url)
-
-            # Build system prompt based on personality
-            system_prompt = self._get_personality_prompt(personality)
-
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": message})
+            return None
 
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                max_tokens=1024,
-                temperature=0.7
-            )
+        return message, model, personality, api_key, base_url
+
+    def _quick_chat_tokens(self, data: dict, message: str, model: str, personality: str,
+                           api_key: str, base_url: str) -> HedgedStream:
+        """Build the (optionally hedged) streaming completion for a quick chat request."""
+        client = get_openai_client(api_key, base_url)
+
+        # Build system prompt based on personality
+        system_prompt = self._get_personality_prompt(personality)
+
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": message})
+
+        hedge_model = resolve_hedge_model(model, data.get("hedge"), data.get("hedge_model", ""))
+        # While racing, bound the wait for headers (and between chunks): a loser stalled
+        # before its response exists can't be closed, only timed out
+        options = {"timeout": HEDGE_ATTEMPT_READ_TIMEOUT_SECONDS} if hedge_model else {}
+
+        def stream_tokens(attempt):
+            with get_breaker("NVIDIA").guard(attempt.cancelled):
+                stream = client.chat.completions.create(
+                    model=attempt.model,
+                    messages=messages,
+                    max_tokens=1024,
+                    temperature=0.7,
+                    stream=True,
+                    **options
+                )
+                attempt.on_cancel(stream.close)
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
 
-            result_text = response.choices[0].message.content
-            self.send_json({
-                "response": result_text,
-                "model": model
-            })
-
-        except ImportError:
-            self.send_json({"error": "openai package not installed. Run: pip3 install openai"}, 500)
-        except Exception as e:
-            logger.error(f"Quick chat error: {e}")
-            self.send_json({"error": str(e)}, 500)
+        return HedgedStream(stream_tokens, model, hedge_model)
 
     def _get_personality_prompt(self, personality: str) -> str:
         """Get system prompt for a personality, or return empty for neutral."""
@@ -3434,7 +3689,7 @@ MERGED RESULT:"""
 
     # ========== ELEVENLABS TTS ENDPOINTS ==========
 
-    def handle_elevenlabs_tts(self, data: dict, send_binary):
+    def handle_elevenlabs_tts(self, data: dict, send_binary, if_none_match: str = ""):
         """POST /api/elevenlabs/tts - Convert text to speech using ElevenLabs.
 
         Request: {"text": "Hello world", "voice_id": "21m00Tcm4TlvDq8ikWAM", "model": "eleven_monolingual_v1"}
@@ -3460,40 +3715,54 @@ MERGED RESULT:"""
             text = text[:5000]
 
         try:
-            import urllib.request
-            import urllib.error
-
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
-            payload = json.dumps({
-                "text": text,
-                "model_id": model_id,
-                "voice_settings": {
-                    "stability": stability,
-                    "similarity_boost": similarity_boost
-                }
-            })
-
-            req = urllib.request.Request(url, data=payload.encode("utf-8"), method="POST")
-            req.add_header("Content-Type", "application/json")
-            req.add_header("xi-api-key", api_key)
-            req.add_header("Accept", "audio/mpeg")
-
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                audio_data = resp.read()
-
-            if audio_data:
-                send_binary(audio_data, "audio/mpeg")
-            else:
+            synthesized = self._send_cached_tts(
+                "elevenlabs", voice_id, text, "audio/mpeg",
+                lambda: self._run_elevenlabs_tts(text, voice_id, model_id, stability, similarity_boost, api_key),
+                send_binary, model_id, if_none_match=if_none_match,
+                stability=stability, similarity_boost=similarity_boost
+            )
+            if not synthesized:
                 self.send_json({"error": "ElevenLabs TTS returned empty audio"}, 500)
 
-        except urllib.error.HTTPError as e:
-            error_body = e.read().decode("utf-8", errors="replace")
-            logger.error(f"ElevenLabs API error {e.code}: {error_body}")
-            self.send_json({"error": f"ElevenLabs API error ({e.code}): {error_body[:200]}"}, e.code)
+        except CircuitOpenError as e:
+            self.send_json({"error": str(e), "retry_after": round(e.retry_after, 1)}, 503)
+        except ProviderHTTPError as e:
+            logger.error(f"ElevenLabs API error {e.status_code}: {e.body}")
+            self.send_json({"error": f"ElevenLabs API error ({e.status_code}): {e.body[:200]}"}, e.status_code)
         except Exception as e:
             logger.error(f"ElevenLabs TTS error: {e}")
             self.send_json({"error": str(e)}, 500)
 
+    def _run_elevenlabs_tts(self, text: str, voice_id: str, model_id: str, stability: float,
+                            similarity_boost: float, api_key: str) -> bytes:
+        """Synthesize with the ElevenLabs API; raises ProviderHTTPError on a non-200 response."""
+        url = f"{self.ELEVENLABS_BASE_URL}/v1/text-to-speech/{voice_id}"
+        payload = {
+            "text": text,
+            "model_id": model_id,
+            "voice_settings": {
+                "stability": stability,
+                "similarity_boost": similarity_boost
+            }
+        }
+        headers = {
+            "Content-Type": "application/json",
+            "xi-api-key": api_key,
+            "Accept": "audio/mpeg"
+        }
+
+        with get_breaker("ElevenLabs").guard():
+            resp = get_session(url).post(url, json=payload, headers=headers, timeout=request_timeout(30))
+            if is_provider_failure(resp.status_code):
+                raise ProviderHTTPError("ElevenLabs", resp.status_code, resp.text)
+
+        if resp.status_code != 200:
+            # Client errors (bad voice, quota) don't count against the circuit breaker
+            raise ProviderHTTPError("ElevenLabs", resp.status_code, resp.text)
+        return resp.content
+
+    ELEVENLABS_BASE_URL = "https://api.elevenlabs.io"
+
     # Curated list of popular ElevenLabs voices (used as fallback if API key lacks voices_read permission)
     ELEVENLABS_DEFAULT_VOICES = [
         {"voice_id": "2wpiDXDz7WnzetrMJddH", "name": "TARS (Interstellar)", "category": "custom", "labels": {"accent": "american", "gender": "male"}},
@@ -3514,57 +3783,135 @@ MERGED RESULT:"""
         {"voice_id": "N2lVS1w4EtoT3dr4eOWO", "name": "Callum", "category": "premade", "labels": {"accent": "transatlantic", "gender": "male"}},
     ]
 
-    def handle_elevenlabs_voices(self):
-        """GET /api/elevenlabs/voices - List available ElevenLabs voices."""
+    def _fetch_elevenlabs_voices(self, api_key: str) -> dict:
+        """ElevenLabs voices for api_key, straight from the API."""
+        url = f"{self.ELEVENLABS_BASE_URL}/v1/voices"
+        headers = {"xi-api-key": api_key, "Accept": "application/json"}
+        with get_breaker("ElevenLabs").guard():
+            resp = get_session(url).get(url, headers=headers, timeout=request_timeout(15))
+            if is_provider_failure(resp.status_code):
+                raise ProviderHTTPError("ElevenLabs", resp.status_code, resp.text)
+
+        if resp.status_code != 200:
+            # A key lacking voices_read permission gets the curated defaults, but they must
+            # not be cached as its catalog: fixing the permission should show the real list
+            if resp.status_code == 401 or resp.status_code == 403:
+                raise ProviderAuthError("ElevenLabs", resp.status_code, resp.text)
+            raise ProviderHTTPError("ElevenLabs", resp.status_code, resp.text)
+
+        data = resp.json()
+
+        voices = []
+        for v in data.get("voices", []):
+            voices.append({
+                "voice_id": v.get("voice_id", ""),
+                "name": v.get("name", ""),
+                "category": v.get("category", ""),
+                "labels": v.get("labels", {}),
+                "preview_url": v.get("preview_url", "")
+            })
+
+        # Sort by name
+        voices.sort(key=lambda v: v["name"])
+        return {"voices": voices}
+
+    def handle_elevenlabs_voices(self, send_binary):
+        """GET /api/elevenlabs/voices - List available ElevenLabs voices.
+
+        Cached per API key; a stale list is refreshed in the background.
+        """
         api_key = os.environ.get("ELEVENLABS_API_KEY", "")
         if not api_key:
             self.send_json({"error": "ELEVENLABS_API_KEY not configured in .env file"}, 500)
             return
 
         try:
-            import urllib.request
-            import urllib.error
-
-            url = "https://api.elevenlabs.io/v1/voices"
-            req = urllib.request.Request(url)
-            req.add_header("xi-api-key", api_key)
-            req.add_header("Accept", "application/json")
-
-            with urllib.request.urlopen(req, timeout=15) as resp:
-                data = json.loads(resp.read().decode("utf-8"))
-
-            voices = []
-            for v in data.get("voices", []):
-                voices.append({
-                    "voice_id": v.get("voice_id", ""),
-                    "name": v.get("name", ""),
-                    "category": v.get("category", ""),
-                    "labels": v.get("labels", {}),
-                    "preview_url": v.get("preview_url", "")
-                })
-
-            # Sort by name
-            voices.sort(key=lambda v: v["name"])
-            self.send_json({"voices": voices})
-
-        except urllib.error.HTTPError as e:
-            error_body = e.read().decode("utf-8", errors="replace")
-            logger.warning(f"ElevenLabs voices API returned {e.code}, using default voice list")
-            # If the API key lacks voices_read permission, return curated defaults
-            if e.code == 401 or e.code == 403:
-                self.send_json({"voices": self.ELEVENLABS_DEFAULT_VOICES, "source": "defaults"})
-            else:
-                self.send_json({"error": f"ElevenLabs API error ({e.code})"}, e.code)
+            key_id = hashlib.sha256(api_key.encode()).hexdigest()[:12]  # Never write the key itself to disk
+            payload, etag = voice_catalog("elevenlabs").get(
+                lambda: self._fetch_elevenlabs_voices(api_key), variant=key_id
+            )
+            self._send_catalog(send_binary, payload, etag)
+
+        except CircuitOpenError as e:
+            self.send_json({"error": str(e), "retry_after": round(e.retry_after, 1)}, 503)
+        except ProviderAuthError as e:
+            logger.warning(f"ElevenLabs voices API returned {e.status_code}, using default voice list")
+            self.send_json({"voices": self.ELEVENLABS_DEFAULT_VOICES, "source": "defaults"})  # Uncached
+        except ProviderHTTPError as e:
+            self.send_json({"error": f"ElevenLabs API error ({e.status_code})"}, e.status_code)
         except Exception as e:
             logger.error(f"ElevenLabs voices error: {e}")
             self.send_json({"error": str(e)}, 500)
 
+    # ========== BACKGROUND MEDIA JOBS ==========
+
+    def handle_media_submit(self, kind: str, run):
+        """Queue a media request ({"async": true}) instead of running it in the request thread.
+
+        run(api, send_binary) invokes the normal handler; its response becomes the job result.
+        Response: {"job_id": "media_...", "status": "queued", "type": "video"}
+        """
+        def execute(send_json, send_error, send_binary):
+            run(APIHandler(send_json, send_error), send_binary)
+
+        job = media_jobs().submit(kind, execute)
+        self.send_json({"job_id": job.id, "status": job.status, "type": kind}, 202)
+
+    def handle_media_status(self, data: dict):
+        """POST /api/media/status - Get a media job's status, progress and result.
+
+        Request: {"job_id": "media_..."}
+        Response: {"job_id": "...", "status": "processing", "progress": 0.4, "activity": "Transcribing audio"}
+        """
+        job = media_jobs().get(data.get("job_id", ""))
+        if not job:
+            self.send_json({"error": "Media job not found"}, 404)
+            return
+        self.send_json(job.to_dict())
+
+    def handle_media_cancel(self, data: dict):
+        """POST /api/media/cancel - Cancel a queued or running media job.
+
+        Request: {"job_id": "media_..."}
+        Response: {"job_id": "...", "status": "cancelled"}
+        Running jobs stop at their next progress checkpoint or subprocess.
+        """
+        job = media_jobs().cancel(data.get("job_id", ""))
+        if not job:
+            self.send_json({"error": "Media job not found"}, 404)
+            return
+        self.send_json({"job_id": job.id, "status": job.status, "cancel_requested": True})
+
+    def handle_media_result(self, job_id: str, send_binary):
+        """GET /api/media/result/<job_id> - Download a finished job's binary result (e.g. PDF)."""
+        job = media_jobs().get(job_id)
+        if not job:
+            self.send_json({"error": "Media job not found"}, 404)
+            return
+        if job.status != "complete":
+            self.send_json({"error": f"Job is {job.status}"}, 409)
+            return
+        if not job.binary_path:
+            self.send_json(job.result)
+            return
+        if not job.binary_path.exists():
+            self.send_json({"error": "Result file no longer available"}, 410)
+            return
+        send_binary(job.binary_path.read_bytes(), job.content_type)
+
     # ========== OCR (Tesseract) ==========
 
+    @staticmethod
+    def _decode_base64(value: str) -> bytes:
+        """Bytes from base64 data or a data: URL."""
+        if "," in value:
+            value = value.split(",", 1)[1]
+        return base64.b64decode(value)
+
     def handle_ocr(self, data: dict):
         """POST /api/ocr - Extract text from an image using Tesseract OCR.
 
-        Request: {"image": "<base64-encoded image data>"}
+        Request: {"image": "<base64-encoded image data>", "lang": "eng", "preprocess": {"grayscale": true}}
         Response: {"text": "extracted text", "confidence": 85}
         """
         image_data = data.get("image", "")
@@ -3573,23 +3920,17 @@ MERGED RESULT:"""
             return
 
         try:
-            import pytesseract
-            from PIL import Image
-            import io
+            import pytesseract  # noqa: F401 - fail fast with the install hint; OCR runs in the pool
+            from PIL import Image  # noqa: F401
 
-            # Decode base64 image
-            if "," in image_data:
-                image_data = image_data.split(",", 1)[1]
-            img_bytes = base64.b64decode(image_data)
-            img = Image.open(io.BytesIO(img_bytes))
+            preprocess = data.get("preprocess") or {}
+            dpi = preprocess.get("dpi")
+            result = ocr_images([self._decode_base64(image_data)], data.get("lang", "eng"),
+                                bool(preprocess.get("grayscale")), OCR_TARGET_DPI if dpi is True else dpi)[0]
+            if "error" in result:
+                raise RuntimeError(result["error"])
 
-            # Run OCR
-            text = pytesseract.image_to_string(img)
-            ocr_data = pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
-            confidences = [int(c) for c in ocr_data.get("conf", []) if str(c).isdigit() and int(c) > 0]
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-
-            self.send_json({"text": text.strip(), "confidence": round(avg_confidence, 1)})
+            self.send_json({"text": result["text"], "confidence": result["confidence"]})
 
         except ImportError:
             self.send_json({"error": "OCR not available. Install: pip3 install pytesseract && apt install tesseract-ocr"}, 500)
@@ -3597,13 +3938,107 @@ MERGED RESULT:"""
             logger.error(f"OCR error: {e}")
             self.send_json({"error": str(e)}, 500)
 
+    def handle_ocr_batch(self, data: dict):
+        """POST /api/ocr/batch - OCR many images or PDF pages in one request.
+
+        Request: {
+            "images": ["<base64>", ...],                 # and/or
+            "pdf": "<base64 PDF>" | "pdf_path": "/path/to/file.pdf",
+            "pages": "1-3,7",                            # Optional: PDF pages (default all)
+            "lang": "eng",
+            "preprocess": {"grayscale": true, "dpi": 300}  # Optional; "dpi": true uses the default
+        }
+        Response: {
+            "results": [{"source": "page 1", "text": "...", "confidence": 91.2, "words": 120, "cached": false}, ...],
+            "text": "all pages, separated by form feeds",
+            "confidence": 90.4,
+            "count": 3,
+            "cached": 1
+        }
+        Images are spread over the OCR process pool; a page that fails gets an "error" entry.
+        """
+        images = data.get("images") or []
+        pdf_data = data.get("pdf", "")
+        pdf_path = data.get("pdf_path", "").strip()
+        if not images and not pdf_data and not pdf_path:
+            self.send_json({"error": "No images or PDF provided"}, 400)
+            return
+
+        try:
+            import pytesseract  # noqa: F401 - fail fast with the install hint; OCR runs in the pool
+            from PIL import Image  # noqa: F401
+
+            sources, blobs = [], []
+            for i, image in enumerate(images):
+                sources.append(f"image {i + 1}")
+                blobs.append(self._decode_base64(image))
+
+            if pdf_data or pdf_path:
+                pages = parse_pages(data.get("pages"))
+                report_progress(0.02, "Rendering PDF pages")
+                if pdf_data:
+                    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+                        tmp.write(self._decode_base64(pdf_data))
+                        tmp.flush()
+                        rendered = render_pdf_pages(tmp.name, pages)
+                else:
+                    if not Path(pdf_path).is_file():
+                        self.send_json({"error": f"PDF not found: {pdf_path}"}, 404)
+                        return
+                    rendered = render_pdf_pages(pdf_path, pages)
+                for number, png in rendered:
+                    sources.append(f"page {number}")
+                    blobs.append(png)
+
+            if not blobs:
+                self.send_json({"error": "No pages to OCR"}, 400)
+                return
+            if len(blobs) > OCR_MAX_IMAGES:
+                self.send_json({"error": f"Too many images ({len(blobs)}); the limit is {OCR_MAX_IMAGES}"}, 400)
+                return
+
+            preprocess = data.get("preprocess") or {}
+            dpi = preprocess.get("dpi")
+            results = ocr_images(
+                blobs, data.get("lang", "eng"), bool(preprocess.get("grayscale")),
+                OCR_TARGET_DPI if dpi is True else dpi,
+                progress=lambda done, total: report_progress(0.05 + 0.95 * done / total, f"OCR {done}/{total}")
+            )
+
+            for source, result in zip(sources, results):
+                result["source"] = source
+            ok = [r for r in results if "error" not in r]
+            words = sum(r["words"] for r in ok)
+            self.send_json({
+                "results": results,
+                "text": "\n\f\n".join(r["text"] for r in ok),
+                "confidence": round(sum(r["confidence"] * r["words"] for r in ok) / words, 1) if words else 0,
+                "count": len(results),
+                "cached": sum(1 for r in ok if r["cached"]),
+            })
+
+        except ImportError:
+            self.send_json({"error": "OCR not available. Install: pip3 install pytesseract && apt install tesseract-ocr"}, 500)
+        except ValueError as e:
+            self.send_json({"error": str(e)}, 400)
+        except FileNotFoundError:
+            self.send_json({"error": "pdftoppm not installed. Install: apt install poppler-utils"}, 500)
+        except subprocess.TimeoutExpired:
+            self.send_json({"error": "PDF rendering timed out"}, 500)
+        except Exception as e:
+            logger.error(f"OCR batch error: {e}")
+            self.send_json({"error": str(e)}, 500)
+
     # ========== PDF GENERATION ==========
 
-    def handle_pdf_generate(self, data: dict, send_binary):
+    def handle_pdf_generate(self, data: dict, send_binary, if_none_match: str = ""):
         """POST /api/pdf/generate - Generate PDF from HTML or Markdown content.
 
         Request: {"content": "<html or markdown>", "format": "html|markdown", "title": "Document Title"}
-        Response: application/pdf binary data
+        Response: application/pdf binary data (with an ETag; identical documents come from the PDF cache)
+
+        A client that already holds the document (if_none_match lists its ETag) gets a 304
+        without it being looked up or rendered.
         """
         content = data.get("content", "").strip()
         fmt = data.get("format", "html")
@@ -3613,31 +4048,14 @@ MERGED RESULT:"""
             self.send_json({"error": "No content provided"}, 400)
             return
 
-        try:
-            from weasyprint import HTML
+        etag = pdf_etag(pdf_key(content, fmt, title))
+        if etag_matches(etag, if_none_match):
+            send_binary(b"", "application/pdf", etag=etag)  # Answered with 304
+            return
 
-            if fmt == "markdown":
-                # Basic markdown to HTML conversion for PDF
-                html_content = self._markdown_to_html_for_pdf(content, title)
-            else:
-                html_content = content
-
-            # Wrap in full HTML if not already
-            if "<html" not in html_content.lower():
-                html_content = f"""<!DOCTYPE html>
-<html><head><meta charset="UTF-8"><title>{title}</title>
-<style>
-body {{ font-family: -apple-system, sans-serif; padding: 40px; line-height: 1.6; color: #333; max-width: 800px; margin: 0 auto; }}
-h1, h2, h3 {{ color: #1a1a2e; }}
-table {{ border-collapse: collapse; width: 100%; margin: 16px 0; }}
-th, td {{ border: 1px solid #ddd; padding: 8px 12px; text-align: left; }}
-th {{ background: #f5f5f5; font-weight: 600; }}
-code {{ background: #f0f0f0; padding: 2px 6px; border-radius: 3px; font-size: 0.9em; }}
-pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto; }}
-</style></head><body>{html_content}</body></html>"""
-
-            pdf_bytes = HTML(string=html_content).write_pdf()
-            send_binary(pdf_bytes, "application/pdf")
+        try:
+            path, key = render_pdf(content, fmt, title)
+            send_binary(path, "application/pdf", etag=pdf_etag(key))
 
         except ImportError:
             self.send_json({"error": "PDF generation not available. Install: pip3 install weasyprint"}, 500)
@@ -3645,20 +4063,6 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
             logger.error(f"PDF generation error: {e}")
             self.send_json({"error": str(e)}, 500)
 
-    def _markdown_to_html_for_pdf(self, md_text: str, title: str) -> str:
-        """Simple markdown to HTML for PDF generation."""
-        import re
-        html = md_text
-        html = re.sub(r'^### (.+)$', r'<h3>\1</h3>', html, flags=re.MULTILINE)
-        html = re.sub(r'^## (.+)$', r'<h2>\1</h2>', html, flags=re.MULTILINE)
-        html = re.sub(r'^# (.+)$', r'<h1>\1</h1>', html, flags=re.MULTILINE)
-        html = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', html)
-        html = re.sub(r'\*(.+?)\*', r'<em>\1</em>', html)
-        html = re.sub(r'^- (.+)$', r'<li>\1</li>', html, flags=re.MULTILINE)
-        html = re.sub(r'`([^`]+)`', r'<code>\1</code>', html)
-        html = html.replace('\n\n', '</p><p>').replace('\n', '<br>')
-        return f"<h1>{title}</h1><p>{html}</p>"
-
     # ========== VIDEO FRAME ANALYSIS ==========
 
     def handle_video_analyze(self, data: dict):
@@ -3699,42 +4103,35 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
                 self.send_json({"error": "ffmpeg not installed. Install: apt install ffmpeg"}, 500)
                 return
 
-            # Get video duration
-            probe_cmd = [ffmpeg_path, "-i", str(video_path), "-f", "null", "-"]
-            probe = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=10)
-            duration_match = None
-            import re
-            for line in probe.stderr.split('\n'):
-                m = re.search(r'Duration:\s*(\d+):(\d+):(\d+)\.(\d+)', line)
-                if m:
-                    h, mi, s, ms = m.groups()
-                    duration_match = int(h) * 3600 + int(mi) * 60 + int(s) + int(ms) / 100
-                    break
-
-            if not duration_match or duration_match <= 0:
+            # Duration and streams from the cached container probe (no decode)
+            info = probe(str(video_path), ffmpeg_path) or {}
+            duration_match = info.get("duration")
+            if not duration_match:
                 self.send_json({"error": "Could not determine video duration"}, 400)
                 return
 
-            # Extract frames at evenly-spaced intervals
-            frames = []
-            frame_timestamps = []
-            with tempfile.TemporaryDirectory() as tmpdir:
-                for i in range(num_frames):
-                    timestamp = (duration_match / (num_frames + 1)) * (i + 1)
-                    frame_timestamps.append(round(timestamp, 2))
-                    frame_path = os.path.join(tmpdir, f"frame_{i:03d}.jpg")
-                    cmd = [ffmpeg_path, "-ss", str(timestamp), "-i", str(video_path),
-                           "-vframes", "1", "-q:v", "2", frame_path, "-y"]
-                    subprocess.run(cmd, capture_output=True, timeout=15)
-
-                    if os.path.exists(frame_path):
-                        with open(frame_path, "rb") as f:
-                            frames.append(base64.b64encode(f.read()).decode())
-
-            # Transcribe audio if requested
-            transcript = None
-            if do_transcribe:
-                transcript = self._transcribe_video_audio(str(video_path), ffmpeg_path, whisper_model)
+            # Transcribe in the background (under this media job) while frames are extracted
+            from concurrent.futures import ThreadPoolExecutor
+            pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="VideoTranscribe")
+            try:
+                transcript_future = None
+                if do_transcribe and info.get("has_audio", True):
+                    transcript_future = pool.submit(
+                        bind_job(self._transcribe_video_audio), str(video_path), ffmpeg_path, whisper_model)
+
+                # All evenly-spaced frames in a single ffmpeg pass
+                report_progress(0.05, f"Extracting {num_frames} frames")
+                frame_timestamps = evenly_spaced_timestamps(duration_match, num_frames)
+                extracted = extract_frames_at(str(video_path), frame_timestamps, ffmpeg_path)
+                frames = [base64.b64encode(img).decode() for _, img in extracted]
+                frame_timestamps = [round(ts, 2) for ts, _ in extracted]
+
+                transcript = None
+                if transcript_future:
+                    report_progress(0.5, "Transcribing audio")
+                    transcript = wait_result(transcript_future)
+            finally:
+                pool.shutdown(wait=False)  # A cancelled job doesn't wait out the transcription
 
             response = {
                 "frames": frames,
@@ -3745,7 +4142,13 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
                 "metadata": {
                     "file": str(video_path),
                     "frames_extracted": len(frames),
-                    "total_duration_seconds": round(duration_match, 2)
+                    "total_duration_seconds": round(duration_match, 2),
+                    "width": info.get("width"),
+                    "height": info.get("height"),
+                    "fps": info.get("fps"),
+                    "video_codec": info.get("video_codec"),
+                    "audio_codec": info.get("audio_codec"),
+                    "has_audio": info.get("has_audio")
                 }
             }
 
@@ -3761,47 +4164,36 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
             self.send_json({"error": str(e)}, 500)
 
     def _transcribe_video_audio(self, video_path: str, ffmpeg_path: str, model_size: str = "base") -> dict:
-        """Extract audio from video and transcribe using Whisper.
+        """Extract audio from video and transcribe it with the fastest installed Whisper backend.
 
         Returns dict with transcript text and timestamped segments.
         """
         try:
-            import whisper
-        except ImportError:
-            logger.warning("Whisper not installed, skipping transcription")
-            return {"error": "Whisper not installed", "text": ""}
+            backend = resolve_backend()
+        except (RuntimeError, ValueError) as e:
+            logger.warning(f"Skipping transcription: {e}")
+            return {"error": str(e), "text": ""}
 
         try:
-            # Extract audio to temp WAV file
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-                audio_path = tmp.name
-
-            extract_cmd = [
-                ffmpeg_path, "-y", "-i", video_path,
-                "-vn",                    # No video
-                "-acodec", "pcm_s16le",   # WAV format
-                "-ar", "16000",           # 16kHz sample rate
-                "-ac", "1",               # Mono
-                "-loglevel", "error",
-                audio_path
-            ]
-            subprocess.run(extract_cmd, check=True, capture_output=True, timeout=60)
-
-            # Load Whisper model and transcribe
-            logger.info(f"Loading Whisper model '{model_size}' for video transcription...")
-            model = whisper.load_model(model_size)
-
-            logger.info("Transcribing video audio...")
-            result = model.transcribe(
-                audio_path,
-                verbose=False,
-                word_timestamps=False,
-                fp16=False  # CPU compatibility
+            # Shared extraction stage: short audio can stream through a pipe, anything
+            # that may need chunking gets the cached 16 kHz WAV (reused across requests)
+            duration = probe_duration(video_path, ffmpeg_path) or 0
+            audio_path = None
+            pcm = None
+            chunk_workers = budget_workers(backend.name, model_size)
+            if AUDIO_STREAM_TO_MODEL and duration and not should_chunk(duration, chunk_workers):
+                pcm = source_pcm(video_path, ffmpeg_path, stream=True)
+            else:
+                audio_path = str(extract_wav(video_path, ffmpeg_path))
+
+            # Long audio is chunked across processes; the same audio + model seen
+            # before (e.g. analyze then transcribe) reuses the cached transcript
+            logger.info(f"Transcribing video audio ({backend.name}/{model_size})...")
+            result = transcribe_file(
+                audio_path, model_size, backend.name, ffmpeg_path=ffmpeg_path, pcm=pcm,
+                progress=lambda done, total: report_progress(activity=f"Transcribed chunk {done}/{total}")
             )
 
-            # Clean up temp file
-            Path(audio_path).unlink(missing_ok=True)
-
             # Format segments with timestamps
             segments = []
             for seg in result.get("segments", []):
@@ -3815,9 +4207,12 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
                 "text": result.get("text", "").strip(),
                 "language": result.get("language", "unknown"),
                 "segments": segments,
-                "segment_count": len(segments)
+                "segment_count": len(segments),
+                "backend": result.get("backend", backend.name)
             }
 
+        except MediaJobCancelled:
+            raise
         except subprocess.TimeoutExpired:
             logger.error("Audio extraction timed out")
             return {"error": "Audio extraction timed out", "text": ""}
@@ -3858,19 +4253,15 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
                 self.send_json({"error": "ffmpeg not installed"}, 500)
                 return
 
-            # Get video duration
-            probe_cmd = [ffmpeg_path, "-i", str(video_path), "-f", "null", "-"]
-            probe = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=10)
-            duration = 0
-            import re
-            for line in probe.stderr.split('\n'):
-                m = re.search(r'Duration:\s*(\d+):(\d+):(\d+)\.(\d+)', line)
-                if m:
-                    h, mi, s, ms = m.groups()
-                    duration = int(h) * 3600 + int(mi) * 60 + int(s) + int(ms) / 100
-                    break
+            # Duration and streams from the cached container probe (no decode)
+            info = probe(str(video_path), ffmpeg_path) or {}
+            duration = info.get("duration") or 0
+            if info and not info.get("has_audio"):
+                self.send_json({"error": "Video has no audio track"}, 400)
+                return
 
             # Transcribe
+            report_progress(0.1, "Transcribing audio")
             transcript = self._transcribe_video_audio(str(video_path), ffmpeg_path, model_size)
 
             if "error" in transcript and transcript["error"]:
@@ -3888,6 +4279,107 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
 
     # ========== YOUTUBE VIDEO DOWNLOAD & ANALYSIS ==========
 
+    def _youtube_fetch(self, url: str, video_format: str, ytdlp_path: str, ffmpeg_path: str,
+                       output_template: str) -> dict:
+        """Download a YouTube video with yt-dlp.
+
+        Returns {"video_path", "title", "duration"}, or {"error": message}.
+        """
+        # Download video with yt-dlp
+        logger.info(f"Downloading YouTube video: {url}")
+
+        # Check for YouTube cookies file (required for bot detection bypass)
+        cookies_file = RELAY_DIR / "www.youtube.com_cookies.txt"
+        if not cookies_file.exists():
+            # Fallback: check alternate names and locations
+            for alt_path in [
+                RELAY_DIR / "youtube_cookies.txt",
+                Path.home() / "www.youtube.com_cookies.txt",
+                Path.home() / "youtube_cookies.txt",
+            ]:
+                if alt_path.exists():
+                    cookies_file = alt_path
+                    break
+
+        base_cmd = [
+            ytdlp_path,
+            "-f", video_format,
+            "--merge-output-format", "mp4",
+            "-o", output_template,
+            "--no-playlist",           # Don't download playlists
+            "--no-warnings",
+            "--js-runtimes", "node",               # Required for YouTube JS challenge solving
+            "--remote-components", "ejs:github",   # Required for YouTube n-challenge solver
+            "--print", "after_move:filepath",  # Print final file path
+            "--print", "title",                 # Print video title
+            "--print", "duration",              # Print duration
+        ]
+
+        # Add cookies if available (required by YouTube to bypass bot detection)
+        if cookies_file.exists():
+            base_cmd.extend(["--cookies", str(cookies_file)])
+            logger.info(f"Using YouTube cookies from: {cookies_file}")
+
+        download_cmd = base_cmd + [url]
+        report_progress(0.05, "Downloading video")
+        result = run_subprocess(
+            download_cmd,
+            text=True,
+            timeout=600  # 10 minute timeout for longer videos
+        )
+
+        if result.returncode != 0:
+            error_msg = result.stderr or "Download failed"
+            logger.error(f"yt-dlp error: {error_msg}")
+
+            # Provide actionable guidance for bot detection errors
+            if "Sign in to confirm" in error_msg or "LOGIN_REQUIRED" in error_msg:
+                cookies_status = f" (cookies file {'found' if cookies_file.exists() else 'NOT found'}: {cookies_file})"
+                return {
+                    "error": "YouTube requires fresh browser cookies." + cookies_status + "  \n\n"
+                             "Your cookies may have expired. Please re-export:  \n"
+                             "1) Install a 'cookies.txt' browser extension (e.g. 'Get cookies.txt LOCALLY')  \n"
+                             "2) Go to youtube.com in your browser (logged in)  \n"
+                             "3) Export cookies to a file  \n"
+                             "4) Upload/copy the file to the server as: www.youtube.com_cookies.txt"
+                }
+
+            return {"error": f"YouTube download failed: {error_msg}"}
+
+        # Parse output - yt-dlp --print order: title, duration print before download,
+        # after_move:filepath prints last (after download completes)
+        output_lines = [line.strip() for line in result.stdout.strip().split('\n') if line.strip()]
+        if len(output_lines) < 3:
+            return {"error": "Failed to parse yt-dlp output"}
+
+        # Find the filepath (line containing a path with extension)
+        video_path = None
+        video_title = ''
+        video_duration = 0
+        for line in output_lines:
+            if line.startswith('/') and ('.' in line.split('/')[-1]):
+                video_path = line
+            else:
+                # Try parsing as duration (numeric)
+                try:
+                    video_duration = float(line)
+                except ValueError:
+                    # Must be the title
+                    if not video_title:
+                        video_title = line
+
+        if not video_path:
+            video_path = output_lines[-1]  # Fallback: last line is usually the path
+
+        if not Path(video_path).exists():
+            return {"error": "Downloaded video file not found"}
+
+        if not video_duration:
+            video_duration = probe_duration(video_path, ffmpeg_path) or 0
+
+        logger.info(f"Downloaded: {video_title} ({video_duration}s) -> {video_path}")
+        return {"video_path": video_path, "title": video_title, "duration": video_duration}
+
     def handle_youtube_download(self, data: dict):
         """POST /api/video/youtube - Download and optionally analyze a YouTube video.
 
@@ -3940,152 +4432,81 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
                 self.send_json({"error": "ffmpeg not installed. Install: apt install ffmpeg"}, 500)
                 return
 
-            # Generate output path
-            timestamp = int(time.time() * 1000)
-            video_id = str(uuid.uuid4())[:8]
-            output_template = str(SCREENSHOTS_DIR / f"youtube_{timestamp}_{video_id}.%(ext)s")
-
-            # Download video with yt-dlp
-            logger.info(f"Downloading YouTube video: {url}")
-
-            # Check for YouTube cookies file (required for bot detection bypass)
-            cookies_file = RELAY_DIR / "www.youtube.com_cookies.txt"
-            if not cookies_file.exists():
-                # Fallback: check alternate names and locations
-                for alt_path in [
-                    RELAY_DIR / "youtube_cookies.txt",
-                    Path.home() / "www.youtube.com_cookies.txt",
-                    Path.home() / "youtube_cookies.txt",
-                ]:
-                    if alt_path.exists():
-                        cookies_file = alt_path
-                        break
-
-            base_cmd = [
-                ytdlp_path,
-                "-f", video_format,
-                "--merge-output-format", "mp4",
-                "-o", output_template,
-                "--no-playlist",           # Don't download playlists
-                "--no-warnings",
-                "--js-runtimes", "node",               # Required for YouTube JS challenge solving
-                "--remote-components", "ejs:github",   # Required for YouTube n-challenge solver
-                "--print", "after_move:filepath",  # Print final file path
-                "--print", "title",                 # Print video title
-                "--print", "duration",              # Print duration
-            ]
-
-            # Add cookies if available (required by YouTube to bypass bot detection)
-            if cookies_file.exists():
-                base_cmd.extend(["--cookies", str(cookies_file)])
-                logger.info(f"Using YouTube cookies from: {cookies_file}")
-
-            download_cmd = base_cmd + [url]
-            result = subprocess.run(
-                download_cmd,
-                capture_output=True,
-                text=True,
-                timeout=600  # 10 minute timeout for longer videos
-            )
-
-            if result.returncode != 0:
-                error_msg = result.stderr or "Download failed"
-                logger.error(f"yt-dlp error: {error_msg}")
-
-                # Provide actionable guidance for bot detection errors
-                if "Sign in to confirm" in error_msg or "LOGIN_REQUIRED" in error_msg:
-                    cookies_status = f" (cookies file {'found' if cookies_file.exists() else 'NOT found'}: {cookies_file})"
-                    self.send_json({
-                        "error": "YouTube requires fresh browser cookies." + cookies_status + "  \n\n"
-                                 "Your cookies may have expired. Please re-export:  \n"
-                                 "1) Install a 'cookies.txt' browser extension (e.g. 'Get cookies.txt LOCALLY')  \n"
-                                 "2) Go to youtube.com in your browser (logged in)  \n"
-                                 "3) Export cookies to a file  \n"
-                                 "4) Upload/copy the file to the server as: www.youtube.com_cookies.txt"
-                    }, 500)
+            # Downloads are cached by canonical video id + format selector
+            cache = youtube_cache()
+            video_id = youtube_video_id(url)
+            cached = False
+            if video_id:
+                # Concurrent requests for the same video wait here and share one download
+                with cache.lock(video_id, video_format):
+                    entry = cache.lookup(video_id, video_format)
+                    cached = entry is not None
+                    if not cached:
+                        fetched = self._youtube_fetch(url, video_format, ytdlp_path, ffmpeg_path,
+                                                      cache.output_template(video_id, video_format))
+                        if "error" in fetched:
+                            self.send_json(fetched, 500)
+                            return
+                        entry = cache.store(video_id, video_format, fetched.pop("video_path"), **fetched)
+            else:
+                # No recognisable video id (e.g. an unusual URL form): one-off download
+                timestamp = int(time.time() * 1000)
+                output_template = str(SCREENSHOTS_DIR / f"youtube_{timestamp}_{str(uuid.uuid4())[:8]}.%(ext)s")
+                fetched = self._youtube_fetch(url, video_format, ytdlp_path, ffmpeg_path, output_template)
+                if "error" in fetched:
+                    self.send_json(fetched, 500)
                     return
+                entry = dict(fetched, downloaded_at=time.strftime("%Y-%m-%d %H:%M:%S"))
 
-                self.send_json({"error": f"YouTube download failed: {error_msg}"}, 500)
-                return
-
-            # Parse output - yt-dlp --print order: title, duration print before download,
-            # after_move:filepath prints last (after download completes)
-            output_lines = [line.strip() for line in result.stdout.strip().split('\n') if line.strip()]
-            if len(output_lines) < 3:
-                self.send_json({"error": "Failed to parse yt-dlp output"}, 500)
-                return
-
-            # Find the filepath (line containing a path with extension)
-            video_path = None
-            video_title = ''
-            video_duration = 0
-            for line in output_lines:
-                if line.startswith('/') and ('.' in line.split('/')[-1]):
-                    video_path = line
-                else:
-                    # Try parsing as duration (numeric)
-                    try:
-                        video_duration = float(line)
-                    except ValueError:
-                        # Must be the title
-                        if not video_title:
-                            video_title = line
-
-            if not video_path:
-                video_path = output_lines[-1]  # Fallback: last line is usually the path
-
-            if not Path(video_path).exists():
-                self.send_json({"error": "Downloaded video file not found"}, 500)
-                return
-
-            logger.info(f"Downloaded: {video_title} ({video_duration}s) -> {video_path}")
+            video_path = entry["video_path"]
+            video_duration = entry.get("duration") or 0
+            if cached:
+                logger.info(f"YouTube cache hit: {video_id} -> {video_path}")
 
             # Build response
             response = {
                 "video_path": video_path,
-                "title": video_title,
+                "title": entry.get("title", ""),
                 "duration": round(video_duration, 2),
                 "url": url,
+                "cached": cached,
                 "metadata": {
-                    "downloaded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "format": video_format
+                    "downloaded_at": entry.get("downloaded_at"),
+                    "format": video_format,
+                    "video_id": video_id
                 }
             }
 
-            # Extract frames if requested
+            # Extract frames if requested (all in a single ffmpeg pass; reused per frame count)
             if do_analyze and num_frames > 0:
-                frames = []
-                frame_timestamps = []
-
-                with tempfile.TemporaryDirectory() as tmpdir:
-                    for i in range(num_frames):
-                        if video_duration > 0:
-                            timestamp_sec = (video_duration / (num_frames + 1)) * (i + 1)
-                        else:
-                            timestamp_sec = i * 5  # Fallback: every 5 seconds
-
-                        frame_timestamps.append(round(timestamp_sec, 2))
-                        frame_path = os.path.join(tmpdir, f"frame_{i:03d}.jpg")
-
-                        cmd = [
-                            ffmpeg_path, "-ss", str(timestamp_sec),
-                            "-i", video_path,
-                            "-vframes", "1", "-q:v", "2",
-                            frame_path, "-y"
-                        ]
-                        subprocess.run(cmd, capture_output=True, timeout=15)
-
-                        if os.path.exists(frame_path):
-                            with open(frame_path, "rb") as f:
-                                frames.append(base64.b64encode(f.read()).decode())
+                saved = entry.get("frames", {}).get(str(num_frames))
+                if saved:
+                    frames, frame_timestamps = saved["frames"], saved["timestamps"]
+                else:
+                    report_progress(0.4, f"Extracting {num_frames} frames")
+                    if video_duration > 0:
+                        frame_timestamps = evenly_spaced_timestamps(video_duration, num_frames)
+                    else:
+                        frame_timestamps = [i * 5 for i in range(num_frames)]  # Fallback: every 5 seconds
+                    extracted = extract_frames_at(video_path, frame_timestamps, ffmpeg_path)
+                    frames = [base64.b64encode(img).decode() for _, img in extracted]
+                    frame_timestamps = [round(ts, 2) for ts, _ in extracted]
+                    if video_id and frames:
+                        cache.update(video_id, video_format, "frames", str(num_frames),
+                                     {"frames": frames, "timestamps": frame_timestamps})
 
                 response["frames"] = frames
                 response["frame_count"] = len(frames)
                 response["frame_timestamps"] = frame_timestamps
 
-            # Transcribe audio if requested
+            # Transcribe audio if requested (reused per Whisper model)
             if do_transcribe:
-                transcript = self._transcribe_video_audio(video_path, ffmpeg_path, whisper_model)
+                transcript = entry.get("transcripts", {}).get(whisper_model)
+                if not transcript:
+                    report_progress(0.6, "Transcribing audio")
+                    transcript = self._transcribe_video_audio(video_path, ffmpeg_path, whisper_model)
+                    if video_id and transcript and not transcript.get("error"):
+                        cache.update(video_id, video_format, "transcripts", whisper_model, transcript)
                 if transcript:
                     response["transcript"] = transcript
 
@@ -4099,7 +4520,7 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
 
     # ========== PIPER TTS (LOCAL NEURAL TTS) ==========
 
-    def handle_piper_tts(self, data: dict, send_binary):
+    def handle_piper_tts(self, data: dict, send_binary, if_none_match: str = ""):
         """POST /api/tts/piper - Generate speech using local Piper TTS.
 
         Request: {"text": "Text to speak", "voice": "amy"}
@@ -4122,35 +4543,54 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
 
         try:
             import subprocess
-            import tempfile
-
-            # Voice model paths
-            voice_dir = RELAY_DIR / ".piper-voices"
-            voice_models = {
-                "amy": voice_dir / "en_US-amy-medium.onnx",                            # Female, US English
-                "ryan": voice_dir / "en_US-ryan-medium.onnx",                          # Male, US English
-                "lessac": voice_dir / "en_US-lessac-medium.onnx",                      # Female, US English
-                "alan": voice_dir / "en_GB-alan-medium.onnx",                          # Male, British English
-                "alba": voice_dir / "en_GB-alba-medium.onnx",                          # Female, Scottish English
-                "cori": voice_dir / "en_GB-cori-medium.onnx",                          # Female, British English
-                "jenny_dioco": voice_dir / "en_GB-jenny_dioco-medium.onnx",            # Female, British English
-                "northern_english_male": voice_dir / "en_GB-northern_english_male-medium.onnx",  # Male, Northern English
-            }
 
+            voice_models = piper_voice_models()
             model_path = voice_models.get(voice)
             if not model_path or not model_path.exists():
                 available = [k for k, v in voice_models.items() if v.exists()]
                 self.send_json({"error": f"Voice '{voice}' not available. Available: {available}"}, 400)
                 return
 
-            # Generate audio with Piper
-            piper_bin = Path.home() / ".local" / "bin" / "piper"
-            if not piper_bin.exists():
-                piper_bin = "piper"  # Try system PATH
+            # Generate audio with Piper (only on a cache miss)
+            try:
+                self._send_cached_tts("piper", voice, text, "audio/wav",
+                                      lambda: self._run_piper(voice, model_path, text), send_binary,
+                                      if_none_match=if_none_match)
+            except RuntimeError as e:
+                logger.error(f"Piper error: {e}")
+                self.send_json({"error": f"Piper TTS failed: {e}"}, 500)
 
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-                tmp_path = tmp.name
+        except FileNotFoundError:
+            self.send_json({"error": "Piper not installed. Run: pip3 install piper-tts"}, 500)
+        except subprocess.TimeoutExpired:
+            self.send_json({"error": "TTS generation timed out"}, 500)
+        except Exception as e:
+            logger.error(f"Piper TTS error: {e}")
+            self.send_json({"error": str(e)}, 500)
 
+    def _run_piper(self, voice: str, model_path: Path, text: str) -> bytes:
+        """Synthesize WAV audio on the voice's resident Piper worker, or the CLI if workers are unavailable.
+
+        Raises RuntimeError if synthesis fails.
+        """
+        try:
+            return piper_pool().synthesize(voice, text)
+        except PiperUnavailable as e:
+            logger.debug(f"Piper worker unavailable, using the CLI: {e}")
+        return self._run_piper_cli(model_path, text)
+
+    def _run_piper_cli(self, model_path: Path, text: str) -> bytes:
+        """Synthesize WAV audio with a one-off Piper CLI process; raises RuntimeError if it fails."""
+        import subprocess
+        import tempfile
+
+        piper_bin = Path.home() / ".local" / "bin" / "piper"
+        if not piper_bin.exists():
+            piper_bin = "piper"  # Try system PATH
+
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
+            tmp_path = tmp.name
+        try:
             result = subprocess.run(
                 [str(piper_bin), "--model", str(model_path), "--output_file", tmp_path],
                 input=text,
@@ -4158,29 +4598,13 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
                 text=True,
                 timeout=30
             )
-
             if result.returncode != 0:
-                logger.error(f"Piper error: {result.stderr}")
-                self.send_json({"error": f"Piper TTS failed: {result.stderr}"}, 500)
-                return
-
-            # Read and send the audio file
+                raise RuntimeError(result.stderr)
             with open(tmp_path, "rb") as f:
-                audio_data = f.read()
-
-            # Clean up
+                return f.read()
+        finally:
             Path(tmp_path).unlink(missing_ok=True)
 
-            send_binary(audio_data, "audio/wav")
-
-        except FileNotFoundError:
-            self.send_json({"error": "Piper not installed. Run: pip3 install piper-tts"}, 500)
-        except subprocess.TimeoutExpired:
-            self.send_json({"error": "TTS generation timed out"}, 500)
-        except Exception as e:
-            logger.error(f"Piper TTS error: {e}")
-            self.send_json({"error": str(e)}, 500)
-
     # ========== IMAGE GENERATION (DALL-E 3 or NVIDIA FLUX) ==========
 
     def handle_dalle_generate(self, data: dict):
@@ -4262,7 +4686,7 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
                 "num_inference_steps": 30
             }
 
-            response = requests.post(url, headers=headers, json=payload, timeout=120)
+            response = get_session(url).post(url, headers=headers, json=payload, timeout=request_timeout(120))
 
             if response.status_code != 200:
                 # Try to parse JSON error, fall back to text
@@ -4321,18 +4745,18 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
 
         try:
             import openai
-            import requests as req
 
-            client = openai.OpenAI(api_key=api_key)
+            client = get_openai_client(api_key)
 
-            response = client.images.generate(
-                model="dall-e-3",
-                prompt=prompt,
-                size=size,
-                quality=quality,
-                style=style,
-                n=1
-            )
+            with get_breaker("OpenAI").guard():
+                response = client.images.generate(
+                    model="dall-e-3",
+                    prompt=prompt,
+                    size=size,
+                    quality=quality,
+                    style=style,
+                    n=1
+                )
 
             image_url = response.data[0].url
             revised_prompt = response.data[0].revised_prompt
@@ -4343,7 +4767,7 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
             preview_path = Path("/opt/clawd/projects/.preview") / filename
 
             try:
-                img_response = req.get(image_url, timeout=60)
+                img_response = get_session(image_url).get(image_url, timeout=request_timeout(60))
                 if img_response.status_code == 200:
                     local_path.write_bytes(img_response.content)
                     preview_path.write_bytes(img_response.content)
@@ -4408,19 +4832,25 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
             self.send_json({"error": f"DALL-E rejected prompt: {str(e)}"}, 400)
         except openai.AuthenticationError:
             self.send_json({"error": "Invalid OpenAI API key"}, 401)
+        except CircuitOpenError as e:
+            self.send_json({"error": str(e), "retry_after": round(e.retry_after, 1)}, 503)
         except Exception as e:
             logger.error(f"DALL-E error: {e}")
             self.send_json({"error": str(e)}, 500)
 
     # ========== SQLITE BROWSER ==========
 
-    def handle_sqlite_query(self, data: dict):
+    def handle_sqlite_query(self, data: dict, send_stream):
         """POST /api/sqlite/query - Execute SQL query on a SQLite database.
 
-        Request: {"database": "/path/to/db.sqlite", "query": "SELECT * FROM users LIMIT 10"}
-        Response: {"columns": [...], "rows": [...], "row_count": 10}
+        Request: {"database": "/path/to/db.sqlite", "query": "SELECT * FROM users",
+                  "page_size": 200, "cursor": "<next_cursor from the previous page>", "stream": false}
+        Response: {"columns": [...], "rows": [...], "row_count": 200, "offset": 0,
+                   "has_more": true, "next_cursor": "..."}
+        With "stream": true the whole result (up to SQLITE_MAX_STREAM_ROWS) is sent as NDJSON:
+        a {"columns": [...]} line, one object per row, then {"row_count": n, "truncated": false}.
 
-        Safety: Only SELECT queries allowed. No modifications.
+        Safety: Only SELECT queries allowed, on read-only connections, with a time limit.
         """
         db_path = data.get("database", "").strip()
         query = data.get("query", "").strip()
@@ -4446,41 +4876,100 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
                 self.send_json({"error": f"Query contains forbidden keyword: {keyword}"}, 403)
                 return
 
-        try:
-            import sqlite3
-
-            db_file = Path(db_path)
-            if not db_file.exists():
-                self.send_json({"error": f"Database not found: {db_path}"}, 404)
-                return
+        db_file = Path(db_path)
+        if not db_file.exists():
+            self.send_json({"error": f"Database not found: {db_path}"}, 404)
+            return
 
-            conn = sqlite3.connect(str(db_file), timeout=5)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+        if data.get("stream"):
+            self._stream_sqlite_query(db_file, query, send_stream)
+            return
 
-            cursor.execute(query)
-            rows = cursor.fetchall()
+        try:
+            page_size = max(1, min(int(data.get("page_size", SQLITE_PAGE_ROWS)), SQLITE_MAX_PAGE_ROWS))
+            offset = decode_cursor(data["cursor"], query) if data.get("cursor") else 0
 
-            # Get column names
-            columns = [description[0] for description in cursor.description] if cursor.description else []
+            with sqlite_pool().connection(db_file) as conn:
+                columns, rows, has_more = query_page(conn, query, offset, page_size)
 
             # Convert rows to list of dicts
-            result_rows = [dict(row) for row in rows]
-
-            conn.close()
+            result_rows = [dict(zip(columns, row)) for row in rows]
 
             self.send_json({
                 "columns": columns,
                 "rows": result_rows,
-                "row_count": len(result_rows)
+                "row_count": len(result_rows),
+                "offset": offset,
+                "has_more": has_more,
+                "next_cursor": encode_cursor(query, offset + len(rows)) if has_more else None
             })
 
+        except ValueError as e:
+            self.send_json({"error": str(e)}, 400)
         except sqlite3.OperationalError as e:
-            self.send_json({"error": f"SQL error: {str(e)}"}, 400)
+            self.send_json({"error": self._sqlite_error_message(e)}, 400)
         except Exception as e:
             logger.error(f"SQLite error: {e}")
             self.send_json({"error": str(e)}, 500)
 
+    @staticmethod
+    def _sqlite_error_message(e: Exception, timeout: float = SQLITE_QUERY_TIMEOUT_SECONDS) -> str:
+        if str(e) == "interrupted":  # Stopped by the query deadline's progress handler
+            return f"Query exceeded the {timeout:g}s time limit"
+        return f"SQL error: {str(e)}"
+
+    def _sqlite_ndjson(self, db_file: Path, query: str):
+        """NDJSON lines for a query, batched into ~64 KB chunks; the columns line comes first."""
+        with sqlite_pool().connection(db_file) as conn:
+            rows = iter_rows(conn, query, SQLITE_MAX_STREAM_ROWS, SQLITE_STREAM_TIMEOUT_SECONDS)
+            try:
+                columns = next(rows)
+                yield (json.dumps({"columns": columns}) + "\n").encode()
+                batch, size, count, truncated = [], 0, 0, False
+                for row in rows:
+                    if isinstance(row, bool):
+                        truncated = row
+                        break
+                    line = json.dumps(dict(zip(columns, row))) + "\n"
+                    batch.append(line)
+                    size += len(line)
+                    count += 1
+                    if size >= 64 * 1024:
+                        yield "".join(batch).encode()
+                        batch, size = [], 0
+                batch.append(json.dumps({"row_count": count, "truncated": truncated}) + "\n")
+                yield "".join(batch).encode()
+            finally:
+                rows.close()
+
+    def _stream_sqlite_query(self, db_file: Path, query: str, send_stream):
+        lines = self._sqlite_ndjson(db_file, query)
+        # Run the query before answering, so SQL errors are still a JSON error
+        try:
+            first = next(lines)
+        except sqlite3.OperationalError as e:
+            lines.close()
+            self.send_json({"error": self._sqlite_error_message(e, SQLITE_STREAM_TIMEOUT_SECONDS)}, 400)
+            return
+        except Exception as e:
+            lines.close()
+            logger.error(f"SQLite stream error: {e}")
+            self.send_json({"error": str(e)}, 500)
+            return
+
+        def stream():
+            try:
+                yield first
+                yield from lines
+            except sqlite3.Error as e:
+                # Headers are already sent; report the failure in-band
+                message = self._sqlite_error_message(e, SQLITE_STREAM_TIMEOUT_SECONDS)
+                yield (json.dumps({"error": message}) + "\n").encode()
+            finally:
+                lines.close()
+
+        send_stream(stream(), "application/x-ndjson")
+
     def handle_sqlite_tables(self, data: dict):
         """POST /api/sqlite/tables - List tables in a SQLite database.
 
@@ -4494,27 +4983,24 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
             return
 
         try:
-            import sqlite3
-
             db_file = Path(db_path)
             if not db_file.exists():
                 self.send_json({"error": f"Database not found: {db_path}"}, 404)
                 return
 
-            conn = sqlite3.connect(str(db_file), timeout=5)
-            cursor = conn.cursor()
-
-            # Get all tables
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-            tables = []
+            with sqlite_pool().connection(db_file) as conn:
+                cursor = conn.cursor()
 
-            for (table_name,) in cursor.fetchall():
-                # Get columns for each table
-                cursor.execute(f"PRAGMA table_info({table_name})")
-                columns = [{"name": col[1], "type": col[2], "notnull": col[3], "pk": col[5]} for col in cursor.fetchall()]
-                tables.append({"name": table_name, "columns": columns})
+                # Get all tables
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
+                tables = []
 
-            conn.close()
+                for (table_name,) in cursor.fetchall():
+                    # Get columns for each table
+                    cursor.execute(f"PRAGMA table_info({table_name})")
+                    columns = [{"name": col[1], "type": col[2], "notnull": col[3], "pk": col[5]} for col in cursor.fetchall()]
+                    tables.append({"name": table_name, "columns": columns})
+                cursor.close()
 
             self.send_json({"tables": tables, "database": db_path})
 
@@ -4528,7 +5014,7 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
         """POST /api/whisper/transcribe - Transcribe audio using local Whisper.
 
         Request: {"audio": "base64_audio_data", "language": "en", "model": "base"}
-        Response: {"text": "transcribed text", "language": "en"}
+        Response: {"text": "transcribed text", "language": "en", "segments": [...], "backend": "faster-whisper"}
 
         Models: tiny, base, small, medium, large (larger = better but slower)
         """
@@ -4541,39 +5027,100 @@ pre {{ background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto;
             return
 
         try:
-            import whisper
+            backend = resolve_backend()
+        except (RuntimeError, ValueError) as e:
+            self.send_json({"error": str(e)}, 500)
+            return
+
+        try:
             import base64
-            import tempfile
+            import shutil
 
-            # Decode audio
+            # Decode the upload straight to 16 kHz PCM through a pipe (no temp file);
+            # the same PCM is fingerprinted for the cache and fed to the model
             audio_data = base64.b64decode(audio_b64)
+            pcm = decode_pcm(audio_data, shutil.which("ffmpeg") or "ffmpeg")
 
-            # Write to temp file
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-                tmp.write(audio_data)
-                tmp_path = tmp.name
-
-            # Load model (cached after first load)
-            model = whisper.load_model(model_size)
-
-            # Transcribe
-            result = model.transcribe(tmp_path, language=language)
-
-            # Clean up
-            Path(tmp_path).unlink(missing_ok=True)
+            report_progress(0.1, "Transcribing")
+            result = transcribe_file(None, model_size, backend.name, language, pcm=pcm)
 
             self.send_json({
                 "text": result["text"].strip(),
                 "language": result.get("language", language),
-                "segments": result.get("segments", [])
+                "segments": result.get("segments", []),
+                "backend": result.get("backend", backend.name)
             })
 
-        except ImportError:
-            self.send_json({"error": "Whisper not installed. Run: pip3 install openai-whisper"}, 500)
         except Exception as e:
             logger.error(f"Whisper error: {e}")
             self.send_json({"error": str(e)}, 500)
 
+    # ========== STREAMING SPEECH-TO-TEXT ==========
+
+    def handle_stt_stream_start(self, data: dict):
+        """POST /api/stt/stream/start - Open a streaming speech-to-text session.
+
+        Request: {"model": "base", "language": "en", "format": "pcm16|webm|ogg", "sample_rate": 16000}
+        Response: {"session_id": "...", "events": "/api/stt/stream/events/<id>"}
+
+        Send audio with /api/stt/stream/chunk as it is recorded; partial and final
+        hypotheses arrive on the events URL (Server-Sent Events).
+        """
+        import shutil
+        try:
+            resolve_backend()
+            session = stt_sessions().create(
+                model=data.get("model") or STT_STREAM_MODEL,
+                language=data.get("language") or None,
+                audio_format=data.get("format", "pcm16"),
+                sample_rate=int(data.get("sample_rate", 16000)),
+                ffmpeg_path=shutil.which("ffmpeg") or "ffmpeg",
+            )
+        except ValueError as e:
+            self.send_json({"error": str(e)}, 400)
+            return
+        except RuntimeError as e:
+            self.send_json({"error": str(e)}, 503)
+            return
+        except OSError as e:
+            self.send_json({"error": f"Could not start audio decoder: {e}"}, 500)
+            return
+        self.send_json({"session_id": session.id, "events": f"/api/stt/stream/events/{session.id}"})
+
+    def handle_stt_stream_chunk(self, data: dict):
+        """POST /api/stt/stream/chunk - Add recorded audio to a session.
+
+        Request: {"session_id": "...", "audio": "base64 PCM or Opus bytes"}
+        Response: {"session_id", "type": "partial", "text": committed, "partial": unstable tail, "seq"}
+
+        Returns at once with the latest hypothesis; decoding runs in the background.
+        """
+        session = stt_sessions().get(data.get("session_id", ""))
+        if session is None:
+            self.send_json({"error": "Unknown or expired session"}, 404)
+            return
+        try:
+            session.feed(base64.b64decode(data.get("audio", "")))
+        except (ValueError, RuntimeError, OSError) as e:
+            self.send_json({"error": str(e)}, 400)
+            return
+        self.send_json(session.latest())
+
+    def handle_stt_stream_stop(self, data: dict):
+        """POST /api/stt/stream/stop - Finish a session and return the final transcript.
+
+        Request: {"session_id": "..."}
+        Response: {"session_id", "type": "final", "text": "full transcript", "duration": seconds}
+        """
+        result = stt_sessions().finish(data.get("session_id", ""))
+        if result is None:
+            self.send_json({"error": "Unknown or expired session"}, 404)
+            return
+        if result.get("type") == "error":
+            self.send_json(result, 500)
+            return
+        self.send_json(result)
+
     # ========== MCP SERVER INTEGRATION ==========
 
     def handle_mcp_config_get(self, data: dict):
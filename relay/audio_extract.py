@@ -0,0 +1,174 @@
+"""Shared audio-extraction stage for every transcription path.
+
+Video analyze, video transcribe, YouTube, the whisper endpoint and the
+transcribe scripts all need the same thing: the source decoded to 16 kHz
+mono 16-bit PCM. extract_wav() produces that WAV once per source file
+version (path, size, mtime) and keeps it in a size-bounded DiskCache, so a
+second transcription of the same video skips ffmpeg entirely. Concurrent
+requests for the same source share one extraction.
+
+When no WAV is needed on disk, decode_pcm() streams ffmpeg's s16le output
+through a pipe straight into memory (uploaded bytes only go through a temp
+file when the container needs seeking), and pcm_to_float32() turns either
+form into the float32 array that Whisper, faster-whisper and WhisperX accept
+in place of a path (which would make them run ffmpeg again).
+"""
+
+import os
+import tempfile
+import threading
+import wave
+import logging
+from pathlib import Path
+from typing import Optional, Union
+
+from .config import AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_MB, TEMP_DIR
+from .disk_cache import DiskCache
+from .media_jobs import run_subprocess
+from .media_probe import MediaProbeCache
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+_PCM_ARGS = ["-vn", "-ac", "1", "-ar", str(SAMPLE_RATE)]
+
+
+def _is_iso_bmff(data: bytes) -> bool:
+    """Whether data is an MP4/M4A/MOV container (an ftyp box first)."""
+    return data[4:8] == b"ftyp"
+
+
+def _run_decode(input_args: list, data: Optional[bytes], ffmpeg_path: str, timeout: float) -> bytes:
+    cmd = [ffmpeg_path, *input_args, *_PCM_ARGS, "-f", "s16le", "-loglevel", "error", "-"]
+    result = run_subprocess(cmd, timeout=timeout, input=data)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode audio: {result.stderr.decode(errors='replace')[:200]}")
+    return result.stdout
+
+
+def decode_pcm(source: Union[str, bytes], ffmpeg_path: str = "ffmpeg", timeout: float = 600) -> bytes:
+    """Decode a file path, or raw media bytes, to 16 kHz mono s16le PCM through a pipe.
+
+    Bytes are piped to ffmpeg's stdin, which can't seek. MP4/M4A/MOV bytes
+    (Safari records audio/mp4, often with the moov box at the end), and any
+    bytes the piped decode rejects, are decoded from a temp file instead.
+    """
+    if not isinstance(source, bytes):
+        return _run_decode(["-nostdin", "-i", source], None, ffmpeg_path, timeout)
+    if not _is_iso_bmff(source):
+        try:
+            return _run_decode(["-i", "pipe:0"], source, ffmpeg_path, timeout)
+        except RuntimeError as e:
+            logger.info(f"Piped decode failed, retrying from a seekable file: {e}")
+    fd, temp_path = tempfile.mkstemp(dir=TEMP_DIR, suffix=".media")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(source)
+        return _run_decode(["-nostdin", "-i", temp_path], None, ffmpeg_path, timeout)
+    finally:
+        Path(temp_path).unlink(missing_ok=True)
+
+
+def read_wav_pcm(wav_path: Union[str, Path]) -> bytes:
+    """Raw PCM frames of a WAV file."""
+    with wave.open(str(wav_path), "rb") as wav:
+        return wav.readframes(wav.getnframes())
+
+
+def pcm_to_float32(pcm: bytes):
+    """16-bit PCM as the float32 array in [-1, 1] that Whisper models take."""
+    import numpy as np
+    return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+class AudioCache:
+    """16 kHz mono WAVs extracted from media files, keyed by source file version."""
+
+    def __init__(self, directory=AUDIO_CACHE_DIR, max_mb: float = AUDIO_CACHE_MAX_MB):
+        self.store = DiskCache(directory, int(max_mb * 1024 * 1024), suffix=".wav")
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def cached(self, source: str) -> Optional[Path]:
+        """Path of the already extracted WAV for source, or None."""
+        try:
+            return self.store.path(MediaProbeCache.key(source))
+        except OSError:
+            return None
+
+    def extract(self, source: str, ffmpeg_path: str = "ffmpeg", timeout: float = 600) -> Path:
+        """Return the cached WAV for source, running ffmpeg only on a miss.
+
+        The returned file belongs to the cache: read it, don't delete it.
+        """
+        key = MediaProbeCache.key(source)
+        with self._lock(key):
+            path = self.store.path(key)
+            if path is not None:
+                return path
+
+            fd, temp_path = tempfile.mkstemp(dir=self.store.directory, suffix=".tmp")
+            os.close(fd)
+            try:
+                cmd = [ffmpeg_path, "-nostdin", "-y", "-i", source, *_PCM_ARGS,
+                       "-acodec", "pcm_s16le", "-f", "wav", "-loglevel", "error", temp_path]
+                result = run_subprocess(cmd, timeout=timeout)
+                if result.returncode != 0:
+                    raise RuntimeError(
+                        f"ffmpeg could not extract audio: {result.stderr.decode(errors='replace')[:200]}")
+                return self.store.put_file(key, Path(temp_path))
+            finally:
+                Path(temp_path).unlink(missing_ok=True)
+
+    def snapshot(self) -> dict:
+        """Return hit/miss counters and size."""
+        return self.store.snapshot()
+
+
+_cache: Optional[AudioCache] = None
+_cache_lock = threading.Lock()
+
+
+def audio_cache() -> AudioCache:
+    """Get the process-wide extracted-audio cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AudioCache()
+        return _cache
+
+
+def extract_wav(source: str, ffmpeg_path: str = "ffmpeg", timeout: float = 600) -> Path:
+    """Cached 16 kHz mono WAV for a media file (see AudioCache.extract)."""
+    return audio_cache().extract(source, ffmpeg_path, timeout)
+
+
+def copy_wav(source: str, dest: Union[str, Path], ffmpeg_path: str = "ffmpeg") -> str:
+    """Place the cached WAV for source at dest (hard link when possible) for callers that keep it."""
+    wav = extract_wav(source, ffmpeg_path)
+    dest = Path(dest)
+    dest.unlink(missing_ok=True)
+    try:
+        os.link(wav, dest)
+    except OSError:
+        import shutil
+        shutil.copyfile(wav, dest)
+    return str(dest)
+
+
+def source_pcm(source: str, ffmpeg_path: str = "ffmpeg", stream: bool = False) -> bytes:
+    """16 kHz mono s16le PCM for a media file.
+
+    Reads the cached WAV when there is one. Otherwise stream=True decodes
+    through a pipe without writing anything to disk, and stream=False
+    extracts (and caches) the WAV first.
+    """
+    wav = audio_cache().cached(source)
+    if wav is None and stream:
+        return decode_pcm(source, ffmpeg_path)
+    return read_wav_pcm(wav or extract_wav(source, ffmpeg_path))
@@ -0,0 +1,144 @@
+"""Batch mode for the transcription scripts.
+
+video_transcribe_fast.py and video_transcribe_whisperx.py accept several
+files, directories or glob patterns. run_batch() transcribes them in one
+process, so the Whisper model (and WhisperX's alignment and diarization
+models) are loaded once and stay warm in the model registry. While file N
+is being transcribed, file N+1's audio is extracted into the shared audio
+cache on a background thread, so ffmpeg never sits on the critical path.
+
+A manifest (JSON, rewritten after every file) records each file's status,
+outputs and timings. Re-running the same command resumes: files whose
+outputs already exist and are newer than the source are skipped.
+"""
+
+import glob
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+from .utils import atomic_write_json, safe_json_load
+
+logger = logging.getLogger(__name__)
+
+MEDIA_EXTENSIONS = {
+    ".mp4", ".mkv", ".mov", ".avi", ".webm", ".mpeg", ".mpg", ".m4v", ".flv", ".wmv", ".ts",
+    ".mp3", ".wav", ".m4a", ".flac", ".ogg", ".opus", ".aac", ".wma",
+}
+
+# Outputs the scripts write next to their transcripts; never treat these as inputs
+_OUTPUT_MARKERS = ("_audio.wav",)
+
+
+def _is_media(path: Path) -> bool:
+    return path.suffix.lower() in MEDIA_EXTENSIONS and not path.name.endswith(_OUTPUT_MARKERS)
+
+
+def expand_inputs(inputs: Iterable[str], recursive: bool = False) -> List[Path]:
+    """Media files named by paths, directories and glob patterns, deduplicated, in sorted order."""
+    found = {}
+    for item in inputs:
+        path = Path(item).expanduser()
+        if path.is_dir():
+            candidates = path.rglob("*") if recursive else path.iterdir()
+        elif path.exists():
+            candidates = [path]
+        else:
+            candidates = [Path(p) for p in glob.glob(str(path), recursive=recursive)]
+        for candidate in candidates:
+            if candidate.is_file() and _is_media(candidate):
+                found.setdefault(candidate.resolve(), None)
+    return sorted(found)
+
+
+def outputs_complete(source: Path, outputs: List[Path]) -> bool:
+    """True if every output exists, is non-empty and is newer than the source."""
+    try:
+        source_mtime = source.stat().st_mtime
+        return all(p.stat().st_size > 0 and p.stat().st_mtime >= source_mtime for p in outputs)
+    except OSError:
+        return False
+
+
+def is_batch(inputs: List[str]) -> bool:
+    """Whether the command line names more than one file (several args, a directory or a glob)."""
+    return len(inputs) != 1 or not Path(inputs[0]).expanduser().is_file()
+
+
+def run_batch(inputs: List[str], process: Callable[[Path], dict],
+              outputs_for: Callable[[Path], List[Path]], manifest_path: Path,
+              settings: Optional[dict] = None, resume: bool = True, recursive: bool = False,
+              prefetch: bool = True, ffmpeg_path: str = "ffmpeg") -> dict:
+    """Transcribe every media file in inputs with process(path), writing a manifest.
+
+    process runs in this thread (so loaded models are reused); it should
+    write the files outputs_for(path) names and return the transcript dict.
+    A failure is recorded in the manifest and the batch moves on.
+    """
+    from .audio_extract import extract_wav
+
+    files = expand_inputs(inputs, recursive)
+    manifest_path = Path(manifest_path)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    previous = safe_json_load(manifest_path, {}) if resume else {}
+    entries = {e["file"]: e for e in previous.get("files", [])}
+    manifest = {
+        "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "settings": settings or {},
+        "files": [],
+    }
+
+    def save():
+        manifest["updated"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        manifest["totals"] = {status: sum(1 for e in manifest["files"] if e["status"] == status)
+                              for status in ("done", "skipped", "failed")}
+        atomic_write_json(manifest_path, manifest)
+
+    todo = []
+    for path in files:
+        outputs = [Path(p) for p in outputs_for(path)]
+        if resume and outputs_complete(path, outputs):
+            entry = dict(entries.get(str(path), {}), file=str(path), status="skipped",
+                         outputs=[str(p) for p in outputs])
+            manifest["files"].append(entry)
+        else:
+            todo.append(path)
+    skipped = len(files) - len(todo)
+    print(f"\nBatch: {len(files)} file(s), {skipped} already done, {len(todo)} to transcribe\n")
+
+    def extract(path: Path):
+        try:
+            extract_wav(str(path), ffmpeg_path)
+        except Exception as e:  # process() reports the failure with context
+            logger.debug(f"Prefetch failed for {path}: {e}")
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending = pool.submit(extract, todo[0]) if prefetch and todo else None
+        for i, path in enumerate(todo):
+            if pending is not None:
+                pending.result()  # This file's audio is in the cache (or extraction failed)
+            pending = pool.submit(extract, todo[i + 1]) if prefetch and i + 1 < len(todo) else None
+
+            print(f"[{skipped + i + 1}/{len(files)}] {path}")
+            entry = {"file": str(path), "outputs": [str(p) for p in outputs_for(path)]}
+            start = time.perf_counter()
+            try:
+                result = process(path)
+                entry.update(status="done", language=result.get("language"),
+                             duration=result.get("duration"), segments=result.get("segment_count"))
+            except Exception as e:
+                logger.error(f"Batch transcription failed for {path}: {e}")
+                print(f"  Failed: {e}")
+                entry.update(status="failed", error=str(e))
+            entry["seconds"] = round(time.perf_counter() - start, 2)
+            manifest["files"].append(entry)
+            save()
+
+    manifest["files"].sort(key=lambda e: e["file"])
+    save()
+    totals = manifest["totals"]
+    print(f"\nBatch complete: {totals['done']} done, {totals['skipped']} skipped, "
+          f"{totals['failed']} failed. Manifest: {manifest_path}")
+    return manifest
@@ -0,0 +1,255 @@
+"""Parallel chunked transcription of long audio.
+
+A single Whisper call on an hour of audio runs at roughly real time on a
+CPU-only box and uses one process. Chunked mode finds silences with ffmpeg
+`silencedetect`, cuts the audio near every CHUNK_TARGET_SECONDS at the
+closest silence (so no word is split), transcribes the chunks in parallel
+across a process pool, and merges the segments with offset-corrected
+timestamps. The merged result has the same shape as model.transcribe():
+{"text", "language", "segments": [{"start", "end", "text", ...}]}.
+
+Expects the 16 kHz mono pcm_s16le WAV that every transcription path already
+extracts. Each worker process loads the model once and reads only its own
+slice of the WAV. The pool is kept warm for the next long file with the same
+model, and its size is capped so one model copy per worker fits in the
+Whisper RAM budget left over by the models loaded in this process.
+"""
+
+import os
+import re
+import subprocess
+import threading
+import wave
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import List, Optional, Tuple
+
+from .config import (
+    CHUNK_TARGET_SECONDS, CHUNK_MIN_SECONDS, CHUNK_MAX_SECONDS,
+    CHUNKED_MIN_DURATION_SECONDS, CHUNKED_TRANSCRIBE_WORKERS
+)
+
+logger = logging.getLogger(__name__)
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+
+def parse_silencedetect(stderr: str, duration: float) -> List[Tuple[float, float]]:
+    """Parse ffmpeg silencedetect log lines into (start, end) silence intervals."""
+    silences = []
+    start = None
+    for line in stderr.splitlines():
+        m = _SILENCE_START.search(line)
+        if m:
+            start = max(0.0, float(m.group(1)))
+            continue
+        m = _SILENCE_END.search(line)
+        if m and start is not None:
+            silences.append((start, float(m.group(1))))
+            start = None
+    if start is not None:  # Silence running to the end of the file
+        silences.append((start, duration))
+    return silences
+
+
+def detect_silences(audio_path: str, ffmpeg_path: str = "ffmpeg",
+                    noise_db: int = -35, min_silence: float = 0.4) -> List[Tuple[float, float]]:
+    """Find silent stretches in an audio file with ffmpeg silencedetect."""
+    cmd = [
+        ffmpeg_path, "-hide_banner", "-nostats", "-i", audio_path,
+        "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}",
+        "-f", "null", "-"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+    return parse_silencedetect(result.stderr, wav_duration(audio_path))
+
+
+def plan_chunks(duration: float, silences: List[Tuple[float, float]],
+                target: float = CHUNK_TARGET_SECONDS, min_len: float = CHUNK_MIN_SECONDS,
+                max_len: float = CHUNK_MAX_SECONDS) -> List[Tuple[float, float]]:
+    """Split [0, duration] into chunks cut at silence midpoints.
+
+    Each cut is the silence midpoint closest to cursor + target within
+    [cursor + min_len, cursor + max_len]; with no silence in that window the
+    chunk is cut hard at cursor + max_len.
+    """
+    cut_points = sorted((start + end) / 2 for start, end in silences)
+    chunks = []
+    cursor = 0.0
+    while duration - cursor > max_len:
+        window = [c for c in cut_points if cursor + min_len <= c <= cursor + max_len]
+        cut = min(window, key=lambda c: abs(c - (cursor + target))) if window else cursor + max_len
+        chunks.append((cursor, cut))
+        cursor = cut
+    if duration > cursor:
+        chunks.append((cursor, duration))
+    return chunks
+
+
+def merge_chunk_results(chunk_results: List[Tuple[float, dict]]) -> dict:
+    """Merge (offset, result) pairs into one transcript with absolute timestamps."""
+    segments = []
+    texts = []
+    languages = Counter()
+    for offset, result in sorted(chunk_results, key=lambda r: r[0]):
+        text = result.get("text", "").strip()
+        if text:
+            texts.append(text)
+        if result.get("language"):
+            languages[result["language"]] += 1
+        for seg in result.get("segments", []):
+            seg = dict(seg)
+            seg["start"] = seg["start"] + offset
+            seg["end"] = seg["end"] + offset
+            if seg.get("words"):
+                seg["words"] = [dict(w, start=w["start"] + offset, end=w["end"] + offset)
+                                for w in seg["words"]]
+            seg["id"] = len(segments)
+            segments.append(seg)
+    return {
+        "text": " ".join(texts),
+        "language": languages.most_common(1)[0][0] if languages else "unknown",
+        "segments": segments,
+    }
+
+
+def wav_duration(audio_path: str) -> float:
+    """Duration in seconds of a PCM WAV file."""
+    with wave.open(audio_path, "rb") as wav:
+        return wav.getnframes() / wav.getframerate()
+
+
+def _read_wav_slice(audio_path: str, start: float, end: float):
+    """Read [start, end) seconds of a 16-bit mono WAV as float32 samples in [-1, 1]."""
+    import numpy as np
+    with wave.open(audio_path, "rb") as wav:
+        rate = wav.getframerate()
+        wav.setpos(int(start * rate))
+        frames = wav.readframes(int((end - start) * rate))
+    return np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+# ---- worker process side -------------------------------------------------
+
+_worker_model = None
+_worker_backend = None
+
+
+def _init_worker(backend: str, model_name: str, threads: int) -> None:
+    """Load the model once per worker process."""
+    global _worker_model, _worker_backend
+    from .transcription import get_backend
+    _worker_backend = get_backend(backend)
+    _worker_model = _worker_backend.load(model_name, device="cpu", threads=threads)
+
+
+def _transcribe_chunk(audio_path: str, start: float, end: float,
+                      language: Optional[str], word_timestamps: bool) -> Tuple[float, dict]:
+    """Transcribe one chunk in a worker; timestamps are relative to the chunk."""
+    audio = _read_wav_slice(audio_path, start, end)
+    # Chunks are already cut at silences, so skip VAD
+    return start, _worker_backend.transcribe(_worker_model, audio, language, word_timestamps, vad=False)
+
+
+# ---- caller side ---------------------------------------------------------
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_key: Optional[tuple] = None
+_pool_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    """Worker processes to use: CHUNKED_TRANSCRIBE_WORKERS, or one per core."""
+    return CHUNKED_TRANSCRIBE_WORKERS or os.cpu_count() or 1
+
+
+def budget_workers(backend: str, model_name: str, workers: Optional[int] = None) -> int:
+    """default_workers() (or workers), capped so each worker's copy of the model fits the RAM budget."""
+    from .transcription import default_compute_type, model_key
+    from .whisper_models import estimate_model_bytes, whisper_registry
+    compute_type = None if backend == "whisper" else default_compute_type("cpu")
+    model_bytes = estimate_model_bytes(model_key(backend, model_name), compute_type)
+    fits = whisper_registry().free_bytes() // model_bytes
+    return max(1, min(workers or default_workers(), fits))
+
+
+def should_chunk(duration: float, workers: Optional[int] = None) -> bool:
+    """True when a file is long enough, and the box has enough cores, for chunking to pay off."""
+    return duration >= CHUNKED_MIN_DURATION_SECONDS and (workers or default_workers()) > 1
+
+
+def _chunk_pool(backend: str, model_name: str, workers: int) -> ProcessPoolExecutor:
+    """The warm worker pool for this model, replacing one started for another model or size."""
+    global _pool, _pool_key
+    key = (backend, model_name, workers)
+    with _pool_lock:
+        if _pool is not None and _pool_key == key:
+            return _pool
+        if _pool is not None:
+            _pool.shutdown(wait=False)  # Chunks already submitted still finish
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        # spawn: the server and watcher are multi-threaded, so forking them is unsafe
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                                    initializer=_init_worker, initargs=(backend, model_name, threads))
+        _pool_key = key
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next call starts a fresh one."""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is pool:
+            _pool, _pool_key = None, None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_chunk_pool() -> None:
+    """Stop the warm worker pool (and free its models)."""
+    global _pool, _pool_key
+    with _pool_lock:
+        pool, _pool, _pool_key = _pool, None, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def transcribe_chunked(audio_path: str, model_name: str = "base", language: Optional[str] = None,
+                       workers: Optional[int] = None, backend: str = "whisper",
+                       word_timestamps: bool = False, ffmpeg_path: str = "ffmpeg",
+                       progress=None) -> dict:
+    """Transcribe a 16 kHz mono WAV in silence-aligned chunks across the warm process pool.
+
+    workers defaults to budget_workers(). progress(done, total), if given, is
+    called as chunks finish.
+    """
+    duration = wav_duration(audio_path)
+    chunks = plan_chunks(duration, detect_silences(audio_path, ffmpeg_path))
+    workers = workers or budget_workers(backend, model_name)
+    logger.info(f"Chunked transcription: {duration:.0f}s in {len(chunks)} chunks "
+                f"across {min(workers, len(chunks))} worker(s) ({backend}/{model_name})")
+
+    results = []
+    pool = _chunk_pool(backend, model_name, workers)
+    futures = []
+    try:
+        futures = [pool.submit(_transcribe_chunk, audio_path, start, end, language, word_timestamps)
+                   for start, end in chunks]
+        for future in futures:
+            results.append(future.result())
+            if progress:
+                progress(len(results), len(chunks))  # May raise to abort (e.g. job cancelled)
+    except BrokenProcessPool:
+        _discard_pool(pool)  # A worker died (e.g. out of memory); the next file gets a fresh pool
+        raise
+    finally:
+        # On error, drop this file's chunks that have not started instead of waiting for them
+        for future in futures:
+            future.cancel()
+
+    merged = merge_chunk_results(results)
+    merged["chunks"] = len(chunks)
+    return merged
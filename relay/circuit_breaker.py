@@ -0,0 +1,218 @@
+"""Per-provider circuit breakers for external APIs.
+
+When a provider is down every call would otherwise wait for its full
+timeout. A breaker tracks recent outcomes and latency per provider, opens
+after repeated failures (or a high error rate), fails fast while open, and
+lets a single half-open probe through after a cooldown to detect recovery.
+"""
+
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from .config import (
+    BREAKER_FAILURE_THRESHOLD, BREAKER_ERROR_RATE, BREAKER_MIN_REQUESTS,
+    BREAKER_WINDOW_SECONDS, BREAKER_OPEN_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+    def __init__(self, provider: str, retry_after: float):
+        self.provider = provider
+        self.retry_after = max(0.0, retry_after)
+        super().__init__(
+            f"{provider} is unavailable (circuit open after repeated failures); "
+            f"retry in {int(self.retry_after) + 1}s"
+        )
+
+
+class ProviderHTTPError(Exception):
+    """A provider answered with an error status code."""
+
+    def __init__(self, provider: str, status_code: int, body: str = ""):
+        self.provider = provider
+        self.status_code = status_code
+        self.body = body
+        super().__init__(f"{provider} API error: {status_code} - {body[:200]}")
+
+
+class ProviderAuthError(ProviderHTTPError):
+    """A provider rejected the API key or its permissions (401/403)."""
+
+
+def is_provider_failure(status_code: int) -> bool:
+    """True for statuses that mean the provider (not the request) is at fault."""
+    return status_code == 429 or status_code >= 500
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a rolling window of call outcomes."""
+
+    def __init__(self, name: str,
+                 failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 error_rate: float = BREAKER_ERROR_RATE,
+                 min_requests: int = BREAKER_MIN_REQUESTS,
+                 window_seconds: float = BREAKER_WINDOW_SECONDS,
+                 open_seconds: float = BREAKER_OPEN_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._consecutive_failures = 0
+        self._window = deque()  # (timestamp, ok, latency_seconds)
+        self.rejected = 0
+        self.times_opened = 0
+
+    def _prune(self, now: float) -> None:
+        while self._window and now - self._window[0][0] > self.window_seconds:
+            self._window.popleft()
+
+    def _open(self, now: float, reason: str) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+        self.times_opened += 1
+        logger.warning(f"Circuit for {self.name} opened: {reason}")
+
+    @property
+    def state(self) -> str:
+        """Current state, promoting open -> half_open once the cooldown has passed."""
+        with self._lock:
+            if self._state == OPEN and time.time() - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        """Admit a call or raise CircuitOpenError. Every admitted call must be recorded."""
+        now = time.time()
+        with self._lock:
+            if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                logger.info(f"Circuit for {self.name} half-open, sending probe")
+                return
+            self.rejected += 1
+            retry_after = self._opened_at + self.open_seconds - now
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record(self, ok: Optional[bool], latency: float = 0.0) -> None:
+        """Record an admitted call: True success, False failure, None abandoned."""
+        now = time.time()
+        with self._lock:
+            was_probe = self._state == HALF_OPEN and self._probe_in_flight
+            if ok is None:
+                if was_probe:
+                    self._probe_in_flight = False
+                return
+
+            self._window.append((now, ok, latency))
+            self._prune(now)
+
+            if ok:
+                self._consecutive_failures = 0
+                if was_probe:
+                    self._state = CLOSED
+                    self._probe_in_flight = False
+                    self._window.clear()
+                    logger.info(f"Circuit for {self.name} closed, probe succeeded")
+                return
+
+            self._consecutive_failures += 1
+            if was_probe:
+                self._open(now, "half-open probe failed")
+                return
+            if self._state != CLOSED:
+                return
+            if self._consecutive_failures >= self.failure_threshold:
+                self._open(now, f"{self._consecutive_failures} consecutive failures")
+                return
+            failures = sum(1 for _, success, _ in self._window if not success)
+            if len(self._window) >= self.min_requests and failures / len(self._window) >= self.error_rate:
+                self._open(now, f"error rate {failures}/{len(self._window)}")
+
+    @contextmanager
+    def guard(self, cancelled: Optional[threading.Event] = None):
+        """Wrap one provider call: fail fast while open, then record its outcome.
+
+        Exceptions carrying a status_code (ProviderHTTPError, openai.APIStatusError)
+        only count as failures for provider-side statuses. Errors raised after
+        `cancelled` is set, and generator shutdown, release the call unrecorded.
+        """
+        self.before_call()
+        started = time.monotonic()
+        outcome = None
+        try:
+            yield
+            outcome = True
+        except Exception as e:
+            status_code = getattr(e, "status_code", None)
+            if isinstance(status_code, int):
+                outcome = not is_provider_failure(status_code)
+            elif cancelled is None or not cancelled.is_set():
+                outcome = False
+            raise
+        finally:
+            self.record(outcome, time.monotonic() - started)
+
+    def snapshot(self) -> dict:
+        """Return state, error rate and latency as a JSON-serialisable dict."""
+        state = self.state
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            calls = len(self._window)
+            failures = sum(1 for _, ok, _ in self._window if not ok)
+            latencies = sorted(latency for _, _, latency in self._window)
+            snapshot = {
+                "state": state,
+                "calls_in_window": calls,
+                "error_rate": round(failures / calls, 3) if calls else 0.0,
+                "consecutive_failures": self._consecutive_failures,
+                "avg_latency_ms": round(sum(latencies) / calls * 1000, 1) if calls else None,
+                "p95_latency_ms": round(latencies[min(calls - 1, int(0.95 * calls))] * 1000, 1)
+                if calls else None,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+            }
+            if state != CLOSED:
+                snapshot["retry_after"] = round(max(0.0, self._opened_at + self.open_seconds - now), 1)
+            return snapshot
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """Get (or create) the breaker for a provider name, e.g. "NVIDIA" or "Edge TTS"."""
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(provider)
+        return _breakers[provider]
+
+
+def breaker_snapshot() -> dict:
+    """Get the state of every provider breaker used so far."""
+    with _breakers_lock:
+        items = list(_breakers.items())
+    return {name: breaker.snapshot() for name, breaker in items}
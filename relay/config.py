@@ -1,6 +1,7 @@
 """Configuration constants and paths for the relay system."""
 
 import os
+import json
 from pathlib import Path
 
 # Base directories
@@ -58,6 +59,135 @@ PROCESS_CHECK_INTERVAL = 0.5  # seconds
 # Session caching
 SESSION_CACHE_TTL_SECONDS = 30
 
+# External provider HTTP pools (NVIDIA NIM, OpenAI, ElevenLabs)
+PROVIDER_POOL_CONNECTIONS = int(os.environ.get("RELAY_PROVIDER_POOL_CONNECTIONS", "8"))  # hosts per session
+PROVIDER_POOL_MAXSIZE = int(os.environ.get("RELAY_PROVIDER_POOL_MAXSIZE", "16"))  # keep-alive sockets per host
+PROVIDER_CONNECT_TIMEOUT = float(os.environ.get("RELAY_PROVIDER_CONNECT_TIMEOUT", "10"))  # seconds
+PROVIDER_READ_TIMEOUT = float(os.environ.get("RELAY_PROVIDER_READ_TIMEOUT", "300"))  # seconds
+
+# Watcher asyncio runner for external-model jobs (NVIDIA NIM, OpenAI)
+# These jobs only wait on the network, so they are multiplexed on one event loop
+# with their own limit instead of holding one of the watcher's project slots
+MAX_PARALLEL_EXTERNAL_JOBS = int(os.environ.get("RELAY_MAX_PARALLEL_EXTERNAL_JOBS", "32"))
+EXTERNAL_ASYNC_ENABLED = os.environ.get("RELAY_EXTERNAL_ASYNC", "1") == "1"  # 0 = old thread-per-job path
+
+# Hedged requests for external model calls (opt-in globally or per request with "hedge": true)
+HEDGE_ENABLED = os.environ.get("RELAY_HEDGE_ENABLED", "0") == "1"
+HEDGE_DELAY_SECONDS = float(os.environ.get("RELAY_HEDGE_DELAY_SECONDS", "0"))  # 0 = observed p95 first token
+HEDGE_MIN_DELAY_SECONDS = 1.0
+HEDGE_MAX_DELAY_SECONDS = 10.0  # Also used until enough samples exist for a p95
+# Read timeout for racing attempts made through the OpenAI SDK: its httpx client can't be
+# aborted before response headers, so this bounds how long a cancelled loser can linger
+HEDGE_ATTEMPT_READ_TIMEOUT_SECONDS = float(os.environ.get("RELAY_HEDGE_ATTEMPT_READ_TIMEOUT", "30"))
+HEDGE_MIN_SAMPLES = 20
+# Model to race against a slow primary, e.g. {"meta/llama-3.3-70b-instruct": "meta/llama-3.1-8b-instruct"}
+# Models not listed are hedged against themselves
+HEDGE_FALLBACK_MODELS = json.loads(os.environ.get("RELAY_HEDGE_FALLBACK_MODELS", "{}"))
+
+# Per-provider circuit breakers (NVIDIA, OpenAI, ElevenLabs, Edge TTS)
+BREAKER_FAILURE_THRESHOLD = 5  # Consecutive failures that open the circuit
+BREAKER_ERROR_RATE = 0.5  # Error rate within the window that opens the circuit
+BREAKER_MIN_REQUESTS = 10  # Calls needed in the window before the error rate counts
+BREAKER_WINDOW_SECONDS = 120
+BREAKER_OPEN_SECONDS = 30  # Fail fast this long, then allow one half-open probe
+
+# Whisper model registry (shared by whisper, video and YouTube transcription)
+WHISPER_RAM_BUDGET_MB = float(os.environ.get("RELAY_WHISPER_RAM_BUDGET_MB", "4096"))  # LRU-evict beyond this
+# Models to load at server start, e.g. "base,small"
+WHISPER_PRELOAD_MODELS = [m.strip() for m in os.environ.get("RELAY_WHISPER_PRELOAD", "").split(",") if m.strip()]
+
+# Transcription backends (relay/transcription.py): "auto" picks the fastest one installed
+TRANSCRIBE_BACKEND = os.environ.get("RELAY_TRANSCRIBE_BACKEND", "auto")  # auto | faster-whisper | whisperx | whisper
+TRANSCRIBE_BACKEND_ORDER = ["faster-whisper", "whisperx", "whisper"]  # Fastest first on CPU
+WHISPER_CPU_COMPUTE_TYPE = os.environ.get("RELAY_WHISPER_COMPUTE_TYPE", "int8")  # CTranslate2 backends on CPU
+
+# Chunked transcription: long audio is cut at silences and transcribed across a process pool
+CHUNKED_MIN_DURATION_SECONDS = float(os.environ.get("RELAY_CHUNKED_MIN_DURATION", "600"))  # Shorter files: one call
+CHUNKED_TRANSCRIBE_WORKERS = int(os.environ.get("RELAY_CHUNKED_WORKERS", "0"))  # 0 = one per CPU core
+CHUNK_TARGET_SECONDS = 120
+CHUNK_MIN_SECONDS = 30
+CHUNK_MAX_SECONDS = 180  # Hard cut if no silence is found before this
+
+# Streaming speech-to-text (/api/stt/stream/*): sliding-window re-decoding on a warm model
+STT_STREAM_MODEL = os.environ.get("RELAY_STT_STREAM_MODEL", "base")
+STT_STREAM_STEP_SECONDS = float(os.environ.get("RELAY_STT_STREAM_STEP", "1.0"))  # New audio before re-decoding
+STT_STREAM_WINDOW_SECONDS = 15  # Trim decoded audio at a committed word once the window is longer
+STT_STREAM_MAX_WINDOW_SECONDS = 30  # Force-commit and trim if nothing has been committed by then
+STT_STREAM_IDLE_SECONDS = 60  # Sessions with no chunks for this long are closed
+STT_STREAM_MAX_SESSIONS = int(os.environ.get("RELAY_STT_STREAM_MAX_SESSIONS", "8"))
+
+# Video frames attached to chat jobs: the most informative frames across the whole video
+VIDEO_KEYFRAME_COUNT = int(os.environ.get("RELAY_VIDEO_KEYFRAMES", "30"))
+VIDEO_KEYFRAME_MODE = os.environ.get("RELAY_VIDEO_KEYFRAME_MODE", "scene")  # scene | dhash | even
+VIDEO_KEYFRAME_MAX_SAMPLES = 600  # Sample rate drops below 1 fps for longer videos
+VIDEO_KEYFRAME_MIN_DISTANCE = 6  # dHash bits (of 64) two kept frames must differ by
+VIDEO_FRAME_MAX_WIDTH = int(os.environ.get("RELAY_VIDEO_FRAME_WIDTH", "1024"))
+VIDEO_FRAME_FORMAT = os.environ.get("RELAY_VIDEO_FRAME_FORMAT", "jpeg")  # jpeg | webp
+
+# On-disk caches (size-bounded LRU, shared by server, watcher and scripts)
+CACHE_DIR = RELAY_DIR / ".cache"
+TRANSCRIPT_CACHE_DIR = CACHE_DIR / "transcripts"
+TRANSCRIPT_CACHE_MAX_MB = float(os.environ.get("RELAY_TRANSCRIPT_CACHE_MB", "256"))
+AUDIO_CACHE_DIR = CACHE_DIR / "audio"  # 16 kHz mono WAVs extracted for transcription (~115 MB per hour)
+AUDIO_CACHE_MAX_MB = float(os.environ.get("RELAY_AUDIO_CACHE_MB", "1024"))
+# Decode short audio through a pipe into the model instead of writing a cached WAV
+AUDIO_STREAM_TO_MODEL = os.environ.get("RELAY_AUDIO_STREAM", "").lower() in ("1", "true", "yes")
+MEDIA_PROBE_CACHE_DIR = CACHE_DIR / "probe"  # ffprobe summaries keyed by (path, size, mtime)
+MEDIA_PROBE_CACHE_MAX_MB = 8
+# YouTube downloads (youtube_* in SCREENSHOTS_DIR), keyed by video id + format, LRU-evicted beyond this
+YOUTUBE_CACHE_MAX_MB = float(os.environ.get("RELAY_YOUTUBE_CACHE_MB", "4096"))
+
+# Synthesized speech (Edge, Piper, ElevenLabs) keyed by engine, voice, model and normalized text
+TTS_CACHE_DIR = CACHE_DIR / "tts"
+TTS_CACHE_MAX_MB = float(os.environ.get("RELAY_TTS_CACHE_MB", "512"))
+# Piper TTS: one long-lived worker per voice keeps the ONNX model loaded (relay/piper_pool.py)
+PIPER_VOICES_DIR = RELAY_DIR / ".piper-voices"
+PIPER_PYTHON = os.environ.get("RELAY_PIPER_PYTHON", "")  # Interpreter with piper-tts installed (default: this one)
+PIPER_MAX_WORKERS = int(os.environ.get("RELAY_PIPER_MAX_WORKERS", "4"))
+PIPER_IDLE_SECONDS = float(os.environ.get("RELAY_PIPER_IDLE_SECONDS", "600"))  # Stop workers unused this long
+# A worker silent this long (model load or next audio frame) is killed, like the CLI's 30 s timeout
+PIPER_READ_TIMEOUT_SECONDS = float(os.environ.get("RELAY_PIPER_READ_TIMEOUT", "30"))
+# Voices to start at server start, e.g. "amy,ryan"
+PIPER_PRELOAD_VOICES = [v.strip() for v in os.environ.get("RELAY_PIPER_PRELOAD", "").split(",") if v.strip()]
+# /api/tts/stream: sentences synthesized ahead of playback in parallel
+TTS_STREAM_WORKERS = int(os.environ.get("RELAY_TTS_STREAM_WORKERS", "2"))
+TTS_STREAM_MAX_SENTENCE_CHARS = 300  # Longer sentences are split at commas, then spaces
+# Voice lists for /api/tts/voices and /api/elevenlabs/voices: served from cache, refreshed in the background once stale
+VOICE_CATALOG_DIR = CACHE_DIR / "voices"
+VOICE_CATALOG_TTL_SECONDS = {
+    "edge": float(os.environ.get("RELAY_EDGE_VOICES_TTL", "86400")),  # Edge's list changes a few times a year
+    "elevenlabs": float(os.environ.get("RELAY_ELEVENLABS_VOICES_TTL", "3600")),  # Picks up newly cloned voices
+}
+
+# OCR (/api/ocr, /api/ocr/batch): one Tesseract pass per image across a process pool, results cached by image hash
+OCR_CACHE_DIR = CACHE_DIR / "ocr"
+OCR_CACHE_MAX_MB = 64
+OCR_WORKERS = int(os.environ.get("RELAY_OCR_WORKERS", "0"))  # 0 = one per CPU core
+OCR_TARGET_DPI = 300  # "dpi" preprocessing: images declaring a lower DPI are upscaled to this
+OCR_PDF_DPI = 300  # Resolution PDF pages are rendered at for OCR
+OCR_MAX_IMAGES = 200  # Images or PDF pages per batch request
+
+# Rendered PDFs (/api/pdf/generate) keyed by content, title and stylesheet version
+PDF_CACHE_DIR = CACHE_DIR / "pdf"
+PDF_CACHE_MAX_MB = float(os.environ.get("RELAY_PDF_CACHE_MB", "256"))
+
+# SQLite browser (/api/sqlite/*): pooled read-only connections, paged or NDJSON-streamed results
+SQLITE_POOL_SIZE = 4  # Idle connections kept per database
+SQLITE_POOL_MAX_DATABASES = 8
+SQLITE_POOL_IDLE_SECONDS = 300
+SQLITE_QUERY_TIMEOUT_SECONDS = float(os.environ.get("RELAY_SQLITE_TIMEOUT", "10"))  # Per page
+SQLITE_STREAM_TIMEOUT_SECONDS = 120  # Whole NDJSON stream
+SQLITE_PAGE_ROWS = 200  # Default page size
+SQLITE_MAX_PAGE_ROWS = 5000
+SQLITE_MAX_STREAM_ROWS = int(os.environ.get("RELAY_SQLITE_MAX_STREAM_ROWS", "1000000"))
+
+# Background media jobs ({"async": true} on whisper, video, YouTube, OCR, PDF and image endpoints)
+MEDIA_MAX_WORKERS = int(os.environ.get("RELAY_MEDIA_MAX_WORKERS", "4"))
+# Concurrent jobs per type; CPU-heavy transcription stays serial. Override with JSON in RELAY_MEDIA_JOB_LIMITS
+MEDIA_JOB_LIMITS = {"whisper": 1, "video": 1, "youtube": 2, "ocr": 2, "pdf": 2, "image": 4}
+MEDIA_JOB_LIMITS.update(json.loads(os.environ.get("RELAY_MEDIA_JOB_LIMITS", "{}")))
+MEDIA_JOB_RETENTION_SECONDS = 3600  # Keep finished job results this long
+
 # Old job cleanup configuration
 OLD_JOB_CLEANUP_ENABLED = True
 OLD_JOB_CLEANUP_INTERVAL_SECONDS = 3600  # Run cleanup every hour
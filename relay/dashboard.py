@@ -7,7 +7,6 @@ from typing import Dict, Any, Optional, List
 
 # Dashboard output directory
 DASHBOARD_DIR = Path("/opt/clawd/projects/.preview/dashboards")
-DASHBOARD_DIR.mkdir(parents=True, exist_ok=True)
 
 # Cost estimates for various operations
 COST_ESTIMATES = {
@@ -29,21 +28,27 @@ COST_ESTIMATES = {
 }
 
 
-def estimate_cost(operation_type: str, params: dict) -> str:
-    """Estimate cost for an operation."""
+def estimate_cost_usd(operation_type: str, params: dict) -> float:
+    """Estimated cost of an operation in US dollars (0.0 for local/free ones)."""
     if operation_type == "image_generation":
         quality = params.get("quality", "standard")
         size = params.get("size", "1024x1024")
         key = f"openai_{quality}_{size.split('x')[0]}"
-        cost = COST_ESTIMATES["image_generation"].get(key, 0.08)
-        return f"~${cost:.2f}"
+        return COST_ESTIMATES["image_generation"].get(key, 0.08)
     elif operation_type == "tts":
-        provider = params.get("provider", "edge_tts")
-        if provider == "elevenlabs":
+        if params.get("provider", "edge_tts") == "elevenlabs":
             chars = len(params.get("text", ""))
-            cost = (chars / 1000) * COST_ESTIMATES["tts"]["elevenlabs_per_1k_chars"]
-            return f"~${cost:.3f}"
-        return "Free"
+            return (chars / 1000) * COST_ESTIMATES["tts"]["elevenlabs_per_1k_chars"]
+    return 0.0
+
+
+def estimate_cost(operation_type: str, params: dict) -> str:
+    """Estimate cost for an operation."""
+    cost = estimate_cost_usd(operation_type, params)
+    if operation_type == "image_generation":
+        return f"~${cost:.2f}"
+    elif operation_type == "tts" and params.get("provider", "edge_tts") == "elevenlabs":
+        return f"~${cost:.3f}"
     return "Free"
 
 
@@ -69,6 +74,7 @@ def generate_dashboard(
     dashboard_id = f"{operation_type}-{uuid.uuid4().hex[:8]}"
     filename = f"{dashboard_id}.html"
     filepath = DASHBOARD_DIR / filename
+    DASHBOARD_DIR.mkdir(parents=True, exist_ok=True)
 
     # Status indicator colors
     status_colors = {
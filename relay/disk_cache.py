@@ -0,0 +1,181 @@
+"""Size-bounded, least-recently-used cache of blobs on disk.
+
+Each entry is one file named by a hash of its key, written atomically
+(temp file + rename) so the server and watcher can share a directory.
+Reads touch the file's mtime; when the directory grows past max_bytes the
+oldest entries are deleted. The in-memory index is rebuilt from the
+directory on start, so the cache survives restarts, and entries another
+process writes later are picked up the first time they are looked up.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(obj):
+    """Serialise numpy scalars/arrays that model outputs sometimes contain."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
+
+
+class DiskCache:
+    """Thread-safe LRU file cache with hit/miss/eviction counters."""
+
+    def __init__(self, directory: Path, max_bytes: int, suffix: str = ".bin"):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # filename -> size, oldest first
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load_index()
+
+    def _load_index(self) -> None:
+        entries = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self._bytes += size
+
+    def _filename(self, key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()[:40] + self.suffix
+
+    def path(self, key: str) -> Optional[Path]:
+        """Return the entry's file path on a hit (marking it recently used), else None."""
+        name = self._filename(key)
+        path = self.directory / name
+        try:
+            size = path.stat().st_size
+        except OSError:
+            size = None
+        with self._lock:
+            if size is None:
+                if name in self._index:
+                    self._bytes -= self._index.pop(name)  # Evicted by another process
+                self.misses += 1
+                return None
+            # Written by another process (watcher, scripts) since the index was built
+            self._bytes += size - self._index.pop(name, 0)
+            self._index[name] = size
+            self._evict(keep=name)
+            self.hits += 1
+        try:
+            os.utime(path, (time.time(), time.time()))
+        except OSError:
+            pass
+        return path
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached bytes for key, or None."""
+        path = self.path(key)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except OSError:
+            return None
+
+    def put(self, key: str, data: bytes) -> Path:
+        """Store bytes under key, evicting least recently used entries beyond max_bytes."""
+        name = self._filename(key)
+        path = self.directory / name
+        temp_fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(temp_fd, "wb") as f:
+                f.write(data)
+            os.rename(temp_path, path)
+        except Exception:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+        self._register(name, len(data))
+        return path
+
+    def put_file(self, key: str, source: Path) -> Path:
+        """Move an existing file (on the same filesystem) into the cache under key."""
+        name = self._filename(key)
+        path = self.directory / name
+        size = os.path.getsize(source)
+        os.replace(source, path)
+        self._register(name, size)
+        return path
+
+    def _register(self, name: str, size: int) -> None:
+        """Index a newly written entry and evict beyond max_bytes."""
+        with self._lock:
+            self._bytes -= self._index.pop(name, 0)
+            self._index[name] = size
+            self._bytes += size
+            self._evict(keep=name)
+
+    def _evict(self, keep: str) -> None:
+        """Delete oldest entries until within max_bytes. Lock held."""
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            name = next(n for n in self._index if n != keep)
+            self._bytes -= self._index.pop(name)
+            self.evictions += 1
+            try:
+                (self.directory / name).unlink()
+            except OSError:
+                pass
+
+    def get_json(self, key: str) -> Optional[Any]:
+        """Return the cached JSON value for key, or None."""
+        data = self.get(key)
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def put_json(self, key: str, value: Any) -> Path:
+        """Store a JSON-serialisable value under key."""
+        return self.put(key, json.dumps(value, default=_json_default).encode())
+
+    def delete(self, key: str) -> None:
+        """Remove an entry if present."""
+        name = self._filename(key)
+        with self._lock:
+            self._bytes -= self._index.pop(name, 0)
+        try:
+            (self.directory / name).unlink()
+        except OSError:
+            pass
+
+    def snapshot(self) -> dict:
+        """Return size and hit/miss counters as a JSON-serialisable dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "size_mb": round(self._bytes / (1024 * 1024), 2),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,148 @@
+"""Asyncio runner that multiplexes external-model jobs on one thread.
+
+An external API job (NVIDIA NIM, OpenAI) spends its whole life waiting on a
+streaming HTTP response. Running each one on a watcher worker thread ties up
+a project slot for minutes while the CPU sits idle, so cheap chats queue
+behind long Claude CLI runs. The runner owns an event loop on a dedicated
+thread, a shared aiohttp session with per-host keep-alive pools, and a
+semaphore sized to MAX_PARALLEL_EXTERNAL_JOBS.
+
+submit() is thread-safe and returns a concurrent.futures.Future, so the
+watcher loop tracks async jobs exactly like its thread-pool futures.
+"""
+
+import asyncio
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Optional
+
+from .config import (
+    MAX_PARALLEL_EXTERNAL_JOBS, PROVIDER_POOL_MAXSIZE,
+    PROVIDER_CONNECT_TIMEOUT, PROVIDER_READ_TIMEOUT
+)
+from .providers import provider_stats
+
+logger = logging.getLogger(__name__)
+
+
+def aiohttp_available() -> bool:
+    """True when aiohttp can be imported (it ships with edge-tts)."""
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _trace_config():
+    """Build an aiohttp TraceConfig feeding connect/TTFB timings into provider stats."""
+    import aiohttp
+
+    async def on_request_start(session, ctx, params):
+        ctx.stats = provider_stats(str(params.url))
+        ctx.sent = time.perf_counter()
+
+    async def on_connection_create_start(session, ctx, params):
+        ctx.connect_started = time.perf_counter()
+
+    async def on_connection_create_end(session, ctx, params):
+        ctx.stats.record_connect(time.perf_counter() - ctx.connect_started)
+
+    async def on_request_end(session, ctx, params):
+        # Fires once the response headers are in, i.e. TTFB
+        ctx.stats.record_response(time.perf_counter() - ctx.sent)
+
+    async def on_request_exception(session, ctx, params):
+        ctx.stats.record_error()
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_connection_create_start.append(on_connection_create_start)
+    trace.on_connection_create_end.append(on_connection_create_end)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+    return trace
+
+
+class AsyncJobRunner:
+    """Event loop thread running up to max_jobs coroutines concurrently."""
+
+    def __init__(self, max_jobs: int = MAX_PARALLEL_EXTERNAL_JOBS):
+        self.max_jobs = max_jobs
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="ExternalJobRunner", daemon=True)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.active = 0
+        self.completed = 0
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def start(self) -> "AsyncJobRunner":
+        """Start the loop thread."""
+        self._thread.start()
+        logger.info(f"External job runner started (max {self.max_jobs} concurrent)")
+        return self
+
+    def _get_session(self):
+        """Get the shared aiohttp session; must be called on the loop thread."""
+        if self._session is None or self._session.closed:
+            import aiohttp
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_jobs * 2,
+                                               limit_per_host=PROVIDER_POOL_MAXSIZE),
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=PROVIDER_CONNECT_TIMEOUT,
+                                              sock_read=PROVIDER_READ_TIMEOUT),
+                trace_configs=[_trace_config()],
+            )
+        return self._session
+
+    async def _limited(self, job: Callable[..., Awaitable], args: tuple):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_jobs)
+        async with self._semaphore:
+            with self._lock:
+                self.active += 1
+            try:
+                return await job(self._get_session(), *args)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+
+    def submit(self, job: Callable[..., Awaitable], *args) -> Future:
+        """Schedule job(session, *args) on the loop. Jobs beyond max_jobs wait their turn."""
+        with self._lock:
+            self.submitted += 1
+        return asyncio.run_coroutine_threadsafe(self._limited(job, args), self.loop)
+
+    def snapshot(self) -> dict:
+        """Return job counters as a JSON-serialisable dict."""
+        with self._lock:
+            return {
+                "max_concurrent": self.max_jobs,
+                "active": self.active,
+                "waiting": self.submitted - self.completed - self.active,
+                "completed": self.completed,
+            }
+
+    def stop(self, timeout: float = 10) -> None:
+        """Close the HTTP session and stop the loop thread."""
+        async def _close():
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+
+        if not self._thread.is_alive():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(_close(), self.loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Error closing external runner session: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
@@ -0,0 +1,322 @@
+"""Hedged requests: race a duplicate call when the first one is slow to start.
+
+Tail latency on hosted model endpoints is erratic - most calls produce their
+first token within a second, a few hang for a minute. A hedged stream starts
+the primary call, and if no token has arrived after the hedge delay (the
+observed p95 first-token latency, or a configured fixed delay) it starts a
+duplicate against the same or a fallback model. Whichever attempt produces a
+token first wins; the other is cancelled.
+
+HedgedStream races threads over blocking iterators; AsyncHedgedStream races
+asyncio tasks over async iterators for the watcher's event-loop runner.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+import logging
+from collections import deque
+from typing import AsyncIterable, Callable, Dict, Iterable, Optional
+
+from .config import (
+    HEDGE_ENABLED, HEDGE_DELAY_SECONDS, HEDGE_MIN_DELAY_SECONDS,
+    HEDGE_MAX_DELAY_SECONDS, HEDGE_MIN_SAMPLES, HEDGE_FALLBACK_MODELS
+)
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class HedgeStats:
+    """First-token latency samples and hedge counters for one model."""
+
+    def __init__(self, sample_size: int = 200):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self._first_token_samples = deque(maxlen=sample_size)
+
+    def record(self, first_token_seconds: Optional[float], fired: bool, won: bool) -> None:
+        """Record one finished race."""
+        with self._lock:
+            self.requests += 1
+            self.hedges_fired += int(fired)
+            self.hedges_won += int(won)
+            if first_token_seconds is not None:
+                self._first_token_samples.append(first_token_seconds)
+
+    def first_token_percentile(self, percentile: float) -> Optional[float]:
+        """Return a first-token latency percentile in seconds once enough samples exist."""
+        with self._lock:
+            samples = sorted(self._first_token_samples)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> dict:
+        """Return the counters as a JSON-serialisable dict."""
+        p95 = self.first_token_percentile(95)
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges_fired": self.hedges_fired,
+                "hedges_won": self.hedges_won,
+                "p95_first_token_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            }
+
+
+_stats: Dict[str, HedgeStats] = {}
+_stats_lock = threading.Lock()
+
+
+def hedge_stats(key: str) -> HedgeStats:
+    """Get (or create) the hedge stats for a model key."""
+    with _stats_lock:
+        if key not in _stats:
+            _stats[key] = HedgeStats()
+        return _stats[key]
+
+
+def hedge_snapshot() -> dict:
+    """Get hedge counters for every model raced so far."""
+    with _stats_lock:
+        items = list(_stats.items())
+    return {key: stats.snapshot() for key, stats in items}
+
+
+def hedge_delay(key: str) -> float:
+    """Seconds to wait for a first token before firing the hedge.
+
+    Uses HEDGE_DELAY_SECONDS when set, otherwise the observed p95 first-token
+    latency for this model clamped to [HEDGE_MIN_DELAY_SECONDS,
+    HEDGE_MAX_DELAY_SECONDS]. Until enough samples exist the maximum is used.
+    """
+    if HEDGE_DELAY_SECONDS > 0:
+        return HEDGE_DELAY_SECONDS
+    p95 = hedge_stats(key).first_token_percentile(95)
+    if p95 is None:
+        return HEDGE_MAX_DELAY_SECONDS
+    return min(HEDGE_MAX_DELAY_SECONDS, max(HEDGE_MIN_DELAY_SECONDS, p95))
+
+
+def resolve_hedge_model(model: str, requested, hedge_model: str = "") -> Optional[str]:
+    """Pick the model to hedge against, or None when hedging is off for this call.
+
+    requested is the per-call opt-in flag (None falls back to HEDGE_ENABLED).
+    """
+    enabled = HEDGE_ENABLED if requested is None else bool(requested)
+    if not enabled:
+        return None
+    return hedge_model or HEDGE_FALLBACK_MODELS.get(model, model)
+
+
+class HedgeAttempt:
+    """One racing call. Passed to the start function so it can be cancelled."""
+
+    def __init__(self, index: int, model: str):
+        self.index = index
+        self.model = model
+        self.cancelled = threading.Event()
+        self._closers = []
+        self._lock = threading.Lock()
+
+    def on_cancel(self, closer: Callable[[], None]) -> None:
+        """Register a callback (e.g. response.close) that aborts in-flight I/O."""
+        with self._lock:
+            if not self.cancelled.is_set():
+                self._closers.append(closer)
+                return
+        closer()
+
+    def cancel(self) -> None:
+        """Cancel the attempt and run its registered closers."""
+        with self._lock:
+            if self.cancelled.is_set():
+                return
+            self.cancelled.set()
+            closers, self._closers = self._closers, []
+        for closer in closers:
+            try:
+                closer()
+            except Exception:
+                pass
+
+
+def _run_attempt(start, attempt: HedgeAttempt, events: queue.Queue) -> None:
+    """Thread body: push each chunk of an attempt onto the shared event queue."""
+    try:
+        for chunk in start(attempt):
+            if attempt.cancelled.is_set():
+                return
+            if chunk:
+                events.put((attempt.index, chunk))
+        events.put((attempt.index, _DONE))
+    except Exception as e:
+        # A cancelled attempt usually fails when its connection is closed under it
+        if not attempt.cancelled.is_set():
+            events.put((attempt.index, e))
+
+
+class HedgedStream:
+    """Iterate the text chunks of whichever attempt produces a token first.
+
+    start(attempt) must return an iterable of text chunks for attempt.model.
+    With hedge_model None only the primary runs, but first-token latency is
+    still recorded so the p95 delay is learned before hedging is switched on.
+    """
+
+    def __init__(self, start: Callable[[HedgeAttempt], Iterable[str]], model: str,
+                 hedge_model: Optional[str] = None, delay: Optional[float] = None):
+        self.start = start
+        self.model = model
+        self.hedge_model = hedge_model
+        self.delay = delay if delay is not None else hedge_delay(model)
+        self.hedge_fired = False
+        self.winner: Optional[str] = None
+        self.first_token_seconds: Optional[float] = None
+        self._attempts = []
+        self._events: queue.Queue = queue.Queue()
+
+    def _launch(self, model: str) -> None:
+        attempt = HedgeAttempt(len(self._attempts), model)
+        self._attempts.append(attempt)
+        threading.Thread(target=_run_attempt, args=(self.start, attempt, self._events),
+                         name=f"hedge-{attempt.index}", daemon=True).start()
+
+    def __iter__(self):
+        started = time.monotonic()
+        self._launch(self.model)
+        winner = None
+        errors = []
+        try:
+            while True:
+                timeout = None
+                if winner is None and self.hedge_model and not self.hedge_fired:
+                    timeout = max(0.0, started + self.delay - time.monotonic())
+                try:
+                    index, item = self._events.get(timeout=timeout)
+                except queue.Empty:
+                    self.hedge_fired = True
+                    logger.info(f"No first token from {self.model} after {self.delay:.1f}s, "
+                                f"hedging with {self.hedge_model}")
+                    self._launch(self.hedge_model)
+                    continue
+
+                if winner is not None and index != winner.index:
+                    continue  # Late output from a cancelled loser
+
+                if isinstance(item, Exception):
+                    if winner is not None:
+                        raise item
+                    errors.append(item)
+                    if len(errors) == len(self._attempts):
+                        raise errors[0]
+                    continue  # The other attempt may still win
+
+                if winner is None:
+                    winner = self._attempts[index]
+                    self.winner = winner.model
+                    self.first_token_seconds = time.monotonic() - started
+                    for attempt in self._attempts:
+                        if attempt is not winner:
+                            attempt.cancel()
+
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            for attempt in self._attempts:
+                attempt.cancel()
+            hedge_stats(self.model).record(
+                self.first_token_seconds, self.hedge_fired,
+                won=winner is not None and winner.index > 0)
+
+
+class AsyncHedgedStream:
+    """Async counterpart of HedgedStream: attempts are tasks on the running loop.
+
+    start(attempt) must return an async iterable of text chunks. Cancelling an
+    attempt cancels its task, so the losing request is torn down in place.
+    """
+
+    def __init__(self, start: Callable[[HedgeAttempt], AsyncIterable[str]], model: str,
+                 hedge_model: Optional[str] = None, delay: Optional[float] = None):
+        self.start = start
+        self.model = model
+        self.hedge_model = hedge_model
+        self.delay = delay if delay is not None else hedge_delay(model)
+        self.hedge_fired = False
+        self.winner: Optional[str] = None
+        self.first_token_seconds: Optional[float] = None
+        self._attempts = []
+        self._events: Optional[asyncio.Queue] = None
+
+    async def _run(self, attempt: HedgeAttempt) -> None:
+        try:
+            async for chunk in self.start(attempt):
+                if chunk:
+                    self._events.put_nowait((attempt.index, chunk))
+            self._events.put_nowait((attempt.index, _DONE))
+        except Exception as e:
+            if not attempt.cancelled.is_set():
+                self._events.put_nowait((attempt.index, e))
+
+    def _launch(self, model: str) -> None:
+        attempt = HedgeAttempt(len(self._attempts), model)
+        self._attempts.append(attempt)
+        task = asyncio.ensure_future(self._run(attempt))
+        attempt.on_cancel(task.cancel)
+
+    async def __aiter__(self):
+        self._events = asyncio.Queue()
+        started = time.monotonic()
+        self._launch(self.model)
+        winner = None
+        errors = []
+        try:
+            while True:
+                if winner is None and self.hedge_model and not self.hedge_fired:
+                    timeout = max(0.0, started + self.delay - time.monotonic())
+                    try:
+                        index, item = await asyncio.wait_for(self._events.get(), timeout)
+                    except asyncio.TimeoutError:
+                        self.hedge_fired = True
+                        logger.info(f"No first token from {self.model} after {self.delay:.1f}s, "
+                                    f"hedging with {self.hedge_model}")
+                        self._launch(self.hedge_model)
+                        continue
+                else:
+                    index, item = await self._events.get()
+
+                if winner is not None and index != winner.index:
+                    continue  # Late output from a cancelled loser
+
+                if isinstance(item, Exception):
+                    if winner is not None:
+                        raise item
+                    errors.append(item)
+                    if len(errors) == len(self._attempts):
+                        raise errors[0]
+                    continue  # The other attempt may still win
+
+                if winner is None:
+                    winner = self._attempts[index]
+                    self.winner = winner.model
+                    self.first_token_seconds = time.monotonic() - started
+                    for attempt in self._attempts:
+                        if attempt is not winner:
+                            attempt.cancel()
+
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            for attempt in self._attempts:
+                attempt.cancel()
+            hedge_stats(self.model).record(
+                self.first_token_seconds, self.hedge_fired,
+                won=winner is not None and winner.index > 0)
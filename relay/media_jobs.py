@@ -0,0 +1,332 @@
+"""Background job queue for slow media endpoints.
+
+Whisper, video analysis, YouTube download, OCR, PDF and image generation can
+take from seconds to ten minutes. Run inline they pin an HTTP connection for
+the whole time and cannot be cancelled. With {"async": true} those endpoints
+submit a MediaJob instead and return its id at once; the unchanged handler
+then runs on a bounded worker pool with a per-type concurrency limit, and
+its JSON (or binary) response becomes the job result.
+
+Progress and status are served by /api/media/status, /api/chat/status and
+/api/sse/status/<job_id>. Handlers report progress and honour cancellation
+cooperatively through report_progress() and run_subprocess(), both of which
+are no-ops/plain calls when not running inside a job. Work a handler hands
+to another thread keeps its job through bind_job().
+"""
+
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from .config import TEMP_DIR, MEDIA_MAX_WORKERS, MEDIA_JOB_LIMITS, MEDIA_JOB_RETENTION_SECONDS
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+PROCESSING = "processing"
+COMPLETE = "complete"
+ERROR = "error"
+CANCELLED = "cancelled"
+FINISHED = (COMPLETE, ERROR, CANCELLED)
+
+
+class MediaJobCancelled(Exception):
+    """Raised inside a handler once its job has been cancelled."""
+
+
+class MediaJob:
+    """One queued media request and its outcome."""
+
+    def __init__(self, kind: str, run: Callable):
+        self.id = f"media_{int(time.time() * 1000)}_{uuid.uuid4().hex[:8]}"
+        self.kind = kind
+        self.run = run
+        self.status = QUEUED
+        self.progress = 0.0
+        self.activity = "Queued"
+        self.created = time.time()
+        self.started_at: Optional[float] = None
+        self.completed_at: Optional[float] = None
+        self.result = None
+        self.error: Optional[str] = None
+        self.http_status = 200
+        self.binary_path: Optional[Path] = None
+        self.content_type: Optional[str] = None
+        self.cancelled = threading.Event()
+        self._closers = []
+        self._lock = threading.Lock()
+
+    def on_cancel(self, closer: Callable[[], None]) -> None:
+        """Register a callback (e.g. proc.kill) that aborts in-flight work on cancel."""
+        with self._lock:
+            if not self.cancelled.is_set():
+                self._closers.append(closer)
+                return
+        closer()
+
+    def cancel(self) -> None:
+        """Flag the job as cancelled and run its registered closers."""
+        with self._lock:
+            if self.cancelled.is_set():
+                return
+            self.cancelled.set()
+            closers, self._closers = self._closers, []
+        for closer in closers:
+            try:
+                closer()
+            except Exception:
+                pass
+
+    def to_dict(self) -> dict:
+        """Return the job status as a JSON-serialisable dict."""
+        data = {
+            "job_id": self.id,
+            "type": self.kind,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "activity": self.activity,
+            "created": self.created,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+        }
+        if self.status == COMPLETE:
+            if self.binary_path:
+                data["result"] = {
+                    "content_type": self.content_type,
+                    "size": self.binary_path.stat().st_size if self.binary_path.exists() else 0,
+                    "result_url": f"/api/media/result/{self.id}",
+                }
+            else:
+                data["result"] = self.result
+        elif self.status == ERROR:
+            data["error"] = self.error
+            data["http_status"] = self.http_status
+        return data
+
+
+_current = threading.local()
+
+
+def current_job() -> Optional[MediaJob]:
+    """The media job running on this thread, if any."""
+    return getattr(_current, "job", None)
+
+
+def report_progress(progress: Optional[float] = None, activity: Optional[str] = None) -> None:
+    """Update the running job's progress (0-1) and activity; raise if it was cancelled.
+
+    Does nothing when the handler is serving a normal synchronous request.
+    """
+    job = current_job()
+    if job is None:
+        return
+    if job.cancelled.is_set():
+        raise MediaJobCancelled(job.id)
+    if progress is not None:
+        job.progress = max(job.progress, min(1.0, progress))
+    if activity:
+        job.activity = activity
+
+
+def bind_job(fn: Callable) -> Callable:
+    """Wrap fn to run under the calling thread's media job, for work handed to another thread.
+
+    report_progress() and run_subprocess() inside fn then report to, and are
+    cancelled with, the caller's job rather than acting as if outside one.
+    """
+    job = current_job()
+
+    def run(*args, **kwargs):
+        previous = current_job()
+        _current.job = job
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.job = previous
+    return run
+
+
+def wait_result(future: Future, poll: float = 0.5):
+    """future.result(), but raise MediaJobCancelled as soon as the running job is cancelled."""
+    while True:
+        try:
+            return future.result(timeout=poll)
+        except FutureTimeout:
+            report_progress()
+
+
+def run_subprocess(cmd: list, timeout: float, **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run(cmd, capture_output=True) that a media job cancel can kill."""
+    job = current_job()
+    if job is None:
+        return subprocess.run(cmd, capture_output=True, timeout=timeout, **kwargs)
+
+    data = kwargs.pop("input", None)
+    if data is not None:
+        kwargs["stdin"] = subprocess.PIPE
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs) as proc:
+        job.on_cancel(proc.kill)
+        try:
+            stdout, stderr = proc.communicate(input=data, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+    if job.cancelled.is_set():
+        raise MediaJobCancelled(job.id)
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+
+class MediaJobQueue:
+    """Bounded worker pool with per-type concurrency limits and in-memory job state."""
+
+    def __init__(self, max_workers: int = MEDIA_MAX_WORKERS,
+                 limits: Optional[Dict[str, int]] = None,
+                 retention_seconds: float = MEDIA_JOB_RETENTION_SECONDS):
+        self.max_workers = max_workers
+        self.limits = dict(MEDIA_JOB_LIMITS if limits is None else limits)
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="MediaWorker")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, MediaJob] = {}
+        self._pending: Dict[str, deque] = {}
+        self._running: Dict[str, int] = {}
+
+    def _limit(self, kind: str) -> int:
+        return self.limits.get(kind, 1)
+
+    def _dispatch(self) -> None:
+        """Start queued jobs, oldest first, while their type and the pool have room. Lock held."""
+        while sum(self._running.values()) < self.max_workers:
+            ready = [queue[0] for kind, queue in self._pending.items()
+                     if queue and self._running.get(kind, 0) < self._limit(kind)]
+            if not ready:
+                return
+            job = min(ready, key=lambda j: j.created)
+            self._pending[job.kind].popleft()
+            self._running[job.kind] = self._running.get(job.kind, 0) + 1
+            job.status = PROCESSING
+            job.activity = "Starting"
+            job.started_at = time.time()
+            self._executor.submit(self._execute, job)
+
+    def _purge(self) -> None:
+        """Forget finished jobs past the retention period. Lock held."""
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [j.id for j in self._jobs.values()
+                       if j.status in FINISHED and (j.completed_at or 0) < cutoff]:
+            job = self._jobs.pop(job_id)
+            if job.binary_path:
+                job.binary_path.unlink(missing_ok=True)
+
+    def submit(self, kind: str, run: Callable) -> MediaJob:
+        """Queue run(send_json, send_error, send_binary) as a job of the given type."""
+        job = MediaJob(kind, run)
+        with self._lock:
+            self._purge()
+            self._jobs[job.id] = job
+            self._pending.setdefault(kind, deque()).append(job)
+            self._dispatch()
+        logger.info(f"Media job {job.id} ({kind}) submitted")
+        return job
+
+    def get(self, job_id: str) -> Optional[MediaJob]:
+        """Look up a job by id."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[MediaJob]:
+        """Cancel a queued or running job. Running handlers stop at their next checkpoint."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return job
+            if job.status == QUEUED:
+                self._pending[job.kind].remove(job)
+                job.status = CANCELLED
+                job.activity = "Cancelled"
+                job.completed_at = time.time()
+        job.cancel()
+        return job
+
+    def _execute(self, job: MediaJob) -> None:
+        captured = {}
+
+        def send_json(data, status=200):
+            captured.setdefault("json", (data, status))
+
+        def send_error(status):
+            send_json({"error": f"HTTP {status}"}, status)
+
+        def send_binary(data, content_type="application/octet-stream", etag=None):
+            path = TEMP_DIR / f"{job.id}.bin"
+            if isinstance(data, Path):
+                shutil.copyfile(data, path)  # A cache entry; the job keeps its own copy
+            else:
+                path.write_bytes(data)
+            job.binary_path = path
+            job.content_type = content_type
+            captured.setdefault("json", (None, 200))
+
+        _current.job = job
+        try:
+            job.run(send_json, send_error, send_binary)
+        except MediaJobCancelled:
+            pass
+        except Exception as e:
+            logger.error(f"Media job {job.id} failed: {e}")
+            captured.setdefault("json", ({"error": str(e)}, 500))
+        finally:
+            _current.job = None
+
+        data, status = captured.get("json", ({"error": "Handler produced no response"}, 500))
+        with self._lock:
+            job.completed_at = time.time()
+            if job.cancelled.is_set():
+                job.status = CANCELLED
+                job.activity = "Cancelled"
+            elif status < 400:
+                job.status = COMPLETE
+                job.progress = 1.0
+                job.activity = "Complete"
+                job.result = data
+            else:
+                job.status = ERROR
+                job.activity = "Failed"
+                job.http_status = status
+                job.error = (data or {}).get("error", f"HTTP {status}")
+            self._running[job.kind] -= 1
+            self._dispatch()
+        logger.info(f"Media job {job.id} ({job.kind}) {job.status} "
+                    f"in {job.completed_at - job.started_at:.1f}s")
+
+    def snapshot(self) -> dict:
+        """Return running/queued counts per type for health reporting."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "limits": self.limits,
+                "running": {k: v for k, v in self._running.items() if v},
+                "queued": {k: len(q) for k, q in self._pending.items() if q},
+                "jobs_tracked": len(self._jobs),
+            }
+
+
+_queue: Optional[MediaJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def media_jobs() -> MediaJobQueue:
+    """Get the process-wide media job queue."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = MediaJobQueue()
+        return _queue
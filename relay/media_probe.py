@@ -0,0 +1,212 @@
+"""Cached media metadata (duration, resolution, codecs, audio presence).
+
+Video handlers and the transcription scripts used to rediscover a file's
+duration by regex-parsing ffmpeg stderr on every call. probe() runs
+`ffprobe -print_format json` once per (path, size, mtime) and keeps a small
+summary in memory and in a DiskCache under CACHE_DIR, so repeat requests and
+the standalone scripts skip the subprocess entirely. A changed file gets a
+new key, so stale entries are never served; they simply age out.
+
+Without ffprobe the summary is parsed from the header `ffmpeg -i` prints,
+which also needs no decode.
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+from .config import MEDIA_PROBE_CACHE_DIR, MEDIA_PROBE_CACHE_MAX_MB
+from .disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+_MEMORY_ENTRIES = 512
+
+_DURATION = re.compile(r"Duration:\s*(\d+):(\d+):(\d+)\.(\d+)")
+_VIDEO_STREAM = re.compile(r"Stream #\S+.*?: Video: (\w+).*?, (\d{2,5})x(\d{2,5})")
+_AUDIO_STREAM = re.compile(r"Stream #\S+.*?: Audio: (\w+)(?:.*?, (\d+) Hz)?")
+_FPS = re.compile(r"([\d.]+) fps")
+
+
+def _rate(value: Optional[str]) -> Optional[float]:
+    """Parse an ffprobe frame rate like "30000/1001"."""
+    try:
+        num, _, den = (value or "").partition("/")
+        fps = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return round(fps, 3) if fps > 0 else None
+
+
+def summarize_ffprobe(data: dict) -> dict:
+    """Reduce `ffprobe -show_format -show_streams` JSON to the fields handlers use."""
+    fmt = data.get("format", {})
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"
+                  and not s.get("disposition", {}).get("attached_pic")), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
+    duration = None
+    for source in (fmt, video or {}, audio or {}):
+        try:
+            duration = float(source["duration"])
+            break
+        except (KeyError, TypeError, ValueError):
+            continue
+
+    return {
+        "duration": duration if duration and duration > 0 else None,
+        "format": fmt.get("format_name"),
+        "bit_rate": int(fmt["bit_rate"]) if str(fmt.get("bit_rate", "")).isdigit() else None,
+        "has_video": video is not None,
+        "video_codec": video.get("codec_name") if video else None,
+        "width": video.get("width") if video else None,
+        "height": video.get("height") if video else None,
+        "fps": _rate(video.get("avg_frame_rate") or video.get("r_frame_rate")) if video else None,
+        "has_audio": audio is not None,
+        "audio_codec": audio.get("codec_name") if audio else None,
+        "sample_rate": int(audio["sample_rate"]) if audio and audio.get("sample_rate") else None,
+        "channels": audio.get("channels") if audio else None,
+    }
+
+
+def summarize_ffmpeg_header(stderr: str) -> dict:
+    """Build the same summary from the stream header `ffmpeg -i` prints."""
+    duration = None
+    m = _DURATION.search(stderr)
+    if m:
+        h, mi, s, frac = m.groups()
+        duration = int(h) * 3600 + int(mi) * 60 + int(s) + int(frac) / (10 ** len(frac))
+
+    video = _VIDEO_STREAM.search(stderr)
+    audio = _AUDIO_STREAM.search(stderr)
+    fps = _FPS.search(stderr[video.start():].split("\n", 1)[0]) if video else None
+    return {
+        "duration": duration if duration and duration > 0 else None,
+        "format": None,
+        "bit_rate": None,
+        "has_video": video is not None,
+        "video_codec": video.group(1) if video else None,
+        "width": int(video.group(2)) if video else None,
+        "height": int(video.group(3)) if video else None,
+        "fps": float(fps.group(1)) if fps else None,
+        "has_audio": audio is not None,
+        "audio_codec": audio.group(1) if audio else None,
+        "sample_rate": int(audio.group(2)) if audio and audio.group(2) else None,
+        "channels": None,
+    }
+
+
+def _run_probe(path: str, ffmpeg_path: str) -> Optional[dict]:
+    """Probe a file with ffprobe, falling back to the ffmpeg header."""
+    ffprobe_path = shutil.which("ffprobe")
+    if ffprobe_path:
+        result = subprocess.run(
+            [ffprobe_path, "-v", "error", "-print_format", "json",
+             "-show_format", "-show_streams", path],
+            capture_output=True, text=True, timeout=30
+        )
+        if result.returncode == 0:
+            try:
+                return summarize_ffprobe(json.loads(result.stdout))
+            except ValueError:
+                pass
+
+    ffmpeg_path = ffmpeg_path if ffmpeg_path != "ffmpeg" else (shutil.which("ffmpeg") or "")
+    if not ffmpeg_path:
+        return None
+    # `ffmpeg -i` with no output prints the header and exits without decoding
+    result = subprocess.run([ffmpeg_path, "-hide_banner", "-i", path],
+                            capture_output=True, text=True, timeout=30)
+    info = summarize_ffmpeg_header(result.stderr)
+    if not (info["has_video"] or info["has_audio"]):
+        return None
+    return info
+
+
+class MediaProbeCache:
+    """Probe summaries keyed by (path, size, mtime), in memory and on disk."""
+
+    def __init__(self, directory=MEDIA_PROBE_CACHE_DIR, max_mb: float = MEDIA_PROBE_CACHE_MAX_MB):
+        self.store = DiskCache(directory, int(max_mb * 1024 * 1024), suffix=".json")
+        self._memory: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path: str) -> str:
+        """Cache key for a file's current contents."""
+        stat = os.stat(path)
+        return f"{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def probe(self, path: str, ffmpeg_path: str = "ffmpeg") -> Optional[dict]:
+        """Return the media summary for path, probing only on a cache miss.
+
+        Returns None if the file is missing or not a media file.
+        """
+        try:
+            key = self.key(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            info = self._memory.get(key)
+            if info is not None:
+                self._memory.move_to_end(key)
+                return dict(info)
+
+        info = self.store.get_json(key)
+        if info is None:
+            try:
+                info = _run_probe(path, ffmpeg_path)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                logger.warning(f"Media probe failed for {path}: {e}")
+                return None
+            if info is None:
+                return None
+            try:
+                self.store.put_json(key, info)
+            except OSError as e:
+                logger.warning(f"Failed to store media probe in cache: {e}")
+
+        with self._lock:
+            self._memory[key] = info
+            while len(self._memory) > _MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+        return dict(info)
+
+    def snapshot(self) -> dict:
+        """Return disk cache counters plus in-memory entry count."""
+        data = self.store.snapshot()
+        with self._lock:
+            data["memory_entries"] = len(self._memory)
+        return data
+
+
+_cache: Optional[MediaProbeCache] = None
+_cache_lock = threading.Lock()
+
+
+def media_probe_cache() -> MediaProbeCache:
+    """Get the process-wide media probe cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MediaProbeCache()
+        return _cache
+
+
+def probe(path: str, ffmpeg_path: str = "ffmpeg") -> Optional[dict]:
+    """Cached media summary for a file (see MediaProbeCache.probe)."""
+    return media_probe_cache().probe(path, ffmpeg_path)
+
+
+def probe_duration(path: str, ffmpeg_path: str = "ffmpeg") -> Optional[float]:
+    """Duration in seconds from the cached probe, or None if unknown."""
+    info = probe(path, ffmpeg_path)
+    return info["duration"] if info else None
@@ -0,0 +1,262 @@
+"""Tesseract OCR for /api/ocr and /api/ocr/batch.
+
+Each image gets a single image_to_data pass: the text is rebuilt from its
+word boxes (words joined into lines, lines into paragraphs, paragraphs
+separated by a blank line, as image_to_string lays them out) and the
+confidence is the mean of the same words' scores, instead of running
+Tesseract a second time with image_to_string.
+
+Batches (many images, or PDF pages rendered with pdftoppm) are spread over a
+long-lived process pool of OCR_WORKERS (default one per core); each worker
+limits Tesseract to one thread so the pool doesn't oversubscribe the CPU.
+If a worker dies (OOM killer, segfault in Tesseract) the pool is replaced
+and the unfinished images are retried once.
+Optional preprocessing converts to grayscale and rescales images whose DPI
+is known to OCR_TARGET_DPI. Results are cached by a hash of the image bytes,
+language and preprocessing options.
+"""
+
+import hashlib
+import io
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .config import OCR_CACHE_DIR, OCR_CACHE_MAX_MB, OCR_WORKERS, OCR_PDF_DPI
+from .disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+_MAX_UPSCALE = 4.0  # Don't blow a 50 DPI thumbnail up 6x
+_PAGE_FILE = re.compile(r"-(\d+)\.png$")
+
+
+# ---- pure helpers --------------------------------------------------------
+
+def _confidence(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return -1.0
+
+
+def text_from_data(data: Dict[str, list]) -> str:
+    """Plain text from an image_to_data dict, laid out like image_to_string."""
+    paragraphs: Dict[tuple, Dict[int, List[str]]] = {}
+    for i, word in enumerate(data.get("text", [])):
+        word = (word or "").strip()
+        if not word:
+            continue
+        paragraph = (data["page_num"][i], data["block_num"][i], data["par_num"][i])
+        paragraphs.setdefault(paragraph, {}).setdefault(data["line_num"][i], []).append(word)
+    return "\n\n".join(
+        "\n".join(" ".join(words) for _, words in sorted(lines.items()))
+        for _, lines in sorted(paragraphs.items())
+    )
+
+
+def mean_confidence(data: Dict[str, list]) -> float:
+    """Mean Tesseract confidence (0-100) of the recognized words, or 0 with none."""
+    scores = [_confidence(conf) for word, conf in zip(data.get("text", []), data.get("conf", []))
+              if (word or "").strip()]
+    scores = [s for s in scores if s >= 0]
+    return round(sum(scores) / len(scores), 1) if scores else 0.0
+
+
+def parse_pages(spec, page_count: Optional[int] = None) -> Optional[List[int]]:
+    """1-based page numbers from "1-3,7", [1, 2] or None (all pages)."""
+    if spec is None or spec == "":
+        return None
+    if isinstance(spec, int):
+        spec = [spec]
+    pages = set()
+    parts = spec if isinstance(spec, list) else str(spec).split(",")
+    for part in parts:
+        part = str(part).strip()
+        if "-" in part:
+            first, _, last = part.partition("-")
+            last = int(last) if last.strip() else page_count
+            if last is None:
+                raise ValueError(f"Open page range '{part}' needs a known page count")
+            pages.update(range(int(first), last + 1))
+        elif part:
+            pages.add(int(part))
+    if any(p < 1 for p in pages):
+        raise ValueError("Page numbers start at 1")
+    return sorted(pages)
+
+
+def cache_key(image: bytes, lang: str, grayscale: bool, dpi: Optional[int]) -> str:
+    """Cache key for one image's OCR result under the given options."""
+    return f"{hashlib.sha256(image).hexdigest()}:{lang}:{int(grayscale)}:{dpi or 0}"
+
+
+# ---- worker side ---------------------------------------------------------
+
+def _init_worker():
+    os.environ["OMP_THREAD_LIMIT"] = "1"  # Parallelism comes from the pool, not Tesseract's threads
+
+
+def ocr_image(image: bytes, lang: str = "eng", grayscale: bool = False, dpi: Optional[int] = None) -> dict:
+    """OCR one encoded image with a single image_to_data pass.
+
+    dpi, if given, rescales images that declare a lower DPI up to it (capped)
+    and tells Tesseract the resolution.
+    """
+    import pytesseract
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(image))
+    if grayscale:
+        img = img.convert("L")
+    elif img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    config = ""
+    if dpi:
+        source_dpi = img.info.get("dpi", (0, 0))[0]
+        if source_dpi and source_dpi < dpi:
+            scale = min(dpi / source_dpi, _MAX_UPSCALE)
+            img = img.resize((round(img.width * scale), round(img.height * scale)), Image.LANCZOS)
+        config = f"--dpi {dpi}"
+
+    data = pytesseract.image_to_data(img, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+    return {"text": text_from_data(data), "confidence": mean_confidence(data),
+            "words": sum(1 for w in data.get("text", []) if (w or "").strip())}
+
+
+# ---- caller side ---------------------------------------------------------
+
+def render_pdf_pages(pdf_path: str, pages: Optional[List[int]] = None, dpi: int = OCR_PDF_DPI,
+                     timeout: float = 300) -> List[tuple]:
+    """[(page number, PNG bytes)] for the selected pages of a PDF, via poppler's pdftoppm."""
+    with tempfile.TemporaryDirectory(prefix="ocr_pdf_") as tmp:
+        cmd = ["pdftoppm", "-r", str(dpi), "-png"]
+        if pages:
+            cmd += ["-f", str(pages[0]), "-l", str(pages[-1])]
+        result = subprocess.run(cmd + [pdf_path, str(Path(tmp) / "page")], capture_output=True, timeout=timeout)
+        if result.returncode != 0:
+            raise RuntimeError(f"pdftoppm failed: {result.stderr.decode(errors='replace')[:200]}")
+        rendered = []
+        for path in Path(tmp).glob("page-*.png"):
+            number = int(_PAGE_FILE.search(path.name).group(1))
+            if not pages or number in pages:
+                rendered.append((number, path.read_bytes()))
+    return sorted(rendered)
+
+
+def default_workers() -> int:
+    """Worker processes to use: OCR_WORKERS, or one per core."""
+    return OCR_WORKERS or os.cpu_count() or 1
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_cache: Optional[DiskCache] = None
+
+
+def ocr_pool() -> ProcessPoolExecutor:
+    """The process-wide OCR pool, started on first use and kept warm."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: the server is multi-threaded, so forking it is unsafe
+            _pool = ProcessPoolExecutor(max_workers=default_workers(), mp_context=get_context("spawn"),
+                                        initializer=_init_worker)
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next ocr_pool() call starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def ocr_cache() -> DiskCache:
+    """Get the process-wide OCR result cache."""
+    global _cache
+    with _pool_lock:
+        if _cache is None:
+            _cache = DiskCache(OCR_CACHE_DIR, int(OCR_CACHE_MAX_MB * 1024 * 1024), suffix=".json")
+        return _cache
+
+
+def ocr_images(images: List[bytes], lang: str = "eng", grayscale: bool = False, dpi: Optional[int] = None,
+               cache: Optional[DiskCache] = None, pool=None,
+               progress: Optional[Callable[[int, int], None]] = None) -> List[dict]:
+    """OCR results in input order; cached images skip the pool entirely.
+
+    A failed image yields {"error": ...} rather than failing the batch.
+    progress(done, total), if given, is called as images finish and may raise to abort.
+    """
+    cache = cache if cache is not None else ocr_cache()
+    results: List[Optional[dict]] = [None] * len(images)
+    pending = {}
+    for i, image in enumerate(images):
+        key = cache_key(image, lang, grayscale, dpi)
+        cached = cache.get_json(key)
+        if cached is not None:
+            results[i] = {**cached, "cached": True}
+        else:
+            pending[i] = key
+
+    done = len(images) - len(pending)
+    if progress and done:
+        progress(done, len(images))
+    if not pending:
+        return results
+
+    attempts = 1 if pool is not None else 2  # Only the shared pool can be replaced
+    for attempt in range(attempts):
+        executor = pool or ocr_pool()
+        futures, broken = {}, {}
+        try:
+            for i in pending:
+                futures[i] = executor.submit(ocr_image, images[i], lang, grayscale, dpi)
+        except BrokenProcessPool:
+            pass  # Images left unsubmitted fail below like the ones the dead worker took down
+        try:
+            for i, key in pending.items():
+                try:
+                    if i not in futures:
+                        raise BrokenProcessPool("OCR pool is broken")
+                    result = futures[i].result()
+                    cache.put_json(key, result)
+                    results[i] = {**result, "cached": False}
+                except BrokenProcessPool as e:
+                    broken[i] = key
+                    if attempt + 1 < attempts:
+                        continue
+                    logger.warning(f"OCR failed for image {i + 1}: {e}")
+                    results[i] = {"error": str(e)}
+                except Exception as e:
+                    logger.warning(f"OCR failed for image {i + 1}: {e}")
+                    results[i] = {"error": str(e)}
+                done += 1
+                if progress:
+                    progress(done, len(images))
+        finally:
+            for future in futures.values():
+                future.cancel()  # Aborted batch: drop images that haven't started
+        if not broken or pool is not None:
+            break
+        logger.warning(f"OCR pool broke with {len(broken)} image(s) unfinished; starting a new one")
+        _discard_pool(executor)
+        pending = broken  # Retried on the new pool if attempts remain
+    return results
+
+
+def ocr_snapshot() -> dict:
+    """OCR pool size and result cache counters, for /api/health."""
+    return {"workers": default_workers(), "pool_started": _pool is not None,
+            "cache": ocr_cache().snapshot()}
@@ -0,0 +1,159 @@
+"""Warm WeasyPrint renderer and rendered-PDF cache for /api/pdf/generate.
+
+Every export used to build a fresh WeasyPrint pipeline: fonts were
+discovered and the inline stylesheet parsed again on each call, and
+exporting the same chat transcript twice rendered it twice. The renderer
+here keeps one FontConfiguration and the default stylesheet pre-parsed for
+the life of the process. Finished PDFs are stored in a size-bounded
+DiskCache keyed by a hash of the format, content, title and STYLE_VERSION
+(bump it whenever PDF_STYLESHEET or the markdown conversion changes).
+
+PDFs are written straight to a cache file and served from disk in chunks,
+so a large document is never held in memory whole. WeasyPrint lays out the
+complete document before it writes the first byte, so the response can't
+start before rendering finishes.
+
+Usage:
+    path, key = render_pdf(content, "markdown", "Chat export")
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import logging
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .config import PDF_CACHE_DIR, PDF_CACHE_MAX_MB
+from .disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+STYLE_VERSION = 1
+
+PDF_STYLESHEET = """
+body { font-family: -apple-system, sans-serif; padding: 40px; line-height: 1.6; color: #333; max-width: 800px; margin: 0 auto; }
+h1, h2, h3 { color: #1a1a2e; }
+table { border-collapse: collapse; width: 100%; margin: 16px 0; }
+th, td { border: 1px solid #ddd; padding: 8px 12px; text-align: left; }
+th { background: #f5f5f5; font-weight: 600; }
+code { background: #f0f0f0; padding: 2px 6px; border-radius: 3px; font-size: 0.9em; }
+pre { background: #f5f5f5; padding: 16px; border-radius: 6px; overflow-x: auto; }
+"""
+
+
+def markdown_to_html(md_text: str, title: str) -> str:
+    """Simple markdown to HTML for PDF generation."""
+    html = md_text
+    html = re.sub(r'^### (.+)$', r'<h3>\1</h3>', html, flags=re.MULTILINE)
+    html = re.sub(r'^## (.+)$', r'<h2>\1</h2>', html, flags=re.MULTILINE)
+    html = re.sub(r'^# (.+)$', r'<h1>\1</h1>', html, flags=re.MULTILINE)
+    html = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', html)
+    html = re.sub(r'\*(.+?)\*', r'<em>\1</em>', html)
+    html = re.sub(r'^- (.+)$', r'<li>\1</li>', html, flags=re.MULTILINE)
+    html = re.sub(r'`([^`]+)`', r'<code>\1</code>', html)
+    html = html.replace('\n\n', '</p><p>').replace('\n', '<br>')
+    return f"<h1>{title}</h1><p>{html}</p>"
+
+
+def build_html(content: str, fmt: str, title: str) -> Tuple[str, bool]:
+    """(HTML document, whether it is a fragment we wrapped and should style with PDF_STYLESHEET)."""
+    html_content = markdown_to_html(content, title) if fmt == "markdown" else content
+    if "<html" in html_content.lower():
+        return html_content, False
+    return (f'<!DOCTYPE html>\n<html><head><meta charset="UTF-8"><title>{title}</title></head>'
+            f'<body>{html_content}</body></html>'), True
+
+
+def pdf_key(content: str, fmt: str, title: str) -> str:
+    """Cache key for a rendered document."""
+    parts = [STYLE_VERSION, fmt, title, content]
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode()).hexdigest()
+
+
+def pdf_etag(key: str) -> str:
+    """Strong ETag for the document stored under key."""
+    return f'"pdf-{key[:32]}"'
+
+
+class PDFRenderer:
+    """WeasyPrint with fonts and the default stylesheet loaded once.
+
+    Renders are serialized: WeasyPrint's font configuration isn't safe to
+    share between concurrent renders.
+    """
+
+    def __init__(self, stylesheet: str = PDF_STYLESHEET):
+        from weasyprint import CSS, HTML
+        try:
+            from weasyprint.text.fonts import FontConfiguration  # WeasyPrint 53+
+        except ImportError:
+            from weasyprint.fonts import FontConfiguration
+        self._html = HTML
+        self.font_config = FontConfiguration()
+        self.stylesheet = CSS(string=stylesheet, font_config=self.font_config)
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    def write_pdf(self, html: str, target: str, styled: bool = True) -> None:
+        """Render an HTML document to a PDF file."""
+        with self._lock:
+            self._html(string=html).write_pdf(
+                target, stylesheets=[self.stylesheet] if styled else None, font_config=self.font_config
+            )
+            self.renders += 1
+
+
+_renderer: Optional[PDFRenderer] = None
+_cache: Optional[DiskCache] = None
+_lock = threading.Lock()
+
+
+def pdf_renderer() -> PDFRenderer:
+    """Get the process-wide renderer (raises ImportError without WeasyPrint)."""
+    global _renderer
+    with _lock:
+        if _renderer is None:
+            _renderer = PDFRenderer()
+        return _renderer
+
+
+def pdf_cache() -> DiskCache:
+    """Get the process-wide rendered-PDF cache."""
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = DiskCache(PDF_CACHE_DIR, int(PDF_CACHE_MAX_MB * 1024 * 1024), suffix=".pdf")
+        return _cache
+
+
+def render_pdf(content: str, fmt: str = "html", title: str = "Document",
+               renderer: Optional[PDFRenderer] = None, cache: Optional[DiskCache] = None) -> Tuple[Path, str]:
+    """(path of the rendered PDF in the cache, cache key), rendering only on a miss."""
+    cache = cache if cache is not None else pdf_cache()
+    key = pdf_key(content, fmt, title)
+    path = cache.path(key)
+    if path is not None:
+        return path, key
+
+    html, styled = build_html(content, fmt, title)
+    renderer = renderer or pdf_renderer()
+    temp_fd, temp_path = tempfile.mkstemp(dir=cache.directory, suffix=".tmp")
+    os.close(temp_fd)
+    try:
+        renderer.write_pdf(html, temp_path, styled)
+        return cache.put_file(key, Path(temp_path)), key
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+
+def pdf_snapshot() -> dict:
+    """Render count and cache counters, for /api/health."""
+    data = pdf_cache().snapshot()
+    data["renders"] = _renderer.renders if _renderer else 0
+    data["style_version"] = STYLE_VERSION
+    return data
@@ -0,0 +1,369 @@
+"""Pool of long-lived Piper TTS workers with resident voice models.
+
+Running the `piper` CLI per request reloads the ONNX voice model every time
+and round-trips the audio through a temp WAV. The pool instead keeps one
+worker process (relay/piper_worker.py) per voice with the model loaded,
+sends it JSON lines on stdin and reads raw PCM back through its stdout pipe
+as each sentence is synthesized.
+
+A worker that dies is restarted on the next request (a request that fails
+before any audio was produced is retried once on the fresh worker), and one
+that goes silent for PIPER_READ_TIMEOUT_SECONDS is killed. Workers
+unused for PIPER_IDLE_SECONDS are stopped, and at most PIPER_MAX_WORKERS
+run at once (least recently used first out). If the piper package can't be
+imported by PIPER_PYTHON (or a voice's model won't load), synthesize() raises
+PiperUnavailable for that voice for a while and callers fall back to the CLI.
+
+Usage:
+    wav = piper_pool().synthesize("amy", text)
+    for pcm in piper_pool().stream("amy", text): ...
+"""
+
+import io
+import json
+import os
+import select
+import struct
+import subprocess
+import sys
+import threading
+import time
+import wave
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from .config import (
+    RELAY_DIR, PIPER_VOICES_DIR, PIPER_PYTHON, PIPER_MAX_WORKERS, PIPER_IDLE_SECONDS, PIPER_PRELOAD_VOICES,
+    PIPER_READ_TIMEOUT_SECONDS
+)
+from .piper_worker import FRAME_AUDIO, FRAME_END, FRAME_ERROR
+
+logger = logging.getLogger(__name__)
+
+_UNAVAILABLE_RETRY_SECONDS = 300  # Don't respawn a worker that can't import piper on every request
+
+
+def piper_voice_models() -> Dict[str, Path]:
+    """Piper voice name -> ONNX model path."""
+    return {
+        "amy": PIPER_VOICES_DIR / "en_US-amy-medium.onnx",                            # Female, US English
+        "ryan": PIPER_VOICES_DIR / "en_US-ryan-medium.onnx",                          # Male, US English
+        "lessac": PIPER_VOICES_DIR / "en_US-lessac-medium.onnx",                      # Female, US English
+        "alan": PIPER_VOICES_DIR / "en_GB-alan-medium.onnx",                          # Male, British English
+        "alba": PIPER_VOICES_DIR / "en_GB-alba-medium.onnx",                          # Female, Scottish English
+        "cori": PIPER_VOICES_DIR / "en_GB-cori-medium.onnx",                          # Female, British English
+        "jenny_dioco": PIPER_VOICES_DIR / "en_GB-jenny_dioco-medium.onnx",            # Female, British English
+        "northern_english_male": PIPER_VOICES_DIR / "en_GB-northern_english_male-medium.onnx",  # Male, Northern English
+    }
+
+
+class PiperUnavailable(RuntimeError):
+    """The Piper Python package (or the voice model) can't be loaded by a worker."""
+
+
+class PiperWorker:
+    """One worker process with a voice model loaded; serves one request at a time."""
+
+    def __init__(self, voice: str, model_path: Path, python: str = "", command: Optional[list] = None,
+                 read_timeout: float = PIPER_READ_TIMEOUT_SECONDS):
+        self.voice = voice
+        self.model_path = Path(model_path)
+        self.read_timeout = read_timeout
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.last_used = time.time()
+        started = time.time()
+        self._process = subprocess.Popen(
+            command or [python or sys.executable, "-m", "relay.piper_worker", str(self.model_path)],
+            cwd=str(RELAY_DIR), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self._buffer = b""  # Read from stdout's descriptor directly, so select() sees everything unread
+        try:
+            header = self._read_line()
+        except OSError:
+            header = b""
+        except subprocess.TimeoutExpired:
+            header = b'{"error": "worker did not start in time"}'
+        try:
+            info = json.loads(header) if header else {"error": "worker exited during startup"}
+        except ValueError:
+            info = {"error": f"unexpected worker output {header[:80]!r}"}
+        if not info.get("ready"):
+            self.stop()
+            raise PiperUnavailable(f"Piper worker for '{voice}' failed to start: {info.get('error')}")
+        self.sample_rate = info["sample_rate"]
+        self.channels = info.get("channels", 1)
+        self.sample_width = info.get("sample_width", 2)
+        self.load_seconds = round(time.time() - started, 2)
+
+    @property
+    def pid(self) -> int:
+        return self._process.pid
+
+    def alive(self) -> bool:
+        return self._process.poll() is None
+
+    def _fill(self, deadline: float):
+        """Append what the worker has written to the buffer; kill it if nothing arrives by deadline."""
+        wait = deadline - time.monotonic()
+        fd = self._process.stdout.fileno()
+        if wait <= 0 or not select.select([fd], [], [], wait)[0]:
+            self.kill()
+            raise subprocess.TimeoutExpired(self._process.args, self.read_timeout)
+        data = os.read(fd, 65536)
+        if not data:
+            raise BrokenPipeError("Piper worker exited mid-response")
+        self._buffer += data
+
+    def _read_line(self) -> bytes:
+        deadline = time.monotonic() + self.read_timeout
+        while b"\n" not in self._buffer:
+            self._fill(deadline)
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        return line
+
+    def _read_exact(self, size: int, deadline: float) -> bytes:
+        while len(self._buffer) < size:
+            self._fill(deadline)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def _read_frame(self):
+        deadline = time.monotonic() + self.read_timeout
+        kind = self._read_exact(1, deadline)
+        (length,) = struct.unpack(">I", self._read_exact(4, deadline))
+        return kind, self._read_exact(length, deadline) if length else b""
+
+    def stream(self, text: str, **options) -> Iterator[bytes]:
+        """Yield raw PCM chunks for text. Call with self.lock held.
+
+        Abandoning the iterator early drains the rest of the response so the
+        worker stays in sync for the next request.
+        """
+        self.requests += 1
+        self.last_used = time.time()
+        request = {"text": text, **{k: v for k, v in options.items() if v is not None}}
+        self._process.stdin.write(json.dumps(request).encode() + b"\n")
+        self._process.stdin.flush()
+        finished = False
+        try:
+            while True:
+                kind, payload = self._read_frame()
+                if kind == FRAME_AUDIO:
+                    yield payload
+                elif kind == FRAME_END:
+                    finished = True
+                    return
+                elif kind == FRAME_ERROR:
+                    finished = True
+                    raise RuntimeError(f"Piper synthesis failed: {payload.decode(errors='replace')}")
+                else:
+                    raise BrokenPipeError(f"Unexpected frame {kind!r} from Piper worker")
+        finally:
+            while not finished and self.alive():
+                try:
+                    kind, _ = self._read_frame()
+                except (OSError, subprocess.TimeoutExpired):
+                    break
+                finished = kind in (FRAME_END, FRAME_ERROR)
+            self.last_used = time.time()
+
+    def stop(self):
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.kill()
+
+    def kill(self):
+        self._process.kill()
+        self._process.wait()
+
+
+class PiperPool:
+    """Workers by voice: started on demand, restarted after crashes, stopped when idle."""
+
+    def __init__(self, max_workers: int = PIPER_MAX_WORKERS, idle_seconds: float = PIPER_IDLE_SECONDS,
+                 python: str = PIPER_PYTHON, voices: Optional[Dict[str, Path]] = None, command=None,
+                 read_timeout: float = PIPER_READ_TIMEOUT_SECONDS):
+        self.max_workers = max_workers
+        self.idle_seconds = idle_seconds
+        self.read_timeout = read_timeout
+        self.python = python
+        self.voices = voices
+        self.command = command  # Override the worker command line (a callable of the model path)
+        self._workers: "OrderedDict[str, PiperWorker]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._start_locks: Dict[str, threading.Lock] = {}
+        self._unavailable: Dict[str, Tuple[float, str]] = {}  # voice -> (retry after, reason)
+        self.started = 0
+        self.restarts = 0
+        self.evictions = 0
+
+    def model_path(self, voice: str) -> Path:
+        voices = self.voices if self.voices is not None else piper_voice_models()
+        path = voices.get(voice)
+        if path is None or not Path(path).exists():
+            raise ValueError(f"Voice '{voice}' not available")
+        return Path(path)
+
+    def _evict(self):
+        """Stop idle workers and the least recently used beyond max_workers."""
+        now = time.time()
+        stopped = []
+        with self._lock:
+            for voice, worker in list(self._workers.items()):
+                if not worker.lock.locked() and now - worker.last_used > self.idle_seconds:
+                    stopped.append(self._workers.pop(voice))
+            while len(self._workers) > self.max_workers:
+                voice = next((v for v, w in self._workers.items() if not w.lock.locked()), None)
+                if voice is None:
+                    break
+                stopped.append(self._workers.pop(voice))
+            self.evictions += len(stopped)
+        for worker in stopped:
+            logger.info(f"Stopping Piper worker for '{worker.voice}' (pid {worker.pid})")
+            worker.stop()
+
+    def worker(self, voice: str) -> PiperWorker:
+        """Running worker for voice, starting (or restarting) it if needed."""
+        until, reason = self._unavailable.get(voice, (0.0, ""))
+        if time.time() < until:
+            raise PiperUnavailable(reason)
+        with self._lock:
+            start_lock = self._start_locks.setdefault(voice, threading.Lock())
+        with start_lock:
+            with self._lock:
+                worker = self._workers.get(voice)
+                if worker is not None:
+                    if worker.alive():
+                        self._workers.move_to_end(voice)
+                        return worker
+                    del self._workers[voice]
+                    self.restarts += 1
+                    logger.warning(f"Piper worker for '{voice}' died (pid {worker.pid}); restarting")
+            model_path = self.model_path(voice)
+            command = self.command(model_path) if self.command else None
+            try:
+                worker = PiperWorker(voice, model_path, self.python, command, self.read_timeout)
+            except (PiperUnavailable, OSError) as e:
+                with self._lock:
+                    self._unavailable[voice] = (time.time() + _UNAVAILABLE_RETRY_SECONDS, str(e))
+                raise PiperUnavailable(str(e)) from e
+            logger.info(f"Started Piper worker for '{voice}' (pid {worker.pid}, loaded in {worker.load_seconds}s)")
+            with self._lock:
+                self._workers[voice] = worker
+                self.started += 1
+        self._evict()
+        return worker
+
+    def _discard(self, worker: PiperWorker):
+        """Drop a worker whose pipe broke or that hung, so the next request starts a new one."""
+        with self._lock:
+            if self._workers.get(worker.voice) is worker:
+                del self._workers[worker.voice]
+                self.restarts += 1
+        worker.stop()
+
+    def stream(self, voice: str, text: str, **options) -> Iterator[bytes]:
+        """Yield raw PCM for text as each sentence is synthesized."""
+        yield from self._stream(voice, text, options)
+
+    def _stream(self, voice: str, text: str, options: dict,
+                on_worker: Optional[Callable[[PiperWorker], None]] = None) -> Iterator[bytes]:
+        """stream(), calling on_worker with each worker the request is sent to."""
+        for attempt in range(2):
+            worker = self.worker(voice)
+            if on_worker:
+                on_worker(worker)
+            produced = False
+            with worker.lock:
+                try:
+                    for pcm in worker.stream(text, **options):
+                        produced = True
+                        yield pcm
+                    return
+                except subprocess.TimeoutExpired:
+                    self._discard(worker)  # Already killed; a retry would likely hang as long again
+                    raise
+                except OSError:
+                    self._discard(worker)
+                    if produced or attempt:
+                        raise
+                    logger.warning(f"Piper worker for '{voice}' crashed; retrying on a new one")
+
+    def synthesize(self, voice: str, text: str, **options) -> bytes:
+        """Complete WAV file for text, in the audio format of the worker that produced it."""
+        used = []
+        pcm = b"".join(self._stream(voice, text, options, used.append))
+        worker = used[-1]
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as wav:
+            wav.setnchannels(worker.channels)
+            wav.setsampwidth(worker.sample_width)
+            wav.setframerate(worker.sample_rate)
+            wav.writeframes(pcm)
+        return buf.getvalue()
+
+    def preload(self, voices: Iterable[str]) -> Optional[threading.Thread]:
+        """Start workers for voices in the background."""
+        voices = list(voices)
+        if not voices:
+            return None
+
+        def run():
+            for voice in voices:
+                try:
+                    self.worker(voice)
+                except (PiperUnavailable, ValueError) as e:
+                    logger.warning(f"Skipping Piper preload of '{voice}': {e}")
+
+        thread = threading.Thread(target=run, name="piper-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        with self._lock:
+            workers, self._workers = list(self._workers.values()), OrderedDict()
+        for worker in workers:
+            worker.stop()
+
+    def snapshot(self) -> dict:
+        """Return running workers and lifetime counters."""
+        self._evict()
+        now = time.time()
+        with self._lock:
+            return {
+                "workers": [{"voice": w.voice, "pid": w.pid, "requests": w.requests,
+                             "busy": w.lock.locked(), "idle_seconds": round(now - w.last_used, 1),
+                             "load_seconds": w.load_seconds} for w in self._workers.values()],
+                "max_workers": self.max_workers,
+                "started": self.started,
+                "restarts": self.restarts,
+                "evictions": self.evictions,
+                "unavailable": {voice: reason for voice, (until, reason) in self._unavailable.items()
+                                if now < until} or None,
+            }
+
+
+_pool: Optional[PiperPool] = None
+_pool_lock = threading.Lock()
+
+
+def piper_pool() -> PiperPool:
+    """Get the process-wide Piper worker pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PiperPool()
+        return _pool
+
+
+def preload_piper_voices(voices: Iterable[str] = PIPER_PRELOAD_VOICES) -> Optional[threading.Thread]:
+    """Start workers for the configured voices (RELAY_PIPER_PRELOAD) in the background."""
+    return piper_pool().preload(voices)
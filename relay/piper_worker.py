@@ -0,0 +1,70 @@
+"""Long-lived Piper synthesis process, one per voice (see piper_pool.py).
+
+Run as `python -m relay.piper_worker MODEL.onnx`. The voice model is loaded
+once; requests arrive on stdin as JSON lines ({"text": "..."}, like
+`piper --json-input`) and raw 16-bit PCM goes back on stdout as it is
+produced, one sentence at a time. Piper's own --output-raw mode has no
+end-of-utterance marker, so output is framed:
+
+    startup     one JSON line: {"ready": true, "sample_rate": 22050, ...} or {"error": "..."}
+    per request b"A" + length + PCM (repeated), then b"E" + zero length
+                or b"X" + length + UTF-8 error message
+
+Lengths are 4-byte big-endian.
+"""
+
+import json
+import struct
+import sys
+
+FRAME_AUDIO = b"A"
+FRAME_END = b"E"
+FRAME_ERROR = b"X"
+
+
+def write_frame(out, kind: bytes, payload: bytes = b"") -> None:
+    out.write(kind + struct.pack(">I", len(payload)) + payload)
+
+
+def _chunks(voice, text: str, request: dict):
+    """Raw PCM chunks for text across piper-tts versions."""
+    if hasattr(voice, "synthesize_stream_raw"):  # piper-tts 1.2
+        yield from voice.synthesize_stream_raw(text, speaker_id=request.get("speaker_id"),
+                                               length_scale=request.get("length_scale"))
+        return
+    for chunk in voice.synthesize(text):  # piper-tts 1.3+: AudioChunk objects
+        yield chunk.audio_int16_bytes
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    out = sys.stdout.buffer
+    try:
+        from piper import PiperVoice
+        voice = PiperVoice.load(argv[0])
+    except Exception as e:  # Missing package or bad model: tell the pool, then exit
+        out.write(json.dumps({"error": f"{type(e).__name__}: {e}"}).encode() + b"\n")
+        out.flush()
+        return 1
+
+    out.write(json.dumps({"ready": True, "sample_rate": voice.config.sample_rate,
+                          "channels": 1, "sample_width": 2}).encode() + b"\n")
+    out.flush()
+
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            for pcm in _chunks(voice, request["text"], request):
+                write_frame(out, FRAME_AUDIO, pcm)
+                out.flush()
+            write_frame(out, FRAME_END)
+        except Exception as e:
+            write_frame(out, FRAME_ERROR, str(e).encode())
+        out.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""Shared, connection-pooled HTTP clients for external model providers.
+
+NVIDIA NIM, OpenAI, ElevenLabs and the DALL-E image CDN are called from both
+the relay server and the watcher. Creating a fresh connection per call pays a
+TCP + TLS handshake every time, so this module keeps one keep-alive session
+per base URL (scheme + host) and records connect and time-to-first-byte
+timings for each of them.
+"""
+
+import socket
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .config import (
+    PROVIDER_POOL_CONNECTIONS, PROVIDER_POOL_MAXSIZE,
+    PROVIDER_CONNECT_TIMEOUT, PROVIDER_READ_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _origin(base_url: str) -> str:
+    """Reduce a URL to scheme://host[:port], the unit a connection pool serves."""
+    parts = urlsplit(base_url)
+    if not parts.scheme or not parts.netloc:
+        raise ValueError(f"Not an absolute URL: {base_url}")
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class ProviderStats:
+    """Connection and time-to-first-byte counters for one provider origin."""
+
+    def __init__(self, origin: str, sample_size: int = 200):
+        self.origin = origin
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.connections_opened = 0
+        self._connect_total = 0.0
+        self._ttfb_total = 0.0
+        self._ttfb_samples = deque(maxlen=sample_size)
+
+    def record_connect(self, seconds: float) -> None:
+        """Record a newly opened connection (TCP connect + TLS handshake)."""
+        with self._lock:
+            self.connections_opened += 1
+            self._connect_total += seconds
+
+    def record_response(self, ttfb_seconds: float) -> None:
+        """Record a response whose headers arrived after ttfb_seconds."""
+        with self._lock:
+            self.requests += 1
+            self._ttfb_total += ttfb_seconds
+            self._ttfb_samples.append(ttfb_seconds)
+
+    def record_error(self) -> None:
+        """Record a request that failed before producing a response."""
+        with self._lock:
+            self.errors += 1
+
+    def ttfb_percentile(self, percentile: float) -> Optional[float]:
+        """Return the given TTFB percentile in seconds, or None with no samples."""
+        with self._lock:
+            samples = sorted(self._ttfb_samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> dict:
+        """Return the counters as a JSON-serialisable dict."""
+        p95 = self.ttfb_percentile(95)
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "connections_opened": self.connections_opened,
+                "avg_connect_ms": round(self._connect_total / self.connections_opened * 1000, 1)
+                if self.connections_opened else None,
+                "avg_ttfb_ms": round(self._ttfb_total / self.requests * 1000, 1)
+                if self.requests else None,
+                "p95_ttfb_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            }
+
+
+_abort_scope = threading.local()
+
+
+@contextmanager
+def abortable_requests(on_cancel: Callable[[Callable[[], None]], None]):
+    """Let a cancel abort this thread's pooled requests calls, even before response headers arrive.
+
+    Each connection a call sends on inside the block is registered with
+    on_cancel(closer) (e.g. HedgeAttempt.on_cancel); the closer shuts its
+    socket down, so a call stalled waiting for headers fails at once instead
+    of holding the thread and connection until the read timeout. Closers
+    registered in the block do nothing once it exits, so a connection that
+    went back to the pool is never touched.
+    """
+    scope = {"on_cancel": on_cancel, "active": True}
+    previous = getattr(_abort_scope, "current", None)
+    _abort_scope.current = scope
+    try:
+        yield
+    finally:
+        scope["active"] = False
+        _abort_scope.current = previous
+
+
+def _register_abort(conn) -> None:
+    """Register conn with the enclosing abortable_requests block, if any."""
+    scope = getattr(_abort_scope, "current", None)
+    if scope is None:
+        return
+
+    def abort():
+        sock = getattr(conn, "sock", None)  # Looked up late: plain HTTP connects inside request()
+        if scope["active"] and sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    scope["on_cancel"](abort)
+
+
+def _timed_pool_classes(stats: ProviderStats) -> dict:
+    """Build urllib3 pool classes whose connections report connect time to stats
+    and can be aborted from another thread (see abortable_requests)."""
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class TimedHTTPConnection(HTTPConnection):
+        def connect(self):
+            start = time.perf_counter()
+            super().connect()
+            stats.record_connect(time.perf_counter() - start)
+
+        def request(self, *args, **kwargs):
+            _register_abort(self)
+            return super().request(*args, **kwargs)
+
+    class TimedHTTPSConnection(HTTPSConnection):
+        def connect(self):
+            start = time.perf_counter()
+            super().connect()
+            stats.record_connect(time.perf_counter() - start)
+
+        def request(self, *args, **kwargs):
+            _register_abort(self)
+            return super().request(*args, **kwargs)
+
+    class TimedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = TimedHTTPConnection
+
+    class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = TimedHTTPSConnection
+
+    return {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+
+def _make_session(stats: ProviderStats, pool_connections: int, pool_maxsize: int):
+    """Create a requests.Session with a sized, instrumented keep-alive pool."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    class TimedAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = _timed_pool_classes(stats)
+
+    session = requests.Session()
+    adapter = TimedAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    # r.elapsed covers request sent -> response headers parsed, i.e. TTFB
+    session.hooks["response"].append(
+        lambda r, *args, **kwargs: stats.record_response(r.elapsed.total_seconds())
+    )
+    return session
+
+
+def _httpx_hooks(stats: ProviderStats) -> dict:
+    """Build httpx event hooks that feed connect and TTFB timings into stats."""
+
+    def on_request(request):
+        marks = {"sent": time.perf_counter()}
+
+        def trace(event_name, info):
+            if event_name == "connection.connect_tcp.started":
+                marks["connect"] = time.perf_counter()
+            elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+                marks["connected"] = time.perf_counter()
+
+        trace.marks = marks
+        request.extensions["trace"] = trace
+
+    def on_response(response):
+        trace = response.request.extensions.get("trace")
+        marks = getattr(trace, "marks", None)
+        if not marks:
+            return
+        if "connect" in marks and "connected" in marks:
+            stats.record_connect(marks["connected"] - marks["connect"])
+        stats.record_response(time.perf_counter() - marks["sent"])
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+class ProviderRegistry:
+    """Process-wide registry of pooled sessions and SDK clients keyed by origin."""
+
+    def __init__(self, pool_connections: int = PROVIDER_POOL_CONNECTIONS,
+                 pool_maxsize: int = PROVIDER_POOL_MAXSIZE,
+                 connect_timeout: float = PROVIDER_CONNECT_TIMEOUT,
+                 read_timeout: float = PROVIDER_READ_TIMEOUT):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._lock = threading.Lock()
+        self._stats: Dict[str, ProviderStats] = {}
+        self._sessions: Dict[str, object] = {}
+        self._openai_clients: Dict[Tuple[str, str], object] = {}
+
+    def stats(self, base_url: str) -> ProviderStats:
+        """Get (or create) the stats object for a base URL's origin."""
+        origin = _origin(base_url)
+        with self._lock:
+            if origin not in self._stats:
+                self._stats[origin] = ProviderStats(origin)
+            return self._stats[origin]
+
+    def timeout(self, read: Optional[float] = None) -> Tuple[float, float]:
+        """Return a (connect, read) timeout tuple for requests calls."""
+        return (self.connect_timeout, read if read is not None else self.read_timeout)
+
+    def session(self, base_url: str):
+        """Get the shared keep-alive requests.Session for a base URL."""
+        origin = _origin(base_url)
+        stats = self.stats(origin)
+        with self._lock:
+            session = self._sessions.get(origin)
+            if session is None:
+                session = _make_session(stats, self.pool_connections, self.pool_maxsize)
+                self._sessions[origin] = session
+                logger.info(f"Opened pooled session for {origin} (pool size {self.pool_maxsize})")
+            return session
+
+    def openai_client(self, api_key: str, base_url: str = "https://api.openai.com/v1"):
+        """Get a cached openai.OpenAI client backed by a pooled httpx client."""
+        import httpx
+        import openai
+
+        key = (base_url.rstrip("/"), api_key)
+        stats = self.stats(base_url)
+        with self._lock:
+            client = self._openai_clients.get(key)
+            if client is None:
+                http_client = httpx.Client(
+                    limits=httpx.Limits(max_connections=self.pool_maxsize,
+                                        max_keepalive_connections=self.pool_maxsize),
+                    timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                    event_hooks=_httpx_hooks(stats),
+                )
+                client = openai.OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+                self._openai_clients[key] = client
+            return client
+
+    def snapshot(self) -> dict:
+        """Return per-origin timing counters for health reporting."""
+        with self._lock:
+            stats = list(self._stats.values())
+        return {s.origin: s.snapshot() for s in stats}
+
+    def close(self) -> None:
+        """Close every pooled session and client."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            clients = list(self._openai_clients.values())
+            self._sessions.clear()
+            self._openai_clients.clear()
+        for session in sessions:
+            session.close()
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+
+_registry = ProviderRegistry()
+
+
+def get_session(base_url: str):
+    """Get the shared pooled requests.Session for a provider base URL."""
+    return _registry.session(base_url)
+
+
+def get_openai_client(api_key: str, base_url: str = "https://api.openai.com/v1"):
+    """Get the shared pooled openai.OpenAI client for (base_url, api_key)."""
+    return _registry.openai_client(api_key, base_url)
+
+
+def request_timeout(read: Optional[float] = None) -> Tuple[float, float]:
+    """Get the configured (connect, read) timeout, optionally overriding read."""
+    return _registry.timeout(read)
+
+
+def provider_stats(base_url: str) -> ProviderStats:
+    """Get the timing stats for a provider base URL."""
+    return _registry.stats(base_url)
+
+
+def provider_snapshot() -> dict:
+    """Get connect/TTFB metrics for every provider origin used so far."""
+    return _registry.snapshot()
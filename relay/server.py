@@ -1,6 +1,8 @@
 """HTTP server with caching for the relay system."""
 
+import os
 import json
+import shutil
 import argparse
 from http.server import HTTPServer, SimpleHTTPRequestHandler
 from socketserver import ThreadingMixIn
@@ -8,10 +10,15 @@ from pathlib import Path
 from urllib.parse import unquote, urlparse, parse_qs
 
 from .config import (
-    TEMPLATES_DIR, SCREENSHOTS_DIR, API_CACHE_HEADERS, DEFAULT_PORT, HTML_CACHE_ENABLED
+    TEMPLATES_DIR, SCREENSHOTS_DIR, API_CACHE_HEADERS, DEFAULT_PORT, HTML_CACHE_ENABLED,
+    STT_STREAM_IDLE_SECONDS
 )
-from .utils import compute_etag
+from .utils import compute_etag, etag_matches
 from .api_handlers import APIHandler
+from .whisper_models import preload_whisper_models
+from .piper_pool import preload_piper_voices
+from .media_jobs import media_jobs
+from .stt_stream import stt_sessions
 
 
 # Pre-computed HTML cache
@@ -79,22 +86,65 @@ class ChatRelayHandler(SimpleHTTPRequestHandler):
         """Send error as JSON."""
         self._json({"error": f"HTTP {status}"}, status)
 
-    def _send_binary(self, data, content_type="application/octet-stream"):
-        """Send binary response (e.g., audio data)."""
+    def _send_binary(self, data, content_type="application/octet-stream", etag=None):
+        """Send binary response (e.g., audio data).
+
+        data may be bytes or a Path, which is streamed from disk in chunks.
+        With an etag, a request whose If-None-Match matches gets 304 and no body.
+        """
+        if etag_matches(etag, self.headers.get("If-None-Match")):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            return
+        source = open(data, "rb") if isinstance(data, Path) else None  # Opened first: survives cache eviction
+        try:
+            size = os.fstat(source.fileno()).st_size if source else len(data)
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(size))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Access-Control-Expose-Headers", "ETag")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            if source:
+                shutil.copyfileobj(source, self.wfile, 64 * 1024)
+            else:
+                self.wfile.write(data)
+        finally:
+            if source:
+                source.close()
+
+    def _send_stream(self, chunks, content_type="application/octet-stream"):
+        """Send a streaming response, flushing each chunk as soon as it is produced.
+
+        The body ends when the connection closes (HTTP/1.0), so no length is sent.
+        """
         self.send_response(200)
         self.send_header("Content-Type", content_type)
-        self.send_header("Content-Length", str(len(data)))
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Cache-Control", "no-cache")
         self.end_headers()
-        self.wfile.write(data)
+        try:
+            for chunk in chunks:
+                self.wfile.write(chunk)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass  # Client disconnected
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()  # Stop the producer (e.g. cancel in-flight provider calls)
 
     def do_OPTIONS(self):
         """Handle CORS preflight requests."""
         self.send_response(200)
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type, If-None-Match")
         self.end_headers()
 
     def do_GET(self):
@@ -139,12 +189,18 @@ class ChatRelayHandler(SimpleHTTPRequestHandler):
             api.handle_screenshots_list()
         elif self.path == "/api/tts/voices":
             api = APIHandler(self._json, self._send_error_json)
-            api.handle_tts_voices()
+            api.handle_tts_voices(self._send_binary)
         elif self.path == "/api/elevenlabs/voices":
             api = APIHandler(self._json, self._send_error_json)
-            api.handle_elevenlabs_voices()
+            api.handle_elevenlabs_voices(self._send_binary)
         elif self.path.startswith("/api/sse/status/"):
             self._handle_sse_status()
+        elif self.path.startswith("/api/stt/stream/events/"):
+            self._handle_stt_stream_events()
+        elif self.path.startswith("/api/media/result/"):
+            job_id = self.path.split("/api/media/result/")[1]
+            api = APIHandler(self._json, self._send_error_json)
+            api.handle_media_result(job_id, self._send_binary)
         elif self.path == "/api/mcp/config":
             api = APIHandler(self._json, self._send_error_json)
             api.handle_mcp_config_get({})
@@ -175,6 +231,8 @@ class ChatRelayHandler(SimpleHTTPRequestHandler):
             return
 
         api = APIHandler(self._json, self._send_error_json)
+        # Lets cached-content handlers answer 304 before doing the work
+        if_none_match = self.headers.get("If-None-Match", "")
 
         # Route to appropriate handler
         routes = {
@@ -220,18 +278,18 @@ class ChatRelayHandler(SimpleHTTPRequestHandler):
             "/api/queue/status": api.handle_queue_status,
             "/api/system/reset": lambda: api.handle_system_reset(data),
             "/api/quick-chat": lambda: api.handle_quick_chat(data),
-            "/api/tts": lambda: api.handle_tts(data, self._send_binary),
-            "/api/tts/piper": lambda: api.handle_piper_tts(data, self._send_binary),
-            "/api/elevenlabs/tts": lambda: api.handle_elevenlabs_tts(data, self._send_binary),
-            "/api/ocr": lambda: api.handle_ocr(data),
-            "/api/pdf/generate": lambda: api.handle_pdf_generate(data, self._send_binary),
-            "/api/video/analyze": lambda: api.handle_video_analyze(data),
-            "/api/video/transcribe": lambda: api.handle_video_transcribe(data),
-            "/api/video/youtube": lambda: api.handle_youtube_download(data),
-            "/api/image/generate": lambda: api.handle_dalle_generate(data),
-            "/api/sqlite/query": lambda: api.handle_sqlite_query(data),
+            "/api/quick-chat/stream": lambda: api.handle_quick_chat_stream(data, self._send_stream),
+            "/api/tts": lambda: api.handle_tts(data, self._send_binary, if_none_match),
+            "/api/tts/piper": lambda: api.handle_piper_tts(data, self._send_binary, if_none_match),
+            "/api/tts/stream": lambda: api.handle_tts_stream(data, self._send_stream),
+            "/api/elevenlabs/tts": lambda: api.handle_elevenlabs_tts(data, self._send_binary, if_none_match),
+            "/api/stt/stream/start": lambda: api.handle_stt_stream_start(data),
+            "/api/stt/stream/chunk": lambda: api.handle_stt_stream_chunk(data),
+            "/api/stt/stream/stop": lambda: api.handle_stt_stream_stop(data),
+            "/api/media/status": lambda: api.handle_media_status(data),
+            "/api/media/cancel": lambda: api.handle_media_cancel(data),
+            "/api/sqlite/query": lambda: api.handle_sqlite_query(data, self._send_stream),
             "/api/sqlite/tables": lambda: api.handle_sqlite_tables(data),
-            "/api/whisper/transcribe": lambda: api.handle_whisper_transcribe(data),
             "/api/mcp/config": lambda: api.handle_mcp_config_set(data),
             "/api/mcp/servers": lambda: api.handle_mcp_servers_list(data),
             "/api/context/save": lambda: api.handle_context_save(data),
@@ -242,6 +300,26 @@ class ChatRelayHandler(SimpleHTTPRequestHandler):
             "/api/project/delete": lambda: api.handle_project_delete(data),
         }
 
+        # Slow media endpoints: {"async": true} queues them as background media jobs
+        media_routes = {
+            "/api/ocr": ("ocr", lambda a, send_binary: a.handle_ocr(data)),
+            "/api/ocr/batch": ("ocr", lambda a, send_binary: a.handle_ocr_batch(data)),
+            "/api/pdf/generate": ("pdf", lambda a, send_binary: a.handle_pdf_generate(
+                data, send_binary, "" if data.get("async") else if_none_match)),
+            "/api/video/analyze": ("video", lambda a, send_binary: a.handle_video_analyze(data)),
+            "/api/video/transcribe": ("video", lambda a, send_binary: a.handle_video_transcribe(data)),
+            "/api/video/youtube": ("youtube", lambda a, send_binary: a.handle_youtube_download(data)),
+            "/api/image/generate": ("image", lambda a, send_binary: a.handle_dalle_generate(data)),
+            "/api/whisper/transcribe": ("whisper", lambda a, send_binary: a.handle_whisper_transcribe(data)),
+        }
+        if self.path in media_routes:
+            kind, run = media_routes[self.path]
+            if data.get("async"):
+                api.handle_media_submit(kind, run)
+            else:
+                run(api, self._send_binary)
+            return
+
         handler = routes.get(self.path)
         if handler:
             handler()
@@ -367,6 +445,11 @@ class ChatRelayHandler(SimpleHTTPRequestHandler):
         self.send_header("Access-Control-Allow-Origin", "*")
         self.end_headers()
 
+        media_job = media_jobs().get(job_id)
+        if media_job:
+            self._stream_media_job_status(media_job)
+            return
+
         queue_dir = Path("/opt/clawd/projects/relay/.queue")
         job_file = queue_dir / f"{job_id}.json"
         result_file = queue_dir / f"{job_id}.result"
@@ -422,6 +505,57 @@ class ChatRelayHandler(SimpleHTTPRequestHandler):
         except (BrokenPipeError, ConnectionResetError, OSError):
             pass  # Client disconnected
 
+    def _handle_stt_stream_events(self):
+        """GET /api/stt/stream/events/<session_id> - Stream partial and final hypotheses via SSE."""
+        import time as _time
+        session = stt_sessions().get(self.path.split("/api/stt/stream/events/")[1])
+        if session is None:
+            self._json({"error": "Unknown or expired session"}, 404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "keep-alive")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+
+        seq = -1
+        try:
+            while True:
+                events = session.events_after(seq, timeout=15)
+                if not events:
+                    if session.done or _time.time() - session.last_activity > STT_STREAM_IDLE_SECONDS:
+                        break
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+                    continue
+                for event in events:
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                seq = events[-1]["seq"]
+                self.wfile.flush()
+                if events[-1]["type"] in ("final", "error"):
+                    break
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass  # Client disconnected
+
+    def _stream_media_job_status(self, job):
+        """Send SSE status events for a media job until it finishes."""
+        import time as _time
+        last_event = None
+        try:
+            while True:
+                event_data = job.to_dict()
+                if event_data != last_event:
+                    self.wfile.write(f"data: {json.dumps(event_data)}\n\n".encode())
+                    self.wfile.flush()
+                    last_event = event_data
+                if event_data["status"] in ("complete", "error", "cancelled"):
+                    break
+                _time.sleep(0.5)
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass  # Client disconnected
+
     def _serve_html_cached(self):
         """Serve HTML page with ETag caching."""
         html_bytes, etag = get_cached_html()
@@ -544,6 +678,11 @@ def run_server(port: int = DEFAULT_PORT):
     # Initialize HTML cache
     init_html_cache()
 
+    # Warm configured Whisper models in the background (RELAY_WHISPER_PRELOAD)
+    preload_whisper_models()
+    # Start resident Piper voices the same way (RELAY_PIPER_PRELOAD)
+    preload_piper_voices()
+
     class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
         daemon_threads = True
 
@@ -0,0 +1,239 @@
+"""Pooled read-only SQLite connections and bounded query results for /api/sqlite/*.
+
+The SQLite browser used to open a connection per request and fetchall()
+the whole result, so a `SELECT *` on a large table was materialized (and
+JSON-encoded) in server memory in one piece. Now:
+
+- connections are opened read-only (`file:...?mode=ro` URI, query_only on)
+  and kept in a small pool per database path; a pooled connection is
+  dropped if the file at that path was replaced (different inode);
+- results are returned in pages of at most SQLITE_MAX_PAGE_ROWS rows, with
+  an opaque cursor for the next page; only one page is ever held;
+- a progress handler interrupts any statement running past its deadline;
+- iter_rows() yields rows one at a time for NDJSON streaming, capped at
+  SQLITE_MAX_STREAM_ROWS.
+
+Usage:
+    with sqlite_pool().connection(path) as conn:
+        columns, rows, has_more = query_page(conn, query, offset=0, page_size=200)
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from .config import (
+    SQLITE_POOL_SIZE, SQLITE_POOL_MAX_DATABASES, SQLITE_POOL_IDLE_SECONDS, SQLITE_QUERY_TIMEOUT_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+_PROGRESS_STEPS = 1000  # VM instructions between deadline checks
+_FETCH_BLOCK = 256
+
+
+def json_value(value):
+    """A column value JSON can carry (BLOBs become base64 strings)."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode()
+    return value
+
+
+def encode_cursor(query: str, offset: int) -> str:
+    """Opaque token for the page starting at offset, bound to the query text."""
+    token = {"o": offset, "q": hashlib.sha256(query.encode()).hexdigest()[:12]}
+    return base64.urlsafe_b64encode(json.dumps(token).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, query: str) -> int:
+    """Row offset from a cursor token; ValueError if it is malformed or from another query."""
+    try:
+        token = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        offset = int(token["o"])
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise ValueError("Invalid cursor")
+    if token.get("q") != hashlib.sha256(query.encode()).hexdigest()[:12] or offset < 0:
+        raise ValueError("Cursor does not belong to this query")
+    return offset
+
+
+@contextmanager
+def query_deadline(conn: sqlite3.Connection, timeout: float):
+    """Interrupt statements on conn that run past timeout seconds (OperationalError 'interrupted')."""
+    deadline = time.monotonic() + timeout
+    conn.set_progress_handler(lambda: 1 if time.monotonic() > deadline else 0, _PROGRESS_STEPS)
+    try:
+        yield
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+def query_page(conn: sqlite3.Connection, query: str, offset: int = 0, page_size: int = 200,
+               timeout: float = SQLITE_QUERY_TIMEOUT_SECONDS) -> Tuple[List[str], List[list], bool]:
+    """(columns, up to page_size rows from offset, whether more rows follow).
+
+    Earlier rows are stepped over without being kept, so memory stays bounded by one page.
+    """
+    cursor = conn.cursor()
+    try:
+        with query_deadline(conn, timeout):
+            cursor.execute(query)
+            columns = [d[0] for d in cursor.description] if cursor.description else []
+            skipped = 0
+            while skipped < offset:
+                block = cursor.fetchmany(min(_FETCH_BLOCK, offset - skipped))
+                if not block:
+                    break
+                skipped += len(block)
+            rows = cursor.fetchmany(page_size + 1)
+    finally:
+        cursor.close()
+    has_more = len(rows) > page_size
+    return columns, [[json_value(v) for v in row] for row in rows[:page_size]], has_more
+
+
+def iter_rows(conn: sqlite3.Connection, query: str, max_rows: int,
+              timeout: float = SQLITE_QUERY_TIMEOUT_SECONDS) -> Iterator:
+    """Yield the column names, then up to max_rows rows, then whether the result was truncated."""
+    cursor = conn.cursor()
+    try:
+        with query_deadline(conn, timeout):
+            cursor.execute(query)
+            yield [d[0] for d in cursor.description] if cursor.description else []
+            sent = 0
+            while sent < max_rows:
+                block = cursor.fetchmany(min(_FETCH_BLOCK, max_rows - sent))
+                if not block:
+                    break
+                for row in block:
+                    yield [json_value(v) for v in row]
+                sent += len(block)
+            yield sent == max_rows and cursor.fetchone() is not None
+    finally:
+        cursor.close()
+
+
+class SQLitePool:
+    """Idle read-only connections per database path, least recently used databases closed first."""
+
+    def __init__(self, size: int = SQLITE_POOL_SIZE, max_databases: int = SQLITE_POOL_MAX_DATABASES,
+                 idle_seconds: float = SQLITE_POOL_IDLE_SECONDS):
+        self.size = size
+        self.max_databases = max_databases
+        self.idle_seconds = idle_seconds
+        self._idle: "OrderedDict[str, list]" = OrderedDict()  # path -> [(conn, identity, last used)]
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+        self.closed = 0
+
+    @staticmethod
+    def _identity(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_dev, stat.st_ino
+
+    @staticmethod
+    def _open(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(f"file:{quote(path)}?mode=ro", uri=True, timeout=5, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _expire(self, now: float) -> list:
+        """Pop idle connections past idle_seconds and databases beyond max_databases. Lock held."""
+        expired = []
+        for path in list(self._idle):
+            entries = self._idle[path]
+            expired += [e[0] for e in entries if now - e[2] > self.idle_seconds]
+            entries[:] = [e for e in entries if now - e[2] <= self.idle_seconds]
+            if not entries:
+                del self._idle[path]
+        while len(self._idle) > self.max_databases:
+            _, entries = self._idle.popitem(last=False)
+            expired += [e[0] for e in entries]
+        return expired
+
+    def _close(self, connections: list):
+        for conn in connections:
+            conn.close()
+        with self._lock:
+            self.closed += len(connections)
+
+    @contextmanager
+    def connection(self, path) -> Iterator[sqlite3.Connection]:
+        """A read-only connection to the database at path, returned to the pool afterwards.
+
+        Raises FileNotFoundError if the database doesn't exist.
+        """
+        path = str(Path(path).resolve())
+        identity = self._identity(path)
+        conn, stale = None, []
+        with self._lock:
+            entries = self._idle.get(path, [])
+            while entries and conn is None:
+                candidate, candidate_identity, _ = entries.pop()
+                if candidate_identity == identity:
+                    conn = candidate
+                    self.reused += 1
+                else:
+                    stale.append(candidate)  # File was replaced; this handle reads the old one
+        self._close(stale)
+        if conn is None:
+            conn = self._open(path)
+            with self._lock:
+                self.opened += 1
+
+        try:
+            yield conn
+        finally:
+            now = time.time()
+            with self._lock:
+                entries = self._idle.setdefault(path, [])
+                self._idle.move_to_end(path)
+                overflow = [conn] if len(entries) >= self.size else []
+                if not overflow:
+                    entries.append((conn, identity, now))
+                overflow += self._expire(now)
+            self._close(overflow)
+
+    def close_all(self):
+        with self._lock:
+            connections = [e[0] for entries in self._idle.values() for e in entries]
+            self._idle.clear()
+        self._close(connections)
+
+    def snapshot(self) -> dict:
+        """Return pooled connections per database and lifetime counters."""
+        with self._lock:
+            expired = self._expire(time.time())
+        self._close(expired)
+        with self._lock:
+            return {
+                "databases": {path: len(entries) for path, entries in self._idle.items()},
+                "opened": self.opened,
+                "reused": self.reused,
+                "closed": self.closed,
+            }
+
+
+_pool: Optional[SQLitePool] = None
+_pool_lock = threading.Lock()
+
+
+def sqlite_pool() -> SQLitePool:
+    """Get the process-wide SQLite connection pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SQLitePool()
+        return _pool
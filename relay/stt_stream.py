@@ -0,0 +1,408 @@
+"""Streaming speech-to-text sessions for microphone input.
+
+/api/whisper/transcribe only sees audio after the user stops talking. A
+stream session instead receives the recording in small chunks while it is
+made and keeps re-decoding a sliding window of the most recent audio on a
+warm model (from the Whisper registry), so text appears while the user is
+still speaking.
+
+Whisper has no incremental decoder, so stability comes from the
+LocalAgreement policy: a word is committed once two consecutive decodes of
+the growing window agree on it, and the unstable tail is sent as a partial
+hypothesis. When the window grows past STT_STREAM_WINDOW_SECONDS the audio
+before the last committed word is dropped, so each decode stays short no
+matter how long the session runs.
+
+Chunks are either raw 16-bit mono PCM or a compressed stream (Opus in
+WebM/Ogg as produced by the browser's MediaRecorder), which one long-lived
+ffmpeg process per session decodes as it arrives.
+
+    session = stt_sessions().create(model="base", language="en", audio_format="webm")
+    session.feed(chunk)           # returns at once; decoding runs on the session's thread
+    session.events_after(seq)     # partial / final hypotheses
+    session.finish()              # final transcript
+"""
+
+import re
+import subprocess
+import threading
+import time
+import uuid
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from .config import (
+    STT_STREAM_MODEL, STT_STREAM_STEP_SECONDS, STT_STREAM_WINDOW_SECONDS,
+    STT_STREAM_MAX_WINDOW_SECONDS, STT_STREAM_IDLE_SECONDS, STT_STREAM_MAX_SESSIONS
+)
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2  # 16-bit mono
+
+AUDIO_FORMATS = ("pcm16", "webm", "ogg", "opus")
+
+# (start, end, word) with times in seconds since the session started
+Word = Tuple[float, float, str]
+
+_NORMALIZE = re.compile(r"[^\w']+")
+
+
+def _norm(word: str) -> str:
+    return _NORMALIZE.sub("", word.lower())
+
+
+def join_words(words: List[Word]) -> str:
+    """Text of a word list (Whisper words carry their own leading spaces)."""
+    return "".join(w for _, _, w in words).strip()
+
+
+class LocalAgreement:
+    """Commit words once two consecutive hypotheses agree on them (LocalAgreement-2)."""
+
+    def __init__(self):
+        self.committed: List[Word] = []
+        self.pending: List[Word] = []
+
+    @property
+    def committed_end(self) -> float:
+        return self.committed[-1][1] if self.committed else 0.0
+
+    def _new_words(self, words: List[Word]) -> List[Word]:
+        """Drop words the window still contains from before the last committed word."""
+        words = [w for w in words if w[0] >= self.committed_end - 0.1]
+        # A word straddling the cut can reappear at the head; drop repeated n-grams
+        if words and self.committed and abs(words[0][0] - self.committed_end) < 1.0:
+            for n in range(min(5, len(words), len(self.committed)), 0, -1):
+                tail = [_norm(w[2]) for w in self.committed[-n:]]
+                if [_norm(w[2]) for w in words[:n]] == tail:
+                    return words[n:]
+        return words
+
+    def insert(self, words: List[Word]) -> List[Word]:
+        """Feed the latest hypothesis; return the words it newly commits."""
+        words = self._new_words(words)
+        agreed = []
+        for old, new in zip(self.pending, words):
+            if _norm(old[2]) != _norm(new[2]):
+                break
+            agreed.append(new)
+        self.committed.extend(agreed)
+        self.pending = words[len(agreed):]
+        return agreed
+
+    def commit_before(self, time_limit: float) -> List[Word]:
+        """Force-commit pending words that end before time_limit."""
+        forced = [w for w in self.pending if w[1] <= time_limit]
+        self.committed.extend(forced)
+        self.pending = self.pending[len(forced):]
+        return forced
+
+    def flush(self) -> List[Word]:
+        """Commit everything still pending (end of stream)."""
+        rest, self.pending = self.pending, []
+        self.committed.extend(rest)
+        return rest
+
+
+def hypothesis_words(result: dict, offset: float) -> List[Word]:
+    """Words of a transcription result, shifted to session time.
+
+    Segments without word timings (e.g. WhisperX without alignment) are
+    split into words spread evenly over the segment.
+    """
+    words = []
+    for seg in result.get("segments", []):
+        if seg.get("words"):
+            words.extend((offset + (w["start"] or seg["start"]), offset + (w["end"] or seg["end"]), w["word"])
+                         for w in seg["words"])
+            continue
+        parts = seg["text"].split()
+        step = (seg["end"] - seg["start"]) / max(1, len(parts))
+        words.extend((offset + seg["start"] + i * step, offset + seg["start"] + (i + 1) * step, " " + p)
+                     for i, p in enumerate(parts))
+    return words
+
+
+class _StreamDecoder:
+    """Long-lived ffmpeg turning a compressed stream (WebM/Ogg Opus) into 16 kHz PCM.
+
+    Probing and buffering are turned off so each chunk's audio comes out as
+    soon as it is written, instead of after ffmpeg has read seconds of input.
+    """
+
+    def __init__(self, on_pcm, ffmpeg_path: str = "ffmpeg", input_args: Optional[List[str]] = None):
+        self._process = subprocess.Popen(
+            [ffmpeg_path, "-hide_banner", "-loglevel", "error",
+             "-probesize", "32", "-analyzeduration", "0", "-fflags", "nobuffer",
+             *(input_args or []), "-i", "pipe:0",
+             "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-flush_packets", "1", "pipe:1"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self._reader = threading.Thread(target=self._read, args=(on_pcm,), daemon=True)
+        self._reader.start()
+
+    def _read(self, on_pcm):
+        while True:
+            data = self._process.stdout.read1(8192)
+            if not data:
+                break
+            on_pcm(data)
+
+    def write(self, chunk: bytes):
+        self._process.stdin.write(chunk)
+        self._process.stdin.flush()
+
+    def close(self, timeout: float = 10):
+        """Finish decoding everything written so far."""
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        self._reader.join(timeout)
+        try:
+            self._process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+
+
+class STTSession:
+    """One streaming recognition: buffered audio, agreement state and emitted events."""
+
+    def __init__(self, session_id: str, model: str = STT_STREAM_MODEL, language: Optional[str] = None,
+                 audio_format: str = "pcm16", sample_rate: int = SAMPLE_RATE, backend: Optional[str] = None,
+                 ffmpeg_path: str = "ffmpeg", transcribe=None):
+        if audio_format not in AUDIO_FORMATS:
+            raise ValueError(f"Unsupported audio format '{audio_format}' (choose from {', '.join(AUDIO_FORMATS)})")
+        self.id = session_id
+        self.model = model
+        self.language = language
+        self.backend = backend
+        self.created = time.time()
+        self.last_activity = self.created
+        self._transcribe = transcribe or self._model_transcribe
+
+        self._pcm = bytearray()
+        self._offset = 0.0          # Session time of the first buffered sample
+        self._received = 0          # PCM bytes received in total
+        self._decoded = 0           # _received at the last decode
+        self._finishing = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self.agreement = LocalAgreement()
+        self.events: List[dict] = []
+        self.decodes = 0
+        self.error: Optional[str] = None
+
+        self._decoder = None
+        if audio_format != "pcm16" or sample_rate != SAMPLE_RATE:
+            input_args = ["-f", "s16le", "-ar", str(sample_rate), "-ac", "1"] if audio_format == "pcm16" else []
+            self._decoder = _StreamDecoder(self._append_pcm, ffmpeg_path, input_args)
+        self._thread = threading.Thread(target=self._run, name=f"stt-{session_id[:8]}", daemon=True)
+        self._thread.start()
+
+    # ---- input -----------------------------------------------------------
+
+    def _append_pcm(self, data: bytes):
+        with self._cond:
+            self._pcm.extend(data)
+            self._received += len(data)
+            self._cond.notify_all()
+
+    def feed(self, chunk: bytes):
+        """Add audio; decoding happens in the background."""
+        if self._finishing or self._closed:
+            raise RuntimeError("Session is finished")
+        self.last_activity = time.time()
+        if self._decoder:
+            self._decoder.write(chunk)
+        else:
+            self._append_pcm(chunk)
+
+    @property
+    def duration(self) -> float:
+        """Seconds of audio received."""
+        return self._received / BYTES_PER_SECOND
+
+    # ---- decoding --------------------------------------------------------
+
+    def _model_transcribe(self, pcm: bytes, language: Optional[str]) -> dict:
+        from .audio_extract import pcm_to_float32
+        from .transcription import transcribe
+        return transcribe(pcm_to_float32(pcm), self.model, self.backend, language,
+                          word_timestamps=True, vad=False)
+
+    def _decode(self, pcm: bytes, offset: float) -> List[Word]:
+        result = self._transcribe(pcm, self.language)
+        self.language = self.language or result.get("language")
+        self.decodes += 1
+        return hypothesis_words(result, offset)
+
+    def _emit(self, event: dict):
+        with self._cond:
+            event["seq"] = len(self.events)
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def _state(self, event_type: str, new: List[Word]) -> dict:
+        return {
+            "type": event_type,
+            "text": join_words(self.agreement.committed),
+            "partial": join_words(self.agreement.pending),
+            "new": join_words(new),
+            "duration": round(self.duration, 2),
+        }
+
+    def _trim(self, buffered: float):
+        """Drop audio before the last committed word once the window is too long."""
+        cut = self.agreement.committed_end
+        if buffered > STT_STREAM_MAX_WINDOW_SECONDS and cut - self._offset < 1.0:
+            # Nothing stable yet: commit what is well behind the live edge rather than grow forever
+            self.agreement.commit_before(self._offset + buffered - 2.0)
+            cut = self.agreement.committed_end
+        if buffered <= STT_STREAM_WINDOW_SECONDS or cut <= self._offset:
+            return
+        drop = int((cut - self._offset) * SAMPLE_RATE) * 2
+        with self._cond:
+            del self._pcm[:drop]
+            self._offset += drop / BYTES_PER_SECOND
+
+    def _run(self):
+        step = int(STT_STREAM_STEP_SECONDS * BYTES_PER_SECOND)
+        while True:
+            with self._cond:
+                while not self._closed and not self._finishing and self._received - self._decoded < step:
+                    self._cond.wait(1.0)
+                if self._closed:
+                    return
+                final = self._finishing
+                pcm, offset = bytes(self._pcm), self._offset
+                self._decoded = self._received
+            try:
+                words = self._decode(pcm, offset) if pcm else []
+            except Exception as e:
+                logger.error(f"Streaming transcription failed: {e}")
+                self.error = str(e)
+                self._emit({"type": "error", "error": str(e)})
+                return
+            if final:
+                new = self.agreement.insert(words) + self.agreement.flush()
+                self._emit(self._state("final", new))
+                return
+            new = self.agreement.insert(words)
+            self._emit(self._state("partial", new))
+            self._trim(len(pcm) / BYTES_PER_SECOND)
+
+    # ---- output ----------------------------------------------------------
+
+    def events_after(self, seq: int = -1, timeout: float = 0) -> List[dict]:
+        """Events with a sequence number above seq, waiting up to timeout for one."""
+        with self._cond:
+            if timeout and len(self.events) <= seq + 1 and not self._closed:
+                self._cond.wait_for(lambda: len(self.events) > seq + 1 or self._closed, timeout)
+            return self.events[seq + 1:]
+
+    @property
+    def done(self) -> bool:
+        return bool(self.events) and self.events[-1]["type"] in ("final", "error")
+
+    def latest(self) -> dict:
+        """The current hypothesis, for clients that poll instead of listening to events."""
+        with self._cond:
+            latest = dict(self.events[-1]) if self.events else self._state("partial", [])
+        latest["session_id"] = self.id
+        return latest
+
+    def finish(self, timeout: float = 60) -> dict:
+        """Decode the remaining audio and return the final event."""
+        if self._decoder:
+            self._decoder.close()
+        with self._cond:
+            self._finishing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return self.latest()
+
+    def close(self):
+        """Stop without a final decode."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._decoder:
+            self._decoder.close(timeout=2)
+
+
+class STTSessions:
+    """Active streaming sessions, closed after STT_STREAM_IDLE_SECONDS without input."""
+
+    def __init__(self, max_sessions: int = STT_STREAM_MAX_SESSIONS, idle_seconds: float = STT_STREAM_IDLE_SECONDS):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._sessions: Dict[str, STTSession] = {}
+        self._lock = threading.Lock()
+        self.started = 0
+        self.finished = 0
+        self.expired = 0
+
+    def _reap(self):
+        now = time.time()
+        with self._lock:
+            idle = [s for s in self._sessions.values() if now - s.last_activity > self.idle_seconds]
+            for session in idle:
+                del self._sessions[session.id]
+            self.expired += len(idle)
+        for session in idle:
+            logger.info(f"Closing idle speech stream {session.id}")
+            session.close()
+
+    def create(self, **kwargs) -> STTSession:
+        """Start a session; raises RuntimeError when max_sessions are active."""
+        self._reap()
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                raise RuntimeError(f"Too many active speech streams (max {self.max_sessions})")
+            session = STTSession(uuid.uuid4().hex, **kwargs)
+            self._sessions[session.id] = session
+            self.started += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[STTSession]:
+        self._reap()
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def finish(self, session_id: str) -> Optional[dict]:
+        """Finish and remove a session, returning its final event (None if unknown)."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return None
+        result = session.finish()
+        with self._lock:
+            self.finished += 1
+        return result
+
+    def snapshot(self) -> dict:
+        """Return active session count and lifetime counters."""
+        with self._lock:
+            return {
+                "active": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "started": self.started,
+                "finished": self.finished,
+                "expired": self.expired,
+            }
+
+
+_sessions: Optional[STTSessions] = None
+_sessions_lock = threading.Lock()
+
+
+def stt_sessions() -> STTSessions:
+    """Get the process-wide streaming speech-to-text sessions."""
+    global _sessions
+    with _sessions_lock:
+        if _sessions is None:
+            _sessions = STTSessions()
+        return _sessions
@@ -0,0 +1,130 @@
+"""Persistent cache of transcripts keyed by audio content, model and language.
+
+The same video is often transcribed several times (analyze, then transcribe,
+then the YouTube URL again). Keys hash the decoded 16 kHz mono PCM rather
+than the container bytes, so a re-download, a remux or a different upload
+of the same audio still hits. Entries live in a size-bounded DiskCache
+shared by the server, the watcher and the standalone transcribe scripts.
+"""
+
+import hashlib
+import subprocess
+import threading
+import wave
+import logging
+from typing import Callable, Optional
+
+from .config import TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_MB
+from .disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+_READ_BLOCK = 1024 * 1024
+
+
+def pcm_fingerprint(audio_path: str, ffmpeg_path: str = "ffmpeg") -> str:
+    """SHA-256 of the audio decoded to 16 kHz mono s16le PCM.
+
+    16 kHz mono 16-bit WAVs (what the transcription paths extract) are hashed
+    straight from their frames; anything else is decoded through ffmpeg.
+    """
+    digest = hashlib.sha256()
+    try:
+        with wave.open(audio_path, "rb") as wav:
+            if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) == (16000, 1, 2):
+                while True:
+                    frames = wav.readframes(_READ_BLOCK // 2)
+                    if not frames:
+                        return digest.hexdigest()
+                    digest.update(frames)
+    except (wave.Error, EOFError):
+        pass  # Not a WAV; decode below
+
+    cmd = [ffmpeg_path, "-nostdin", "-i", audio_path, "-vn", "-f", "s16le",
+           "-ac", "1", "-ar", "16000", "-loglevel", "error", "-"]
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+        for block in iter(lambda: proc.stdout.read(_READ_BLOCK), b""):
+            digest.update(block)
+        stderr = proc.stderr.read()
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode audio: {stderr.decode(errors='replace')[:200]}")
+    return digest.hexdigest()
+
+
+def pcm_bytes_fingerprint(pcm: bytes) -> str:
+    """pcm_fingerprint of 16 kHz mono s16le PCM that is already in memory."""
+    return hashlib.sha256(pcm).hexdigest()
+
+
+def transcript_key(fingerprint: str, model: str, language: Optional[str] = None, options: str = "") -> str:
+    """Cache key for one transcription; options distinguishes e.g. word timestamps."""
+    return f"{fingerprint}:{model}:{language or 'auto'}:{options}"
+
+
+class TranscriptCache:
+    """Transcript results stored as JSON in a size-bounded DiskCache."""
+
+    def __init__(self, directory=TRANSCRIPT_CACHE_DIR, max_mb: float = TRANSCRIPT_CACHE_MAX_MB):
+        self.store = DiskCache(directory, int(max_mb * 1024 * 1024), suffix=".json")
+
+    def get(self, fingerprint: str, model: str, language: Optional[str] = None,
+            options: str = "") -> Optional[dict]:
+        """Return a cached transcript or None."""
+        return self.store.get_json(transcript_key(fingerprint, model, language, options))
+
+    def put(self, fingerprint: str, model: str, language: Optional[str], result: dict,
+            options: str = "") -> None:
+        """Store a transcript result."""
+        self.store.put_json(transcript_key(fingerprint, model, language, options), result)
+
+    def transcribe(self, audio_path: Optional[str], model: str, language: Optional[str],
+                   run: Callable[[], dict], options: str = "", ffmpeg_path: str = "ffmpeg",
+                   fingerprint: Optional[str] = None) -> dict:
+        """Return the cached transcript for this audio, or run() and cache its result.
+
+        A result flagged {"diarized": False} (speakers requested, diarization
+        failed) is returned but not cached, so a later run can try again.
+
+        Pass fingerprint (e.g. pcm_bytes_fingerprint of PCM already in memory)
+        to skip hashing audio_path. If the audio can't be fingerprinted the
+        transcription still runs, uncached.
+        """
+        if fingerprint is None:
+            try:
+                fingerprint = pcm_fingerprint(audio_path, ffmpeg_path)
+            except Exception as e:
+                logger.warning(f"Transcript cache skipped, could not fingerprint audio: {e}")
+                return run()
+
+        cached = self.get(fingerprint, model, language, options)
+        if cached is not None:
+            logger.info(f"Transcript cache hit ({model}, {language or 'auto'})")
+            return cached
+
+        result = run()
+        if result.get("diarized") is False:
+            # Diarization was requested but failed: don't serve this as the speaker-labelled transcript
+            logger.info("Transcript not cached: diarization failed")
+            return result
+        try:
+            self.put(fingerprint, model, language, result, options)
+        except Exception as e:
+            logger.warning(f"Failed to store transcript in cache: {e}")
+        return result
+
+    def snapshot(self) -> dict:
+        """Return hit/miss counters and size."""
+        return self.store.snapshot()
+
+
+_cache: Optional[TranscriptCache] = None
+_cache_lock = threading.Lock()
+
+
+def transcript_cache() -> TranscriptCache:
+    """Get the process-wide transcript cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TranscriptCache()
+        return _cache
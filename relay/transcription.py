@@ -0,0 +1,386 @@
+"""Transcription engine with pluggable Whisper backends.
+
+Three implementations of the same model are supported behind one interface:
+
+    faster-whisper  CTranslate2, int8 on CPU: several times faster than openai-whisper
+    whisperx        faster-whisper with batched decoding, word alignment and diarization
+    whisper         the reference openai-whisper (PyTorch)
+
+resolve_backend() picks TRANSCRIBE_BACKEND, or with "auto" the fastest one
+installed (TRANSCRIBE_BACKEND_ORDER). Loaded models are shared through the
+Whisper model registry under model_key(backend, model), so the API
+handlers, the media jobs and the chunked-transcription workers all reuse
+warm models. Every backend returns the same result shape:
+
+    {"text", "language", "language_probability", "duration", "backend", "model",
+     "segments": [{"id", "start", "end", "text", "words"?: [{"word", "start", "end", "probability"}]}]}
+
+Usage:
+    result = transcribe(samples_or_path, "base", language="en")
+    result = transcribe_file(wav_path, "small", word_timestamps=True)  # chunked + cached
+"""
+
+import importlib.util
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .config import TRANSCRIBE_BACKEND, TRANSCRIBE_BACKEND_ORDER, WHISPER_CPU_COMPUTE_TYPE
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+def default_device() -> str:
+    """ "cuda" when torch sees a GPU, else "cpu"."""
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return "cuda"
+    except ImportError:
+        pass
+    return "cpu"
+
+
+def default_compute_type(device: str) -> str:
+    """CTranslate2 compute type: float16 on GPU, WHISPER_CPU_COMPUTE_TYPE (int8) on CPU."""
+    return "float16" if device == "cuda" else WHISPER_CPU_COMPUTE_TYPE
+
+
+class LoadedModel:
+    """A backend model plus the device settings it was loaded with."""
+
+    def __init__(self, backend: "Backend", name: str, model, device: str,
+                 compute_type: Optional[str] = None, size_bytes: Optional[int] = None):
+        self.backend = backend
+        self.name = name
+        self.model = model
+        self.device = device
+        self.compute_type = compute_type
+        self.size_bytes = size_bytes
+
+
+def _word(w: dict) -> dict:
+    """Normalise a word timing dict (whisperx calls probability "score")."""
+    word = {"word": w.get("word", ""), "start": w.get("start"), "end": w.get("end"),
+            "probability": w.get("probability", w.get("score"))}
+    if w.get("speaker"):
+        word["speaker"] = w["speaker"]
+    return word
+
+
+def normalize_segments(segments) -> List[dict]:
+    """Common segment dicts from any backend's segment dicts."""
+    result = []
+    for seg in segments:
+        entry = {"id": len(result), "start": seg["start"], "end": seg["end"], "text": seg.get("text", "")}
+        if seg.get("words"):
+            entry["words"] = [_word(w) for w in seg["words"]]
+        if seg.get("speaker"):
+            entry["speaker"] = seg["speaker"]
+        result.append(entry)
+    return result
+
+
+class Backend:
+    """One Whisper implementation. Subclasses set name/module and implement load/transcribe."""
+
+    name = ""
+    module = ""
+    supports_chunking = True
+
+    def available(self) -> bool:
+        """True if the backend's package is installed (checked without importing it)."""
+        return importlib.util.find_spec(self.module) is not None
+
+    def load(self, model_name: str, device: Optional[str] = None,
+             compute_type: Optional[str] = None, threads: int = 0) -> LoadedModel:
+        raise NotImplementedError
+
+    def transcribe(self, loaded: LoadedModel, audio, language: Optional[str] = None,
+                   word_timestamps: bool = False, **options) -> dict:
+        """Transcribe 16 kHz float32 samples; returns the common result shape."""
+        raise NotImplementedError
+
+
+class WhisperBackend(Backend):
+    """Reference openai-whisper on PyTorch."""
+
+    name = "whisper"
+    module = "whisper"
+
+    def load(self, model_name, device=None, compute_type=None, threads=0):
+        import whisper
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        device = device or default_device()
+        model = whisper.load_model(model_name, device=device)
+        size = sum(p.numel() * p.element_size() for p in model.parameters())
+        return LoadedModel(self, model_name, model, device, "float32", size)
+
+    def transcribe(self, loaded, audio, language=None, word_timestamps=False, **options):
+        result = loaded.model.transcribe(audio, language=language, word_timestamps=word_timestamps,
+                                         fp16=loaded.device == "cuda", verbose=None)
+        return {
+            "text": result.get("text", ""),
+            "language": result.get("language"),
+            "language_probability": None,
+            "segments": normalize_segments(result.get("segments", [])),
+        }
+
+
+class FasterWhisperBackend(Backend):
+    """CTranslate2 implementation; int8 weights on CPU."""
+
+    name = "faster-whisper"
+    module = "faster_whisper"
+
+    def load(self, model_name, device=None, compute_type=None, threads=0):
+        from faster_whisper import WhisperModel
+        device = device or default_device()
+        compute_type = compute_type or default_compute_type(device)
+        model = WhisperModel(model_name, device=device, compute_type=compute_type, cpu_threads=threads)
+        return LoadedModel(self, model_name, model, device, compute_type)
+
+    def transcribe(self, loaded, audio, language=None, word_timestamps=False, **options):
+        vad = options.get("vad", True)
+        segments, info = loaded.model.transcribe(
+            audio,
+            language=language,
+            beam_size=options.get("beam_size", 5),
+            word_timestamps=word_timestamps,
+            vad_filter=vad,  # Silero VAD skips silence before decoding
+            vad_parameters=dict(min_silence_duration_ms=500, speech_pad_ms=200) if vad else None
+        )
+        raw = [{"start": seg.start, "end": seg.end, "text": seg.text,
+                "words": [{"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                          for w in seg.words] if seg.words else None}
+               for seg in segments]  # Decoding happens lazily as the generator is consumed
+        return {
+            "text": "".join(s["text"] for s in raw),
+            "language": info.language,
+            "language_probability": info.language_probability,
+            "duration": info.duration,
+            "segments": normalize_segments(raw),
+        }
+
+
+class WhisperXBackend(Backend):
+    """Batched faster-whisper with wav2vec2 word alignment and optional diarization."""
+
+    name = "whisperx"
+    module = "whisperx"
+    supports_chunking = False  # Already batches internally; alignment needs the whole file
+
+    def __init__(self):
+        self._align_models: Dict[tuple, tuple] = {}
+        self._diarize_pipelines: Dict[tuple, object] = {}
+
+    def load(self, model_name, device=None, compute_type=None, threads=0):
+        import whisperx
+        device = device or default_device()
+        compute_type = compute_type or default_compute_type(device)
+        kwargs = {"threads": threads} if threads else {}
+        model = whisperx.load_model(model_name, device=device, compute_type=compute_type, **kwargs)
+        return LoadedModel(self, model_name, model, device, compute_type)
+
+    def _align_model(self, language: str, device: str):
+        """Alignment models are per language; keep each one loaded after first use."""
+        import whisperx
+        key = (language, device)
+        if key not in self._align_models:
+            self._align_models[key] = whisperx.load_align_model(language_code=language, device=device)
+        return self._align_models[key]
+
+    def _diarize_pipeline(self, hf_token: str, device: str):
+        import whisperx
+        key = (hf_token, device)
+        if key not in self._diarize_pipelines:
+            self._diarize_pipelines[key] = whisperx.DiarizationPipeline(use_auth_token=hf_token, device=device)
+        return self._diarize_pipelines[key]
+
+    def transcribe(self, loaded, audio, language=None, word_timestamps=False, **options):
+        import whisperx
+        result = loaded.model.transcribe(audio, batch_size=options.get("batch_size", 16), language=language)
+        language = result.get("language") or language or "en"
+
+        if options.get("align", True):
+            model_a, metadata = self._align_model(language, loaded.device)
+            result = whisperx.align(result["segments"], model_a, metadata, audio, loaded.device,
+                                    return_char_alignments=False)
+
+        diarized = None  # Not requested
+        if options.get("diarize") and options.get("hf_token"):
+            try:
+                diarize_segments = self._diarize_pipeline(options["hf_token"], loaded.device)(
+                    audio, min_speakers=options.get("min_speakers"), max_speakers=options.get("max_speakers"))
+                result = whisperx.assign_word_speakers(diarize_segments, result)
+                diarized = True
+            except Exception as e:
+                logger.warning(f"Diarization failed, continuing without speakers: {e}")
+                diarized = False  # Keeps the transcript cache from storing it as the diarized result
+
+        segments = normalize_segments(result.get("segments", []))
+        transcript = {
+            "text": " ".join(s["text"].strip() for s in segments),
+            "language": language,
+            "language_probability": None,
+            "segments": segments,
+        }
+        if diarized is not None:
+            transcript["diarized"] = diarized
+        return transcript
+
+
+BACKENDS: Dict[str, Backend] = {
+    backend.name: backend for backend in (FasterWhisperBackend(), WhisperXBackend(), WhisperBackend())
+}
+
+
+def get_backend(name: str) -> Backend:
+    """Look up a backend by name."""
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown transcription backend '{name}' (choose from {', '.join(BACKENDS)})")
+
+
+def available_backends() -> List[str]:
+    """Installed backends, fastest first."""
+    return [name for name in TRANSCRIBE_BACKEND_ORDER if name in BACKENDS and BACKENDS[name].available()]
+
+
+def resolve_backend(name: Optional[str] = None) -> Backend:
+    """The named backend, or with None/"auto" the configured default, else the fastest installed.
+
+    Raises RuntimeError if no backend is installed.
+    """
+    name = name or TRANSCRIBE_BACKEND
+    if name and name != "auto":
+        backend = get_backend(name)
+        if not backend.available():
+            raise RuntimeError(f"Transcription backend '{name}' is not installed")
+        return backend
+    available = available_backends()
+    if not available:
+        raise RuntimeError("No transcription backend installed. "
+                           "Install one of: pip install faster-whisper / whisperx / openai-whisper")
+    return BACKENDS[available[0]]
+
+
+def model_key(backend: str, model_name: str) -> str:
+    """Registry and transcript-cache id: plain name for openai-whisper, else "backend/name"."""
+    return model_name if backend == "whisper" else f"{backend}/{model_name}"
+
+
+def load_model(key: str) -> LoadedModel:
+    """Load a model_key() on the default device (the Whisper registry's loader).
+
+    Only the first segment can name the backend: model names may contain "/"
+    themselves (Hugging Face ids such as "Systran/faster-whisper-large-v3").
+    """
+    backend, _, name = key.partition("/")
+    if backend not in BACKENDS:
+        backend, name = "whisper", key
+    return get_backend(backend).load(name)
+
+
+def _as_samples(audio):
+    """float32 samples from an array, a 16 kHz WAV path, or any media file path."""
+    if not isinstance(audio, (str, Path)):
+        return audio
+    from .audio_extract import read_wav_pcm, pcm_to_float32, source_pcm
+    import wave
+    try:
+        with wave.open(str(audio), "rb") as wav:
+            if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) == (SAMPLE_RATE, 1, 2):
+                return pcm_to_float32(read_wav_pcm(audio))
+    except (wave.Error, EOFError):
+        pass
+    return pcm_to_float32(source_pcm(str(audio), stream=True))
+
+
+def transcribe(audio, model_name: str = "base", backend: Optional[str] = None,
+               language: Optional[str] = None, word_timestamps: bool = False, **options) -> dict:
+    """Transcribe audio (float32 16 kHz samples or a file path) with a warm shared model.
+
+    options are backend-specific: vad/beam_size (faster-whisper), batch_size,
+    align, diarize, hf_token, min_speakers, max_speakers (whisperx).
+    """
+    from .whisper_models import whisper_model
+    impl = resolve_backend(backend)
+    samples = _as_samples(audio)
+    with whisper_model(model_key(impl.name, model_name)) as loaded:
+        result = impl.transcribe(loaded, samples, language, word_timestamps, **options)
+    result.setdefault("duration", len(samples) / SAMPLE_RATE)
+    result["backend"] = impl.name
+    result["model"] = model_name
+    return result
+
+
+def transcribe_file(audio_path: str, model_name: str = "base", backend: Optional[str] = None,
+                    language: Optional[str] = None, word_timestamps: bool = False,
+                    chunked: Optional[bool] = None, workers: Optional[int] = None,
+                    progress: Optional[Callable[[int, int], None]] = None,
+                    use_cache: bool = True, cache_options: Optional[str] = None,
+                    ffmpeg_path: str = "ffmpeg", pcm: Optional[bytes] = None, **options) -> dict:
+    """Transcribe a 16 kHz mono WAV (or in-memory PCM) with chunking and the transcript cache.
+
+    chunked=None chunks automatically when the audio is long enough and the
+    backend supports it. With pcm given, audio_path may be None and the audio
+    is never written to disk.
+    """
+    from .chunked_transcribe import transcribe_chunked, should_chunk, budget_workers, wav_duration
+    from .transcript_cache import transcript_cache, pcm_bytes_fingerprint
+    from .audio_extract import pcm_to_float32
+
+    impl = resolve_backend(backend)
+    if pcm is not None:
+        duration = len(pcm) / (2 * SAMPLE_RATE)
+        chunked = False  # Chunk workers read slices of a WAV file
+    else:
+        duration = wav_duration(audio_path)
+    if chunked is None:
+        workers = workers or budget_workers(impl.name, model_name)
+        chunked = impl.supports_chunking and should_chunk(duration, workers)
+
+    def run():
+        if chunked:
+            # Long audio: silence-aligned chunks transcribed in parallel processes
+            result = transcribe_chunked(audio_path, model_name, language=language, workers=workers,
+                                        backend=impl.name, word_timestamps=word_timestamps,
+                                        ffmpeg_path=ffmpeg_path, progress=progress)
+            result.update(backend=impl.name, model=model_name, duration=duration)
+            return result
+        return transcribe(pcm_to_float32(pcm) if pcm is not None else audio_path,
+                          model_name, impl.name, language, word_timestamps, **options)
+
+    if not use_cache:
+        return run()
+    if cache_options is None:
+        cache_options = "words" if word_timestamps else ""
+    return transcript_cache().transcribe(
+        audio_path, model_key(impl.name, model_name), language, run, options=cache_options,
+        ffmpeg_path=ffmpeg_path, fingerprint=pcm_bytes_fingerprint(pcm) if pcm is not None else None
+    )
+
+
+def backend_snapshot() -> dict:
+    """Configured and installed backends, for health reporting.
+
+    Device and compute type come from the most recently used loaded model and
+    are "unknown" until one is loaded: asking torch would import it into the
+    server just to answer a health poll.
+    """
+    from .whisper_models import whisper_registry
+    available = available_backends()
+    loaded = [m for m in whisper_registry().models() if isinstance(m, LoadedModel)]
+    return {
+        "configured": TRANSCRIBE_BACKEND,
+        "available": available,
+        "default": available[0] if TRANSCRIBE_BACKEND == "auto" and available else TRANSCRIBE_BACKEND,
+        "device": loaded[-1].device if loaded else "unknown",
+        "compute_type": (loaded[-1].compute_type or "unknown") if loaded else "unknown",
+    }
@@ -0,0 +1,97 @@
+"""Synthesized speech cache shared by the Edge, Piper and ElevenLabs TTS endpoints.
+
+Voice mode re-speaks the same status phrases and replays earlier responses,
+and each call used to hit the network (Edge, ElevenLabs) or the CPU (Piper).
+Audio is stored in a size-bounded DiskCache keyed by a hash of the engine,
+voice, model, voice settings and the text with whitespace and Unicode form
+normalized, so trivially different spellings of the same request share an
+entry. The key hash doubles as the response ETag, so a browser replaying a
+clip it still holds gets a 304 without the audio being sent again.
+
+Each hit is credited with what the synthesis would have cost
+(dashboard.estimate_cost_usd), reported as dollars_saved in /api/health.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+import logging
+from typing import Optional
+
+from .config import TTS_CACHE_DIR, TTS_CACHE_MAX_MB
+from .disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# estimate_cost_usd provider names for each engine
+_COST_PROVIDERS = {"edge": "edge_tts", "piper": "piper", "elevenlabs": "elevenlabs"}
+
+
+def normalize_text(text: str) -> str:
+    """Text as spoken: NFC Unicode, whitespace runs collapsed, ends trimmed."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class TTSCache:
+    """Audio clips keyed by (engine, voice, model, settings, normalized text)."""
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_mb: float = TTS_CACHE_MAX_MB):
+        self.store = DiskCache(directory, int(max_mb * 1024 * 1024), suffix=".audio")
+        self._lock = threading.Lock()
+        self.dollars_saved = 0.0
+        self.hits_by_engine = {}
+
+    @staticmethod
+    def key(engine: str, voice: str, text: str, model: str = "", **settings) -> str:
+        """Cache key (a hex digest) for a synthesis request."""
+        parts = [engine, voice, model or "", normalize_text(text), sorted(settings.items())]
+        return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode()).hexdigest()
+
+    @staticmethod
+    def etag(key: str) -> str:
+        """Strong ETag for the audio stored under key."""
+        return f'"tts-{key[:32]}"'
+
+    def get(self, key: str, engine: str, text: str) -> Optional[bytes]:
+        """Cached audio for key, or None. Hits are credited with the synthesis cost saved."""
+        audio = self.store.get(key)
+        if audio is None:
+            return None
+        from .dashboard import estimate_cost_usd
+        saved = estimate_cost_usd("tts", {"provider": _COST_PROVIDERS.get(engine, engine), "text": text})
+        with self._lock:
+            self.dollars_saved += saved
+            self.hits_by_engine[engine] = self.hits_by_engine.get(engine, 0) + 1
+        return audio
+
+    def put(self, key: str, audio: bytes) -> None:
+        """Store synthesized audio; a failed write only costs a future re-synthesis."""
+        try:
+            self.store.put(key, audio)
+        except OSError as e:
+            logger.warning(f"Failed to store TTS audio in cache: {e}")
+
+    def snapshot(self) -> dict:
+        """Return hit/miss counters, size and estimated dollars saved."""
+        data = self.store.snapshot()
+        with self._lock:
+            data["dollars_saved"] = round(self.dollars_saved, 4)
+            data["hits_by_engine"] = dict(self.hits_by_engine)
+        return data
+
+
+_cache: Optional[TTSCache] = None
+_cache_lock = threading.Lock()
+
+
+def tts_cache() -> TTSCache:
+    """Get the process-wide TTS audio cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TTSCache()
+        return _cache
@@ -0,0 +1,128 @@
+"""Sentence-pipelined speech synthesis for /api/tts/stream.
+
+The whole-text TTS endpoints return nothing until every sentence has been
+synthesized, so a long response means seconds of silence. Here the text is
+split into sentences, up to TTS_STREAM_WORKERS of them are synthesized
+ahead in parallel, and each one's audio is yielded (in order) as soon as it
+and everything before it are ready. Playback starts after the first
+sentence instead of the last.
+
+Edge TTS returns MP3, whose frames can simply be concatenated. Piper
+returns one WAV per sentence, so the stream is a single WAV header (with an
+open-ended length) followed by each sentence's PCM frames.
+"""
+
+import io
+import re
+import struct
+import wave
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Tuple
+
+from .config import TTS_STREAM_WORKERS, TTS_STREAM_MAX_SENTENCE_CHARS
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END = re.compile(r"(?:(?<=[.!?…])|(?<=[.!?…][\"')\]]))\s+|\n\s*\n|\n(?=\s*[-*•]|\s*\d+[.)])")
+_CLAUSE_BREAK = re.compile(r"(?<=[,;:—])\s+")
+_MIN_CHARS = 24  # Shorter pieces ("Yes.", "1.") are merged into the next sentence
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """Split an over-long sentence at clause breaks, then at spaces."""
+    pieces, current = [], ""
+    for part in _CLAUSE_BREAK.split(sentence):
+        while len(part) > max_chars:
+            cut = part.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(part[:cut].strip())
+            part = part[cut:].strip()
+        if current and len(current) + 1 + len(part) > max_chars:
+            pieces.append(current)
+            current = part
+        else:
+            current = f"{current} {part}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_sentences(text: str, max_chars: int = TTS_STREAM_MAX_SENTENCE_CHARS) -> List[str]:
+    """Split text into speakable sentences of at most max_chars."""
+    sentences, pending = [], ""
+    for raw in _SENTENCE_END.split(text):
+        raw = " ".join(raw.split())
+        if not raw:
+            continue
+        pending = f"{pending} {raw}".strip()
+        if len(pending) < _MIN_CHARS:
+            continue
+        sentences.extend(_split_long(pending, max_chars) if len(pending) > max_chars else [pending])
+        pending = ""
+    if pending:
+        if sentences and len(sentences[-1]) + len(pending) < max_chars:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+
+def synthesize_pipelined(sentences: List[str], synthesize: Callable[[str], bytes],
+                         workers: int = TTS_STREAM_WORKERS) -> Iterator[bytes]:
+    """Yield synthesize(sentence) for each sentence in order, working up to workers ahead.
+
+    Closing the generator early (client disconnected) cancels sentences not yet started.
+    """
+    workers = max(1, workers)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-stream")
+    futures = []
+    try:
+        for sentence in sentences[:workers]:
+            futures.append(pool.submit(synthesize, sentence))
+        for i in range(len(sentences)):
+            if i + workers < len(sentences):
+                futures.append(pool.submit(synthesize, sentences[i + workers]))
+            yield futures[i].result()
+    finally:
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+
+def wav_params(data: bytes) -> Tuple[Tuple[int, int, int], bytes]:
+    """((channels, sample width, rate), PCM frames) of a WAV file in memory."""
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        return (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()), wav.readframes(wav.getnframes())
+
+
+def wav_stream_header(channels: int, sample_width: int, sample_rate: int) -> bytes:
+    """44-byte PCM WAV header with the maximum length, for a stream of unknown duration."""
+    unknown = 0xFFFFFFFF
+    byte_rate = sample_rate * channels * sample_width
+    return (b"RIFF" + struct.pack("<I", unknown) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, byte_rate,
+                                    channels * sample_width, sample_width * 8)
+            + b"data" + struct.pack("<I", unknown - 36))
+
+
+def wav_stream(wav_chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Turn a sequence of WAV files into one streamable WAV: a header, then each file's PCM."""
+    params = None
+    try:
+        for data in wav_chunks:
+            chunk_params, frames = wav_params(data)
+            if params is None:
+                params = chunk_params
+                yield wav_stream_header(*params)
+            elif chunk_params != params:
+                logger.warning(f"Skipping TTS chunk with mismatched WAV format {chunk_params} != {params}")
+                continue
+            yield frames
+    finally:
+        close = getattr(wav_chunks, "close", None)
+        if close:
+            close()
@@ -71,6 +71,11 @@ def compute_etag(content: bytes) -> str:
     return hashlib.md5(content).hexdigest()[:16]
 
 
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Whether an If-None-Match header value lists etag."""
+    return bool(etag) and etag in [t.strip() for t in (if_none_match or "").split(",")]
+
+
 def safe_json_load(filepath: Path, default: Any = None) -> Any:
     """Safely load JSON from a file, returning default on error."""
     if not filepath.exists():
@@ -0,0 +1,240 @@
+"""Video duration probing and single-pass frame extraction.
+
+Seeking with one `ffmpeg -ss T -vframes 1` process per frame costs a process
+launch and a demuxer open per frame, and parsing `Duration:` from a full
+`-f null` decode reads the whole file just to learn its length. Here the
+duration comes from the cached container probe (media_probe), and every requested
+timestamp is picked by one `select` filter in a single ffmpeg run that
+streams the JPEGs back over stdout (image2pipe).
+
+Keyframe selection picks the N most informative frames across a whole video
+for chat attachments. One low-resolution decode pass samples the video
+(1 fps, less for long videos), recording ffmpeg's scene-change score and a
+64-bit difference hash (dHash) of each sample. Samples are ranked by score
+and near-duplicates (small dHash distance) are dropped, so a static screen
+recording yields a handful of distinct frames rather than thirty copies.
+"""
+
+import os
+import re
+import tempfile
+import logging
+from typing import List, Optional, Tuple
+
+from .config import (
+    TEMP_DIR, VIDEO_KEYFRAME_MAX_SAMPLES, VIDEO_KEYFRAME_MIN_DISTANCE,
+    VIDEO_FRAME_MAX_WIDTH, VIDEO_FRAME_FORMAT
+)
+from .media_jobs import run_subprocess
+from .media_probe import probe_duration
+
+logger = logging.getLogger(__name__)
+
+_PTS_TIME = re.compile(r"pts_time:\s*(-?[\d.]+)")
+_SCENE_SCORE = re.compile(r"lavfi\.scene_score=([\d.]+)")
+
+# dHash input: 9x8 grayscale, comparing horizontally adjacent pixels gives 64 bits
+_HASH_W, _HASH_H = 9, 8
+
+
+def evenly_spaced_timestamps(duration: float, count: int) -> List[float]:
+    """count timestamps splitting the video into count + 1 equal parts."""
+    return [round(duration / (count + 1) * (i + 1), 2) for i in range(count)]
+
+
+def select_expression(timestamps: List[float]) -> str:
+    """ffmpeg select filter expression picking the first frame at or after each timestamp.
+
+    prev_pts is NAN on the first decoded frame, so each term also accepts that frame.
+    """
+    terms = [f"(isnan(prev_pts)+lt(prev_pts*TB\\,{t}))*gte(pts*TB\\,{t})" for t in timestamps]
+    return "+".join(terms)
+
+
+def parse_showinfo_pts(text: str) -> List[float]:
+    """Timestamps of the frames logged by ffmpeg's showinfo filter, in output order."""
+    return [float(m.group(1)) for line in text.splitlines()
+            if "showinfo" in line and (m := _PTS_TIME.search(line))]
+
+
+def split_jpeg_stream(data: bytes) -> List[bytes]:
+    """Split concatenated JPEGs (image2pipe mjpeg output) into individual images.
+
+    JPEG entropy data byte-stuffs 0xFF, so FFD9 only occurs as an end-of-image marker.
+    """
+    frames = []
+    pos = 0
+    while True:
+        start = data.find(b"\xff\xd8", pos)
+        if start < 0:
+            break
+        end = data.find(b"\xff\xd9", start + 2)
+        if end < 0:
+            break
+        frames.append(data[start:end + 2])
+        pos = end + 2
+    return frames
+
+
+def split_webp_stream(data: bytes) -> List[bytes]:
+    """Split concatenated WebP images (RIFF containers) into individual images."""
+    frames = []
+    pos = 0
+    while pos + 8 <= len(data) and data[pos:pos + 4] == b"RIFF":
+        size = int.from_bytes(data[pos + 4:pos + 8], "little")
+        end = pos + 8 + size + (size & 1)  # RIFF chunks are padded to even length
+        if end > len(data):
+            break
+        frames.append(data[pos:end])
+        pos = end
+    return frames
+
+
+def extract_frames_at(video_path: str, timestamps: List[float], ffmpeg_path: str = "ffmpeg",
+                      quality: int = 2, timeout: Optional[float] = None,
+                      max_width: Optional[int] = None, image_format: str = "jpeg") -> List[Tuple[float, bytes]]:
+    """Extract frames at the given timestamps with a single ffmpeg process.
+
+    Returns (actual frame timestamp, image) pairs. Timestamps that fall on the
+    same frame (or past the end) yield one frame or none, so callers should
+    label images with the returned timestamps rather than the requested ones.
+    max_width downscales wider frames (keeping aspect ratio); image_format is
+    "jpeg" or "webp".
+    """
+    if not timestamps:
+        return []
+    vf = f"select='{select_expression(sorted(timestamps))}',showinfo"
+    if max_width:
+        vf += f",scale='min(iw,{max_width})':-2"
+    if image_format == "webp":
+        codec = ["-vcodec", "libwebp", "-quality", "80"]
+    else:
+        codec = ["-vcodec", "mjpeg", "-q:v", str(quality)]
+    cmd = [
+        ffmpeg_path, "-hide_banner", "-loglevel", "info", "-nostats", "-nostdin",  # info: showinfo lines
+        "-i", video_path,
+        "-an", "-sn",
+        "-vf", vf,
+        "-vsync", "vfr",            # Emit only the selected frames
+        *codec,
+        "-f", "image2pipe", "-"
+    ]
+    result = run_subprocess(cmd, timeout=timeout or 30 + 15 * len(timestamps))
+    stderr = result.stderr.decode(errors="replace")
+    if result.returncode != 0 and not result.stdout:
+        logger.warning(f"Frame extraction failed: {stderr[-200:]}")
+    images = split_webp_stream(result.stdout) if image_format == "webp" else split_jpeg_stream(result.stdout)
+    pts = parse_showinfo_pts(stderr)
+    if len(pts) != len(images):
+        logger.warning(f"Frame extraction returned {len(images)} images for {len(pts)} selected frames")
+    return list(zip(pts, images))
+
+
+# ---- keyframe selection --------------------------------------------------
+
+def parse_scene_metadata(text: str) -> List[Tuple[float, float]]:
+    """Parse ffmpeg metadata=print output into (timestamp, scene score) pairs."""
+    samples = []
+    for line in text.splitlines():
+        m = _PTS_TIME.search(line)
+        if m:
+            samples.append([float(m.group(1)), 0.0])
+            continue
+        m = _SCENE_SCORE.search(line)
+        if m and samples:
+            samples[-1][1] = float(m.group(1))
+    return [(ts, score) for ts, score in samples]
+
+
+def dhash_frames(raw: bytes) -> List[int]:
+    """Difference hashes of concatenated 9x8 8-bit grayscale frames (rawvideo output)."""
+    size = _HASH_W * _HASH_H
+    hashes = []
+    for offset in range(0, len(raw) - size + 1, size):
+        frame = raw[offset:offset + size]
+        bits = 0
+        for row in range(_HASH_H):
+            pixels = frame[row * _HASH_W:(row + 1) * _HASH_W]
+            for col in range(_HASH_W - 1):
+                bits = (bits << 1) | (pixels[col] > pixels[col + 1])
+        hashes.append(bits)
+    return hashes
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+def sample_rate(duration: float, max_samples: int = VIDEO_KEYFRAME_MAX_SAMPLES) -> float:
+    """Frames per second to sample so the whole video fits in max_samples (at most 1 fps)."""
+    return min(1.0, max_samples / duration) if duration > 0 else 1.0
+
+
+def sample_signatures(video_path: str, fps: float, ffmpeg_path: str = "ffmpeg",
+                      timeout: float = 600) -> List[Tuple[float, float, int]]:
+    """Decode the video once, returning (timestamp, scene score, dHash) for each sample."""
+    fd, meta_path = tempfile.mkstemp(dir=TEMP_DIR, suffix=".meta")
+    os.close(fd)
+    vf = (f"fps={fps:.6f},scale=64:36,select='gte(scene,0)',metadata=print:file='{meta_path}',"
+          f"scale={_HASH_W}:{_HASH_H}:flags=area,format=gray")
+    cmd = [
+        ffmpeg_path, "-hide_banner", "-loglevel", "error", "-nostdin",
+        "-i", video_path, "-an", "-sn",
+        "-vf", vf,
+        "-f", "rawvideo", "-"
+    ]
+    try:
+        result = run_subprocess(cmd, timeout=timeout)
+        with open(meta_path, encoding="utf-8", errors="replace") as f:
+            scores = parse_scene_metadata(f.read())
+    finally:
+        os.unlink(meta_path)
+    if result.returncode != 0 and not result.stdout:
+        logger.warning(f"Keyframe sampling failed: {result.stderr.decode(errors='replace')[:200]}")
+    hashes = dhash_frames(result.stdout)
+    return [(ts, score, h) for (ts, score), h in zip(scores, hashes)]
+
+
+def pick_keyframes(samples: List[Tuple[float, float, int]], count: int, mode: str = "scene",
+                   min_distance: int = VIDEO_KEYFRAME_MIN_DISTANCE) -> List[float]:
+    """Choose up to count sample timestamps, most informative first, in time order.
+
+    "scene" ranks samples by ffmpeg's scene score, "dhash" by the hash distance
+    to the previous sample. The opening frame always ranks first, and a sample
+    within min_distance bits of one already chosen is skipped as a duplicate.
+    """
+    if not samples or count <= 0:
+        return []
+    if mode == "dhash":
+        samples = [samples[0]] + [(ts, hamming(h, samples[i][2]), h)
+                                  for i, (ts, _, h) in enumerate(samples[1:])]
+    ranked = [samples[0]] + sorted(samples[1:], key=lambda s: s[1], reverse=True)
+    chosen = []
+    for sample in ranked:
+        if len(chosen) >= count:
+            break
+        if all(hamming(sample[2], c[2]) >= min_distance for c in chosen):
+            chosen.append(sample)
+    return sorted(ts for ts, _, _ in chosen)
+
+
+def extract_keyframes(video_path: str, count: int, mode: str = "scene", ffmpeg_path: str = "ffmpeg",
+                      max_width: int = VIDEO_FRAME_MAX_WIDTH,
+                      image_format: str = VIDEO_FRAME_FORMAT) -> List[Tuple[float, bytes]]:
+    """Return up to count (timestamp, image bytes) keyframes spanning the whole video.
+
+    Timestamps are those of the frames actually extracted, the opening frame at 0.
+    mode is "scene", "dhash" or "even" (evenly spaced, no sampling pass).
+    """
+    duration = probe_duration(video_path, ffmpeg_path)
+    if not duration:
+        return []
+    if mode == "even":
+        timestamps = evenly_spaced_timestamps(duration, count)
+    else:
+        samples = sample_signatures(video_path, sample_rate(duration), ffmpeg_path,
+                                    timeout=120 + duration)
+        timestamps = pick_keyframes(samples, count, mode)
+    return extract_frames_at(video_path, timestamps, ffmpeg_path,
+                             max_width=max_width, image_format=image_format)
@@ -0,0 +1,180 @@
+"""Cached voice lists for /api/tts/voices (Edge) and /api/elevenlabs/voices.
+
+Both endpoints used to call the provider on every request, so opening the
+settings panel waited on a network round trip (and, for Edge, a fresh
+asyncio event loop). Catalogs are now kept in memory and persisted under
+VOICE_CATALOG_DIR, so a restarted server answers from disk immediately.
+
+An entry younger than its TTL is served as is. An older one is still served
+(stale-while-revalidate) while a background thread fetches a replacement;
+if that fails the stale list keeps being served and the refresh is retried
+after _REFRESH_RETRY_SECONDS. Only a catalog that has never been fetched
+blocks the request. Each entry carries an ETag derived from its contents, so
+clients revalidating an unchanged list get a 304.
+
+Usage:
+    voices, etag = voice_catalog("edge").get(fetch_edge_voices)
+    voices, etag = voice_catalog("elevenlabs").get(fetch, variant=api_key_hash)
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from .config import VOICE_CATALOG_DIR, VOICE_CATALOG_TTL_SECONDS
+from .utils import atomic_write_json, safe_json_load
+
+logger = logging.getLogger(__name__)
+
+_REFRESH_RETRY_SECONDS = 60  # After a failed background refresh, keep serving stale this long before retrying
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def catalog_etag(payload: dict) -> str:
+    """Strong ETag for a catalog payload (stable across key order)."""
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    return f'"voices-{digest[:24]}"'
+
+
+class VoiceCatalog:
+    """One provider's voice list per variant (e.g. per API key), with TTL and background refresh."""
+
+    def __init__(self, name: str, ttl_seconds: float, directory: Path = VOICE_CATALOG_DIR):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.directory = Path(directory)
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self._refreshing = set()
+        self._retry_after: Dict[str, float] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_error: Optional[str] = None
+
+    def _path(self, variant: str) -> Path:
+        suffix = f"-{_UNSAFE_CHARS.sub('_', variant)}" if variant else ""
+        return self.directory / f"{self.name}{suffix}.json"
+
+    def _entry(self, variant: str) -> Optional[dict]:
+        """Entry from memory, else from disk (after a restart)."""
+        with self._lock:
+            entry = self._entries.get(variant)
+        if entry is not None:
+            return entry
+        entry = safe_json_load(self._path(variant))
+        if not isinstance(entry, dict) or "payload" not in entry:
+            return None
+        entry.setdefault("etag", catalog_etag(entry["payload"]))
+        with self._lock:
+            return self._entries.setdefault(variant, entry)
+
+    def _store(self, variant: str, payload: dict) -> dict:
+        entry = {"payload": payload, "etag": catalog_etag(payload), "fetched_at": time.time()}
+        with self._lock:
+            self._entries[variant] = entry
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(self._path(variant), entry)
+        except OSError as e:
+            logger.warning(f"Failed to persist {self.name} voice catalog: {e}")
+        return entry
+
+    def _refresh(self, variant: str, fetch: Callable[[], dict]):
+        try:
+            self._store(variant, fetch())
+            with self._lock:
+                self.refreshes += 1
+                self._retry_after.pop(variant, None)
+        except Exception as e:
+            logger.warning(f"Background refresh of {self.name} voice catalog failed: {e}")
+            with self._lock:
+                self.refresh_errors += 1
+                self.last_error = str(e)
+                self._retry_after[variant] = time.time() + _REFRESH_RETRY_SECONDS
+        finally:
+            with self._lock:
+                self._refreshing.discard(variant)
+
+    def get(self, fetch: Callable[[], dict], variant: str = "") -> Tuple[dict, str]:
+        """(payload, etag) for variant, calling fetch() only when nothing is cached.
+
+        Exceptions from a blocking fetch propagate; background refresh errors are logged.
+        """
+        entry = self._entry(variant)
+        now = time.time()
+        if entry is not None:
+            stale = now - entry.get("fetched_at", 0) >= self.ttl_seconds
+            with self._lock:
+                if not stale:
+                    self.hits += 1
+                    return entry["payload"], entry["etag"]
+                self.stale_hits += 1
+                start = variant not in self._refreshing and now >= self._retry_after.get(variant, 0)
+                if start:
+                    self._refreshing.add(variant)
+            if start:
+                threading.Thread(target=self._refresh, args=(variant, fetch),
+                                 name=f"voices-{self.name}", daemon=True).start()
+            return entry["payload"], entry["etag"]
+
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(variant, threading.Lock())
+        with fetch_lock:  # Concurrent cold requests share one fetch
+            with self._lock:
+                entry = self._entries.get(variant)
+            if entry is None:
+                with self._lock:
+                    self.misses += 1
+                entry = self._store(variant, fetch())
+        return entry["payload"], entry["etag"]
+
+    def invalidate(self, variant: str = ""):
+        """Forget a variant so the next get() fetches it again."""
+        with self._lock:
+            self._entries.pop(variant, None)
+        self._path(variant).unlink(missing_ok=True)
+
+    def snapshot(self) -> dict:
+        """Return counters and the age of each cached variant."""
+        now = time.time()
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl_seconds,
+                "entries": {variant or "default": round(now - e.get("fetched_at", 0))
+                            for variant, e in self._entries.items()},
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "refreshing": len(self._refreshing),
+                "last_error": self.last_error,
+            }
+
+
+_catalogs: Dict[str, VoiceCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def voice_catalog(name: str) -> VoiceCatalog:
+    """Get the process-wide catalog for a provider ("edge", "elevenlabs")."""
+    with _catalogs_lock:
+        if name not in _catalogs:
+            _catalogs[name] = VoiceCatalog(name, VOICE_CATALOG_TTL_SECONDS.get(name, 3600))
+        return _catalogs[name]
+
+
+def voice_catalog_snapshot() -> dict:
+    """Snapshot of every catalog used so far, for /api/health."""
+    with _catalogs_lock:
+        catalogs = dict(_catalogs)
+    return {name: catalog.snapshot() for name, catalog in catalogs.items()}
@@ -0,0 +1,223 @@
+"""Process-wide registry of loaded Whisper models.
+
+Loading a model reads hundreds of MB to GBs of weights from disk, which
+dwarfs the transcription time of a short voice clip. The registry keeps
+loaded models by key, evicts the least recently used ones once their
+combined size exceeds WHISPER_RAM_BUDGET_MB, and serialises inference per
+model (Whisper installs kv-cache hooks on the model for each decode, so two
+threads must not transcribe with the same instance at once).
+
+Keys are transcription.model_key() ids: "base" for openai-whisper,
+"faster-whisper/base" and "whisperx/base" for the other backends.
+
+Usage:
+    with whisper_model("faster-whisper/base") as loaded:
+        result = loaded.backend.transcribe(loaded, samples)
+"""
+
+import threading
+import time
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional
+
+from .config import WHISPER_RAM_BUDGET_MB, WHISPER_PRELOAD_MODELS
+
+logger = logging.getLogger(__name__)
+
+# Approximate fp32 resident size per model, used when the real size can't be measured
+MODEL_SIZE_ESTIMATES_MB = {
+    "tiny": 150, "tiny.en": 150,
+    "base": 290, "base.en": 290,
+    "small": 970, "small.en": 970,
+    "medium": 3100, "medium.en": 3100,
+    "turbo": 3200, "large-v3-turbo": 3200,
+    "large": 6200, "large-v1": 6200, "large-v2": 6200, "large-v3": 6200,
+}
+
+
+def _load_model(key: str):
+    from .transcription import load_model
+    return load_model(key)
+
+
+def estimate_model_bytes(key: str, compute_type: Optional[str] = None) -> int:
+    """Resident size of a model from the fp32 size table (a quarter for int8)."""
+    estimate = MODEL_SIZE_ESTIMATES_MB.get(key.rpartition("/")[2], 1000) * 1024 * 1024
+    if compute_type == "int8":
+        estimate //= 4
+    return estimate
+
+
+def _model_size_bytes(key: str, model) -> int:
+    """Measured parameter memory if known, else estimate_model_bytes()."""
+    size = getattr(model, "size_bytes", None)
+    if size:
+        return size
+    try:
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    except Exception:
+        pass
+    return estimate_model_bytes(key, getattr(model, "compute_type", None))
+
+
+class _Entry:
+    def __init__(self, model, size_bytes: int, load_seconds: float):
+        self.model = model
+        self.size_bytes = size_bytes
+        self.load_seconds = load_seconds
+        self.inference_lock = threading.Lock()
+        self.uses = 0
+
+
+class ModelRegistry:
+    """Thread-safe LRU cache of loaded models under a memory budget."""
+
+    def __init__(self, budget_mb: float = WHISPER_RAM_BUDGET_MB,
+                 loader: Callable[[str], object] = _load_model,
+                 sizer: Callable[[str, object], int] = _model_size_bytes):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.loader = loader
+        self.sizer = sizer
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def _used_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def free_bytes(self) -> int:
+        """Budget not taken by the models loaded in this process."""
+        with self._lock:
+            return self.budget_bytes - self._used_bytes()
+
+    def _evict_for(self, keep: str) -> None:
+        """Drop least recently used models (never `keep`) until within budget."""
+        while self._used_bytes() > self.budget_bytes and len(self._entries) > 1:
+            name = next(n for n in self._entries if n != keep)
+            entry = self._entries.pop(name)
+            self.evictions += 1
+            # Requests already holding the model finish with their own reference
+            logger.info(f"Evicted Whisper model '{name}' ({entry.size_bytes // (1024 * 1024)} MB) "
+                        f"to stay within {self.budget_bytes // (1024 * 1024)} MB")
+
+    def _entry(self, name: str) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                self._entries.move_to_end(name)
+                self.hits += 1
+                return entry
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # One thread loads a given model; others wait for it instead of loading a copy
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None:
+                    self._entries.move_to_end(name)
+                    self.hits += 1
+                    return entry
+
+            logger.info(f"Loading Whisper model '{name}'...")
+            started = time.monotonic()
+            model = self.loader(name)
+            entry = _Entry(model, self.sizer(name, model), time.monotonic() - started)
+            logger.info(f"Loaded Whisper model '{name}' in {entry.load_seconds:.1f}s")
+
+            with self._lock:
+                self._entries[name] = entry
+                self.loads += 1
+                self._evict_for(keep=name)
+            return entry
+
+    def models(self) -> list:
+        """Loaded models, least recently used first."""
+        with self._lock:
+            return [entry.model for entry in self._entries.values()]
+
+    def get(self, name: str):
+        """Return the loaded model, loading it on first use."""
+        return self._entry(name).model
+
+    @contextmanager
+    def use(self, name: str):
+        """Yield the model with exclusive inference access for this call."""
+        entry = self._entry(name)
+        with entry.inference_lock:
+            entry.uses += 1
+            yield entry.model
+
+    def preload(self, names: Iterable[str]) -> threading.Thread:
+        """Load models in a background thread so the first request finds them warm."""
+        names = [n for n in names if n]
+
+        def _run():
+            for name in names:
+                try:
+                    self._entry(name)
+                except Exception as e:
+                    logger.warning(f"Whisper preload of '{name}' failed: {e}")
+
+        thread = threading.Thread(target=_run, name="WhisperPreload", daemon=True)
+        thread.start()
+        return thread
+
+    def snapshot(self) -> dict:
+        """Return loaded models and counters as a JSON-serialisable dict."""
+        with self._lock:
+            return {
+                "budget_mb": self.budget_bytes // (1024 * 1024),
+                "used_mb": self._used_bytes() // (1024 * 1024),
+                "models": {
+                    name: {
+                        "size_mb": entry.size_bytes // (1024 * 1024),
+                        "load_seconds": round(entry.load_seconds, 2),
+                        "uses": entry.uses,
+                    }
+                    for name, entry in self._entries.items()
+                },
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def whisper_registry() -> ModelRegistry:
+    """Get the process-wide Whisper model registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
+
+
+def whisper_model(name: str):
+    """Context manager yielding a warm Whisper model with exclusive use for the call."""
+    return whisper_registry().use(name)
+
+
+def preload_whisper_models(names: Iterable[str] = WHISPER_PRELOAD_MODELS) -> Optional[threading.Thread]:
+    """Start loading the configured models for the default backend in the background.
+
+    No-op if none are configured or no transcription backend is installed.
+    """
+    from .transcription import resolve_backend, model_key
+    names = list(names)
+    if not names:
+        return None
+    try:
+        backend = resolve_backend()
+    except (RuntimeError, ValueError) as e:
+        logger.warning(f"Skipping Whisper model preload: {e}")
+        return None
+    logger.info(f"Preloading {backend.name} models: {', '.join(names)}")
+    return whisper_registry().preload(model_key(backend.name, n) for n in names)
@@ -0,0 +1,186 @@
+"""Download cache for /api/video/youtube.
+
+Downloads are stored in SCREENSHOTS_DIR as youtube_<video id>_<format hash>.<ext>
+with a JSON sidecar holding the title, duration and any frames and
+transcripts already produced for that file (counted toward the size budget
+along with the download). The sidecar is written only
+after yt-dlp finishes, so a half-downloaded file is never served. A
+per-(id, format) lock makes concurrent requests for the same video share
+one download, and the youtube_* files in the directory (including ones from
+before this cache) are kept under YOUTUBE_CACHE_MAX_MB, least recently used
+first.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+from .config import SCREENSHOTS_DIR, YOUTUBE_CACHE_MAX_MB
+from .utils import atomic_write_json, safe_json_load
+
+logger = logging.getLogger(__name__)
+
+_VIDEO_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_PATH_PREFIXES = ("/shorts/", "/embed/", "/live/", "/v/")
+_SKIP_SUFFIXES = (".json", ".part", ".ytdl", ".tmp")
+
+
+def youtube_video_id(url: str) -> Optional[str]:
+    """Canonical 11-character video id from any common YouTube URL form, or None."""
+    parsed = urlparse(url if "://" in url else f"https://{url}")
+    host = (parsed.hostname or "").lower()
+    candidate = None
+    if host.endswith("youtu.be"):
+        candidate = parsed.path.lstrip("/").split("/")[0]
+    elif host.endswith("youtube.com") or host.endswith("youtube-nocookie.com"):
+        candidate = parse_qs(parsed.query).get("v", [None])[0]
+        if not candidate:
+            for prefix in _PATH_PREFIXES:
+                if parsed.path.startswith(prefix):
+                    candidate = parsed.path[len(prefix):].split("/")[0]
+                    break
+    return candidate if candidate and _VIDEO_ID.match(candidate) else None
+
+
+class YouTubeCache:
+    """youtube_* downloads in a directory, keyed by video id and format selector."""
+
+    def __init__(self, directory: Path = SCREENSHOTS_DIR, max_mb: float = YOUTUBE_CACHE_MAX_MB):
+        self.directory = Path(directory)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def stem(video_id: str, video_format: str) -> str:
+        """File name stem for a (video id, format selector) pair."""
+        return f"youtube_{video_id}_{hashlib.sha256(video_format.encode()).hexdigest()[:8]}"
+
+    def output_template(self, video_id: str, video_format: str) -> str:
+        """yt-dlp -o template that downloads straight to the cache name."""
+        return str(self.directory / f"{self.stem(video_id, video_format)}.%(ext)s")
+
+    def lock(self, video_id: str, video_format: str) -> threading.Lock:
+        """Lock held while checking for and downloading one (id, format)."""
+        key = self.stem(video_id, video_format)
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _sidecar(self, video_id: str, video_format: str) -> Path:
+        return self.directory / f"{self.stem(video_id, video_format)}.json"
+
+    def lookup(self, video_id: str, video_format: str) -> Optional[dict]:
+        """Return the cached entry (with "video_path") and mark it recently used, or None."""
+        entry = safe_json_load(self._sidecar(video_id, video_format), None)
+        video_path = Path(entry["video_path"]) if entry and entry.get("video_path") else None
+        if not video_path or not video_path.exists():
+            self.misses += 1
+            return None
+        self.hits += 1
+        now = time.time()
+        for path in (video_path, self._sidecar(video_id, video_format)):
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+        return entry
+
+    def store(self, video_id: str, video_format: str, video_path: str, **fields) -> dict:
+        """Record a finished download, then evict old downloads beyond the size budget."""
+        entry = {
+            "video_id": video_id,
+            "format": video_format,
+            "video_path": str(video_path),
+            "downloaded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "frames": {},
+            "transcripts": {},
+            **fields,
+        }
+        atomic_write_json(self._sidecar(video_id, video_format), entry)
+        self.evict(keep=Path(video_path).name)
+        return entry
+
+    def update(self, video_id: str, video_format: str, section: str, key: str, value) -> None:
+        """Save a derived result (frames per count, transcript per model) in the sidecar."""
+        with self.lock(video_id, video_format):
+            sidecar = self._sidecar(video_id, video_format)
+            entry = safe_json_load(sidecar, None)
+            if entry is None:
+                return
+            entry.setdefault(section, {})[key] = value
+            atomic_write_json(sidecar, entry)
+        self.evict(keep=Path(entry["video_path"]).name)  # The sidecar grew
+
+    def _downloads(self):
+        """(mtime, size, path) of every youtube_* media file, oldest first.
+
+        size includes the sidecar, whose inline base64 frames can run to megabytes.
+        """
+        files = []
+        for path in self.directory.glob("youtube_*"):
+            if path.suffix in _SKIP_SUFFIXES:
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            try:
+                sidecar_size = path.with_suffix(".json").stat().st_size
+            except OSError:
+                sidecar_size = 0
+            files.append((stat.st_mtime, stat.st_size + sidecar_size, path))
+        return sorted(files)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Delete least recently used downloads (and sidecars) until within max_bytes."""
+        files = self._downloads()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            if path.name == keep:
+                continue
+            try:
+                path.unlink()
+                path.with_suffix(".json").unlink(missing_ok=True)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+            logger.info(f"Evicted cached YouTube download {path.name}")
+
+    def snapshot(self) -> dict:
+        """Return entry count, size and hit/miss counters."""
+        files = self._downloads()
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(files),
+            "size_mb": round(sum(size for _, size, _ in files) / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+        }
+
+
+_cache: Optional[YouTubeCache] = None
+_cache_lock = threading.Lock()
+
+
+def youtube_cache() -> YouTubeCache:
+    """Get the process-wide YouTube download cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = YouTubeCache()
+        return _cache
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Tests for the shared audio-extraction stage."""
+
+import subprocess
+import wave
+from pathlib import Path
+
+from relay import audio_extract
+from relay.audio_extract import AudioCache, decode_pcm, read_wav_pcm
+from relay.media_probe import MediaProbeCache
+from relay.transcript_cache import pcm_fingerprint, pcm_bytes_fingerprint
+
+
+def _write_wav(path, samples: bytes):
+    """Write 16 kHz 16-bit mono PCM samples to a WAV file."""
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(samples)
+
+
+def test_in_memory_fingerprint_matches_file(tmp_path):
+    """Test that piped PCM and the extracted WAV share a transcript cache key."""
+    samples = bytes(range(256)) * 64
+    wav = tmp_path / "audio.wav"
+    _write_wav(wav, samples)
+    assert read_wav_pcm(wav) == samples
+    assert pcm_bytes_fingerprint(samples) == pcm_fingerprint(str(wav))
+
+
+def test_cached_wav_keyed_by_source_version(tmp_path):
+    """Test that an extracted WAV is found for its source until the source changes."""
+    source = tmp_path / "clip.mp4"
+    source.write_bytes(b"video")
+    cache = AudioCache(tmp_path / "audio", max_mb=1)
+    assert cache.cached(str(source)) is None
+
+    extracted = tmp_path / "audio" / "extract.tmp"
+    _write_wav(extracted, b"\x01\x00" * 100)
+    path = cache.store.put_file(MediaProbeCache.key(str(source)), extracted)
+    assert not extracted.exists(), "put_file moves the file into the cache"
+    assert cache.cached(str(source)) == path
+    assert cache.snapshot()["entries"] == 1
+
+    source.write_bytes(b"re-encoded video")
+    assert cache.cached(str(source)) is None
+
+
+def test_decode_pcm_uses_seekable_file_when_pipe_cannot_work(monkeypatch):
+    """Test that MP4 bytes, and bytes the piped decode rejects, are decoded from a temp file."""
+    inputs = []
+
+    def fake_run(cmd, timeout=None, input=None):
+        source = cmd[cmd.index("-i") + 1]
+        if source == "pipe:0":
+            inputs.append(("pipe", input))
+            return subprocess.CompletedProcess(cmd, 1, b"", b"Invalid data found")
+        inputs.append(("file", Path(source).read_bytes()))
+        return subprocess.CompletedProcess(cmd, 0, b"pcm", b"")
+
+    monkeypatch.setattr(audio_extract, "run_subprocess", fake_run)
+    mp4 = b"\x00\x00\x00\x20ftypM4A " + b"\x00" * 32
+    assert decode_pcm(mp4) == b"pcm"
+    assert inputs == [("file", mp4)]
+
+    inputs.clear()
+    assert decode_pcm(b"webm?") == b"pcm"
+    assert inputs == [("pipe", b"webm?"), ("file", b"webm?")]
+    assert not list(audio_extract.TEMP_DIR.glob("*.media"))
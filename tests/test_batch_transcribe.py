@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Tests for batch transcription input expansion, manifest and resume."""
+
+import json
+
+from relay.batch_transcribe import expand_inputs, is_batch, run_batch
+
+
+def _outputs(path):
+    return [path.with_name(f"{path.stem}_transcript.json")]
+
+
+def _process(path):
+    if path.stem == "broken":
+        raise RuntimeError("no audio")
+    _outputs(path)[0].write_text(json.dumps({"transcript": path.stem}))
+    return {"language": "en", "duration": 1.0, "segment_count": 1}
+
+
+def test_expand_inputs(tmp_path):
+    """Test that directories, globs and files expand to unique media files, skipping outputs."""
+    (tmp_path / "sub").mkdir()
+    for name in ("a.mp4", "b.MOV", "notes.txt", "a_audio.wav", "sub/c.mp3"):
+        (tmp_path / name).write_bytes(b"x")
+    flat = expand_inputs([str(tmp_path), str(tmp_path / "*.mp4")])
+    assert [p.name for p in flat] == ["a.mp4", "b.MOV"]
+    assert [p.name for p in expand_inputs([str(tmp_path)], recursive=True)] == ["a.mp4", "b.MOV", "c.mp3"]
+    assert not is_batch([str(tmp_path / "a.mp4")])
+    assert is_batch([str(tmp_path)]) and is_batch([str(tmp_path / "*.mp4")])
+
+
+def test_run_batch_manifest_and_resume(tmp_path):
+    """Test that failures are recorded and a re-run skips files with finished outputs."""
+    for name in ("one.mp4", "two.mp4", "broken.mp4"):
+        (tmp_path / name).write_bytes(b"x")
+    manifest_path = tmp_path / "out" / "manifest.json"
+
+    first = run_batch([str(tmp_path)], _process, _outputs, manifest_path, prefetch=False)
+    assert first["totals"] == {"done": 2, "skipped": 0, "failed": 1}
+    failed = [e for e in first["files"] if e["status"] == "failed"]
+    assert failed[0]["error"] == "no audio"
+
+    calls = []
+    second = run_batch([str(tmp_path)], lambda p: calls.append(p.name) or _process(p),
+                       _outputs, manifest_path, prefetch=False)
+    assert calls == ["broken.mp4"]
+    assert second["totals"] == {"done": 0, "skipped": 2, "failed": 1}
+    assert json.loads(manifest_path.read_text())["totals"] == second["totals"]
+    skipped = {e["file"]: e for e in second["files"] if e["status"] == "skipped"}
+    assert skipped[str(tmp_path / "one.mp4")]["language"] == "en"  # Kept from the first run
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Tests for silence-aligned chunk planning and merging."""
+
+import wave
+
+import pytest
+
+from relay import chunked_transcribe, whisper_models
+from relay.chunked_transcribe import parse_silencedetect, plan_chunks, merge_chunk_results, wav_duration, \
+    budget_workers
+from relay.whisper_models import ModelRegistry
+
+SILENCEDETECT_LOG = """\
+[silencedetect @ 0x55d] silence_start: 118.2
+[silencedetect @ 0x55d] silence_end: 119.0 | silence_duration: 0.8
+[silencedetect @ 0x55d] silence_start: 241.5
+[silencedetect @ 0x55d] silence_end: 242.5 | silence_duration: 1.0
+[silencedetect @ 0x55d] silence_start: 398
+"""
+
+
+def test_parse_silencedetect():
+    """Test that ffmpeg silencedetect output becomes intervals, including a trailing silence."""
+    silences = parse_silencedetect(SILENCEDETECT_LOG, duration=400.0)
+    assert silences == [(118.2, 119.0), (241.5, 242.5), (398.0, 400.0)]
+
+
+def test_plan_chunks_cuts_at_silences():
+    """Test that cuts land on silence midpoints and chunks tile the whole file."""
+    silences = [(118.2, 119.0), (241.5, 242.5)]
+    chunks = plan_chunks(400.0, silences, target=120, min_len=30, max_len=180)
+    assert chunks == [(0.0, 118.6), (118.6, 242.0), (242.0, 400.0)]
+
+
+def test_plan_chunks_hard_cut_without_silence():
+    """Test that audio with no silence is cut at max_len."""
+    chunks = plan_chunks(500.0, [], target=120, min_len=30, max_len=180)
+    assert chunks == [(0.0, 180.0), (180.0, 360.0), (360.0, 500.0)]
+    assert all(end - start <= 180 for start, end in chunks)
+
+
+def test_short_audio_single_chunk():
+    """Test that audio shorter than max_len is one chunk."""
+    assert plan_chunks(90.0, [(40.0, 41.0)], max_len=180) == [(0.0, 90.0)]
+
+
+def test_merge_offsets_timestamps():
+    """Test that chunk segments are shifted by their offset and renumbered in order."""
+    second = {"text": " world", "language": "en",
+              "segments": [{"id": 0, "start": 0.5, "end": 1.5, "text": " world",
+                            "words": [{"word": "world", "start": 0.6, "end": 1.4}]}]}
+    first = {"text": " hello", "language": "en",
+             "segments": [{"id": 0, "start": 0.0, "end": 2.0, "text": " hello"}]}
+    merged = merge_chunk_results([(118.6, second), (0.0, first)])
+    assert merged["text"] == "hello world"
+    assert merged["language"] == "en"
+    assert [s["id"] for s in merged["segments"]] == [0, 1]
+    assert merged["segments"][1]["start"] == pytest.approx(119.1)
+    assert merged["segments"][1]["end"] == pytest.approx(120.1)
+    assert merged["segments"][1]["words"][0]["start"] == pytest.approx(119.2)
+    assert second["segments"][0]["start"] == 0.5, "Input results should not be mutated"
+
+
+def test_wav_duration(tmp_path):
+    """Test reading the duration of a 16 kHz mono WAV."""
+    path = tmp_path / "audio.wav"
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(b"\x00\x00" * 16000 * 3)
+    assert wav_duration(str(path)) == 3.0
+
+
+def test_workers_capped_by_ram_budget(monkeypatch):
+    """Test that each worker's model copy must fit the RAM budget the registry leaves free."""
+    registry = ModelRegistry(budget_mb=4096, loader=lambda name: object(), sizer=lambda name, model: 1024 ** 3)
+    monkeypatch.setattr(whisper_models, "_registry", registry)
+    assert budget_workers("faster-whisper", "large-v3", 8) == 2  # int8: ~1.5 GB per copy
+    assert budget_workers("whisper", "large-v3", 8) == 1  # fp32 copy exceeds the budget: no chunking
+    assert budget_workers("whisper", "base", 8) == 8
+    registry.get("small")  # 1 GB now held by this process
+    assert budget_workers("faster-whisper", "large-v3", 8) == 1
+
+
+def test_pool_kept_warm_per_model(monkeypatch):
+    """Test that the worker pool is reused for the same model and replaced for another."""
+    monkeypatch.setattr(chunked_transcribe, "_pool", None)
+    try:
+        pool = chunked_transcribe._chunk_pool("faster-whisper", "base", 2)
+        assert chunked_transcribe._chunk_pool("faster-whisper", "base", 2) is pool
+        assert chunked_transcribe._chunk_pool("faster-whisper", "small", 2) is not pool
+    finally:
+        chunked_transcribe.shutdown_chunk_pool()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Tests for per-provider circuit breakers."""
+
+import threading
+import time
+
+import pytest
+
+from relay.circuit_breaker import (
+    CircuitBreaker, CircuitOpenError, ProviderHTTPError, CLOSED, OPEN, HALF_OPEN
+)
+
+
+def _fail(breaker, exc=None):
+    """Run one failing call through the breaker."""
+    with pytest.raises(Exception):
+        with breaker.guard():
+            raise exc or ConnectionError("provider down")
+
+
+def test_opens_after_consecutive_failures():
+    """Test that repeated failures open the circuit and calls then fail fast."""
+    breaker = CircuitBreaker("test", failure_threshold=3, open_seconds=60)
+    for _ in range(3):
+        _fail(breaker)
+    assert breaker.state == OPEN
+
+    began = time.monotonic()
+    with pytest.raises(CircuitOpenError) as excinfo:
+        with breaker.guard():
+            pytest.fail("Call should not be admitted while open")
+    assert time.monotonic() - began < 0.1
+    assert excinfo.value.retry_after > 0
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_opens_on_error_rate():
+    """Test that a high error rate opens the circuit without a failure streak."""
+    breaker = CircuitBreaker("test", failure_threshold=100, error_rate=0.5, min_requests=4)
+    for _ in range(2):
+        with breaker.guard():
+            pass
+        _fail(breaker)
+    assert breaker.state == OPEN
+
+
+def test_client_errors_do_not_count():
+    """Test that 4xx responses are not provider failures but 5xx are."""
+    breaker = CircuitBreaker("test", failure_threshold=2)
+    for _ in range(3):
+        _fail(breaker, ProviderHTTPError("test", 400, "bad request"))
+    assert breaker.state == CLOSED
+    _fail(breaker, ProviderHTTPError("test", 503, "unavailable"))
+    _fail(breaker, ProviderHTTPError("test", 502, "bad gateway"))
+    assert breaker.state == OPEN
+
+
+def test_half_open_probe_recovers():
+    """Test that after the cooldown one probe is admitted and success closes the circuit."""
+    breaker = CircuitBreaker("test", failure_threshold=1, open_seconds=0.05)
+    _fail(breaker)
+    assert breaker.state == OPEN
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+
+    breaker.before_call()  # The probe
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # Only one probe at a time
+    breaker.record(True, 0.01)
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens():
+    """Test that a failing half-open probe opens the circuit again."""
+    breaker = CircuitBreaker("test", failure_threshold=1, open_seconds=0.05)
+    _fail(breaker)
+    time.sleep(0.06)
+    _fail(breaker)
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["times_opened"] == 2
+
+
+def test_cancelled_call_is_not_a_failure():
+    """Test that errors after cancellation (a hedge loser) are not recorded."""
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    cancelled = threading.Event()
+    cancelled.set()
+    with pytest.raises(ConnectionError):
+        with breaker.guard(cancelled):
+            raise ConnectionError("closed by hedge")
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["calls_in_window"] == 0
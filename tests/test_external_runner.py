@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Tests for the asyncio runner that multiplexes external API jobs."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from relay.external_runner import AsyncJobRunner
+
+
+def test_jobs_run_concurrently_up_to_limit():
+    """Test that jobs overlap on one thread but never exceed max_jobs at once."""
+    runner = AsyncJobRunner(max_jobs=3).start()
+    running = []
+    peak = []
+    threads = set()
+
+    async def job(session, index):
+        running.append(index)
+        peak.append(len(running))
+        threads.add(threading.get_ident())
+        await asyncio.sleep(0.1)
+        running.remove(index)
+        return index
+
+    try:
+        began = time.monotonic()
+        futures = [runner.submit(job, i) for i in range(9)]
+        results = [f.result(timeout=5) for f in futures]
+        elapsed = time.monotonic() - began
+    finally:
+        runner.stop()
+
+    assert results == list(range(9))
+    assert max(peak) == 3, f"Expected at most 3 concurrent jobs, saw {max(peak)}"
+    assert len(threads) == 1, "All jobs should run on the runner's loop thread"
+    assert elapsed < 0.9, f"9 jobs x 0.1s at 3-way concurrency took {elapsed:.2f}s"
+    assert runner.snapshot()["completed"] == 9
+
+
+def test_job_errors_surface_on_future():
+    """Test that an exception in a job is raised from its future."""
+    runner = AsyncJobRunner(max_jobs=1).start()
+
+    async def job(session):
+        raise RuntimeError("provider exploded")
+
+    try:
+        with pytest.raises(RuntimeError):
+            runner.submit(job).result(timeout=5)
+    finally:
+        runner.stop()
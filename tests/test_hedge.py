@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Tests for hedged request racing."""
+
+import threading
+import time
+
+import pytest
+
+from relay.hedge import HedgedStream, hedge_stats
+
+
+def _attempt_factory(behaviour, closed):
+    """Build a start function whose per-model behaviour is (delay, tokens, error)."""
+
+    def start(attempt):
+        delay, tokens, error = behaviour[attempt.model]
+        released = threading.Event()
+        attempt.on_cancel(released.set)
+        attempt.on_cancel(lambda: closed.append(attempt.model))
+        if released.wait(delay):
+            raise ConnectionError("closed by hedge")
+        if error:
+            raise error
+        for token in tokens:
+            yield token
+
+    return start
+
+
+def test_fast_primary_does_not_hedge():
+    """Test that a primary answering before the delay wins without a hedge."""
+    closed = []
+    start = _attempt_factory({"primary": (0.0, ["a", "b"], None)}, closed)
+    stream = HedgedStream(start, "primary", hedge_model="backup", delay=1.0)
+    assert "".join(stream) == "ab"
+    assert not stream.hedge_fired
+    assert stream.winner == "primary"
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    """Test that a stalled primary triggers the hedge and is cancelled when it loses."""
+    closed = []
+    start = _attempt_factory({
+        "slow-model": (5.0, ["late"], None),
+        "backup": (0.0, ["fast"], None),
+    }, closed)
+    began = time.monotonic()
+    stream = HedgedStream(start, "slow-model", hedge_model="backup", delay=0.05)
+    assert "".join(stream) == "fast"
+    assert time.monotonic() - began < 2, "Hedge should not wait for the slow primary"
+    assert stream.hedge_fired
+    assert stream.winner == "backup"
+    assert "slow-model" in closed, "Losing attempt should be cancelled"
+    stats = hedge_stats("slow-model").snapshot()
+    assert stats["hedges_fired"] >= 1 and stats["hedges_won"] >= 1
+
+
+def test_primary_error_without_hedge_raises():
+    """Test that an error from the only attempt propagates."""
+    start = _attempt_factory({"broken": (0.0, [], RuntimeError("boom"))}, [])
+    with pytest.raises(RuntimeError):
+        "".join(HedgedStream(start, "broken", hedge_model=None, delay=1.0))
+
+
+def test_failed_hedge_does_not_mask_primary():
+    """Test that a failing hedge still lets a slower primary win."""
+    start = _attempt_factory({
+        "primary": (0.2, ["ok"], None),
+        "backup": (0.0, [], RuntimeError("backup down")),
+    }, [])
+    stream = HedgedStream(start, "primary", hedge_model="backup", delay=0.05)
+    assert "".join(stream) == "ok"
+    assert stream.winner == "primary"
+
+
+def test_async_slow_primary_is_hedged():
+    """Test that the asyncio variant hedges a stalled primary and cancels the loser."""
+    import asyncio
+    from relay.hedge import AsyncHedgedStream
+
+    cancelled = []
+
+    async def start(attempt):
+        try:
+            if attempt.model == "async-slow":
+                await asyncio.sleep(5)
+            yield f"from {attempt.model}"
+        except asyncio.CancelledError:
+            cancelled.append(attempt.model)
+            raise
+
+    async def run():
+        stream = AsyncHedgedStream(start, "async-slow", hedge_model="async-backup", delay=0.05)
+        chunks = [chunk async for chunk in stream]
+        await asyncio.sleep(0)  # Let the cancelled task unwind
+        return stream, chunks
+
+    began = time.monotonic()
+    stream, chunks = asyncio.run(run())
+    assert chunks == ["from async-backup"]
+    assert time.monotonic() - began < 2, "Hedge should not wait for the slow primary"
+    assert stream.hedge_fired and stream.winner == "async-backup"
+    assert cancelled == ["async-slow"], "Losing task should be cancelled"
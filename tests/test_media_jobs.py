@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Tests for the background media job queue."""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from relay.media_jobs import MediaJobQueue, bind_job, report_progress, run_subprocess, wait_result
+
+
+def _wait(job, timeout=5):
+    """Poll until the job reaches a finished state."""
+    deadline = time.monotonic() + timeout
+    while job.status not in ("complete", "error", "cancelled"):
+        assert time.monotonic() < deadline, f"Job stuck in {job.status}"
+        time.sleep(0.01)
+    return job
+
+
+def test_result_and_error_captured():
+    """Test that a handler's JSON response becomes the job result or error."""
+    queue = MediaJobQueue(max_workers=2, limits={"ocr": 2})
+    ok = queue.submit("ocr", lambda send_json, send_error, send_binary: send_json({"text": "hi"}))
+    bad = queue.submit("ocr", lambda send_json, send_error, send_binary: send_json({"error": "no image"}, 400))
+    assert _wait(ok).to_dict()["result"] == {"text": "hi"}
+    assert _wait(bad).status == "error"
+    assert bad.to_dict()["error"] == "no image" and bad.http_status == 400
+
+
+def test_binary_result_stored():
+    """Test that send_binary output is kept for /api/media/result."""
+    queue = MediaJobQueue(max_workers=1, limits={"pdf": 1})
+    job = _wait(queue.submit("pdf", lambda sj, se, send_binary: send_binary(b"%PDF-1.7", "application/pdf")))
+    result = job.to_dict()["result"]
+    assert result["content_type"] == "application/pdf" and result["size"] == 8
+    assert job.binary_path.read_bytes() == b"%PDF-1.7"
+    job.binary_path.unlink()
+
+
+def test_per_type_limit():
+    """Test that a type at its limit queues while other types still run."""
+    queue = MediaJobQueue(max_workers=4, limits={"video": 1, "ocr": 2})
+    release = threading.Event()
+    peak = {"video": 0}
+    running = {"video": 0}
+    lock = threading.Lock()
+
+    def slow_video(send_json, send_error, send_binary):
+        with lock:
+            running["video"] += 1
+            peak["video"] = max(peak["video"], running["video"])
+        release.wait(5)
+        with lock:
+            running["video"] -= 1
+        send_json({"ok": True})
+
+    videos = [queue.submit("video", slow_video) for _ in range(3)]
+    ocr = queue.submit("ocr", lambda sj, se, sb: sj({"text": ""}))
+    assert _wait(ocr).status == "complete", "OCR should not wait behind video jobs"
+    assert [v.status for v in videos] == ["processing", "queued", "queued"]
+    release.set()
+    for v in videos:
+        _wait(v)
+    assert peak["video"] == 1
+
+
+def test_cancel_queued_and_running():
+    """Test that cancel drops a queued job and stops a running one at a checkpoint."""
+    queue = MediaJobQueue(max_workers=1, limits={"video": 1})
+    started = threading.Event()
+
+    def looping(send_json, send_error, send_binary):
+        started.set()
+        for i in range(500):
+            report_progress(i / 500, "Working")
+            time.sleep(0.01)
+        send_json({"ok": True})
+
+    running = queue.submit("video", looping)
+    queued = queue.submit("video", looping)
+    started.wait(5)
+    assert queue.cancel(queued.id).status == "cancelled"
+    queue.cancel(running.id)
+    assert _wait(running).status == "cancelled"
+    assert running.progress < 1.0
+
+
+def test_cancel_kills_subprocess():
+    """Test that cancelling a job kills its running subprocess."""
+    queue = MediaJobQueue(max_workers=1, limits={"youtube": 1})
+
+    def download(send_json, send_error, send_binary):
+        run_subprocess([sys.executable, "-c", "import time; time.sleep(30)"], timeout=60)
+        send_json({"ok": True})
+
+    job = queue.submit("youtube", download)
+    time.sleep(0.3)
+    began = time.monotonic()
+    queue.cancel(job.id)
+    assert _wait(job).status == "cancelled"
+    assert time.monotonic() - began < 5, "Subprocess should be killed on cancel"
+
+
+def test_bound_helper_thread_reports_and_cancels_with_job():
+    """Test that work handed to another thread keeps the job's progress and cancellation."""
+    queue = MediaJobQueue(max_workers=1, limits={"video": 1})
+    helper = ThreadPoolExecutor(max_workers=1)
+
+    def transcribe():
+        report_progress(0.3, "Transcribed chunk 1/9")
+        run_subprocess([sys.executable, "-c", "import time; time.sleep(30)"], timeout=60)
+
+    def analyze(send_json, send_error, send_binary):
+        wait_result(helper.submit(bind_job(transcribe)))
+        send_json({"ok": True})
+
+    job = queue.submit("video", analyze)
+    deadline = time.monotonic() + 5
+    while job.activity != "Transcribed chunk 1/9":
+        assert time.monotonic() < deadline, "Progress from the helper thread was lost"
+        time.sleep(0.01)
+    time.sleep(0.3)
+    began = time.monotonic()
+    queue.cancel(job.id)
+    assert _wait(job).status == "cancelled"
+    assert time.monotonic() - began < 5, "Helper subprocess should be killed on cancel"
+    helper.shutdown()
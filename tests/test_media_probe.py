@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Tests for the cached media probe."""
+
+import os
+
+from relay.media_probe import MediaProbeCache, summarize_ffprobe, summarize_ffmpeg_header
+
+
+def test_summarize_ffprobe():
+    """Test reducing ffprobe JSON, skipping cover art and parsing rational frame rates."""
+    data = {
+        "format": {"format_name": "mov,mp4", "duration": "12.5", "bit_rate": "800000"},
+        "streams": [
+            {"codec_type": "video", "codec_name": "mjpeg", "width": 300, "height": 300,
+             "disposition": {"attached_pic": 1}},
+            {"codec_type": "video", "codec_name": "h264", "width": 1920, "height": 1080,
+             "avg_frame_rate": "30000/1001"},
+            {"codec_type": "audio", "codec_name": "aac", "sample_rate": "48000", "channels": 2},
+        ],
+    }
+    info = summarize_ffprobe(data)
+    assert info["duration"] == 12.5 and info["bit_rate"] == 800000
+    assert (info["video_codec"], info["width"], info["height"]) == ("h264", 1920, 1080)
+    assert info["fps"] == 29.97
+    assert info["has_audio"] and info["sample_rate"] == 48000
+
+
+def test_summarize_ffmpeg_header():
+    """Test the no-ffprobe fallback on a typical ffmpeg -i header."""
+    stderr = (
+        "Input #0, mov,mp4,m4a,3gp,3g2,mj2, from 'clip.mp4':\n"
+        "  Duration: 00:01:02.50, start: 0.000000, bitrate: 1205 kb/s\n"
+        "  Stream #0:0[0x1](und): Video: h264 (High) (avc1 / 0x31637661), yuv420p(progressive), "
+        "1280x720 [SAR 1:1 DAR 16:9], 1070 kb/s, 25 fps, 25 tbr, 12800 tbn (default)\n"
+        "  Stream #0:1[0x2](und): Audio: aac (LC) (mp4a / 0x6134706D), 44100 Hz, stereo, fltp, 128 kb/s\n"
+    )
+    info = summarize_ffmpeg_header(stderr)
+    assert info["duration"] == 62.5
+    assert (info["video_codec"], info["width"], info["height"], info["fps"]) == ("h264", 1280, 720, 25.0)
+    assert info["audio_codec"] == "aac" and info["sample_rate"] == 44100
+    assert not summarize_ffmpeg_header("clip.txt: Invalid data found")["has_audio"]
+
+
+def test_cache_keyed_by_size_and_mtime(tmp_path):
+    """Test that a stored probe is reused until the file changes."""
+    media = tmp_path / "clip.txt"
+    media.write_text("not really a video")
+    cache = MediaProbeCache(tmp_path / "probe", max_mb=1)
+    cache.store.put_json(cache.key(str(media)), {"duration": 3.0, "has_audio": True})
+
+    assert cache.probe(str(media))["duration"] == 3.0
+    assert MediaProbeCache(tmp_path / "probe", max_mb=1).probe(str(media))["duration"] == 3.0, \
+        "Entry should persist on disk"
+
+    stat = media.stat()
+    os.utime(media, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.probe(str(media)) is None, "Changed file should miss and fail to probe as media"
+    assert cache.probe(str(tmp_path / "missing.mp4")) is None
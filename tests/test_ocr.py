@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Tests for single-pass OCR text/confidence extraction and the batch cache."""
+
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from relay import ocr
+from relay.disk_cache import DiskCache
+from relay.ocr import cache_key, mean_confidence, ocr_images, parse_pages, text_from_data
+
+
+def _data(words):
+    """image_to_data-style dict from (page, block, par, line, text, conf) tuples."""
+    keys = ["page_num", "block_num", "par_num", "line_num", "text", "conf"]
+    return {key: [w[i] for w in words] for i, key in enumerate(keys)}
+
+
+def test_text_and_confidence_from_one_data_pass():
+    """Test that words are laid out as lines and paragraphs, and empty boxes don't count."""
+    data = _data([
+        (1, 1, 0, 0, "", "-1"),
+        (1, 1, 1, 1, "Build", "96"),
+        (1, 1, 1, 1, "finished", "90.5"),
+        (1, 1, 1, 2, "cleanly.", "88"),
+        (1, 2, 1, 1, "Next", 70),
+        (1, 2, 1, 1, " ", "-1"),
+    ])
+    assert text_from_data(data) == "Build finished\ncleanly.\n\nNext"
+    assert mean_confidence(data) == pytest.approx(86.1)
+    assert mean_confidence(_data([])) == 0.0
+
+
+def test_parse_pages():
+    """Test page specs: ranges, lists, open ranges and invalid pages."""
+    assert parse_pages(None) is None
+    assert parse_pages("1-3,7, 2") == [1, 2, 3, 7]
+    assert parse_pages([4, "2"]) == [2, 4]
+    assert parse_pages("3-", page_count=5) == [3, 4, 5]
+    with pytest.raises(ValueError):
+        parse_pages("0-2")
+
+
+def test_batch_uses_cache_and_isolates_failures(tmp_path):
+    """Test that cached images skip the pool and an unreadable image only fails its own entry."""
+    cache = DiskCache(tmp_path, 1024 * 1024, suffix=".json")
+    cached = {"text": "hello", "confidence": 91.0, "words": 1}
+    cache.put_json(cache_key(b"img-1", "eng", False, None), cached)
+    progress = []
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = ocr_images([b"img-1", b"not an image"], cache=cache, pool=pool,
+                             progress=lambda done, total: progress.append((done, total)))
+
+    assert results[0] == {**cached, "cached": True}
+    assert "error" in results[1]
+    assert progress == [(1, 2), (2, 2)]
+    assert cache_key(b"img-1", "eng", True, None) != cache_key(b"img-1", "eng", False, None)
+
+
+class _BrokenPool:
+    """Pool whose worker died: every submission fails like ProcessPoolExecutor's."""
+
+    def __init__(self):
+        self.shut_down = False
+
+    def submit(self, *args):
+        raise BrokenProcessPool("A child process terminated abruptly")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+def test_broken_pool_is_replaced_and_batch_retried(tmp_path, monkeypatch):
+    """Test that a dead shared pool is dropped and its images are OCR'd on a fresh one."""
+    broken, fresh = _BrokenPool(), ThreadPoolExecutor(max_workers=1)
+    pools = iter([broken, fresh])
+    monkeypatch.setattr(ocr, "_pool", broken)
+    monkeypatch.setattr(ocr, "ocr_pool", lambda: next(pools))
+    monkeypatch.setattr(ocr, "ocr_image", lambda image, *args: {"text": image.decode(), "confidence": 90.0})
+    try:
+        results = ocr_images([b"a", b"b"], cache=DiskCache(tmp_path, 1024 * 1024, suffix=".json"))
+    finally:
+        fresh.shutdown()
+    assert [r["text"] for r in results] == ["a", "b"]
+    assert broken.shut_down and ocr._pool is None
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Tests for the rendered-PDF cache."""
+
+from pathlib import Path
+
+from relay.disk_cache import DiskCache
+from relay.pdf_render import STYLE_VERSION, build_html, pdf_etag, pdf_key, render_pdf
+
+
+class _CountingRenderer:
+    """Writes the HTML it was given as the 'PDF' and counts renders."""
+
+    def __init__(self):
+        self.renders = []
+
+    def write_pdf(self, html, target, styled=True):
+        self.renders.append(styled)
+        Path(target).write_text(html)
+
+
+def test_build_html_wraps_fragments_only():
+    """Test that fragments and markdown are wrapped (and styled) while full documents pass through."""
+    html, styled = build_html("# Notes\n\n**done**", "markdown", "Export")
+    assert styled and "<title>Export</title>" in html
+    assert "<h1>Notes</h1>" in html and "<strong>done</strong>" in html
+    full = "<html><body>custom</body></html>"
+    assert build_html(full, "html", "Export") == (full, False)
+
+
+def test_key_covers_content_title_format_and_style():
+    """Test that every input that changes the output changes the cache key."""
+    key = pdf_key("# Hi", "markdown", "Chat")
+    assert key == pdf_key("# Hi", "markdown", "Chat")
+    assert len({key, pdf_key("# Hi!", "markdown", "Chat"), pdf_key("# Hi", "html", "Chat"),
+                pdf_key("# Hi", "markdown", "Other")}) == 4
+    assert isinstance(STYLE_VERSION, int)
+    assert pdf_etag(key) == f'"pdf-{key[:32]}"'
+
+
+def test_identical_documents_render_once(tmp_path):
+    """Test that a repeated export is served from the cache without rendering again."""
+    cache = DiskCache(tmp_path, 1024 * 1024, suffix=".pdf")
+    renderer = _CountingRenderer()
+    path, key = render_pdf("# Transcript", "markdown", "Chat", renderer=renderer, cache=cache)
+    again, again_key = render_pdf("# Transcript", "markdown", "Chat", renderer=renderer, cache=cache)
+    assert (again, again_key) == (path, key)
+    assert "<h1>Transcript</h1>" in path.read_text()
+    assert renderer.renders == [True]
+    assert not list(tmp_path.glob("*.tmp"))
+
+    render_pdf("<html><body>x</body></html>", "html", "Chat", renderer=renderer, cache=cache)
+    assert renderer.renders == [True, False]
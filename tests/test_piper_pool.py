@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Tests for the Piper worker pool protocol, restarts and eviction."""
+
+import io
+import subprocess
+import sys
+import wave
+
+import pytest
+
+from relay.piper_pool import PiperPool, PiperUnavailable
+
+# Stand-in worker speaking the relay.piper_worker protocol: PCM is the request text's bytes
+FAKE_WORKER = r'''
+import json, os, struct, sys, time
+from relay.piper_worker import write_frame, FRAME_AUDIO, FRAME_END, FRAME_ERROR
+out = sys.stdout.buffer
+if os.path.basename(sys.argv[1]).startswith("broken"):
+    out.write(b'{"error": "ModuleNotFoundError: piper"}\n'); out.flush(); sys.exit(1)
+out.write(b'{"ready": true, "sample_rate": 22050, "channels": 1, "sample_width": 2}\n'); out.flush()
+for line in sys.stdin.buffer:
+    text = json.loads(line)["text"]
+    if text == "crash" and not os.path.exists(sys.argv[1] + ".crashed"):
+        open(sys.argv[1] + ".crashed", "w").close(); os._exit(1)
+    if text == "hang":
+        time.sleep(60)
+    if text == "fail":
+        write_frame(out, FRAME_ERROR, b"bad input")
+    else:
+        for word in text.split():
+            write_frame(out, FRAME_AUDIO, word.encode().ljust(4, b"_"))
+        write_frame(out, FRAME_END)
+    out.flush()
+    if text == "bye":
+        os._exit(0)
+'''
+
+
+def _pool(tmp_path, **kwargs):
+    voices = {}
+    for name in ("amy", "ryan", "broken"):
+        path = tmp_path / f"{name}.onnx"
+        path.write_bytes(b"")
+        voices[name] = path
+    return PiperPool(voices=voices, command=lambda path: [sys.executable, "-c", FAKE_WORKER, str(path)], **kwargs)
+
+
+def test_worker_is_reused_and_returns_wav(tmp_path):
+    """Test that one resident worker serves repeated requests and audio comes back as WAV."""
+    pool = _pool(tmp_path)
+    try:
+        assert b"".join(pool.stream("amy", "hi all")) == b"hi__all_"
+        data = pool.synthesize("amy", "ok")
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            assert (wav.getframerate(), wav.readframes(10)) == (22050, b"ok__")
+        with pytest.raises(RuntimeError, match="bad input"):
+            pool.synthesize("amy", "fail")
+        assert pool.synthesize("amy", "again")  # Still in sync after the error
+        stats = pool.snapshot()
+        assert stats["started"] == 1 and stats["workers"][0]["requests"] == 4
+    finally:
+        pool.shutdown()
+
+
+def test_crashed_worker_is_restarted(tmp_path):
+    """Test that a request hitting a dead worker is retried on a fresh one."""
+    pool = _pool(tmp_path)
+    try:
+        assert b"".join(pool.stream("amy", "crash")) == b"crash"
+        assert pool.snapshot()["restarts"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_wav_header_from_worker_that_synthesized(tmp_path):
+    """Test that the WAV format comes from the worker that produced the audio, even once it has exited."""
+    pool = _pool(tmp_path)
+    try:
+        data = pool.synthesize("amy", "bye")
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            assert (wav.getframerate(), wav.readframes(10)) == (22050, b"bye_")
+        assert pool.snapshot()["started"] == 1, "No worker should be started just for the header"
+    finally:
+        pool.shutdown()
+
+
+def test_hung_worker_is_killed(tmp_path):
+    """Test that a worker sending nothing within the read timeout is killed and replaced."""
+    pool = _pool(tmp_path, read_timeout=1)
+    try:
+        hung = pool.worker("amy")
+        with pytest.raises(subprocess.TimeoutExpired):
+            pool.synthesize("amy", "hang")
+        assert not hung.alive()
+        assert pool.synthesize("amy", "ok")
+        assert pool.snapshot()["restarts"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_eviction_and_unavailable(tmp_path):
+    """Test LRU eviction beyond max_workers and that a voice failing to load is backed off on its own."""
+    pool = _pool(tmp_path, max_workers=1)
+    try:
+        pool.synthesize("amy", "one")
+        pool.synthesize("ryan", "two")
+        assert [w["voice"] for w in pool.snapshot()["workers"]] == ["ryan"]
+        assert pool.snapshot()["evictions"] == 1
+        with pytest.raises(ValueError):
+            pool.worker("nobody")
+        with pytest.raises(PiperUnavailable):
+            pool.worker("broken")
+        with pytest.raises(PiperUnavailable):
+            pool.worker("broken")  # Back-off: no respawn attempts for a while
+        assert pool.synthesize("amy", "three")  # Other voices are unaffected
+        assert list(pool.snapshot()["unavailable"]) == ["broken"]
+    finally:
+        pool.shutdown()
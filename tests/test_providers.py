@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Tests for pooled provider sessions, run against a local stand-in HTTP server."""
+
+import json
+import socket
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from relay.hedge import HedgeAttempt
+from relay.providers import ProviderRegistry, abortable_requests
+
+
+class _StubProviderHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-style chat completions endpoint with keep-alive."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        chunk = {"choices": [{"delta": {"content": "hi"}}]}
+        body = f"data: {json.dumps(chunk)}\n\ndata: [DONE]\n\n".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _start_stub_server():
+    """Start the stand-in provider on an ephemeral port. Returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubProviderHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def test_session_shared_per_origin():
+    """Test that base URLs on the same host share one pooled session."""
+    registry = ProviderRegistry()
+    a = registry.session("https://integrate.api.nvidia.com/v1")
+    b = registry.session("https://integrate.api.nvidia.com/v1/chat/completions")
+    c = registry.session("https://api.openai.com/v1")
+    assert a is b, "Same origin should reuse the session"
+    assert a is not c, "Different origins should get separate sessions"
+
+
+def test_keep_alive_reuses_connection():
+    """Test that repeated streaming calls reuse one TCP connection."""
+    server, base_url = _start_stub_server()
+    registry = ProviderRegistry()
+    try:
+        for _ in range(5):
+            response = registry.session(base_url).post(
+                f"{base_url}/chat/completions", json={"stream": True},
+                stream=True, timeout=registry.timeout(5))
+            lines = [line for line in response.iter_lines() if line]
+            response.raw.drain_conn()
+            response.close()
+            assert lines[-1] == b"data: [DONE]"
+
+        stats = registry.stats(base_url).snapshot()
+        assert stats["requests"] == 5, f"Expected 5 requests, got {stats['requests']}"
+        assert stats["connections_opened"] == 1, f"Expected 1 connection, got {stats['connections_opened']}"
+        assert stats["avg_ttfb_ms"] is not None
+        assert stats["avg_connect_ms"] is not None
+    finally:
+        registry.close()
+        server.shutdown()
+
+
+def test_timeouts_configurable():
+    """Test that the registry hands out its configured (connect, read) timeouts."""
+    registry = ProviderRegistry(connect_timeout=2.5, read_timeout=42)
+    assert registry.timeout() == (2.5, 42)
+    assert registry.timeout(read=7) == (2.5, 7)
+
+
+def test_snapshot_lists_origins():
+    """Test that the health snapshot is keyed by origin."""
+    server, base_url = _start_stub_server()
+    registry = ProviderRegistry()
+    try:
+        registry.session(base_url).post(f"{base_url}/chat/completions", json={},
+                                        timeout=registry.timeout(5))
+        snapshot = registry.snapshot()
+        origin = base_url.rsplit("/v1", 1)[0]
+        assert origin in snapshot, f"Missing {origin} in {list(snapshot)}"
+        assert snapshot[origin]["requests"] == 1
+    finally:
+        registry.close()
+        server.shutdown()
+
+
+def test_cancel_aborts_request_stalled_before_headers():
+    """Test that cancelling an attempt frees a call whose server never sends response headers."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    base_url = f"http://127.0.0.1:{listener.getsockname()[1]}/v1"
+    registry = ProviderRegistry()
+    attempt = HedgeAttempt(0, "primary")
+    outcome = {}
+
+    def call():
+        started = time.monotonic()
+        try:
+            with abortable_requests(attempt.on_cancel):
+                registry.session(base_url).post(f"{base_url}/chat/completions", json={},
+                                                timeout=registry.timeout(30))
+        except Exception as e:
+            outcome["error"] = e
+        outcome["seconds"] = time.monotonic() - started
+
+    thread = threading.Thread(target=call)
+    try:
+        thread.start()
+        conn, _ = listener.accept()  # Request sent; never answer it
+        time.sleep(0.2)
+        attempt.cancel()
+        thread.join(5)
+        assert not thread.is_alive(), "Cancelled call still blocked waiting for headers"
+        assert "error" in outcome and outcome["seconds"] < 5
+        conn.close()
+    finally:
+        registry.close()
+        listener.close()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Tests for pooled read-only SQLite connections and bounded query results."""
+
+import os
+import sqlite3
+
+import pytest
+
+from relay.sqlite_pool import SQLitePool, decode_cursor, encode_cursor, iter_rows, query_page
+
+
+def _make_db(path, rows=50):
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, data BLOB)")
+    conn.executemany("INSERT INTO items VALUES (?, ?, ?)", [(i, f"item {i}", b"\x00\x01") for i in range(rows)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_pages_and_cursors(tmp_path):
+    """Test that pages follow each other through cursors and BLOBs come back as base64."""
+    db = _make_db(tmp_path / "app.db")
+    query = "SELECT * FROM items ORDER BY id"
+    pool = SQLitePool()
+    with pool.connection(db) as conn:
+        columns, rows, has_more = query_page(conn, query, 0, 20)
+        assert columns == ["id", "name", "data"]
+        assert [r[0] for r in rows] == list(range(20)) and has_more
+        assert rows[0][2] == "AAE="
+
+        offset = decode_cursor(encode_cursor(query, 40), query)
+        _, rows, has_more = query_page(conn, query, offset, 20)
+        assert [r[0] for r in rows] == list(range(40, 50)) and not has_more
+
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(query, 20), "SELECT name FROM items")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", query)
+
+
+def test_connections_are_read_only_pooled_and_dropped_when_file_replaced(tmp_path):
+    """Test that writes fail, connections are reused, and a replaced file gets a fresh connection."""
+    db = _make_db(tmp_path / "app.db")
+    pool = SQLitePool(size=2)
+    with pool.connection(db) as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO items (name) VALUES ('x')")
+    with pool.connection(db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM items").fetchone() == (50,)
+    assert (pool.snapshot()["opened"], pool.snapshot()["reused"]) == (1, 1)
+
+    replacement = _make_db(tmp_path / "new.db", rows=3)
+    os.replace(replacement, db)
+    with pool.connection(db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM items").fetchone() == (3,)
+    stats = pool.snapshot()
+    assert (stats["opened"], stats["closed"]) == (2, 1)
+    pool.close_all()
+
+
+def test_deadline_interrupts_and_stream_is_capped(tmp_path):
+    """Test that a runaway query is interrupted, the connection stays usable, and streams stop at the cap."""
+    db = _make_db(tmp_path / "app.db")
+    pool = SQLitePool()
+    forever = "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) SELECT COUNT(*) FROM n"
+    with pool.connection(db) as conn:
+        with pytest.raises(sqlite3.OperationalError, match="interrupted"):
+            query_page(conn, forever, timeout=0.2)
+        assert query_page(conn, "SELECT COUNT(*) FROM items")[1] == [[50]]
+
+        rows = list(iter_rows(conn, "SELECT id FROM items ORDER BY id", max_rows=10))
+        assert rows[0] == ["id"] and rows[1:-1] == [[i] for i in range(10)] and rows[-1] is True
+        rows = list(iter_rows(conn, "SELECT id FROM items", max_rows=50))
+        assert len(rows) == 52 and rows[-1] is False
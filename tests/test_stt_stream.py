@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Tests for streaming speech-to-text agreement and sessions."""
+
+import pytest
+
+from relay.stt_stream import LocalAgreement, STTSessions, hypothesis_words, join_words
+
+SECOND = b"\x00\x00" * 16000
+
+
+def _words(*items):
+    return [(float(i), float(i) + 1, f" {w}") for i, w in enumerate(items)]
+
+
+def _one_word_per_second(pcm, language):
+    """Stand-in model: one word per second of buffered audio."""
+    seconds = len(pcm) // len(SECOND)
+    return {"language": "en", "segments": [
+        {"start": float(i), "end": i + 1.0, "text": f" w{i}",
+         "words": [{"word": f" w{i}", "start": float(i), "end": i + 1.0}]} for i in range(seconds)]}
+
+
+def test_local_agreement_commits_stable_prefix():
+    """Test that only words two consecutive hypotheses agree on are committed."""
+    agreement = LocalAgreement()
+    assert agreement.insert(_words("the", "birch")) == []
+    assert join_words(agreement.insert(_words("the", "birch", "canoe", "slip"))) == "the birch"
+    assert join_words(agreement.pending) == "canoe slip"
+    assert join_words(agreement.insert(_words("the", "birch", "canoe", "slid", "on"))) == "canoe"
+    assert join_words(agreement.flush()) == "slid on"
+    assert join_words(agreement.committed) == "the birch canoe slid on"
+
+
+def test_local_agreement_drops_repeated_head():
+    """Test that a word re-decoded at the start of a trimmed window is not committed twice."""
+    agreement = LocalAgreement()
+    agreement.insert(_words("a", "b"))
+    agreement.insert(_words("a", "b", "c"))
+    assert agreement._new_words([(0.95, 2.0, " b"), (2.0, 3.0, " c")]) == [(2.0, 3.0, " c")]
+
+
+def test_hypothesis_words_without_word_timings():
+    """Test that segment-only results are split into evenly timed words in session time."""
+    words = hypothesis_words({"segments": [{"start": 0.0, "end": 2.0, "text": " hello there"}]}, offset=10.0)
+    assert words == [(10.0, 11.0, " hello"), (11.0, 12.0, " there")]
+
+
+def test_session_partial_then_final():
+    """Test that a PCM session emits partial hypotheses while fed and a full final transcript."""
+    sessions = STTSessions(max_sessions=1)
+    session = sessions.create(transcribe=_one_word_per_second)
+    with pytest.raises(RuntimeError):
+        sessions.create(transcribe=_one_word_per_second)
+
+    session.feed(SECOND)
+    assert session.events_after(-1, timeout=5)[0]["partial"] == "w0"
+    session.feed(SECOND)
+    second = session.events_after(0, timeout=5)[0]
+    assert (second["text"], second["partial"]) == ("w0", "w1")
+
+    session.feed(SECOND)
+    final = sessions.finish(session.id)
+    assert final["type"] == "final" and final["text"] == "w0 w1 w2"
+    assert final["duration"] == 3.0
+    assert sessions.get(session.id) is None
+    assert sessions.snapshot()["finished"] == 1
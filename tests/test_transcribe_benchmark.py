@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Tests for the transcription benchmark's scoring and corpus handling."""
+
+import argparse
+import json
+import subprocess
+import wave
+from pathlib import Path
+
+import pytest
+
+import transcribe_benchmark
+from transcribe_benchmark import word_error_rate, word_errors, load_corpus, summarize_files, compare_runs, \
+    run_isolated
+
+
+def test_word_error_rate():
+    """Test WER ignores case and punctuation and counts substitutions, deletions and insertions."""
+    ref = "The birch canoe slid on the smooth planks."
+    assert word_error_rate(ref, "the birch canoe, slid on the smooth planks") == 0.0
+    assert word_errors(ref, "The birch canoe slid on the smooth plank.") == 1
+    assert word_errors(ref, "The canoe slid on the smooth planks.") == 1
+    assert word_errors(ref, "The birch canoe slid on to the smooth planks.") == 1
+    assert word_error_rate(ref, "") == 1.0
+    assert word_error_rate("", "") == 0.0
+
+
+def test_load_corpus(tmp_path):
+    """Test that only WAVs with a reference transcript are loaded, with their duration."""
+    for name, seconds in (("a", 2), ("b", 1)):
+        with wave.open(str(tmp_path / f"{name}.wav"), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(16000)
+            wav.writeframes(b"\x00\x00" * 16000 * seconds)
+    (tmp_path / "a.txt").write_text("Hello there.\n")
+    corpus = load_corpus(tmp_path)
+    assert [(e["name"], e["text"], e["duration"]) for e in corpus] == [("a", "Hello there.", 2.0)]
+
+
+def test_summary_and_compare():
+    """Test corpus-level RTF/WER weighting and deltas against an earlier report."""
+    files = [{"duration": 10.0, "seconds": 1.0, "words": 20, "errors": 1},
+             {"duration": 30.0, "seconds": 5.0, "words": 80, "errors": 4}]
+    summary = summarize_files(files)
+    assert summary["rtf"] == 0.15 and summary["wer"] == 0.05
+
+    previous = {"results": [{"backend": "whisper", "model": "base", "rtf": 0.25, "wer": 0.05,
+                             "load_seconds": 2.0, "peak_rss_mb": 900.0}]}
+    current = {"results": [{"backend": "whisper", "model": "base", **summary,
+                            "load_seconds": 1.5, "peak_rss_mb": 800.0},
+                           {"backend": "whisper", "model": "tiny", "error": "not installed"}]}
+    deltas = compare_runs(current, previous)
+    assert deltas == [{"backend": "whisper", "model": "base", "rtf": pytest.approx(-0.1),
+                       "wer": 0.0, "load_seconds": -0.5, "peak_rss_mb": -100.0}]
+
+
+def test_run_isolated_reads_result_file_not_stdout(monkeypatch, tmp_path):
+    """Test that banners on the child's stdout don't break the result, and a missing result is an error."""
+    def child(cmd, **kwargs):
+        result_file = Path(cmd[cmd.index("--result-file") + 1])
+        if cmd[cmd.index("--single") + 2] == "base":
+            result_file.write_text(json.dumps({"backend": "whisper", "model": "base", "rtf": 0.1}))
+        return subprocess.CompletedProcess(cmd, 0, "Downloading model...\n{not json", "")
+
+    monkeypatch.setattr(transcribe_benchmark.subprocess, "run", child)
+    args = argparse.Namespace(language="en", threads=0, warmup=1, repeat=1)
+    assert run_isolated("whisper", "base", tmp_path, args) == {"backend": "whisper", "model": "base", "rtf": 0.1}
+    failed = run_isolated("whisper", "tiny", tmp_path, args)
+    assert (failed["model"], "error" in failed) == ("tiny", True)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Tests for the disk LRU cache and the transcript cache built on it."""
+
+import wave
+
+from relay.disk_cache import DiskCache
+from relay.transcript_cache import TranscriptCache, pcm_fingerprint
+
+
+def _write_wav(path, samples: bytes, rate=16000):
+    """Write 16-bit mono PCM samples to a WAV file."""
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples)
+
+
+def test_disk_cache_sees_entries_written_by_another_process(tmp_path):
+    """Test that an entry written by a second instance after the first built its index is a hit."""
+    server = DiskCache(tmp_path, max_bytes=1000)
+    script = DiskCache(tmp_path, max_bytes=1000)
+    script.put("transcript", b"t" * 100)
+    assert server.get("transcript") == b"t" * 100
+    stats = server.snapshot()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 0, 1)
+
+    script.delete("transcript")
+    assert server.get("transcript") is None
+    assert server.snapshot()["entries"] == 0
+
+
+def test_disk_cache_lru_eviction(tmp_path):
+    """Test that the least recently used entry is evicted past max_bytes."""
+    cache = DiskCache(tmp_path, max_bytes=250)
+    cache.put("a", b"x" * 100)
+    cache.put("b", b"y" * 100)
+    assert cache.get("a") == b"x" * 100  # a is now most recently used
+    cache.put("c", b"z" * 100)
+    assert cache.get("b") is None, "Least recently used entry should be evicted"
+    assert cache.get("a") is not None and cache.get("c") is not None
+    stats = cache.snapshot()
+    assert stats["evictions"] == 1 and stats["entries"] == 2
+
+
+def test_disk_cache_survives_restart(tmp_path):
+    """Test that a new instance over the same directory sees earlier entries."""
+    DiskCache(tmp_path, max_bytes=1000).put_json("key", {"text": "hello"})
+    assert DiskCache(tmp_path, max_bytes=1000).get_json("key") == {"text": "hello"}
+
+
+def test_fingerprint_is_content_based(tmp_path):
+    """Test that identical PCM in different files gives the same fingerprint."""
+    samples = bytes(range(256)) * 64
+    _write_wav(tmp_path / "a.wav", samples)
+    _write_wav(tmp_path / "b.wav", samples)
+    _write_wav(tmp_path / "c.wav", samples[::-1])
+    assert pcm_fingerprint(str(tmp_path / "a.wav")) == pcm_fingerprint(str(tmp_path / "b.wav"))
+    assert pcm_fingerprint(str(tmp_path / "a.wav")) != pcm_fingerprint(str(tmp_path / "c.wav"))
+
+
+def test_transcribe_runs_once_per_audio_and_model(tmp_path):
+    """Test that a repeat transcription is served from cache, keyed by model and language."""
+    _write_wav(tmp_path / "clip.wav", b"\x01\x00" * 16000)
+    cache = TranscriptCache(directory=tmp_path / "cache", max_mb=1)
+    calls = []
+
+    def run():
+        calls.append(1)
+        return {"text": "hello", "language": "en", "segments": [{"start": 0.0, "end": 1.0, "text": "hello"}]}
+
+    audio = str(tmp_path / "clip.wav")
+    first = cache.transcribe(audio, "base", None, run)
+    second = cache.transcribe(audio, "base", None, run)
+    assert first == second and len(calls) == 1
+    cache.transcribe(audio, "small", None, run)
+    cache.transcribe(audio, "base", "de", run)
+    assert len(calls) == 3, "Different model or language should miss"
+    stats = cache.snapshot()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+
+
+def test_failed_diarization_is_not_cached(tmp_path):
+    """Test that a transcript whose diarization failed is returned but run again next time."""
+    _write_wav(tmp_path / "clip.wav", b"\x01\x00" * 16000)
+    cache = TranscriptCache(directory=tmp_path / "cache", max_mb=1)
+    outcomes = [False, True]
+
+    def run():
+        return {"text": "hello", "language": "en", "segments": [], "diarized": outcomes.pop(0)}
+
+    audio = str(tmp_path / "clip.wav")
+    assert cache.transcribe(audio, "whisperx/base", None, run, options="diarize:None-None")["diarized"] is False
+    assert cache.transcribe(audio, "whisperx/base", None, run, options="diarize:None-None")["diarized"] is True
+    assert cache.transcribe(audio, "whisperx/base", None, run, options="diarize:None-None")["diarized"] is True
+    assert not outcomes
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Tests for the transcription engine's backend selection and result shape."""
+
+import pytest
+
+from relay import whisper_models
+from relay.transcription import (
+    BACKENDS, Backend, LoadedModel, backend_snapshot, get_backend, load_model, model_key, normalize_segments,
+    resolve_backend, transcribe
+)
+from relay.whisper_models import ModelRegistry
+
+
+class _EchoBackend(Backend):
+    """Stand-in backend that reports how many samples it was given."""
+
+    name = "echo"
+    module = "json"  # Always importable
+    loads = 0
+
+    def load(self, model_name, device=None, compute_type=None, threads=0):
+        _EchoBackend.loads += 1
+        return LoadedModel(self, model_name, object(), "cpu", "int8", size_bytes=1)
+
+    def transcribe(self, loaded, audio, language=None, word_timestamps=False, **options):
+        return {"text": f"{len(audio)} samples", "language": language or "en",
+                "segments": normalize_segments([{"start": 0.0, "end": 1.0, "text": "hi"}])}
+
+
+def test_model_key():
+    """Test registry/cache ids stay plain for openai-whisper (existing cache entries)."""
+    assert model_key("whisper", "base") == "base"
+    assert model_key("faster-whisper", "small") == "faster-whisper/small"
+
+
+def test_load_model_keeps_slashes_in_model_names(monkeypatch):
+    """Test that only the first key segment picks the backend, so Hugging Face ids load intact."""
+    monkeypatch.setattr(_EchoBackend, "loads", 0)
+    monkeypatch.setitem(BACKENDS, "echo", _EchoBackend())
+    monkeypatch.setitem(BACKENDS, "whisper", _EchoBackend())
+    assert load_model(model_key("echo", "Systran/faster-whisper-large-v3")).name == "Systran/faster-whisper-large-v3"
+    assert load_model(model_key("whisper", "base")).name == "base"
+    assert load_model("/models/ggml-base.pt").name == "/models/ggml-base.pt"
+
+
+def test_normalize_segments_whisperx_words():
+    """Test that whisperx word scores and speakers map onto the common shape."""
+    segments = normalize_segments([
+        {"start": 0.0, "end": 1.5, "text": " Hello", "speaker": "SPEAKER_00",
+         "words": [{"word": "Hello", "start": 0.1, "end": 0.5, "score": 0.9, "speaker": "SPEAKER_00"}]},
+        {"start": 1.5, "end": 2.0, "text": " there", "words": None},
+    ])
+    assert segments[0]["words"] == [{"word": "Hello", "start": 0.1, "end": 0.5,
+                                     "probability": 0.9, "speaker": "SPEAKER_00"}]
+    assert segments[0]["speaker"] == "SPEAKER_00"
+    assert [s["id"] for s in segments] == [0, 1] and "words" not in segments[1]
+
+
+def test_unknown_backend():
+    """Test that an unknown backend name is rejected."""
+    with pytest.raises(ValueError):
+        get_backend("nope")
+    with pytest.raises(ValueError):
+        resolve_backend("nope")
+
+
+def test_transcribe_reuses_loaded_model():
+    """Test that transcribe() loads through the shared registry once and tags the result."""
+    BACKENDS["echo"] = _EchoBackend()
+    try:
+        first = transcribe([0.0] * 16000, "tiny", backend="echo")
+        second = transcribe([0.0] * 8000, "tiny", backend="echo", language="de")
+    finally:
+        del BACKENDS["echo"]
+    assert _EchoBackend.loads == 1
+    assert first["text"] == "16000 samples" and first["duration"] == 1.0
+    assert (first["backend"], first["model"]) == ("echo", "tiny")
+    assert second["language"] == "de" and second["duration"] == 0.5
+
+
+def test_snapshot_device_comes_from_loaded_models(monkeypatch):
+    """Test that the health snapshot reports the loaded model's device instead of probing torch."""
+    registry = ModelRegistry(loader=lambda name: LoadedModel(_EchoBackend(), name, object(), "cpu", "int8", 1))
+    monkeypatch.setattr(whisper_models, "_registry", registry)
+    snapshot = backend_snapshot()
+    assert (snapshot["device"], snapshot["compute_type"]) == ("unknown", "unknown")
+    registry.get("faster-whisper/base")
+    snapshot = backend_snapshot()
+    assert (snapshot["device"], snapshot["compute_type"]) == ("cpu", "int8")
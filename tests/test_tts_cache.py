@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Tests for the shared TTS audio cache."""
+
+import pytest
+
+from relay.tts_cache import TTSCache, normalize_text
+
+
+def test_key_normalizes_text_and_separates_voices():
+    """Test that whitespace/Unicode variants share a key while engine, voice and settings don't."""
+    assert normalize_text("  Build\tfinished.\n ") == "Build finished."
+    key = TTSCache.key("edge", "en-US-GuyNeural", "Build  finished.")
+    assert key == TTSCache.key("edge", "en-US-GuyNeural", " Build finished. ")
+    assert key == TTSCache.key("edge", "en-US-GuyNeural", "Build finished.")
+    assert key != TTSCache.key("edge", "en-US-AriaNeural", "Build finished.")
+    assert key != TTSCache.key("piper", "en-US-GuyNeural", "Build finished.")
+    eleven = TTSCache.key("elevenlabs", "v1", "Hi", "eleven_monolingual_v1", stability=0.5)
+    assert eleven != TTSCache.key("elevenlabs", "v1", "Hi", "eleven_monolingual_v1", stability=0.7)
+    assert TTSCache.etag(key) == f'"tts-{key[:32]}"'
+
+
+def test_hits_credit_dollars_saved(tmp_path):
+    """Test that ElevenLabs hits are credited at the per-character price and local engines at zero."""
+    cache = TTSCache(tmp_path, max_mb=1)
+    text = "x" * 2000
+    eleven = cache.key("elevenlabs", "v1", text)
+    piper = cache.key("piper", "amy", text)
+    assert cache.get(eleven, "elevenlabs", text) is None
+
+    cache.put(eleven, b"mp3")
+    cache.put(piper, b"wav")
+    assert cache.get(eleven, "elevenlabs", text) == b"mp3"
+    assert cache.get(piper, "piper", text) == b"wav"
+
+    stats = cache.snapshot()
+    assert stats["dollars_saved"] == pytest.approx(0.03)
+    assert stats["hits_by_engine"] == {"elevenlabs": 1, "piper": 1}
+    assert (stats["hits"], stats["misses"]) == (2, 1)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Tests for sentence splitting and pipelined streaming TTS."""
+
+import io
+import threading
+import time
+import wave
+
+from relay.tts_stream import split_sentences, synthesize_pipelined, wav_stream, wav_params
+
+
+def _wav(frames: bytes, rate: int = 22050) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(frames)
+    return buf.getvalue()
+
+
+def test_split_sentences():
+    """Test sentence splitting keeps closing quotes, merges fragments and caps length."""
+    text = 'The reviewer said "ship it now." Then the logs went quiet for a while. Ok.\n\nNext paragraph here.'
+    assert split_sentences(text) == ['The reviewer said "ship it now."',
+                                     "Then the logs went quiet for a while.", "Ok. Next paragraph here."]
+    assert split_sentences("Version 3.5 is out and it is much faster than before.") == \
+        ["Version 3.5 is out and it is much faster than before."]
+    long = split_sentences("word " * 200, max_chars=100)
+    assert all(len(s) <= 100 for s in long) and " ".join(long).split() == ["word"] * 200
+
+
+def test_pipelined_synthesis_is_ordered_and_parallel():
+    """Test that sentences are synthesized ahead concurrently but yielded in order."""
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def synthesize(sentence):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05 if sentence == "a" else 0.01)  # First sentence finishes last
+        with lock:
+            active[0] -= 1
+        return sentence.encode()
+
+    assert list(synthesize_pipelined(["a", "b", "c", "d"], synthesize, workers=2)) == [b"a", b"b", b"c", b"d"]
+    assert peak[0] == 2
+
+
+def test_closing_stream_cancels_pending_sentences():
+    """Test that a client disconnect stops sentences that have not started."""
+    started = []
+    chunks = synthesize_pipelined([str(i) for i in range(10)], lambda s: started.append(s) or b"x", workers=1)
+    next(chunks)
+    chunks.close()
+    time.sleep(0.05)
+    assert len(started) <= 3
+
+
+def test_wav_stream_concatenates_pcm():
+    """Test that per-sentence WAVs become one header followed by their PCM frames."""
+    data = b"".join(wav_stream(iter([_wav(b"\x01\x00" * 10), _wav(b"\x02\x00" * 5)])))
+    params, frames = wav_params(data[:44])[0], data[44:]
+    assert params == (1, 2, 22050)
+    assert frames == b"\x01\x00" * 10 + b"\x02\x00" * 5
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Tests for single-pass video frame extraction helpers."""
+
+import shutil
+import subprocess
+
+import pytest
+
+from relay.video_frames import (
+    evenly_spaced_timestamps, select_expression, split_jpeg_stream, split_webp_stream,
+    parse_scene_metadata, parse_showinfo_pts, dhash_frames, pick_keyframes, extract_frames_at, extract_keyframes
+)
+
+_FFMPEG = shutil.which("ffmpeg")
+
+
+def _make_video(path, seconds=3, fps=2):
+    """Render a short test pattern video with ffmpeg."""
+    subprocess.run([_FFMPEG, "-hide_banner", "-loglevel", "error", "-y", "-f", "lavfi",
+                    "-i", f"testsrc=duration={seconds}:rate={fps}:size=160x120", "-c:v", "mjpeg", str(path)],
+                   check=True)
+    return str(path)
+
+
+def test_evenly_spaced_timestamps():
+    """Test that timestamps split the video into count + 1 equal parts."""
+    assert evenly_spaced_timestamps(100, 4) == [20.0, 40.0, 60.0, 80.0]
+    assert evenly_spaced_timestamps(10, 0) == []
+
+
+def test_select_expression():
+    """Test that each timestamp selects the first frame crossing it."""
+    expr = select_expression([0, 3])
+    assert expr == ("(isnan(prev_pts)+lt(prev_pts*TB\\,0))*gte(pts*TB\\,0)"
+                    "+(isnan(prev_pts)+lt(prev_pts*TB\\,3))*gte(pts*TB\\,3)")
+
+
+def test_parse_showinfo_pts():
+    """Test reading selected frame timestamps from showinfo log lines only."""
+    text = ("Input #0, lavfi, from 'testsrc':\n"
+            "[Parsed_showinfo_1 @ 0x55] n:   0 pts:      0 pts_time:0       duration:1\n"
+            "[Parsed_showinfo_1 @ 0x55] n:   1 pts:      3 pts_time:1.5     duration:1\n"
+            "frame:1    pts:1       pts_time:9\n")
+    assert parse_showinfo_pts(text) == [0.0, 1.5]
+
+
+@pytest.mark.skipif(_FFMPEG is None, reason="ffmpeg not installed")
+def test_extract_frames_pairs_images_with_actual_timestamps(tmp_path):
+    """Test that t=0 yields the first frame and images carry the timestamps of the frames chosen."""
+    video = _make_video(tmp_path / "clip.avi")
+    frames = extract_frames_at(video, [0, 1.2, 1.4, 2.0], _FFMPEG)
+    assert [ts for ts, _ in frames] == [0.0, 1.5, 2.0]  # 1.2 and 1.4 both land on the 1.5s frame
+    assert all(image.startswith(b"\xff\xd8") for _, image in frames)
+
+
+def test_split_jpeg_stream():
+    """Test splitting concatenated JPEGs, ignoring a truncated trailing image."""
+    a = b"\xff\xd8" + b"\x01\xff\x00\x02" + b"\xff\xd9"
+    b = b"\xff\xd8" + b"\x03\x04" + b"\xff\xd9"
+    frames = split_jpeg_stream(a + b + b"\xff\xd8\x05")
+    assert frames == [a, b]
+    assert split_jpeg_stream(b"") == []
+
+
+def test_split_webp_stream():
+    """Test splitting concatenated RIFF/WebP images, including odd-size padding."""
+    a = b"RIFF" + (5).to_bytes(4, "little") + b"WEBPx" + b"\x00"
+    b = b"RIFF" + (4).to_bytes(4, "little") + b"WEBP"
+    assert split_webp_stream(a + b) == [a, b]
+
+
+def test_parse_scene_metadata():
+    """Test pairing metadata=print frame lines with their scene scores."""
+    text = ("frame:0    pts:0       pts_time:0\n"
+            "lavfi.scene_score=0.000000\n"
+            "frame:1    pts:1       pts_time:1\n"
+            "lavfi.scene_score=0.420000\n")
+    assert parse_scene_metadata(text) == [(0.0, 0.0), (1.0, 0.42)]
+
+
+def test_dhash_frames():
+    """Test that a left-to-right falling gradient sets every hash bit."""
+    falling = bytes(range(90, 0, -10)) * 8  # 9x8, each pixel brighter than its right neighbour
+    flat = bytes(72)
+    assert dhash_frames(falling + flat) == [(1 << 64) - 1, 0]
+
+
+def test_pick_keyframes_drops_duplicates():
+    """Test that near-duplicate frames are skipped and the biggest changes kept."""
+    samples = [
+        (0.0, 0.0, 0x0),
+        (1.0, 0.01, 0x1),       # Same screen as the opening frame
+        (2.0, 0.9, 0xFFFF),     # Scene cut
+        (3.0, 0.02, 0xFFFE),    # Same as the cut
+        (4.0, 0.5, 0xFFFF0000FFFF0000),  # Bigger change to its neighbour than the cut
+    ]
+    assert pick_keyframes(samples, 10, "scene", min_distance=6) == [0.0, 2.0, 4.0]
+    assert pick_keyframes(samples, 2, "scene", min_distance=6) == [0.0, 2.0]
+    assert pick_keyframes(samples, 2, "dhash", min_distance=6) == [0.0, 4.0]
+    assert pick_keyframes([], 5) == []
+
+
+@pytest.mark.skipif(_FFMPEG is None, reason="ffmpeg not installed")
+def test_keyframes_include_opening_frame_with_matching_timestamps(tmp_path):
+    """Test that the t=0 keyframe is extracted and every image is paired with its own timestamp."""
+    video = _make_video(tmp_path / "clip.avi", seconds=4)
+    keyframes = extract_keyframes(video, 3, "scene", _FFMPEG, max_width=160, image_format="jpeg")
+    timestamps = [ts for ts, _ in keyframes]
+    assert timestamps[0] == 0.0
+    assert timestamps == sorted(set(timestamps))
+    for ts, image in keyframes:
+        assert [t for t, _ in extract_frames_at(video, [ts], _FFMPEG, max_width=160)] == [ts]
+        assert image.startswith(b"\xff\xd8")
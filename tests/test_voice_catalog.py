@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Tests for the cached Edge/ElevenLabs voice catalogs."""
+
+import threading
+import time
+
+import pytest
+
+from relay import api_handlers
+from relay.api_handlers import APIHandler
+from relay.circuit_breaker import ProviderAuthError
+from relay.voice_catalog import VoiceCatalog, catalog_etag
+
+
+class _Fetcher:
+    """Returns a numbered voice list per call; optionally fails or blocks."""
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+        self.done = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        try:
+            if self.fail:
+                raise RuntimeError("provider down")
+            return {"voices": [f"voice-{self.calls}"]}
+        finally:
+            self.done.set()
+
+
+def test_fresh_entries_are_served_and_survive_restart(tmp_path):
+    """Test that a cached list is reused within the TTL and reloaded from disk by a new catalog."""
+    fetch = _Fetcher()
+    catalog = VoiceCatalog("edge", ttl_seconds=60, directory=tmp_path)
+    payload, etag = catalog.get(fetch)
+    assert payload == {"voices": ["voice-1"]}
+    assert etag == catalog_etag(payload)
+    assert catalog.get(fetch) == (payload, etag)
+    assert fetch.calls == 1
+
+    restarted = VoiceCatalog("edge", ttl_seconds=60, directory=tmp_path)
+    assert restarted.get(fetch) == (payload, etag)
+    assert fetch.calls == 1
+    assert (restarted.snapshot()["hits"], restarted.snapshot()["misses"]) == (1, 0)
+
+
+def test_stale_entry_is_served_while_refreshing(tmp_path):
+    """Test that an expired list is returned at once and replaced by a background refresh."""
+    fetch = _Fetcher()
+    catalog = VoiceCatalog("elevenlabs", ttl_seconds=0, directory=tmp_path)
+    first, first_etag = catalog.get(fetch, variant="key1")
+    fetch.done.clear()
+
+    stale, stale_etag = catalog.get(fetch, variant="key1")
+    assert (stale, stale_etag) == (first, first_etag)
+    assert fetch.done.wait(5)
+    for _ in range(50):
+        if catalog.snapshot()["refreshes"]:
+            break
+        time.sleep(0.02)
+
+    catalog.ttl_seconds = 60
+    refreshed, refreshed_etag = catalog.get(fetch, variant="key1")
+    assert refreshed == {"voices": ["voice-2"]}
+    assert refreshed_etag != first_etag
+    assert catalog.snapshot()["stale_hits"] == 1
+
+
+def test_failed_refresh_keeps_stale_and_cold_failure_raises(tmp_path):
+    """Test that a failing provider leaves the stale list in place, and raises when nothing is cached."""
+    fetch = _Fetcher()
+    catalog = VoiceCatalog("edge", ttl_seconds=0, directory=tmp_path)
+    first, _ = catalog.get(fetch)
+    fetch.fail = True
+    fetch.done.clear()
+    assert catalog.get(fetch)[0] == first
+    assert fetch.done.wait(5)
+    for _ in range(50):
+        if catalog.snapshot()["refresh_errors"]:
+            break
+        time.sleep(0.02)
+    assert catalog.snapshot()["last_error"] == "provider down"
+    assert catalog.get(fetch)[0] == first  # Retry is backed off; still stale
+
+    with pytest.raises(RuntimeError):
+        catalog.get(fetch, variant="other")
+
+
+def test_elevenlabs_defaults_for_forbidden_key_are_not_cached(tmp_path, monkeypatch):
+    """Test that a key without voices_read gets the curated defaults, and the real list once it's fixed."""
+    catalog = VoiceCatalog("elevenlabs", ttl_seconds=3600, directory=tmp_path)
+    monkeypatch.setattr(api_handlers, "voice_catalog", lambda name: catalog)
+    monkeypatch.setenv("ELEVENLABS_API_KEY", "key")
+    responses, sent = [], []
+    api = APIHandler(lambda data, status=200: responses.append(data), lambda status: None)
+
+    def forbidden(api_key):
+        raise ProviderAuthError("ElevenLabs", 403, "missing_permissions")
+
+    monkeypatch.setattr(api, "_fetch_elevenlabs_voices", forbidden)
+    api.handle_elevenlabs_voices(lambda *args, **kwargs: sent.append(args))
+    assert responses[0]["source"] == "defaults" and not sent
+    assert not catalog.snapshot()["entries"] and not list(tmp_path.iterdir())
+
+    monkeypatch.setattr(api, "_fetch_elevenlabs_voices", lambda api_key: {"voices": ["mine"]})
+    api.handle_elevenlabs_voices(lambda *args, **kwargs: sent.append(args))
+    assert sent and b"mine" in sent[0][0]
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Tests for the shared Whisper model registry (with a stand-in loader)."""
+
+import threading
+import time
+
+from relay.whisper_models import ModelRegistry
+
+MB = 1024 * 1024
+
+
+def _registry(budget_mb, sizes_mb):
+    """Build a registry whose loader counts loads and returns a named stand-in model."""
+    loads = []
+
+    def loader(name):
+        loads.append(name)
+        time.sleep(0.05)
+        return object()
+
+    registry = ModelRegistry(budget_mb=budget_mb, loader=loader,
+                             sizer=lambda name, model: sizes_mb[name] * MB)
+    return registry, loads
+
+
+def test_model_loaded_once():
+    """Test that repeat and concurrent requests share a single load."""
+    registry, loads = _registry(1000, {"base": 300})
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.get("base"))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert loads == ["base"], f"Expected one load, got {loads}"
+    assert all(m is models[0] for m in models)
+    assert registry.get("base") is models[0]
+
+
+def test_lru_eviction_under_budget():
+    """Test that the least recently used model is evicted when over budget."""
+    registry, loads = _registry(1000, {"tiny": 150, "base": 300, "small": 900})
+    registry.get("tiny")
+    registry.get("base")
+    registry.get("tiny")  # base is now least recently used
+    registry.get("small")
+    snapshot = registry.snapshot()
+    assert set(snapshot["models"]) == {"small"}, snapshot["models"]
+    assert snapshot["evictions"] == 2
+    assert snapshot["used_mb"] <= 1000
+
+
+def test_oversized_model_still_served():
+    """Test that a model larger than the budget is kept alone rather than refused."""
+    registry, _ = _registry(100, {"large": 6200})
+    assert registry.get("large") is not None
+    assert list(registry.snapshot()["models"]) == ["large"]
+
+
+def test_use_serialises_inference():
+    """Test that use() gives one thread at a time access to the same model."""
+    registry, _ = _registry(1000, {"base": 300})
+    active = []
+    overlap = []
+
+    def transcribe():
+        with registry.use("base"):
+            active.append(1)
+            overlap.append(len(active))
+            time.sleep(0.02)
+            active.pop()
+
+    threads = [threading.Thread(target=transcribe) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(overlap) == 1, "Inference on one model instance should not overlap"
+    assert registry.snapshot()["models"]["base"]["uses"] == 4
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Tests for the YouTube download cache."""
+
+import os
+
+from relay.youtube_cache import YouTubeCache, youtube_video_id
+
+
+def test_youtube_video_id():
+    """Test that every common URL form maps to the same canonical id."""
+    for url in [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://youtube.com/watch?feature=share&v=dQw4w9WgXcQ&t=42",
+        "youtu.be/dQw4w9WgXcQ?si=abc",
+        "https://m.youtube.com/shorts/dQw4w9WgXcQ",
+        "https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ",
+    ]:
+        assert youtube_video_id(url) == "dQw4w9WgXcQ", url
+    assert youtube_video_id("https://www.youtube.com/@channel") is None
+    assert youtube_video_id("https://example.com/watch?v=dQw4w9WgXcQ") is None
+
+
+def test_store_lookup_and_update(tmp_path):
+    """Test that a stored download is found again with its derived results."""
+    cache = YouTubeCache(tmp_path, max_mb=1)
+    assert cache.lookup("dQw4w9WgXcQ", "best") is None
+
+    video = tmp_path / f"{cache.stem('dQw4w9WgXcQ', 'best')}.mp4"
+    video.write_bytes(b"x" * 100)
+    cache.store("dQw4w9WgXcQ", "best", str(video), title="Song", duration=212.0)
+    cache.update("dQw4w9WgXcQ", "best", "transcripts", "base", {"text": "hello"})
+
+    entry = cache.lookup("dQw4w9WgXcQ", "best")
+    assert entry["title"] == "Song" and entry["video_path"] == str(video)
+    assert entry["transcripts"]["base"]["text"] == "hello"
+    assert cache.lookup("dQw4w9WgXcQ", "worst") is None, "Format selector is part of the key"
+    assert cache.snapshot()["hits"] == 1
+
+
+def test_lru_eviction(tmp_path):
+    """Test that the least recently used download is evicted past the budget."""
+    cache = YouTubeCache(tmp_path, max_mb=250_000 / (1024 * 1024))
+    paths = {}
+    for i, video_id in enumerate(["aaaaaaaaaaa", "bbbbbbbbbbb", "ccccccccccc"]):
+        path = tmp_path / f"{cache.stem(video_id, 'best')}.mp4"
+        path.write_bytes(b"x" * 100_000)
+        os.utime(path, (1000 + i, 1000 + i))
+        paths[video_id] = path
+        if video_id != "ccccccccccc":
+            cache.store(video_id, "best", str(path))
+            os.utime(path, (1000 + i, 1000 + i))
+
+    cache.lookup("aaaaaaaaaaa", "best")  # Most recently used now
+    cache.store("ccccccccccc", "best", str(paths["ccccccccccc"]))
+    assert not paths["bbbbbbbbbbb"].exists(), "Least recently used download should be evicted"
+    assert cache.lookup("bbbbbbbbbbb", "best") is None
+    assert paths["aaaaaaaaaaa"].exists() and paths["ccccccccccc"].exists()
+
+
+def test_sidecar_frames_count_toward_budget(tmp_path):
+    """Test that frames saved in a sidecar count toward the budget and can evict older downloads."""
+    cache = YouTubeCache(tmp_path, max_mb=1000 / (1024 * 1024))
+    old = tmp_path / f"{cache.stem('aaaaaaaaaaa', 'best')}.mp4"
+    new = tmp_path / f"{cache.stem('bbbbbbbbbbb', 'best')}.mp4"
+    for i, (video_id, path) in enumerate([("aaaaaaaaaaa", old), ("bbbbbbbbbbb", new)]):
+        path.write_bytes(b"x" * 100)
+        cache.store(video_id, "best", str(path))
+        os.utime(path, (1000 + i, 1000 + i))
+    assert old.exists()
+
+    cache.update("bbbbbbbbbbb", "best", "frames", "8", ["A" * 1000])
+    assert not old.exists() and not old.with_suffix(".json").exists()
+    assert new.exists() and cache.snapshot()["evictions"] == 1
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Transcription benchmark: real-time factor, load time, peak memory and WER
+for every installed backend and model size on a fixed local corpus.
+
+The corpus is a directory of 16 kHz mono WAV files, each with a .txt file of
+the same name holding the reference transcript. --synthesize builds one from
+a fixed set of sentences with the local Piper voice, so every machine
+benchmarks the same audio. Each (backend, model) pair runs in a fresh
+process so its peak RSS and load time aren't skewed by models loaded
+before it.
+
+Results are written as JSON (tagged with the git commit) for comparing runs:
+
+Usage:
+    python transcribe_benchmark.py --synthesize
+    python transcribe_benchmark.py --backends faster-whisper,whisper --models tiny,base
+    python transcribe_benchmark.py --compare .cache/benchmarks/previous.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+from typing import List, Optional
+
+from relay.config import CACHE_DIR, RELAY_DIR
+
+DEFAULT_CORPUS = CACHE_DIR / "bench-corpus"
+DEFAULT_RESULTS = CACHE_DIR / "benchmarks"
+DEFAULT_MODELS = ["tiny", "base", "small"]
+SAMPLE_RATE = 16000
+
+# Harvard sentences (IEEE 1969): phonetically balanced, public domain
+CORPUS_SENTENCES = [
+    "The birch canoe slid on the smooth planks.",
+    "Glue the sheet to the dark blue background.",
+    "It's easy to tell the depth of a well.",
+    "These days a chicken leg is a rare dish.",
+    "Rice is often served in round bowls.",
+    "The juice of lemons makes fine punch.",
+    "The box was thrown beside the parked truck.",
+    "The hogs were fed chopped corn and garbage.",
+    "Four hours of steady work faced us.",
+    "A large size in stockings is hard to sell.",
+    "The boy was there when the sun rose. A rod is used to catch pink salmon. "
+    "The source of the huge river is the clear spring.",
+    "Kick the ball straight and follow through. Help the woman get back to her feet. "
+    "A pot of tea helps to pass the evening.",
+]
+
+_PUNCTUATION = re.compile(r"[^\w\s']")
+
+
+# ---- scoring ---------------------------------------------------------------
+
+def normalize_text(text: str) -> List[str]:
+    """Lowercased words with punctuation removed (apostrophes kept)."""
+    return _PUNCTUATION.sub(" ", text.lower()).split()
+
+
+def word_errors(reference: str, hypothesis: str) -> int:
+    """Word-level edit distance (substitutions + deletions + insertions)."""
+    ref, hyp = normalize_text(reference), normalize_text(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1]
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """WER of hypothesis against reference (0.0 is perfect; can exceed 1.0)."""
+    words = len(normalize_text(reference))
+    if not words:
+        return 0.0 if not normalize_text(hypothesis) else 1.0
+    return word_errors(reference, hypothesis) / words
+
+
+# ---- corpus ----------------------------------------------------------------
+
+def load_corpus(corpus_dir: Path) -> List[dict]:
+    """Corpus entries ({"name", "path", "text", "duration"}) for every WAV with a .txt reference."""
+    entries = []
+    for wav_path in sorted(Path(corpus_dir).glob("*.wav")):
+        txt_path = wav_path.with_suffix(".txt")
+        if not txt_path.exists():
+            continue
+        with wave.open(str(wav_path), "rb") as wav:
+            duration = wav.getnframes() / wav.getframerate()
+        entries.append({"name": wav_path.stem, "path": str(wav_path),
+                        "text": txt_path.read_text(encoding="utf-8").strip(),
+                        "duration": round(duration, 3)})
+    return entries
+
+
+def _piper_binary() -> str:
+    piper_bin = Path.home() / ".local" / "bin" / "piper"
+    return str(piper_bin) if piper_bin.exists() else "piper"
+
+
+def synthesize_corpus(corpus_dir: Path, voice: str = "en_US-amy-medium",
+                      ffmpeg_path: str = "ffmpeg") -> List[dict]:
+    """Speak CORPUS_SENTENCES with Piper into 16 kHz mono WAVs with reference .txt files."""
+    from relay.audio_extract import decode_pcm
+
+    model_path = RELAY_DIR / ".piper-voices" / f"{voice}.onnx"
+    if not model_path.exists():
+        raise FileNotFoundError(f"Piper voice not found: {model_path}")
+    corpus_dir = Path(corpus_dir)
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+
+    for i, sentence in enumerate(CORPUS_SENTENCES):
+        wav_path = corpus_dir / f"{i:02d}.wav"
+        raw_path = corpus_dir / f"{i:02d}.piper.wav"
+        result = subprocess.run([_piper_binary(), "--model", str(model_path), "--output_file", str(raw_path)],
+                                input=sentence, capture_output=True, text=True, timeout=60)
+        if result.returncode != 0:
+            raise RuntimeError(f"Piper failed: {result.stderr[:200]}")
+        # Piper speaks at the voice's native rate (22.05 kHz); Whisper wants 16 kHz
+        pcm = decode_pcm(str(raw_path), ffmpeg_path)
+        raw_path.unlink()
+        with wave.open(str(wav_path), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(SAMPLE_RATE)
+            wav.writeframes(pcm)
+        wav_path.with_suffix(".txt").write_text(sentence + "\n", encoding="utf-8")
+        print(f"  synthesized {wav_path.name}", file=sys.stderr)
+    return load_corpus(corpus_dir)
+
+
+# ---- measurement -----------------------------------------------------------
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize_files(files: List[dict]) -> dict:
+    """Corpus-level RTF (total compute / total audio) and WER (total errors / total words)."""
+    audio = sum(f["duration"] for f in files)
+    compute = sum(f["seconds"] for f in files)
+    words = sum(f["words"] for f in files)
+    errors = sum(f["errors"] for f in files)
+    return {
+        "audio_seconds": round(audio, 3),
+        "transcribe_seconds": round(compute, 3),
+        "rtf": round(compute / audio, 4) if audio else None,
+        "wer": round(errors / words, 4) if words else None,
+    }
+
+
+def run_single(backend: str, model_name: str, corpus: List[dict], language: Optional[str] = "en",
+               threads: int = 0, warmup: int = 1, repeat: int = 1) -> dict:
+    """Load one model and transcribe the corpus with it, in this process."""
+    from relay.audio_extract import read_wav_pcm, pcm_to_float32
+    from relay.transcription import get_backend, default_device, default_compute_type
+
+    impl = get_backend(backend)
+    device = default_device()
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    loaded = impl.load(model_name, device, default_compute_type(device), threads)
+    load_seconds = time.perf_counter() - start
+
+    samples = {entry["name"]: pcm_to_float32(read_wav_pcm(entry["path"])) for entry in corpus}
+    for entry in corpus[:warmup]:
+        impl.transcribe(loaded, samples[entry["name"]], language)
+
+    files = []
+    for entry in corpus:
+        timings = []
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            result = impl.transcribe(loaded, samples[entry["name"]], language)
+            timings.append(time.perf_counter() - start)
+        seconds = min(timings)
+        files.append({
+            "name": entry["name"],
+            "duration": entry["duration"],
+            "seconds": round(seconds, 3),
+            "rtf": round(seconds / entry["duration"], 4) if entry["duration"] else None,
+            "words": len(normalize_text(entry["text"])),
+            "errors": word_errors(entry["text"], result["text"]),
+            "hypothesis": result["text"].strip(),
+        })
+
+    return {
+        "backend": backend,
+        "model": model_name,
+        "device": loaded.device,
+        "compute_type": loaded.compute_type,
+        "threads": threads or os.cpu_count(),
+        "load_seconds": round(load_seconds, 3),
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": peak_rss_mb(),
+        **summarize_files(files),
+        "files": files,
+    }
+
+
+def run_isolated(backend: str, model_name: str, corpus_dir: Path, args) -> dict:
+    """Run one (backend, model) benchmark in a fresh interpreter.
+
+    The child writes its result to a file rather than stdout, which backends
+    and model downloads are free to print banners and progress to.
+    """
+    fd, result_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    cmd = [sys.executable, __file__, "--corpus", str(corpus_dir), "--single", backend, model_name,
+           "--result-file", result_path, "--language", args.language or "", "--threads", str(args.threads),
+           "--warmup", str(args.warmup), "--repeat", str(args.repeat)]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(Path(__file__).parent))
+        if result.returncode != 0:
+            return {"backend": backend, "model": model_name,
+                    "error": (result.stderr.strip().splitlines() or ["failed"])[-1]}
+        try:
+            return json.loads(Path(result_path).read_text())
+        except ValueError as e:
+            return {"backend": backend, "model": model_name, "error": f"Unreadable result: {e}"}
+    finally:
+        Path(result_path).unlink(missing_ok=True)
+
+
+# ---- reporting -------------------------------------------------------------
+
+def git_commit() -> Optional[str]:
+    """Short hash of HEAD, or None outside a git checkout."""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=str(Path(__file__).parent), timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() or None
+
+
+def compare_runs(current: dict, previous: dict) -> List[dict]:
+    """Per (backend, model) change in RTF, WER, load time and peak RSS against an earlier report."""
+    before = {(r["backend"], r["model"]): r for r in previous.get("results", []) if "error" not in r}
+    rows = []
+    for run in current.get("results", []):
+        old = before.get((run["backend"], run["model"]))
+        if "error" in run or old is None:
+            continue
+        row = {"backend": run["backend"], "model": run["model"]}
+        for field in ("rtf", "wer", "load_seconds", "peak_rss_mb"):
+            if run.get(field) is not None and old.get(field) is not None:
+                row[field] = round(run[field] - old[field], 4)
+        rows.append(row)
+    return rows
+
+
+def print_table(report: dict) -> None:
+    print(f"\n{'backend':<16}{'model':<10}{'RTF':>8}{'WER':>8}{'load s':>9}{'peak MB':>10}", file=sys.stderr)
+    for run in report["results"]:
+        if "error" in run:
+            print(f"{run['backend']:<16}{run['model']:<10}  error: {run['error']}", file=sys.stderr)
+            continue
+        print(f"{run['backend']:<16}{run['model']:<10}{run['rtf']:>8.3f}{run['wer']:>8.3f}"
+              f"{run['load_seconds']:>9.2f}{run['peak_rss_mb']:>10.0f}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark transcription backends and model sizes (RTF, load time, peak RSS, WER)"
+    )
+    parser.add_argument(
+        "--corpus",
+        default=str(DEFAULT_CORPUS),
+        help="Directory of 16 kHz WAV files with matching .txt references"
+    )
+    parser.add_argument(
+        "--synthesize",
+        action="store_true",
+        help="(Re)build the corpus from the built-in sentences with Piper"
+    )
+    parser.add_argument(
+        "--voice",
+        default="en_US-amy-medium",
+        help="Piper voice for --synthesize (default: en_US-amy-medium)"
+    )
+    parser.add_argument(
+        "--backends",
+        help="Comma-separated backends (default: every installed one)"
+    )
+    parser.add_argument(
+        "--models",
+        default=",".join(DEFAULT_MODELS),
+        help=f"Comma-separated model sizes (default: {','.join(DEFAULT_MODELS)})"
+    )
+    parser.add_argument("--language", default="en", help="Language code, empty to auto-detect (default: en)")
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads per model (default: backend default)")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed warm-up files per model (default: 1)")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per file, best kept (default: 1)")
+    parser.add_argument(
+        "--output", "-o",
+        help="Report path (default: .cache/benchmarks/<time>_<commit>.json)"
+    )
+    parser.add_argument("--compare", help="Earlier report to print deltas against")
+    parser.add_argument("--single", nargs=2, metavar=("BACKEND", "MODEL"), help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    corpus_dir = Path(args.corpus)
+
+    if args.single:
+        result = run_single(args.single[0], args.single[1], load_corpus(corpus_dir),
+                            args.language or None, args.threads, args.warmup, args.repeat)
+        if args.result_file:
+            Path(args.result_file).write_text(json.dumps(result))
+        else:
+            print(json.dumps(result))
+        return 0
+
+    from relay.transcription import available_backends
+
+    if args.synthesize:
+        print(f"Synthesizing corpus in {corpus_dir}...", file=sys.stderr)
+        synthesize_corpus(corpus_dir, args.voice)
+    corpus = load_corpus(corpus_dir)
+    if not corpus:
+        print(f"Error: no corpus in {corpus_dir} (run with --synthesize)", file=sys.stderr)
+        return 1
+
+    backends = args.backends.split(",") if args.backends else available_backends()
+    if not backends:
+        print("Error: no transcription backend installed", file=sys.stderr)
+        return 1
+
+    results = []
+    for backend in backends:
+        for model_name in args.models.split(","):
+            print(f"Benchmarking {backend} / {model_name}...", file=sys.stderr)
+            results.append(run_isolated(backend, model_name, corpus_dir, args))
+
+    commit = git_commit()
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": commit,
+        "host": {"platform": platform.platform(), "machine": platform.machine(),
+                 "cpus": os.cpu_count(), "python": platform.python_version()},
+        "corpus": {"path": str(corpus_dir), "files": len(corpus),
+                   "audio_seconds": round(sum(e["duration"] for e in corpus), 3)},
+        "results": results,
+    }
+    if args.compare:
+        report["compared_to"] = args.compare
+        report["deltas"] = compare_runs(report, json.loads(Path(args.compare).read_text()))
+
+    output = Path(args.output) if args.output else \
+        DEFAULT_RESULTS / f"{time.strftime('%Y%m%d-%H%M%S')}_{commit or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    print_table(report)
+    for row in report.get("deltas", []):
+        print(f"  vs {args.compare}: {row}", file=sys.stderr)
+    print(f"\nReport written to {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 """
 Video Transcription Tool for Relay/Axion
-Extracts audio from video files and transcribes speech to text using Whisper.
+Extracts audio from video files and transcribes speech to text using Whisper
+(faster-whisper, WhisperX or openai-whisper, whichever is fastest and installed).
 
 Usage:
     python video_transcribe.py /path/to/video.mp4
     python video_transcribe.py /path/to/video.mp4 --model medium --output transcript.json
+    python video_transcribe.py /path/to/video.mp4 --backend whisper
 
 Outputs:
     - JSON file with timestamped transcript segments
@@ -16,54 +18,26 @@ Outputs:
 import argparse
 import json
 import os
-import subprocess
 import sys
 import tempfile
 from pathlib import Path
 from datetime import timedelta
 
-# Check for whisper availability
-try:
-    import whisper
-    WHISPER_AVAILABLE = True
-except ImportError:
-    WHISPER_AVAILABLE = False
-    print("Warning: openai-whisper not installed. Install with: pip install openai-whisper")
-
-
 def extract_audio(video_path: str, output_path: str = None) -> str:
-    """Extract audio from video using FFmpeg."""
+    """Extract 16 kHz mono WAV audio (cached per source file, shared with the relay server)."""
+    from relay.audio_extract import copy_wav
     if output_path is None:
         output_path = tempfile.mktemp(suffix=".wav")
-
-    cmd = [
-        "ffmpeg", "-y", "-i", video_path,
-        "-vn",                    # No video
-        "-acodec", "pcm_s16le",   # WAV format
-        "-ar", "16000",           # 16kHz sample rate (optimal for Whisper)
-        "-ac", "1",               # Mono
-        "-loglevel", "error",
-        output_path
-    ]
-
-    try:
-        subprocess.run(cmd, check=True, capture_output=True)
-        return output_path
-    except subprocess.CalledProcessError as e:
-        print(f"Error extracting audio: {e.stderr.decode()}")
-        raise
+    return copy_wav(video_path, output_path)
 
 
 def get_video_duration(video_path: str) -> float:
-    """Get video duration in seconds using FFprobe."""
-    cmd = [
-        "ffprobe", "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        video_path
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    return float(result.stdout.strip())
+    """Get video duration in seconds (ffprobe, cached and shared with the relay server)."""
+    from relay.media_probe import probe_duration
+    duration = probe_duration(video_path)
+    if duration is None:
+        raise RuntimeError(f"Could not determine duration of {video_path}")
+    return duration
 
 
 def format_timestamp(seconds: float) -> str:
@@ -76,26 +50,32 @@ def format_timestamp(seconds: float) -> str:
     return f"{minutes:02d}:{secs:02d}"
 
 
-def transcribe_audio(audio_path: str, model_name: str = "base") -> dict:
-    """Transcribe audio using Whisper."""
-    if not WHISPER_AVAILABLE:
-        raise RuntimeError("Whisper not available. Install with: pip install openai-whisper")
+def transcribe_audio(audio_path: str, model_name: str = "base", chunked: bool = False,
+                     workers: int = None, backend: str = "auto") -> dict:
+    """Transcribe audio with relay's transcription engine (optionally in parallel silence-aligned chunks)."""
+    from relay.transcription import resolve_backend, transcribe_file
+    from relay.transcript_cache import transcript_cache
+    from relay.chunked_transcribe import budget_workers
 
-    print(f"Loading Whisper model '{model_name}'...")
-    model = whisper.load_model(model_name)
+    impl = resolve_backend(backend)
+    if chunked:
+        workers = workers or budget_workers(impl.name, model_name)
+        print(f"Transcribing with {impl.name} in chunks across {workers} worker process(es)...")
+    else:
+        print(f"Transcribing with {impl.name}...")
 
-    print("Transcribing audio...")
-    result = model.transcribe(
-        audio_path,
-        verbose=False,
-        word_timestamps=True,
-        fp16=False  # Use FP32 for CPU compatibility
+    # Shared with the relay server: re-running on the same audio reuses the transcript
+    result = transcribe_file(
+        audio_path, model_name, impl.name, word_timestamps=True, chunked=chunked, workers=workers,
+        progress=lambda done, total: print(f"  Chunk {done}/{total} done")
     )
-
+    stats = transcript_cache().snapshot()
+    print(f"Transcript cache: {stats['hits']} hit(s), {stats['misses']} miss(es)")
     return result
 
 
-def process_video(video_path: str, model_name: str = "base", output_dir: str = None) -> dict:
+def process_video(video_path: str, model_name: str = "base", output_dir: str = None,
+                  chunked: bool = False, workers: int = None, backend: str = "auto") -> dict:
     """
     Main processing function - extracts audio and transcribes.
 
@@ -133,8 +113,8 @@ def process_video(video_path: str, model_name: str = "base", output_dir: str = N
     print(f"Audio saved to: {audio_path}")
 
     # Transcribe
-    print(f"\nTranscribing with Whisper ({model_name} model)...")
-    result = transcribe_audio(audio_path, model_name)
+    print(f"\nTranscribing ({model_name} model)...")
+    result = transcribe_audio(audio_path, model_name, chunked, workers, backend)
 
     # Process segments
     segments = []
@@ -156,7 +136,8 @@ def process_video(video_path: str, model_name: str = "base", output_dir: str = N
         "transcript": result.get("text", "").strip(),
         "segments": segments,
         "segment_count": len(segments),
-        "model_used": model_name
+        "model_used": model_name,
+        "transcription_engine": result.get("backend")
     }
 
     # Save JSON output
@@ -235,6 +216,22 @@ def main():
         "--output", "-o",
         help="Output directory for transcript files (default: same as video)"
     )
+    parser.add_argument(
+        "--backend", "-b",
+        default="auto",
+        choices=["auto", "faster-whisper", "whisperx", "whisper"],
+        help="Transcription backend (default: auto, the fastest one installed)"
+    )
+    parser.add_argument(
+        "--chunked",
+        action="store_true",
+        help="Split long audio at silences and transcribe chunks in parallel processes"
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        help="Worker processes for --chunked (default: one per CPU core)"
+    )
     parser.add_argument(
         "--claude-format", "-c",
         action="store_true",
@@ -244,7 +241,8 @@ def main():
     args = parser.parse_args()
 
     try:
-        result = process_video(args.video_path, args.model, args.output)
+        result = process_video(args.video_path, args.model, args.output, args.chunked, args.workers,
+                               args.backend)
 
         if args.claude_format:
             print("\n" + "="*60)
@@ -8,18 +8,20 @@ Video Transcription Tool using faster-whisper
 Usage:
     source .venv/bin/activate
     python video_transcribe_fast.py /path/to/video.mp4 --model base
+
+    # Batch: directories and globs, model loaded once, resumable (see relay/batch_transcribe.py)
+    python video_transcribe_fast.py recordings/ "talks/*.mp4" --output transcripts/
 """
 
 import argparse
 import json
-import subprocess
 import sys
 import tempfile
 from pathlib import Path
 from datetime import timedelta
 
 try:
-    from faster_whisper import WhisperModel
+    import faster_whisper  # noqa: F401
     FASTER_WHISPER_AVAILABLE = True
 except ImportError:
     print("Error: faster-whisper not installed.")
@@ -27,36 +29,12 @@ except ImportError:
     sys.exit(1)
 
 
-def get_device():
-    """Determine best device."""
-    try:
-        import torch
-        if torch.cuda.is_available():
-            return "cuda"
-    except ImportError:
-        pass
-    return "cpu"
-
-
-def get_compute_type(device):
-    """Get compute type for device."""
-    return "float16" if device == "cuda" else "int8"
-
-
 def extract_audio(video_path: str, output_path: str = None) -> str:
-    """Extract audio from video using FFmpeg."""
+    """Extract 16 kHz mono WAV audio (cached per source file, shared with the relay server)."""
+    from relay.audio_extract import copy_wav
     if output_path is None:
         output_path = tempfile.mktemp(suffix=".wav")
-
-    cmd = [
-        "ffmpeg", "-y", "-i", video_path,
-        "-vn", "-acodec", "pcm_s16le",
-        "-ar", "16000", "-ac", "1",
-        "-loglevel", "error",
-        output_path
-    ]
-    subprocess.run(cmd, check=True, capture_output=True)
-    return output_path
+    return copy_wav(video_path, output_path)
 
 
 def format_timestamp(seconds: float) -> str:
@@ -72,7 +50,10 @@ def format_timestamp(seconds: float) -> str:
 def transcribe_video(
     video_path: str,
     model_name: str = "base",
-    output_dir: str = None
+    output_dir: str = None,
+    chunked: bool = False,
+    workers: int = None,
+    word_timestamps: bool = False
 ) -> dict:
     """Transcribe video using faster-whisper."""
 
@@ -87,8 +68,9 @@ def transcribe_video(
         output_dir.mkdir(parents=True, exist_ok=True)
 
     base_name = video_path.stem
-    device = get_device()
-    compute_type = get_compute_type(device)
+    from relay.transcription import default_device, default_compute_type, transcribe_file
+    device = default_device()
+    compute_type = default_compute_type(device)
 
     print(f"\n{'='*60}")
     print(f"faster-whisper Video Transcription")
@@ -98,70 +80,78 @@ def transcribe_video(
     print(f"Device: {device} ({compute_type})")
     print(f"{'='*60}\n")
 
+    # Cached probe (shared with the relay server): fail fast on silent videos
+    from relay.media_probe import probe
+    info = probe(str(video_path))
+    if info and not info["has_audio"]:
+        raise ValueError(f"Video has no audio track: {video_path}")
+
     # Extract audio
     print("Extracting audio...")
     audio_path = str(output_dir / f"{base_name}_audio.wav")
     extract_audio(str(video_path), audio_path)
     print(f"Audio saved: {audio_path}")
 
-    # Load model
-    print(f"\nLoading faster-whisper model '{model_name}'...")
-    model = WhisperModel(
-        model_name,
-        device=device,
-        compute_type=compute_type
-    )
-
-    # Transcribe
-    print("Transcribing (4x faster than standard Whisper)...")
-    segments_generator, info = model.transcribe(
-        audio_path,
-        beam_size=5,
-        vad_filter=True,  # Uses Silero VAD - no compatibility issues
-        vad_parameters=dict(
-            min_silence_duration_ms=500,
-            speech_pad_ms=200
-        )
+    # Shared with the relay server: re-running on the same audio reuses the transcript
+    from relay.transcript_cache import transcript_cache
+    if chunked:
+        # Long audio: silence-aligned chunks transcribed in parallel worker processes
+        from relay.chunked_transcribe import budget_workers
+        workers = workers or budget_workers("faster-whisper", model_name)
+        print(f"\nTranscribing in chunks across {workers} worker process(es)...")
+    else:
+        print(f"\nTranscribing with faster-whisper '{model_name}' (4x faster than standard Whisper)...")
+    result = transcribe_file(
+        audio_path, model_name, "faster-whisper", word_timestamps=word_timestamps,
+        chunked=chunked, workers=workers,
+        progress=lambda done, total: print(f"  Chunk {done}/{total} done")
     )
-
-    print(f"Detected language: {info.language} (confidence: {info.language_probability:.2f})")
+    raw_segments = result["segments"]
+    language = result["language"]
+    language_probability = result.get("language_probability")
+    duration = result["duration"]
+    if language_probability is not None:
+        print(f"Detected language: {language} (confidence: {language_probability:.2f})")
 
     # Process segments
     segments = []
     full_text_parts = []
 
-    for seg in segments_generator:
+    for seg in raw_segments:
         segment_data = {
-            "start": round(seg.start, 3),
-            "end": round(seg.end, 3),
-            "start_formatted": format_timestamp(seg.start),
-            "end_formatted": format_timestamp(seg.end),
-            "text": seg.text.strip(),
+            "start": round(seg["start"], 3),
+            "end": round(seg["end"], 3),
+            "start_formatted": format_timestamp(seg["start"]),
+            "end_formatted": format_timestamp(seg["end"]),
+            "text": seg["text"].strip(),
         }
 
         # Include word-level timestamps if available
-        if seg.words:
+        if seg.get("words"):
             segment_data["words"] = [
                 {
-                    "word": w.word,
-                    "start": round(w.start, 3),
-                    "end": round(w.end, 3),
-                    "probability": round(w.probability, 3)
+                    "word": w["word"],
+                    "start": round(w["start"], 3),
+                    "end": round(w["end"], 3),
+                    "probability": round(w["probability"] or 0, 3)
                 }
-                for w in seg.words
+                for w in seg["words"]
             ]
 
         segments.append(segment_data)
-        full_text_parts.append(seg.text.strip())
-        print(f"  [{segment_data['start_formatted']}] {seg.text.strip()[:50]}...")
+        full_text_parts.append(seg["text"].strip())
+        print(f"  [{segment_data['start_formatted']}] {seg['text'].strip()[:50]}...")
+
+    stats = transcript_cache().snapshot()
+    print(f"Transcript cache: {stats['hits']} hit(s), {stats['misses']} miss(es)")
 
     # Build output
     full_transcript = " ".join(full_text_parts)
     output = {
         "video_file": str(video_path),
-        "language": info.language,
-        "language_confidence": round(info.language_probability, 3),
-        "duration": round(info.duration, 2),
+        "language": language,
+        "language_confidence": round(language_probability, 3) if language_probability is not None else None,
+        "duration": round(duration, 2),
         "model_used": model_name,
         "transcription_engine": "faster-whisper",
         "transcript": full_transcript,
@@ -179,9 +169,9 @@ def transcribe_video(
     txt_path = output_dir / f"{base_name}_transcript.txt"
     with open(txt_path, "w") as f:
         f.write(f"Video: {video_path.name}\n")
-        f.write(f"Language: {info.language}\n")
+        f.write(f"Language: {language}\n")
         f.write(f"Model: {model_name} (faster-whisper)\n")
-        f.write(f"Duration: {format_timestamp(info.duration)}\n")
+        f.write(f"Duration: {format_timestamp(duration)}\n")
         f.write("="*60 + "\n\n")
 
         for seg in segments:
@@ -193,8 +183,8 @@ def transcribe_video(
     print(f"\n{'='*60}")
     print("TRANSCRIPTION COMPLETE")
     print(f"{'='*60}")
-    print(f"Language: {info.language}")
-    print(f"Duration: {format_timestamp(info.duration)}")
+    print(f"Language: {language}")
+    print(f"Duration: {format_timestamp(duration)}")
     print(f"Segments: {len(segments)}")
     print(f"\nTranscript:\n")
     print(full_transcript[:1500] + ("..." if len(full_transcript) > 1500 else ""))
@@ -203,11 +193,18 @@ def transcribe_video(
     return output
 
 
+def transcript_outputs(video_path: Path, output_dir: str = None) -> list:
+    """JSON and text transcript paths transcribe_video() writes for a video."""
+    directory = Path(output_dir) if output_dir else video_path.parent
+    return [directory / f"{video_path.stem}_transcript.json", directory / f"{video_path.stem}_transcript.txt"]
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Transcribe video with faster-whisper (4x faster than standard Whisper)"
     )
-    parser.add_argument("video_path", help="Path to video file")
+    parser.add_argument("inputs", nargs="+", metavar="video_path",
+                        help="Video file(s), directories or glob patterns")
     parser.add_argument(
         "--model", "-m",
         default="base",
@@ -216,14 +213,43 @@ def main():
         help="Model size (default: base)"
     )
     parser.add_argument("--output", "-o", help="Output directory")
+    parser.add_argument("--chunked", action="store_true",
+                        help="Split long audio at silences and transcribe chunks in parallel processes")
+    parser.add_argument("--workers", "-w", type=int,
+                        help="Worker processes for --chunked (default: one per CPU core)")
+    parser.add_argument("--word-timestamps", action="store_true",
+                        help="Include word-level timestamps in the JSON output")
+    parser.add_argument("--recursive", "-r", action="store_true",
+                        help="Batch: also look in subdirectories")
+    parser.add_argument("--manifest",
+                        help="Batch: manifest path (default: <output or .>/transcript_manifest.json)")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Batch: re-transcribe files whose outputs already exist")
 
     args = parser.parse_args()
 
+    from relay.batch_transcribe import is_batch, run_batch
+    if is_batch(args.inputs):
+        manifest = run_batch(
+            args.inputs,
+            lambda path: transcribe_video(str(path), model_name=args.model, output_dir=args.output,
+                                          chunked=args.chunked, workers=args.workers,
+                                          word_timestamps=args.word_timestamps),
+            lambda path: transcript_outputs(path, args.output),
+            Path(args.manifest or Path(args.output or ".") / "transcript_manifest.json"),
+            settings={"engine": "faster-whisper", "model": args.model, "word_timestamps": args.word_timestamps},
+            resume=not args.no_resume, recursive=args.recursive
+        )
+        return 1 if manifest["totals"]["failed"] else 0
+
     try:
         result = transcribe_video(
-            args.video_path,
+            args.inputs[0],
             model_name=args.model,
-            output_dir=args.output
+            output_dir=args.output,
+            chunked=args.chunked,
+            workers=args.workers,
+            word_timestamps=args.word_timestamps
         )
         return 0
     except Exception as e:
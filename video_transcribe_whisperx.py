@@ -19,12 +19,14 @@ Usage:
 
     # Specify model size
     python video_transcribe_whisperx.py /path/to/video.mp4 --model large-v3
+
+    # Batch: directories and globs, models loaded once, resumable (see relay/batch_transcribe.py)
+    python video_transcribe_whisperx.py recordings/ "talks/*.mp4" --diarize --output transcripts/
 """
 
 import argparse
 import json
 import os
-import subprocess
 import sys
 import tempfile
 from pathlib import Path
@@ -56,37 +58,12 @@ def _patched_torch_load(*args, **kwargs):
 torch.load = _patched_torch_load
 
 
-def get_device():
-    """Determine best device for processing."""
-    if torch.cuda.is_available():
-        return "cuda"
-    return "cpu"
-
-
-def get_compute_type(device):
-    """Get appropriate compute type for device."""
-    if device == "cuda":
-        return "float16"
-    return "int8"  # Faster on CPU
-
-
 def extract_audio(video_path: str, output_path: str = None) -> str:
-    """Extract audio from video using FFmpeg."""
+    """Extract 16 kHz mono WAV audio (cached per source file, shared with the relay server)."""
+    from relay.audio_extract import copy_wav
     if output_path is None:
         output_path = tempfile.mktemp(suffix=".wav")
-
-    cmd = [
-        "ffmpeg", "-y", "-i", video_path,
-        "-vn",                    # No video
-        "-acodec", "pcm_s16le",   # WAV format
-        "-ar", "16000",           # 16kHz sample rate
-        "-ac", "1",               # Mono
-        "-loglevel", "error",
-        output_path
-    ]
-
-    subprocess.run(cmd, check=True, capture_output=True)
-    return output_path
+    return copy_wav(video_path, output_path)
 
 
 def format_timestamp(seconds: float) -> str:
@@ -103,8 +80,6 @@ def format_timestamp(seconds: float) -> str:
 def transcribe_with_whisperx(
     audio_path: str,
     model_name: str = "base",
-    device: str = None,
-    compute_type: str = None,
     enable_diarization: bool = False,
     hf_token: str = None,
     min_speakers: int = None,
@@ -113,11 +88,13 @@ def transcribe_with_whisperx(
     """
     Transcribe audio using WhisperX with optional speaker diarization.
 
+    Runs through relay's transcription engine, so the WhisperX, alignment and
+    diarization models stay loaded for later calls in the same process and the
+    result is cached by audio content (shared with the relay server).
+
     Args:
-        audio_path: Path to audio file
+        audio_path: Path to 16 kHz mono WAV file
         model_name: Whisper model (tiny, base, small, medium, large-v2, large-v3)
-        device: cuda or cpu (auto-detected if None)
-        compute_type: float16, int8, etc. (auto-selected if None)
         enable_diarization: Whether to identify speakers
         hf_token: HuggingFace token (required for diarization)
         min_speakers: Minimum expected speakers
@@ -126,70 +103,26 @@ def transcribe_with_whisperx(
     Returns:
         dict with transcript, segments, and optional speaker info
     """
-    if device is None:
-        device = get_device()
-    if compute_type is None:
-        compute_type = get_compute_type(device)
-
-    print(f"Device: {device}, Compute type: {compute_type}")
-    print(f"Loading WhisperX model '{model_name}'...")
-
-    # Load model
-    model = whisperx.load_model(
-        model_name,
-        device=device,
-        compute_type=compute_type
+    from relay.transcription import default_device, default_compute_type, transcribe_file
+
+    device = default_device()
+    print(f"Device: {device}, Compute type: {default_compute_type(device)}")
+    if enable_diarization and not hf_token:
+        print("Warning: Speaker diarization requires HuggingFace token. Skipping.")
+        enable_diarization = False
+
+    print(f"Transcribing with WhisperX '{model_name}' (batched, with word alignment"
+          f"{' and speaker diarization' if enable_diarization else ''})...")
+    diarize_options = f"diarize:{min_speakers}-{max_speakers}" if enable_diarization else ""
+    result = transcribe_file(
+        audio_path, model_name, "whisperx", word_timestamps=True, chunked=False,
+        cache_options=diarize_options, diarize=enable_diarization, hf_token=hf_token,
+        min_speakers=min_speakers, max_speakers=max_speakers
     )
-
-    # Load audio
-    print("Loading audio...")
-    audio = whisperx.load_audio(audio_path)
-
-    # Transcribe
-    print("Transcribing (this is 4x faster than standard Whisper)...")
-    result = model.transcribe(audio, batch_size=16)
-
-    detected_language = result.get("language", "en")
-    print(f"Detected language: {detected_language}")
-
-    # Align whisper output for word-level timestamps
-    print("Aligning timestamps...")
-    model_a, metadata = whisperx.load_align_model(
-        language_code=detected_language,
-        device=device
-    )
-    result = whisperx.align(
-        result["segments"],
-        model_a,
-        metadata,
-        audio,
-        device,
-        return_char_alignments=False
-    )
-
-    # Speaker diarization (optional)
-    if enable_diarization:
-        if not hf_token:
-            print("Warning: Speaker diarization requires HuggingFace token. Skipping.")
-        else:
-            print("Running speaker diarization...")
-            try:
-                diarize_model = whisperx.DiarizationPipeline(
-                    use_auth_token=hf_token,
-                    device=device
-                )
-                diarize_segments = diarize_model(
-                    audio,
-                    min_speakers=min_speakers,
-                    max_speakers=max_speakers
-                )
-                result = whisperx.assign_word_speakers(diarize_segments, result)
-                print("Speaker diarization complete!")
-            except Exception as e:
-                print(f"Warning: Diarization failed: {e}")
-                print("Continuing without speaker identification...")
-
-    return result, detected_language
+    print(f"Detected language: {result['language']}")
+    if result.get("diarized") is False:
+        print("Warning: Speaker diarization failed; transcript has no speaker labels.")
+    return result
 
 
 def process_video(
@@ -225,14 +158,21 @@ def process_video(
     print(f"Diarization: {'Enabled' if enable_diarization else 'Disabled'}")
     print(f"{'='*60}\n")
 
+    # Cached probe (shared with the relay server): fail fast on silent videos
+    from relay.media_probe import probe
+    info = probe(str(video_path))
+    if info and not info["has_audio"]:
+        raise ValueError(f"Video has no audio track: {video_path}")
+
     # Extract audio
     print("Extracting audio from video...")
     audio_path = str(output_dir / f"{base_name}_audio.wav")
     extract_audio(str(video_path), audio_path)
     print(f"Audio saved: {audio_path}")
 
-    # Transcribe with WhisperX
-    result, language = transcribe_with_whisperx(
+    # Transcribe with WhisperX (cached by audio content, shared with the relay server)
+    from relay.transcript_cache import transcript_cache
+    result = transcribe_with_whisperx(
         audio_path,
         model_name=model_name,
         enable_diarization=enable_diarization,
@@ -240,6 +180,9 @@ def process_video(
         min_speakers=min_speakers,
         max_speakers=max_speakers
     )
+    language = result["language"]
+    stats = transcript_cache().snapshot()
+    print(f"Transcript cache: {stats['hits']} hit(s), {stats['misses']} miss(es)")
 
     # Process segments
     segments = []
@@ -264,9 +207,9 @@ def process_video(
             segment_data["words"] = [
                 {
                     "word": w.get("word", ""),
-                    "start": round(w.get("start", 0), 3),
-                    "end": round(w.get("end", 0), 3),
-                    "score": round(w.get("score", 0), 3)
+                    "start": round(w.get("start") or 0, 3),
+                    "end": round(w.get("end") or 0, 3),
+                    "score": round(w.get("probability", w.get("score")) or 0, 3)
                 }
                 for w in seg["words"]
             ]
@@ -334,13 +277,22 @@ def process_video(
     return output
 
 
+def transcript_outputs(video_path: Path, output_dir: str = None) -> list:
+    """JSON and text transcript paths process_video() writes for a video."""
+    directory = Path(output_dir) if output_dir else video_path.parent
+    return [directory / f"{video_path.stem}_whisperx_transcript.json",
+            directory / f"{video_path.stem}_whisperx_transcript.txt"]
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Transcribe video with WhisperX (4x faster + speaker diarization)"
     )
     parser.add_argument(
-        "video_path",
-        help="Path to video file (MP4, MPEG, MOV, etc.)"
+        "inputs",
+        nargs="+",
+        metavar="video_path",
+        help="Video file(s) (MP4, MPEG, MOV, etc.), directories or glob patterns"
     )
     parser.add_argument(
         "--model", "-m",
@@ -371,6 +323,20 @@ def main():
         type=int,
         help="Maximum number of speakers expected"
     )
+    parser.add_argument(
+        "--recursive", "-r",
+        action="store_true",
+        help="Batch: also look in subdirectories"
+    )
+    parser.add_argument(
+        "--manifest",
+        help="Batch: manifest path (default: <output or .>/whisperx_transcript_manifest.json)"
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Batch: re-transcribe files whose outputs already exist"
+    )
 
     args = parser.parse_args()
 
@@ -385,9 +351,23 @@ def main():
         print("\nContinuing without speaker diarization...\n")
         args.diarize = False
 
+    from relay.batch_transcribe import is_batch, run_batch
+    if is_batch(args.inputs):
+        manifest = run_batch(
+            args.inputs,
+            lambda path: process_video(str(path), model_name=args.model, output_dir=args.output,
+                                       enable_diarization=args.diarize, hf_token=hf_token,
+                                       min_speakers=args.min_speakers, max_speakers=args.max_speakers),
+            lambda path: transcript_outputs(path, args.output),
+            Path(args.manifest or Path(args.output or ".") / "whisperx_transcript_manifest.json"),
+            settings={"engine": "whisperx", "model": args.model, "diarize": args.diarize},
+            resume=not args.no_resume, recursive=args.recursive
+        )
+        return 1 if manifest["totals"]["failed"] else 0
+
     try:
         result = process_video(
-            args.video_path,
+            args.inputs[0],
             model_name=args.model,
             output_dir=args.output,
             enable_diarization=args.diarize,
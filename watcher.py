@@ -62,6 +62,9 @@ _active_projects: Set[str] = set()
 _active_projects_lock = threading.Lock()
 _jobs_lock = threading.Lock()
 
+# External API jobs run on an asyncio runner (see watch()) with their own limit
+_external_runner = None
+
 # Job timeout settings
 MAX_JOB_RUNTIME_SECONDS = 30 * 60  # 30 minutes max per job
 PROCESS_CHECK_INTERVAL = 0.5  # seconds
@@ -252,6 +255,40 @@ def unlock_file(lock_handle):
             logger.warning(f"unlock_file error: {e}")
 
 
+def _provider_pool_snapshot() -> dict:
+    """Get connect/TTFB metrics for external provider pools used by this watcher."""
+    try:
+        from relay.providers import provider_snapshot
+    except ImportError:
+        return {}
+    return provider_snapshot()
+
+
+def _hedge_snapshot() -> dict:
+    """Get hedged-request counters for external models called by this watcher."""
+    try:
+        from relay.hedge import hedge_snapshot
+    except ImportError:
+        return {}
+    return hedge_snapshot()
+
+
+def _breaker_snapshot() -> dict:
+    """Get circuit breaker state for external providers called by this watcher."""
+    try:
+        from relay.circuit_breaker import breaker_snapshot
+    except ImportError:
+        return {}
+    return breaker_snapshot()
+
+
+def _external_runner_snapshot() -> Optional[dict]:
+    """Get async external job runner counters, or None when jobs use worker threads."""
+    if _external_runner is None:
+        return None
+    return _external_runner.snapshot()
+
+
 def write_heartbeat(current_job=None, activity=None):
     """Write heartbeat file so health monitor knows we're alive."""
     global CURRENT_JOB
@@ -262,7 +299,11 @@ def write_heartbeat(current_job=None, activity=None):
             "pid": os.getpid(),
             "jobs_processed": JOBS_PROCESSED,
             "current_job": current_job,
-            "activity": activity
+            "activity": activity,
+            "provider_pools": _provider_pool_snapshot(),
+            "hedging": _hedge_snapshot(),
+            "circuit_breakers": _breaker_snapshot(),
+            "external_runner": _external_runner_snapshot()
         }
         atomic_write_json(HEARTBEAT_FILE, data)
     except Exception as e:
@@ -775,11 +816,121 @@ def kill_process_tree(pid):
         logger.warning(f"Error killing process {pid}: {e}")
 
 
+def resolve_external_api(model: str) -> Tuple[str, str, str, str]:
+    """Map a relay model name to (provider, api_key, base_url, model_id)."""
+    if model.startswith("openai/"):
+        # Map openai/gpt-4o to gpt-4o
+        return ("OpenAI", os.environ.get("OPENAI_API_KEY", ""), "https://api.openai.com/v1",
+                model.replace("openai/", ""))
+    # NVIDIA NIM
+    return ("NVIDIA", os.environ.get("NVIDIA_API_KEY", ""),
+            os.environ.get("NVIDIA_BASE_URL", "https://integrate.api.nvidia.com/v1"), model)
+
+
+def parse_sse_content(line: bytes):
+    """Extract the delta text from one OpenAI-style SSE line.
+
+    Returns the text (possibly ""), or None once the [DONE] marker is seen.
+    """
+    line_text = line.decode("utf-8")
+    if not line_text.startswith("data: "):
+        return ""
+    data_str = line_text[6:]
+    if data_str == "[DONE]":
+        return None
+    try:
+        data = json.loads(data_str)
+    except json.JSONDecodeError:
+        return ""
+    if "choices" in data and len(data["choices"]) > 0:
+        delta = data["choices"][0].get("delta", {})
+        return delta.get("content", "") or ""
+    return ""
+
+
+EXTERNAL_MODEL_PREFIXES = ("nvidia/", "meta/", "deepseek-ai/", "qwen/", "mistralai/",
+                           "microsoft/", "google/", "moonshotai/", "openai/")
+
+
+def is_external_model(model: str) -> bool:
+    """True for models served by an external API (NVIDIA NIM, OpenAI) rather than Claude CLI."""
+    return model.startswith(EXTERNAL_MODEL_PREFIXES)
+
+
+def build_chat_request(model: str, messages: list) -> Tuple[str, str, dict, dict]:
+    """Build (provider, url, headers, payload) for a streaming chat completion."""
+    provider, api_key, base_url, model_id = resolve_external_api(model)
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    payload = {
+        "model": model_id,
+        "messages": messages,
+        "stream": True,
+        "max_tokens": 8192
+    }
+    return provider, f"{base_url}/chat/completions", headers, payload
+
+
+def stream_entry(text: str) -> str:
+    """Format one chunk of external API output as a stream-json line."""
+    return json.dumps({"type": "assistant", "message": {"content": [{"type": "text", "text": text}]}})
+
+
+def write_stream_file(stream_file: Path, stream_data: list):
+    """Write the stream-json lines received so far (atomic rename)."""
+    try:
+        temp_stream = stream_file.with_suffix('.tmp')
+        with open(temp_stream, "w") as f:
+            f.write('\n'.join(stream_data))
+        os.rename(temp_stream, stream_file)
+    except Exception:
+        pass
+
+
+def complete_external_job(job: dict, job_file: Path, project: str, message: str,
+                          result: str, start_time: float, tokens) -> None:
+    """Record a finished external API job: job file, result file and history."""
+    elapsed = time.time() - start_time
+
+    job["status"] = "complete"
+    job["result"] = result
+    job["completed_at"] = time.time()
+    job["elapsed"] = elapsed
+    job["activity"] = "Complete"
+    if tokens.hedge_fired:
+        job["hedge"] = {"fired": True, "winner": tokens.winner}
+    atomic_write_json(job_file, job)
+
+    # Write result file
+    result_file = job_file.with_suffix('.result')
+    result_file.write_text(result)
+
+    logger.info(f"Job {job['id']} completed via {tokens.winner or tokens.model} in {elapsed:.1f}s")
+    write_heartbeat(job["id"], "Complete")
+
+    # Save to history (server-side, browser-independent)
+    job_type = job.get("job_type", "chat")
+    if job_type not in ("format",):
+        save_to_history(project, message, result)
+
+
+def fail_external_job(job: dict, job_file: Path, error_msg: str) -> None:
+    """Mark an external API job as failed."""
+    job["status"] = "error"
+    job["error"] = error_msg
+    atomic_write_json(job_file, job)
+
+
 def process_external_api_job(job_id: str, model: str, message: str, project: str,
                               images: list, stream_file: Path, job_file: Path, job: dict) -> bool:
     """Process a job using external API (NVIDIA NIM or OpenAI) instead of Claude CLI."""
     import requests
     from dotenv import load_dotenv
+    from relay.providers import get_session, request_timeout, abortable_requests
+    from relay.hedge import HedgedStream, resolve_hedge_model
+    from relay.circuit_breaker import get_breaker, CircuitOpenError, ProviderHTTPError
 
     # Load environment variables
     env_path = Path(__file__).parent / ".env"
@@ -789,24 +940,11 @@ def process_external_api_job(job_id: str, model: str, message: str, project: str
     logger.info(f"Processing job {job_id} with external API: {model}")
 
     # Determine API configuration
-    is_openai = model.startswith("openai/")
-
-    if is_openai:
-        api_key = os.environ.get("OPENAI_API_KEY", "")
-        base_url = "https://api.openai.com/v1"
-        # Map openai/gpt-4o to gpt-4o
-        model_id = model.replace("openai/", "")
-    else:
-        # NVIDIA NIM
-        api_key = os.environ.get("NVIDIA_API_KEY", "")
-        base_url = os.environ.get("NVIDIA_BASE_URL", "https://integrate.api.nvidia.com/v1")
-        model_id = model
+    provider, api_key, base_url, model_id = resolve_external_api(model)
 
     if not api_key:
-        error_msg = "API key not configured for " + ("OpenAI" if is_openai else "NVIDIA")
-        job["status"] = "error"
-        job["error"] = error_msg
-        atomic_write_json(job_file, job)
+        error_msg = f"API key not configured for {provider}"
+        fail_external_job(job, job_file, error_msg)
         logger.error(error_msg)
         return True
 
@@ -816,6 +954,41 @@ def process_external_api_job(job_id: str, model: str, message: str, project: str
     # Add image support for vision models (if applicable)
     # Note: Not all NVIDIA models support images
 
+    def stream_tokens(attempt):
+        """Stream delta text for one (possibly hedged) attempt at the call."""
+        attempt_provider, url, headers, payload = build_chat_request(attempt.model, messages)
+
+        # Raises CircuitOpenError straight away while the provider is known to be down,
+        # so the job fails fast instead of waiting out the read timeout
+        with get_breaker(attempt_provider).guard(attempt.cancelled):
+            # Pooled keep-alive session: repeat jobs to the same provider skip TCP/TLS setup.
+            # A losing attempt still waiting for headers is aborted by closing its socket
+            with abortable_requests(attempt.on_cancel):
+                response = get_session(url).post(
+                    url,
+                    headers=headers,
+                    json=payload,
+                    stream=True,
+                    timeout=request_timeout(300)  # 5 minute read timeout
+                )
+            attempt.on_cancel(response.close)
+
+            if response.status_code != 200:
+                raise ProviderHTTPError(attempt_provider, response.status_code, response.text)
+
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                content = parse_sse_content(line)
+                if content is None:
+                    break
+                if content:
+                    yield content
+
+            # Drain anything after [DONE] so the keep-alive connection returns to the pool
+            response.raw.drain_conn()
+            response.close()
+
     try:
         # Update job status
         job["status"] = "processing"
@@ -823,125 +996,172 @@ def process_external_api_job(job_id: str, model: str, message: str, project: str
         atomic_write_json(job_file, job)
         write_heartbeat(job_id, f"Calling {model_id}...")
 
-        # Make streaming API call
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-
-        payload = {
-            "model": model_id,
-            "messages": messages,
-            "stream": True,
-            "max_tokens": 8192
-        }
-
-        response = requests.post(
-            f"{base_url}/chat/completions",
-            headers=headers,
-            json=payload,
-            stream=True,
-            timeout=300  # 5 minute timeout
-        )
-
-        if response.status_code != 200:
-            error_msg = f"API error: {response.status_code} - {response.text[:200]}"
-            job["status"] = "error"
-            job["error"] = error_msg
-            atomic_write_json(job_file, job)
-            logger.error(error_msg)
-            return True
+        # Optionally race a duplicate call if the first token is slow to arrive
+        hedge_model = resolve_hedge_model(model, job.get("hedge"), job.get("hedge_model", ""))
+        tokens = HedgedStream(stream_tokens, model, hedge_model)
 
         # Process streaming response
         full_response = []
         stream_data = []
 
-        for line in response.iter_lines():
-            if not line:
-                continue
+        for content in tokens:
+            full_response.append(content)
 
-            line_text = line.decode("utf-8")
-            if line_text.startswith("data: "):
-                data_str = line_text[6:]
-                if data_str == "[DONE]":
-                    break
+            # Write stream file for live updates
+            # Format as stream-json compatible
+            stream_data.append(stream_entry(content))
+            write_stream_file(stream_file, stream_data)
 
-                try:
-                    data = json.loads(data_str)
-                    if "choices" in data and len(data["choices"]) > 0:
-                        delta = data["choices"][0].get("delta", {})
-                        content = delta.get("content", "")
-                        if content:
-                            full_response.append(content)
-
-                            # Write stream file for live updates
-                            # Format as stream-json compatible
-                            stream_entry = {
-                                "type": "assistant",
-                                "message": {
-                                    "content": [{"type": "text", "text": content}]
-                                }
-                            }
-                            stream_data.append(json.dumps(stream_entry))
-
-                            # Update stream file
-                            try:
-                                temp_stream = stream_file.with_suffix('.tmp')
-                                with open(temp_stream, "w") as f:
-                                    f.write('\n'.join(stream_data))
-                                os.rename(temp_stream, stream_file)
-                            except Exception as e:
-                                pass
-
-                            # Update activity
-                            elapsed = int(time.time() - start_time)
-                            preview = "".join(full_response)[-50:].replace('\n', ' ')
-                            job["activity"] = f"Generating... ({elapsed}s)"
-                            write_heartbeat(job_id, f"Generating: ...{preview}")
-
-                except json.JSONDecodeError:
-                    continue
+            # Update activity
+            elapsed = int(time.time() - start_time)
+            preview = "".join(full_response)[-50:].replace('\n', ' ')
+            job["activity"] = f"Generating... ({elapsed}s)"
+            write_heartbeat(job_id, f"Generating: ...{preview}")
 
         # Complete the job
-        result = "".join(full_response)
-        elapsed = time.time() - start_time
-
-        job["status"] = "complete"
-        job["result"] = result
-        job["completed_at"] = time.time()
-        job["elapsed"] = elapsed
-        job["activity"] = "Complete"
-        atomic_write_json(job_file, job)
-
-        # Write result file
-        result_file = job_file.with_suffix('.result')
-        result_file.write_text(result)
-
-        logger.info(f"Job {job_id} completed via {model} in {elapsed:.1f}s")
-        write_heartbeat(job_id, "Complete")
-
-        # Save to history (server-side, browser-independent)
-        job_type = job.get("job_type", "chat")
-        if job_type not in ("format",):
-            save_to_history(project, message, result)
+        complete_external_job(job, job_file, project, message, "".join(full_response), start_time, tokens)
+        return True
 
+    except (ProviderHTTPError, CircuitOpenError) as e:
+        fail_external_job(job, job_file, str(e))
+        logger.error(str(e))
         return True
 
     except requests.exceptions.Timeout:
-        job["status"] = "error"
-        job["error"] = "API request timed out"
-        atomic_write_json(job_file, job)
+        fail_external_job(job, job_file, "API request timed out")
         logger.error(f"Job {job_id} timed out")
         return True
 
     except Exception as e:
-        job["status"] = "error"
-        job["error"] = str(e)
-        atomic_write_json(job_file, job)
+        fail_external_job(job, job_file, str(e))
         logger.error(f"Job {job_id} failed: {e}")
         return True
 
 
+# Many async jobs share the event loop, so throttle their per-token file writes
+ASYNC_STREAM_FLUSH_INTERVAL = 0.25  # seconds
+
+
+async def process_external_api_job_async(session, job_file: Path) -> bool:
+    """Claim and process an external API job on the asyncio runner.
+
+    Counterpart of process_job + process_external_api_job for the event loop:
+    the completion streams over the runner's shared aiohttp session and the job
+    holds no project slot, so it never waits behind Claude CLI jobs.
+    Returns True if the job was processed, False if skipped.
+    """
+    import asyncio
+    from dotenv import load_dotenv
+    from relay.hedge import AsyncHedgedStream, resolve_hedge_model
+    from relay.circuit_breaker import get_breaker, CircuitOpenError, ProviderHTTPError
+
+    loop = asyncio.get_running_loop()
+    try:
+        # flock blocks, so take it off the event loop
+        lock_handle = await loop.run_in_executor(None, lock_file, job_file)
+    except Exception as e:
+        logger.warning(f"Could not lock {job_file}, skipping: {e}")
+        return False
+
+    try:
+        if not job_file.exists():
+            logger.info(f"Job file {job_file} no longer exists, skipping")
+            return False
+        try:
+            with open(job_file) as f:
+                job = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error(f"Failed to read job file {job_file}: {e}")
+            return False
+        if job.get("status") not in ("pending", "answers_provided"):
+            return False
+
+        load_dotenv(Path(__file__).parent / ".env")
+
+        job_id = job["id"]
+        message = job["message"]
+        model = job.get("model", "")
+        project = job.get("project", "") or "default"
+        stream_file = QUEUE_DIR / f"{job_id}.stream"
+        start_time = time.time()
+        job["started_at"] = start_time
+        logger.info(f"Processing job {job_id} (project={project}) with external API (async): {model}")
+
+        provider, api_key, base_url, model_id = resolve_external_api(model)
+        if not api_key:
+            error_msg = f"API key not configured for {provider}"
+            fail_external_job(job, job_file, error_msg)
+            logger.error(error_msg)
+            return True
+
+        messages = [{"role": "user", "content": message}]
+
+        async def stream_tokens(attempt):
+            """Stream delta text for one (possibly hedged) attempt at the call."""
+            attempt_provider, url, headers, payload = build_chat_request(attempt.model, messages)
+            # A hedge loser is cancelled as a task; CancelledError leaves the breaker unrecorded
+            with get_breaker(attempt_provider).guard(attempt.cancelled):
+                async with session.post(url, headers=headers, json=payload) as response:
+                    if response.status != 200:
+                        raise ProviderHTTPError(attempt_provider, response.status, await response.text())
+                    async for line in response.content:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        content = parse_sse_content(line)
+                        if content is None:
+                            break
+                        if content:
+                            yield content
+                    # Drain anything after [DONE] so the connection goes back to the pool
+                    await response.content.read()
+
+        try:
+            job["status"] = "processing"
+            job["activity"] = f"Calling {model_id}..."
+            atomic_write_json(job_file, job)
+            write_heartbeat(job_id, f"Calling {model_id}...")
+
+            hedge_model = resolve_hedge_model(model, job.get("hedge"), job.get("hedge_model", ""))
+            tokens = AsyncHedgedStream(stream_tokens, model, hedge_model)
+
+            full_response = []
+            stream_data = []
+            last_flush = 0.0
+            async for content in tokens:
+                full_response.append(content)
+                stream_data.append(stream_entry(content))
+                now = time.time()
+                if now - last_flush >= ASYNC_STREAM_FLUSH_INTERVAL:
+                    last_flush = now
+                    write_stream_file(stream_file, stream_data)
+                    preview = "".join(full_response)[-50:].replace('\n', ' ')
+                    job["activity"] = f"Generating... ({int(now - start_time)}s)"
+                    write_heartbeat(job_id, f"Generating: ...{preview}")
+            write_stream_file(stream_file, stream_data)
+
+            complete_external_job(job, job_file, project, message, "".join(full_response), start_time, tokens)
+            return True
+
+        except (ProviderHTTPError, CircuitOpenError) as e:
+            fail_external_job(job, job_file, str(e))
+            logger.error(str(e))
+            return True
+
+        except asyncio.TimeoutError:
+            fail_external_job(job, job_file, "API request timed out")
+            logger.error(f"Job {job_id} timed out")
+            return True
+
+        except Exception as e:
+            fail_external_job(job, job_file, str(e))
+            logger.error(f"Job {job_id} failed: {e}")
+            return True
+
+    finally:
+        unlock_file(lock_handle)
+
+
 def process_job(job_file: Path) -> bool:
     """Process a single job file with streaming output via PTY.
     Returns True if job was processed, False if skipped.
@@ -1024,13 +1244,7 @@ def process_job(job_file: Path) -> bool:
             logger.info(f"Attached {len(image_paths)} image(s)")
 
         # Check if this is an external API model (NVIDIA, OpenAI) or Claude CLI
-        is_nvidia_model = model.startswith("nvidia/") or model.startswith("meta/") or \
-                          model.startswith("deepseek-ai/") or model.startswith("qwen/") or \
-                          model.startswith("mistralai/") or model.startswith("microsoft/") or \
-                          model.startswith("google/") or model.startswith("moonshotai/")
-        is_openai_model = model.startswith("openai/")
-
-        if is_nvidia_model or is_openai_model:
+        if is_external_model(model):
             # Use external API instead of Claude CLI
             result = process_external_api_job(
                 job_id, model, message, project, images, stream_file, job_file, job
@@ -1836,9 +2050,22 @@ def watch():
     logger.info(f"Max job runtime: {MAX_JOB_RUNTIME_SECONDS // 60} minutes")
     logger.info(f"Max parallel projects: {MAX_PARALLEL_PROJECTS}")
 
-    global shutdown_event
+    global shutdown_event, _external_runner
     shutdown_event = threading.Event()
 
+    # External-model jobs only wait on the network: multiplex them on one event loop
+    # instead of giving each a worker thread and a project slot
+    try:
+        from relay.config import EXTERNAL_ASYNC_ENABLED
+        from relay.external_runner import AsyncJobRunner, aiohttp_available
+        if EXTERNAL_ASYNC_ENABLED:
+            if aiohttp_available():
+                _external_runner = AsyncJobRunner().start()
+            else:
+                logger.warning("aiohttp not installed, external API jobs will use worker threads")
+    except ImportError:
+        pass
+
     def signal_handler(sig, frame):
         logger.info("Received shutdown signal, shutting down...")
         shutdown_event.set()
@@ -1903,6 +2130,13 @@ def watch():
                             continue
                         project = job_data.get("project", "") or "default"
 
+                        if _external_runner and is_external_model(job_data.get("model", "")):
+                            # No project slot needed; the runner applies its own limit
+                            logger.info(f"Submitting job {job_file.stem} for project '{project}' to external runner")
+                            active_futures[str(job_file)] = _external_runner.submit(
+                                process_external_api_job_async, job_file)
+                            continue
+
                         # Skip if this project already has a job running
                         if is_project_busy(project):
                             continue
@@ -1934,6 +2168,8 @@ def watch():
                 future.result(timeout=10)
             except Exception:
                 pass
+        if _external_runner:
+            _external_runner.stop()
         logger.info("Shutdown complete")
 
 def _acquire_pid_lock():